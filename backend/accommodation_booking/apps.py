@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class AccommodationBookingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accommodation_booking'
+
+    def ready(self):
+        # Registers the tour package, availability index and search document signals and their outbox jobs.
+        import accommodation_booking.signals
+        # Registers the booking-created subscriber jobs (run by the outbox worker too).
+        import accommodation_booking.booking_events
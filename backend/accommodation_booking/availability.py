@@ -0,0 +1,298 @@
+"""
+Per-provider availability calendar index.
+
+Every guide/agency has at most one ``ProviderAvailabilityMonth`` row per month
+with two day bitmasks: ``confirmed_mask`` (days blocked by Confirmed bookings)
+and ``active_mask`` (days held by any booking that still occupies the
+provider). Booking saves and deletes rebuild only the months they touch, from
+one bounded query over that provider's bookings, so the answer is always
+derived from the bookings themselves rather than patched incrementally.
+A rebuild first locks the provider's user row: two bookings saved at once for
+the same provider are then rebuilt one after the other, the second reading
+the first's committed booking instead of overwriting its days.
+
+Calendar reads then cost one query over at most a handful of month rows,
+however long the provider's booking history is.
+"""
+import calendar
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, Max, Q
+
+from .models import Booking, ProviderAvailabilityMonth
+
+# Statuses that make a provider unavailable to other tourists.
+BLOCKING_STATUSES = ('Confirmed',)
+# Statuses under which a booking still occupies the provider (used by the agency manifest).
+ACTIVE_STATUSES = ('Accepted', 'Pending_Payment', 'Confirmed', 'Completed')
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def month_end(day):
+    return day.replace(day=calendar.monthrange(day.year, day.month)[1])
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def iter_months(start, end):
+    month = month_start(start)
+    while month <= end:
+        yield month
+        month = add_months(month, 1)
+
+
+def day_mask(start, end, month):
+    """Bits for the days of ``month`` that fall inside ``[start, end]``."""
+    first = max(start, month)
+    last = min(end, month_end(month))
+    if first > last:
+        return 0
+    return ((1 << (last.day - first.day + 1)) - 1) << (first.day - 1)
+
+
+def compute_month_masks(ranges, first_month, last_month):
+    """ORs ``(check_in, check_out)`` ranges into ``{month: mask}`` for the months in the window."""
+    masks = {}
+    window_end = month_end(last_month)
+    for check_in, check_out in ranges:
+        start = max(check_in, first_month)
+        end = min(check_out, window_end)
+        for month in iter_months(start, end):
+            masks[month] = masks.get(month, 0) | day_mask(start, end, month)
+    return masks
+
+
+def mask_days(month, mask):
+    days = []
+    day = 1
+    while mask:
+        if mask & 1:
+            days.append(month.replace(day=day))
+        mask >>= 1
+        day += 1
+    return days
+
+
+def _provider_bookings(provider_id):
+    return Booking.objects.filter(Q(guide_id=provider_id) | Q(agency_id=provider_id))
+
+
+def _lock_provider(provider_id):
+    # Held until the surrounding (booking save) transaction ends.
+    list(get_user_model().objects.select_for_update().filter(pk=provider_id).values_list('pk', flat=True))
+
+
+@transaction.atomic
+def rebuild_provider_months(provider_id, first_month, last_month):
+    """Recomputes the index rows of one provider for every month in the window."""
+    first_month = month_start(first_month)
+    last_month = month_start(last_month)
+    _lock_provider(provider_id)
+    rows = (
+        _provider_bookings(provider_id)
+        .filter(
+            status__in=ACTIVE_STATUSES,
+            check_in__lte=month_end(last_month),
+            check_out__gte=first_month,
+        )
+        .values_list('check_in', 'check_out', 'status')
+    )
+
+    confirmed_ranges = []
+    active_ranges = []
+    for check_in, check_out, status in rows:
+        active_ranges.append((check_in, check_out))
+        if status in BLOCKING_STATUSES:
+            confirmed_ranges.append((check_in, check_out))
+
+    confirmed = compute_month_masks(confirmed_ranges, first_month, last_month)
+    active = compute_month_masks(active_ranges, first_month, last_month)
+
+    ProviderAvailabilityMonth.objects.filter(
+        provider_id=provider_id,
+        month__gte=first_month,
+        month__lte=last_month,
+    ).exclude(month__in=list(active)).delete()
+
+    if active:
+        ProviderAvailabilityMonth.objects.bulk_create(
+            [
+                ProviderAvailabilityMonth(
+                    provider_id=provider_id,
+                    month=month,
+                    confirmed_mask=confirmed.get(month, 0),
+                    active_mask=mask,
+                )
+                for month, mask in active.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['provider', 'month'],
+            update_fields=['confirmed_mask', 'active_mask', 'updated_at'],
+        )
+
+
+def _spans_for_state(state):
+    guide_id, agency_id, check_in, check_out, status = state
+    provider_id = guide_id or agency_id
+    if not provider_id or not check_in or not check_out or status not in ACTIVE_STATUSES:
+        return []
+    return [(provider_id, check_in, check_out)]
+
+
+def sync_booking_availability(previous_state, current_state):
+    """
+    Rebuilds the months affected by a booking moving from ``previous_state`` to
+    ``current_state`` (``Booking.availability_state()`` tuples, ``None`` for a
+    created or deleted booking).
+    """
+    if previous_state == current_state:
+        return
+
+    windows = {}
+    for state in (previous_state, current_state):
+        if state is None:
+            continue
+        for provider_id, check_in, check_out in _spans_for_state(state):
+            first, last = windows.get(provider_id, (check_in, check_out))
+            windows[provider_id] = (min(first, check_in), max(last, check_out))
+
+    # Sorted, so concurrent multi-provider rebuilds take the locks in one order.
+    for provider_id, (first, last) in sorted(windows.items()):
+        rebuild_provider_months(provider_id, first, last)
+
+
+def refresh_bookings_availability(bookings):
+    """For bulk writes that skip signals: pass the affected bookings' ``(provider, check_in, check_out)``."""
+    windows = {}
+    for provider_id, check_in, check_out in bookings:
+        if not provider_id:
+            continue
+        first, last = windows.get(provider_id, (check_in, check_out))
+        windows[provider_id] = (min(first, check_in), max(last, check_out))
+
+    # Sorted, so concurrent multi-provider rebuilds take the locks in one order.
+    for provider_id, (first, last) in sorted(windows.items()):
+        rebuild_provider_months(provider_id, first, last)
+
+
+@transaction.atomic
+def rebuild_provider_index(provider_id):
+    """Full rebuild for one provider across the whole span of their bookings."""
+    _lock_provider(provider_id)
+    bounds = list(
+        _provider_bookings(provider_id)
+        .filter(status__in=ACTIVE_STATUSES)
+        .order_by()
+        .values_list('check_in', 'check_out')
+    )
+    ProviderAvailabilityMonth.objects.filter(provider_id=provider_id).delete()
+    if bounds:
+        rebuild_provider_months(
+            provider_id,
+            min(check_in for check_in, _ in bounds),
+            max(check_out for _, check_out in bounds),
+        )
+
+
+def _load_masks(provider_id, start=None, end=None):
+    rows = ProviderAvailabilityMonth.objects.filter(provider_id=provider_id)
+    if start is not None:
+        rows = rows.filter(month__gte=month_start(start))
+    if end is not None:
+        rows = rows.filter(month__lte=month_start(end))
+    return {
+        month: (confirmed_mask, active_mask)
+        for month, confirmed_mask, active_mask in rows.values_list('month', 'confirmed_mask', 'active_mask')
+    }
+
+
+def _window_mask(month, start, end):
+    if start is None and end is None:
+        return -1
+    return day_mask(start or month, end or month_end(month), month)
+
+
+def blocked_dates(provider_id, start=None, end=None, *, include_held=False):
+    """Sorted days in ``[start, end]`` (either bound optional) on which the provider is booked."""
+    days = []
+    for month, (confirmed_mask, active_mask) in sorted(_load_masks(provider_id, start, end).items()):
+        mask = (active_mask if include_held else confirmed_mask) & _window_mask(month, start, end)
+        days.extend(mask_days(month, mask))
+    return days
+
+
+def is_range_free(provider_id, start, end, *, include_held=False):
+    """True when no day in ``[start, end]`` is blocked (or held, with ``include_held``)."""
+    for month, (confirmed_mask, active_mask) in _load_masks(provider_id, start, end).items():
+        mask = active_mask if include_held else confirmed_mask
+        if mask & day_mask(start, end, month):
+            return False
+    return True
+
+
+def month_window(provider_id, first_month, months=1):
+    """Calendar view: blocked and held days for ``months`` consecutive months."""
+    first_month = month_start(first_month)
+    last_month = add_months(first_month, months - 1)
+    masks = _load_masks(provider_id, first_month, last_month)
+
+    window = []
+    for offset in range(months):
+        month = add_months(first_month, offset)
+        confirmed_mask, active_mask = masks.get(month, (0, 0))
+        window.append({
+            'month': month.strftime('%Y-%m'),
+            'blocked_dates': [day.isoformat() for day in mask_days(month, confirmed_mask)],
+            'held_dates': [day.isoformat() for day in mask_days(month, active_mask & ~confirmed_mask)],
+        })
+    return window
+
+
+def _masks_in_window(provider_id, start, end, include_held):
+    """``[(month, mask)]`` for booked months in ``[start, end]``, clipped to the window."""
+    masks = []
+    for month, (confirmed_mask, active_mask) in sorted(_load_masks(provider_id, start, end).items()):
+        mask = (active_mask if include_held else confirmed_mask) & day_mask(start, end, month)
+        if mask:
+            masks.append((month, mask))
+    return masks
+
+
+def blocked_ranges(provider_id, start, end, *, include_held=False):
+    """Blocked days in ``[start, end]`` merged into ``(first, last)`` ranges, joined across month boundaries."""
+    ranges = []
+    for month, mask in _masks_in_window(provider_id, start, end, include_held):
+        for day in mask_days(month, mask):
+            if ranges and ranges[-1][1] + timedelta(days=1) == day:
+                ranges[-1][1] = day
+            else:
+                ranges.append([day, day])
+    return [(first, last) for first, last in ranges]
+
+
+def blocked_month_masks(provider_id, start, end, *, include_held=False):
+    """Blocked days in ``[start, end]`` as ``[(month, mask)]``; bit 0 of a mask is the 1st of the month."""
+    return _masks_in_window(provider_id, start, end, include_held)
+
+
+def calendar_version(provider_id, start, end):
+    """
+    Changes whenever a booking change rewrites any of the provider's months in
+    ``[start, end]``: rebuilt rows get a new ``updated_at`` and removed rows
+    change the count. Used as the calendar's ETag.
+    """
+    stats = ProviderAvailabilityMonth.objects.filter(
+        provider_id=provider_id,
+        month__gte=month_start(start),
+        month__lte=month_start(end),
+    ).aggregate(rows=Count('id'), changed_at=Max('updated_at'))
+    changed_at = stats['changed_at'].timestamp() if stats['changed_at'] else 0
+    return f"{stats['rows']}-{changed_at:.6f}"
@@ -0,0 +1,168 @@
+"""
+Side effects of a new booking, run after the booking commits.
+
+``BookingViewSet.perform_create`` only validates, prices and inserts the
+booking. Inside that same transaction it calls ``publish_booking_created``,
+which queues one outbox job per subscriber, so:
+
+- nothing runs if the create rolls back;
+- every subscriber runs (and retries) on its own, off the request path;
+- a failing subscriber never repeats the work of the others.
+
+Subscribers take the saved booking and are registered with
+``@on_booking_created('<name>')``; their job kind is ``booking.created.<name>``.
+"""
+from django.conf import settings
+
+from system_management_module.services.email_preferences import send_preference_aware_email
+from system_management_module.services.outbox import enqueue_job, register_job_handler
+from system_management_module.services.push_notifications import build_alert_push_data, send_push_to_user
+
+from .models import Booking
+
+BOOKING_CREATED = 'booking.created'
+
+_SUBSCRIBERS = []
+
+
+def on_booking_created(name):
+    kind = f'{BOOKING_CREATED}.{name}'
+
+    def decorator(func):
+        @register_job_handler(kind)
+        def run(payload):
+            booking = (
+                Booking.objects
+                .select_related('tourist', 'guide', 'agency', 'accommodation__host', 'destination', 'tour_package')
+                .filter(pk=payload.get('booking_id'))
+                .first()
+            )
+            # The booking may have been deleted before the job ran.
+            if booking is not None:
+                func(booking)
+
+        _SUBSCRIBERS.append(kind)
+        return func
+    return decorator
+
+
+def publish_booking_created(booking):
+    """Queues every subscriber for ``booking``. Call inside the creating transaction."""
+    for kind in _SUBSCRIBERS:
+        enqueue_job(kind, {'booking_id': booking.pk}, dedupe_key=f'{kind}:{booking.pk}')
+
+
+def _booking_provider(booking):
+    return booking.guide or booking.agency or (booking.accommodation.host if booking.accommodation else None)
+
+
+@on_booking_created('copy_tourist_id')
+def copy_tourist_id_to_profile(booking):
+    """
+    Makes the ID uploaded with the booking the tourist's profile ID. The profile
+    points at the file the booking already stored instead of uploading it twice.
+    """
+    if not booking.tourist_valid_id_image:
+        return
+    tourist = booking.tourist
+    if tourist.valid_id_image.name == booking.tourist_valid_id_image.name:
+        return
+    tourist.valid_id_image.name = booking.tourist_valid_id_image.name
+    tourist.save(update_fields=['valid_id_image'])
+
+
+@on_booking_created('notify_provider')
+def notify_provider_of_request(booking):
+    # Food skip-mode bookings have no provider to notify.
+    provider = _booking_provider(booking)
+    if not provider:
+        return
+
+    # Imported here: views imports this module.
+    from .views import format_booking_date_display, generate_itinerary_html_and_plain
+
+    tourist = booking.tourist
+    tourist_name = f"{tourist.first_name} {tourist.last_name}".strip() or tourist.username
+
+    if provider.email:
+        booking_date_display = format_booking_date_display(booking.check_in, booking.check_out)
+        itin_html, itin_plain = generate_itinerary_html_and_plain(booking)
+
+        subject = "New Booking Request Received - LocaLynk"
+
+        plain_message = (
+            f"Hi {provider.username},\n\n"
+            f"You have received a new booking request from {tourist_name}!\n\n"
+            f"Details:\n"
+            f"- Destination: {booking.destination or 'N/A'}\n"
+            f"- Dates: {booking_date_display}\n"
+            f"- Guests: {booking.num_guests}\n"
+            f"{itin_plain}\n\n"
+            f"This booking is currently 'Pending Payment'. You will receive another notification once the tourist completes their down payment.\n\n"
+            f"Please check your dashboard for more details."
+        )
+
+        html_message = f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <style>
+                body {{ font-family: 'Helvetica Neue', Helvetica, Arial, sans-serif; background-color: #f4f7f6; margin: 0; padding: 20px; color: #333; }}
+                .container {{ max-width: 600px; margin: 0 auto; background: #ffffff; border-radius: 8px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); overflow: hidden; }}
+                .header {{ background-color: #0072FF; padding: 20px; text-align: center; color: #ffffff; font-size: 22px; font-weight: bold; }}
+                .content {{ padding: 30px; font-size: 15px; color: #444; line-height: 1.5; }}
+                .details-box {{ background-color: #f8fafc; padding: 20px; border-radius: 8px; border: 1px solid #e2e8f0; margin: 20px 0; }}
+                .btn {{ display: inline-block; background-color: #0072FF; color: #ffffff; padding: 12px 24px; text-decoration: none; border-radius: 6px; font-weight: bold; margin-top: 20px; text-align: center; }}
+                .footer {{ padding: 15px; text-align: center; color: #888; font-size: 12px; background-color: #f8fafc; border-top: 1px solid #e2e8f0; }}
+            </style>
+        </head>
+        <body>
+            <div class="container">
+                <div class="header">New Booking Request</div>
+                <div class="content">
+                    <h2 style="color: #333; margin-top: 0;">Hi {provider.username},</h2>
+                    <p>You have received a new booking request from <strong>{tourist_name}</strong>.</p>
+
+                    <div class="details-box">
+                        <p style="margin: 5px 0;"><strong>Destination:</strong> {booking.destination or 'N/A'}</p>
+                        <p style="margin: 5px 0;"><strong>Dates:</strong> {booking_date_display}</p>
+                        <p style="margin: 5px 0;"><strong>Guests:</strong> {booking.num_guests}</p>
+
+                        <div style="display: inline-block; background-color: #f59e0b; color: white; padding: 4px 8px; border-radius: 4px; font-size: 12px; font-weight: bold; margin-top: 10px;">Pending Payment</div>
+
+                        {itin_html}
+                    </div>
+
+                    <p>The tourist is currently processing their down payment. We will notify you again once the payment is confirmed.</p>
+
+                    <div style="text-align: center;">
+                        <a href="{getattr(settings, 'FRONTEND_URL', 'http://localhost:5173')}/portal" class="btn">View Dashboard</a>
+                    </div>
+                </div>
+                <div class="footer">&copy; 2026 LocaLynk Partner Network.</div>
+            </div>
+        </body>
+        </html>
+        """
+
+        send_preference_aware_email(
+            subject=subject,
+            message=plain_message,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipient_list=[provider.email],
+            html_message=html_message,
+        )
+
+    provider_name = provider.get_full_name() or provider.username
+    send_push_to_user(
+        user=provider,
+        title='New Booking Request',
+        body=f"{tourist_name} sent a new booking request.",
+        data=build_alert_push_data(
+            alert_type='new_booking_request',
+            related_model='Booking',
+            related_object_id=booking.id,
+            extra={'provider_name': provider_name},
+        ),
+        event_key=f"booking-request:{booking.id}",
+    )
@@ -1,136 +1,92 @@
 from django.core.management.base import BaseCommand #type: ignore
-from django.db import transaction #type: ignore
 
 from accommodation_booking.models import Booking
-from destinations_and_attractions.models import TourPackage
+from accommodation_booking.tour_packages import (
+    DEFAULT_BATCH_SIZE,
+    requeue_inferred_bookings,
+    resolve_pending_bookings,
+)
 
 
 class Command(BaseCommand):
     help = (
-        'Backfill Booking.tour_package for old guide bookings. '
-        'By default this runs as a dry-run and prints a summary only.'
+        'Resolve Booking.tour_package for bookings still pending resolution, in id-ordered batches. '
+        'Each batch is committed on its own, so the job can be stopped and rerun at any time. '
+        'By default this runs as a dry-run and prints a summary only. '
+        'Bookings use the same rule as Booking.save: the provider\'s active packages at the destination '
+        'lasting the trip length or one day less, preferring an exact length and then the newest '
+        '(recorded as ambiguous_newest). The old --include-inactive and --allow-ambiguous-newest '
+        'flags were removed: inactive packages are never matched, and several matches always '
+        'resolve to the newest.'
     )
 
     def add_arguments(self, parser):
         parser.add_argument(
             '--apply',
             action='store_true',
-            help='Persist matched tour_package values. Without this flag, command is dry-run.',
+            help='Persist resolved tour_package values. Without this flag, command is dry-run.',
         )
         parser.add_argument(
-            '--include-inactive',
-            action='store_true',
-            help='Also consider inactive TourPackage records when matching.',
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Bookings resolved per query batch (default {DEFAULT_BATCH_SIZE}).',
         )
         parser.add_argument(
-            '--allow-ambiguous-newest',
-            action='store_true',
-            help='If multiple packages match, choose newest by created_at instead of skipping.',
+            '--after-id',
+            type=int,
+            default=0,
+            help='Resume after this booking id (printed after every batch).',
+        )
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            default=None,
+            help='Stop after this many batches.',
         )
         parser.add_argument(
             '--repair-invalid',
             action='store_true',
-            help='Also re-evaluate bookings with an existing invalid tour_package assignment.',
+            help='Also re-resolve open bookings whose package was inferred earlier.',
         )
 
     def handle(self, *args, **options):
         apply_changes = options['apply']
-        include_inactive = options['include_inactive']
-        allow_ambiguous_newest = options['allow_ambiguous_newest']
-        repair_invalid = options['repair_invalid']
-
-        bookings = Booking.objects.filter(
-            guide__isnull=False,
-            destination__isnull=False,
-        ).select_related('guide', 'destination', 'tour_package')
-
-        total = bookings.count()
-        considered = 0
-        matched = 0
-        updated = 0
-        cleared_invalid = 0
-        skipped_has_valid = 0
-        skipped_no_match = 0
-        skipped_ambiguous = 0
 
+        if options['repair_invalid']:
+            if apply_changes:
+                requeued = requeue_inferred_bookings()
+                self.stdout.write(f'Re-queued {requeued} booking(s) with an inferred tour_package.')
+            else:
+                self.stdout.write('Dry-run: --repair-invalid only re-queues bookings together with --apply.')
+
+        pending = Booking.objects.filter(
+            tour_package_resolution=Booking.PACKAGE_PENDING,
+            id__gt=options['after_id'],
+        ).count()
         self.stdout.write(
-            f'Scanning {total} booking(s) missing tour_package. Dry-run={not apply_changes}.'
+            f'Resolving {pending} pending booking(s). Dry-run={not apply_changes}.'
         )
 
-        with transaction.atomic():
-            for booking in bookings.iterator():
-                trip_days = max((booking.check_out - booking.check_in).days, 1)
-                possible_days = {trip_days, max(trip_days + 1, 1)}
-                current = booking.tour_package
-
-                has_valid_current = (
-                    current is not None
-                    and current.guide_id == booking.guide_id
-                    and current.main_destination_id == booking.destination_id
-                    and current.duration_days in possible_days
-                    and (include_inactive or current.is_active)
-                )
-
-                if has_valid_current:
-                    skipped_has_valid += 1
-                    continue
-
-                if current is not None and not repair_invalid:
-                    skipped_has_valid += 1
-                    continue
-
-                considered += 1
-
-                candidates = TourPackage.objects.filter(
-                    guide=booking.guide,
-                    main_destination=booking.destination,
-                    duration_days__in=possible_days,
-                )
-
-                if not include_inactive:
-                    candidates = candidates.filter(is_active=True)
-
-                candidates = candidates.order_by('-created_at', '-id')
-                candidate_count = candidates.count()
-
-                if candidate_count == 0:
-                    skipped_no_match += 1
-                    if apply_changes and current is not None and repair_invalid:
-                        booking.tour_package = None
-                        booking.save(update_fields=['tour_package'])
-                        cleared_invalid += 1
-                    continue
-
-                selected = None
-                if candidate_count == 1:
-                    selected = candidates.first()
-                elif allow_ambiguous_newest:
-                    selected = candidates.first()
-                else:
-                    skipped_ambiguous += 1
-                    continue
-
-                matched += 1
-
-                if apply_changes:
-                    if booking.tour_package_id != selected.id:
-                        booking.tour_package = selected
-                        booking.save(update_fields=['tour_package'])
-                        updated += 1
+        def report_batch(summary):
+            self.stdout.write(
+                f"- batch {summary['batches']}: {summary['processed']} processed, last id {summary['last_id']}"
+            )
 
-            if not apply_changes:
-                transaction.set_rollback(True)
+        summary = resolve_pending_bookings(
+            batch_size=max(options['batch_size'], 1),
+            after_id=options['after_id'],
+            max_batches=options['max_batches'],
+            apply=apply_changes,
+            on_batch=report_batch,
+        )
 
         self.stdout.write('')
         self.stdout.write(self.style.SUCCESS('Backfill summary:'))
-        self.stdout.write(f'- total_guide_destination_bookings: {total}')
-        self.stdout.write(f'- considered_for_backfill: {considered}')
-        self.stdout.write(f'- matched: {matched}')
-        self.stdout.write(f'- updated: {updated}')
-        self.stdout.write(f'- cleared_invalid: {cleared_invalid}')
-        self.stdout.write(f'- skipped_has_valid_or_not_selected: {skipped_has_valid}')
-        self.stdout.write(f'- skipped_no_match: {skipped_no_match}')
-        self.stdout.write(f'- skipped_ambiguous: {skipped_ambiguous}')
+        self.stdout.write(f"- processed: {summary['processed']}")
+        self.stdout.write(f"- last_id: {summary['last_id']}")
+        for resolution, count in sorted(summary['resolutions'].items()):
+            self.stdout.write(f'- {resolution}: {count}')
 
         if not apply_changes:
             self.stdout.write('')
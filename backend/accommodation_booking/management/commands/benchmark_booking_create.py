@@ -0,0 +1,131 @@
+import io
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand #type: ignore
+from django.db import connection, reset_queries, transaction #type: ignore
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accommodation_booking.views import BookingViewSet
+from destinations_and_attractions.models import Destination, TourPackage
+
+User = get_user_model()
+
+
+def _id_image_bytes():
+    buffer = io.BytesIO()
+    Image.new('RGB', (640, 400), (200, 210, 220)).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Time POST /bookings/ (guide booking with an itinerary package and an ID upload) '
+        'and report p50/p95 latency and queries per request. Media goes to a temporary '
+        'directory and nothing is persisted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Number of bookings to create.',
+        )
+
+    def handle(self, *args, **options):
+        media_root = tempfile.mkdtemp(prefix='booking_create_bench_')
+        storages = {
+            'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+            'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+        }
+        try:
+            with override_settings(MEDIA_ROOT=media_root, STORAGES=storages), transaction.atomic():
+                latencies, queries = self._run(max(options['requests'], 1))
+                transaction.set_rollback(True)
+        finally:
+            shutil.rmtree(media_root, ignore_errors=True)
+
+        self.stdout.write(
+            f'requests={len(latencies)} p50_ms={_percentile(latencies, 0.50):.2f} '
+            f'p95_ms={_percentile(latencies, 0.95):.2f} max_ms={max(latencies):.2f} '
+            f'queries_per_request={queries}'
+        )
+
+    def _run(self, request_count):
+        tourist = User.objects.create_user(username='create_bench_tourist', first_name='Bench', last_name='Tourist')
+        guide = User.objects.create_user(
+            username='create_bench_guide',
+            email='create-bench-guide@example.com',
+            is_local_guide=True,
+            guide_approved=True,
+            guide_tier='paid',
+            available_days=['All'],
+        )
+        destination = Destination.objects.create(
+            name='Create Bench Island',
+            description='Benchmark destination',
+            category='Beach',
+            location='Zamboanga City',
+            municipality='Zamboanga City',
+            latitude='6.870000',
+            longitude='122.050000',
+        )
+        package = TourPackage.objects.create(
+            guide=guide,
+            main_destination=destination,
+            name='Create Bench Tour',
+            description='Benchmark package',
+            duration='2 days',
+            duration_days=2,
+            max_group_size=10,
+            price_per_day='3000.00',
+            solo_price='3500.00',
+            itinerary_timeline=[
+                {'day': day, 'startTime': '08:00', 'endTime': '10:00', 'activityName': f'Stop {stop}'}
+                for day in (1, 2) for stop in range(6)
+            ],
+        )
+
+        factory = APIRequestFactory()
+        view = BookingViewSet.as_view({'post': 'create'})
+        first_day = timezone.localdate() + timedelta(days=30)
+
+        id_image = _id_image_bytes()
+        latencies = []
+        queries = 0
+        for index in range(request_count):
+            check_in = first_day + timedelta(days=index * 3)
+            request = factory.post('/api/bookings/', {
+                'guide': guide.id,
+                'destination': destination.id,
+                'tour_package_id': package.id,
+                'check_in': check_in.isoformat(),
+                'check_out': (check_in + timedelta(days=1)).isoformat(),
+                'num_guests': 2,
+                'tourist_valid_id_image': SimpleUploadedFile('id.png', id_image, content_type='image/png'),
+            }, format='multipart')
+            force_authenticate(request, user=tourist)
+
+            # The query log is capped, so clear it or long runs capture nothing.
+            reset_queries()
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = view(request)
+                latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 201:
+                raise RuntimeError(f'Create failed with {response.status_code}: {response.data}')
+            queries = len(captured.captured_queries)
+        return latencies, queries
@@ -0,0 +1,105 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand #type: ignore
+from django.db import connection, transaction #type: ignore
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from accommodation_booking.availability import blocked_dates, is_range_free, rebuild_provider_index
+from accommodation_booking.models import Booking
+
+User = get_user_model()
+
+
+def _legacy_blocked_dates(guide_id):
+    """The pre-index guide_blocked_dates: expand every Confirmed booking day by day."""
+    days = []
+    for row in Booking.objects.filter(guide_id=guide_id, status='Confirmed').values('check_in', 'check_out'):
+        current = row['check_in']
+        while current <= row['check_out']:
+            days.append(current.isoformat())
+            current += timedelta(days=1)
+    return days
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway guide with a long booking history and compare calendar '
+        'lookups against raw bookings with the availability index. Nothing is persisted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--bookings',
+            type=int,
+            nargs='+',
+            default=[100, 1000, 5000],
+            help='Historical booking counts to benchmark.',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Timed runs per case (best run is reported).',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('bookings | lookup                 | queries | best_ms')
+
+        for booking_count in options['bookings']:
+            with transaction.atomic():
+                for label, queries, best_ms in self._run_case(booking_count, max(options['repeat'], 1)):
+                    self.stdout.write(f'{booking_count:>8} | {label:<22} | {queries:>7} | {best_ms:>7.2f}')
+                transaction.set_rollback(True)
+
+    def _run_case(self, booking_count, repeat):
+        tourist = User.objects.create_user(username=f'availability_bench_tourist_{booking_count}')
+        guide = User.objects.create_user(
+            username=f'availability_bench_guide_{booking_count}',
+            is_local_guide=True,
+            guide_approved=True,
+        )
+
+        today = timezone.localdate()
+        first_day = today - timedelta(days=booking_count * 3)
+        Booking.objects.bulk_create(
+            [
+                Booking(
+                    tourist=tourist,
+                    guide=guide,
+                    check_in=first_day + timedelta(days=index * 3),
+                    check_out=first_day + timedelta(days=index * 3 + 1),
+                    status='Confirmed' if index % 4 else 'Completed',
+                    tour_package_resolution=Booking.PACKAGE_NOT_APPLICABLE,
+                )
+                for index in range(booking_count)
+            ],
+            batch_size=1000,
+        )
+        # bulk_create skips post_save, so build the index rows directly.
+        rebuild_provider_index(guide.id)
+
+        month_start = today.replace(day=1)
+        month_end = month_start + timedelta(days=31)
+        cases = [
+            ('raw scan (all history)', lambda: _legacy_blocked_dates(guide.id)),
+            ('index (all history)', lambda: blocked_dates(guide.id)),
+            ('index (one month)', lambda: blocked_dates(guide.id, month_start, month_end)),
+            ('index (is_range_free)', lambda: is_range_free(guide.id, today, today + timedelta(days=2))),
+        ]
+
+        results = []
+        for label, lookup in cases:
+            best_ms = None
+            queries = 0
+            for _ in range(repeat):
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    lookup()
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                queries = len(captured.captured_queries)
+                best_ms = elapsed_ms if best_ms is None else min(best_ms, elapsed_ms)
+            results.append((label, queries, best_ms))
+        return results
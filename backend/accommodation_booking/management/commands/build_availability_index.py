@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand #type: ignore
+from django.db import transaction #type: ignore
+
+from accommodation_booking.availability import rebuild_provider_index
+from accommodation_booking.models import Booking
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the provider availability index from bookings. Booking saves keep it '
+        'current; run this after bulk imports or raw SQL changes to bookings.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--provider',
+            type=int,
+            action='append',
+            dest='providers',
+            help='Only rebuild this provider (user id). May be repeated.',
+        )
+
+    def handle(self, *args, **options):
+        provider_ids = options['providers']
+        if not provider_ids:
+            provider_ids = set(
+                Booking.objects.filter(guide__isnull=False).values_list('guide_id', flat=True).distinct()
+            ) | set(
+                Booking.objects.filter(agency__isnull=False).values_list('agency_id', flat=True).distinct()
+            )
+
+        for provider_id in sorted(provider_ids):
+            with transaction.atomic():
+                rebuild_provider_index(provider_id)
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt availability for {len(provider_ids)} provider(s).'))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand #type: ignore
+
+from accommodation_booking.payouts import find_payout_drift, repair_payouts
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the stored Booking.effective_payout column against the price fields. '
+        'By default this only reports drift.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repair',
+            action='store_true',
+            help='Rewrite every drifted payout from the price fields.',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=20,
+            help='Maximum number of drifted bookings to print.',
+        )
+
+    def handle(self, *args, **options):
+        drift = find_payout_drift()
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('Booking payouts are consistent with the price fields.'))
+            return
+
+        self.stdout.write(self.style.WARNING(f'Found {len(drift)} booking(s) with a stale effective payout.'))
+        for booking_id, expected, actual in drift[:options['limit']]:
+            self.stdout.write(f'- booking={booking_id} expected={expected} actual={actual}')
+
+        if options['repair']:
+            repaired = repair_payouts(drift)
+            self.stdout.write(self.style.SUCCESS(f'Repaired {repaired} booking payout(s).'))
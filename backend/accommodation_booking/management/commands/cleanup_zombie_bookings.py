@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from datetime import timedelta
+from accommodation_booking.availability import refresh_bookings_availability
 from accommodation_booking.models import Booking
 
 class Command(BaseCommand):
@@ -17,7 +18,13 @@ class Command(BaseCommand):
         count = zombie_bookings.count()
         
         if count > 0:
+            affected = [
+                (guide_id or agency_id, check_in, check_out)
+                for guide_id, agency_id, check_in, check_out in zombie_bookings.values_list('guide_id', 'agency_id', 'check_in', 'check_out')
+            ]
             zombie_bookings.update(status='Cancelled')
+            # update() skips post_save, so release the held calendar days here.
+            refresh_bookings_availability(affected)
             self.stdout.write(self.style.SUCCESS(f'Successfully cancelled {count} zombie bookings.'))
         else:
             self.stdout.write(self.style.SUCCESS('No zombie bookings found.'))
\ No newline at end of file
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand #type: ignore
+
+from accommodation_booking.models import Booking
+from accommodation_booking.search import DEFAULT_BATCH_SIZE, refresh_search_documents
+
+
+class Command(BaseCommand):
+    help = (
+        'Rewrite booking search documents from bookings. Saves and renames keep them '
+        'current; run this after bulk imports or raw SQL changes to bookings, users, '
+        'destinations or accommodations.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Bookings rewritten per batch (default {DEFAULT_BATCH_SIZE}).',
+        )
+
+    def handle(self, *args, **options):
+        written = refresh_search_documents(Booking.objects.all(), batch_size=max(options['batch_size'], 1))
+        self.stdout.write(self.style.SUCCESS(f'Rewrote {written} booking search document(s).'))
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-18
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def mark_existing_packages_explicit(apps, schema_editor):
+    """Packages already on a booking were chosen by the tourist or the old backfill; keep them."""
+    Booking = apps.get_model('accommodation_booking', 'Booking')
+    Booking.objects.filter(tour_package__isnull=False).update(
+        tour_package_resolution='explicit',
+        tour_package_resolved_at=timezone.now(),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accommodation_booking', '0026_accommodation_transport_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='tour_package_resolution',
+            field=models.CharField(choices=[('pending', 'Pending resolution'), ('explicit', 'Chosen by the tourist'), ('matched', 'Single matching package'), ('ambiguous_newest', 'Newest of several matches'), ('no_match', 'No matching package'), ('not_applicable', 'Not a guide/agency booking')], db_index=True, default='pending', help_text='How tour_package was chosen; pending rows are picked up by the reconciler.', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='tour_package_resolved_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(mark_existing_packages_explicit, migrations.RunPython.noop),
+    ]
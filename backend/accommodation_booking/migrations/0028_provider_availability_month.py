@@ -0,0 +1,71 @@
+# Generated by Django 5.2.6 on 2026-10-18
+
+import calendar
+from datetime import date
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+ACTIVE_STATUSES = ('Accepted', 'Pending_Payment', 'Confirmed', 'Completed')
+
+
+def build_availability_index(apps, schema_editor):
+    """Seeds the month bitmasks from existing bookings (same rules as accommodation_booking.availability)."""
+    Booking = apps.get_model('accommodation_booking', 'Booking')
+    ProviderAvailabilityMonth = apps.get_model('accommodation_booking', 'ProviderAvailabilityMonth')
+
+    masks = {}
+    rows = (
+        Booking.objects
+        .filter(status__in=ACTIVE_STATUSES)
+        .exclude(guide__isnull=True, agency__isnull=True)
+        .values_list('guide_id', 'agency_id', 'check_in', 'check_out', 'status')
+    )
+    for guide_id, agency_id, check_in, check_out, status in rows.iterator():
+        provider_id = guide_id or agency_id
+        month = check_in.replace(day=1)
+        while month <= check_out:
+            last_day = month.replace(day=calendar.monthrange(month.year, month.month)[1])
+            first = max(check_in, month)
+            last = min(check_out, last_day)
+            bits = ((1 << (last.day - first.day + 1)) - 1) << (first.day - 1)
+            confirmed, active = masks.get((provider_id, month), (0, 0))
+            masks[(provider_id, month)] = (confirmed | bits if status == 'Confirmed' else confirmed, active | bits)
+            index = month.year * 12 + month.month
+            month = date(index // 12, index % 12 + 1, 1)
+
+    ProviderAvailabilityMonth.objects.bulk_create(
+        [
+            ProviderAvailabilityMonth(provider_id=provider_id, month=month, confirmed_mask=confirmed, active_mask=active)
+            for (provider_id, month), (confirmed, active) in masks.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accommodation_booking', '0027_booking_tour_package_resolution'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProviderAvailabilityMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month.')),
+                ('confirmed_mask', models.IntegerField(default=0, help_text='Days covered by Confirmed bookings.')),
+                ('active_mask', models.IntegerField(default=0, help_text='Days covered by any booking still holding the provider.')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('provider', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='availability_months', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['provider', 'month'],
+                'constraints': [models.UniqueConstraint(fields=('provider', 'month'), name='unique_provider_availability_month')],
+            },
+        ),
+        migrations.RunPython(build_availability_index, migrations.RunPython.noop),
+    ]
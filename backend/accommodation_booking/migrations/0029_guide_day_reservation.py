@@ -0,0 +1,58 @@
+# Generated by Django 5.2.6 on 2026-10-18
+
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def reserve_confirmed_guide_days(apps, schema_editor):
+    """
+    Seeds reservations for existing Confirmed guide bookings (same day rules as
+    Booking.reserved_guide_days). Overlaps that slipped past the old check keep
+    the earliest booking's rows instead of failing the migration.
+    """
+    Booking = apps.get_model('accommodation_booking', 'Booking')
+    GuideDayReservation = apps.get_model('accommodation_booking', 'GuideDayReservation')
+
+    rows = (
+        Booking.objects
+        .filter(status='Confirmed', guide__isnull=False)
+        .order_by('id')
+        .values_list('id', 'guide_id', 'check_in', 'check_out')
+    )
+    batch = []
+    for booking_id, guide_id, check_in, check_out in rows.iterator():
+        last = max(check_out - timedelta(days=1), check_in)
+        for offset in range((last - check_in).days + 1):
+            batch.append(GuideDayReservation(guide_id=guide_id, day=check_in + timedelta(days=offset), booking_id=booking_id))
+        if len(batch) >= 1000:
+            GuideDayReservation.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    GuideDayReservation.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accommodation_booking', '0028_provider_availability_month'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GuideDayReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='guide_day_reservations', to='accommodation_booking.booking')),
+                ('guide', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='day_reservations', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['guide', 'day'],
+                'constraints': [models.UniqueConstraint(fields=('guide', 'day'), name='unique_guide_day_reservation')],
+            },
+        ),
+        migrations.RunPython(reserve_confirmed_guide_days, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.6 on 2026-10-18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accommodation_booking', '0029_guide_day_reservation'),
+        ('agency_management_module', '0011_touristguide_specializations'),
+        ('destinations_and_attractions', '0014_gazetteer_place'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['-created_at'], name='booking_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['tourist', '-created_at'], name='booking_tourist_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['guide', '-created_at'], name='booking_guide_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['agency', '-created_at'], name='booking_agency_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['status', '-created_at'], name='booking_status_created_idx'),
+        ),
+        migrations.AlterField(
+            model_name='booking',
+            name='agency',
+            field=models.ForeignKey(blank=True, db_index=False, limit_choices_to={'is_staff': True}, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='agency_bookings', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='booking',
+            name='guide',
+            field=models.ForeignKey(blank=True, db_index=False, limit_choices_to={'guide_approved': True, 'is_local_guide': True}, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='guide_tours_booked', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='booking',
+            name='tourist',
+            field=models.ForeignKey(db_index=False, limit_choices_to={'is_tourist': True}, on_delete=django.db.models.deletion.CASCADE, related_name='tourist_bookings', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,118 @@
+# Generated by Django 5.2.6 on 2026-10-18
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+DOCUMENT_TABLE = 'accommodation_booking_bookingsearchdocument'
+FTS_TABLE = 'booking_search_fts'
+PG_INDEX_NAME = 'booking_search_document_fts'
+
+# External-content FTS5 table mirroring BookingSearchDocument.document through triggers.
+SQLITE_FTS_STATEMENTS = (
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+    f"document, content='{DOCUMENT_TABLE}', content_rowid='booking_id', prefix='2 3')",
+    f"CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON {DOCUMENT_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, document) VALUES (new.booking_id, new.document); END",
+    f"CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON {DOCUMENT_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, document) VALUES ('delete', old.booking_id, old.document); END",
+    f"CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE ON {DOCUMENT_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, document) VALUES ('delete', old.booking_id, old.document); "
+    f"INSERT INTO {FTS_TABLE}(rowid, document) VALUES (new.booking_id, new.document); END",
+)
+
+
+def _sqlite_has_fts5(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return any('FTS5' in row[0] for row in cursor.fetchall())
+
+
+def create_fulltext_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.indexes import GinIndex
+        from django.contrib.postgres.search import SearchVector
+
+        model = apps.get_model('accommodation_booking', 'BookingSearchDocument')
+        schema_editor.add_index(model, GinIndex(SearchVector('document', config='simple'), name=PG_INDEX_NAME))
+    elif connection.vendor == 'sqlite' and _sqlite_has_fts5(connection):
+        for statement in SQLITE_FTS_STATEMENTS:
+            schema_editor.execute(statement)
+    # Other backends search the document column with icontains.
+
+
+def drop_fulltext_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {PG_INDEX_NAME}')
+    elif connection.vendor == 'sqlite':
+        for suffix in ('ai', 'ad', 'au'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def _normalize(value):
+    text = unicodedata.normalize('NFKD', str(value or ''))
+    text = ''.join(char for char in text if not unicodedata.combining(char)).lower()
+    return re.sub(r'[\W_]+', ' ', text).strip()
+
+
+def build_search_documents(apps, schema_editor):
+    """Seeds one document per existing booking (same rules as accommodation_booking.search)."""
+    Booking = apps.get_model('accommodation_booking', 'Booking')
+    BookingSearchDocument = apps.get_model('accommodation_booking', 'BookingSearchDocument')
+
+    rows = (
+        Booking.objects
+        .order_by('id')
+        .values_list('id', 'tourist__first_name', 'tourist__last_name', 'destination__name', 'accommodation__title')
+    )
+    batch = []
+    for booking_id, first_name, last_name, destination_name, accommodation_title in rows.iterator():
+        tourist_name = ' '.join(part for part in (first_name, last_name) if part).strip()
+        document = ' '.join(
+            part for part in (
+                str(booking_id),
+                _normalize(tourist_name),
+                _normalize(destination_name),
+                _normalize(accommodation_title),
+            )
+            if part
+        )
+        batch.append(BookingSearchDocument(
+            booking_id=booking_id,
+            tourist_name=tourist_name[:301],
+            destination_name=(destination_name or '')[:255],
+            accommodation_title=(accommodation_title or '')[:255],
+            document=document,
+        ))
+        if len(batch) >= 1000:
+            BookingSearchDocument.objects.bulk_create(batch)
+            batch = []
+    BookingSearchDocument.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accommodation_booking', '0030_booking_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingSearchDocument',
+            fields=[
+                ('booking', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='accommodation_booking.booking')),
+                ('tourist_name', models.CharField(blank=True, default='', max_length=301)),
+                ('destination_name', models.CharField(blank=True, default='', max_length=255)),
+                ('accommodation_title', models.CharField(blank=True, default='', max_length=255)),
+                ('document', models.TextField(blank=True, default='')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+        migrations.RunPython(build_search_documents, migrations.RunPython.noop),
+    ]
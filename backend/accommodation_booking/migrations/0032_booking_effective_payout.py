@@ -0,0 +1,54 @@
+# Generated by Django 5.2.6 on 2026-10-18
+
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_effective_payout(apps, schema_editor):
+    """Stores the payout for existing bookings (same rules as compute_effective_payout)."""
+    Booking = apps.get_model('accommodation_booking', 'Booking')
+
+    batch = []
+    rows = Booking.objects.order_by('id').values_list(
+        'id', 'total_price', 'down_payment', 'platform_fee', 'guide_payout_amount',
+    )
+    for booking_id, total_price, down_payment, platform_fee, guide_payout_amount in rows.iterator():
+        if guide_payout_amount and guide_payout_amount > 0:
+            payout = Decimal(guide_payout_amount)
+        else:
+            fee = platform_fee if platform_fee is not None else Decimal(total_price or 0) * Decimal('0.02')
+            payout = Decimal(down_payment or 0) - Decimal(fee)
+        batch.append(Booking(id=booking_id, effective_payout=payout.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)))
+        if len(batch) >= 1000:
+            Booking.objects.bulk_update(batch, ['effective_payout'])
+            batch = []
+    Booking.objects.bulk_update(batch, ['effective_payout'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accommodation_booking', '0031_booking_search_document'),
+        ('agency_management_module', '0011_touristguide_specializations'),
+        ('destinations_and_attractions', '0014_gazetteer_place'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='effective_payout',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Stored compute_effective_payout(); rewritten on save when the price or payout fields change.', max_digits=12),
+        ),
+        migrations.RunPython(backfill_effective_payout, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['status', '-effective_payout'], name='booking_status_payout_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['-effective_payout'], name='booking_payout_idx'),
+        ),
+    ]
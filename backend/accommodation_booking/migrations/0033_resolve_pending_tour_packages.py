@@ -0,0 +1,88 @@
+# Generated by Django 5.2.6 on 2026-10-18
+
+from django.db import migrations
+from django.db.models import F, Q
+from django.utils import timezone
+
+BATCH_SIZE = 500
+
+
+def pick_tour_package(candidates, trip_days):
+    # Same rule as accommodation_booking.models.pick_tour_package.
+    if not candidates:
+        return None, 'no_match'
+    exact = [package for package in candidates if package.duration_days == trip_days]
+    tier = exact or candidates
+    return tier[0], 'matched' if len(tier) == 1 else 'ambiguous_newest'
+
+
+def resolve_pending_tour_packages(apps, schema_editor):
+    """
+    Bookings that predate 0027 and had no package were left pending; resolve
+    them now so reads do not wait for the reconciler.
+    """
+    Booking = apps.get_model('accommodation_booking', 'Booking')
+    TourPackage = apps.get_model('destinations_and_attractions', 'TourPackage')
+
+    last_id = 0
+    while True:
+        batch = list(
+            Booking.objects
+            .filter(tour_package_resolution='pending', id__gt=last_id)
+            .only('id', 'guide_id', 'agency_id', 'destination_id', 'check_in', 'check_out', 'tour_package_id')
+            .order_by('id')[:BATCH_SIZE]
+        )
+        if not batch:
+            return
+
+        resolvable = [booking for booking in batch if (booking.guide_id or booking.agency_id) and booking.destination_id]
+        grouped = {}
+        if resolvable:
+            providers = Q(guide_id__in={booking.guide_id for booking in resolvable if booking.guide_id})
+            agency_user_ids = {booking.agency_id for booking in resolvable if booking.agency_id and not booking.guide_id}
+            if agency_user_ids:
+                providers |= Q(agency__user_id__in=agency_user_ids)
+            packages = (
+                TourPackage.objects
+                .filter(providers, main_destination_id__in={booking.destination_id for booking in resolvable}, is_active=True)
+                .annotate(agency_user_id=F('agency__user_id'))
+                .order_by('-created_at', '-id')
+            )
+            for package in packages:
+                if package.guide_id:
+                    grouped.setdefault((package.main_destination_id, 'guide', package.guide_id), []).append(package)
+                if package.agency_user_id:
+                    grouped.setdefault((package.main_destination_id, 'agency', package.agency_user_id), []).append(package)
+
+        now = timezone.now()
+        resolvable_ids = {booking.id for booking in resolvable}
+        for booking in batch:
+            if booking.id in resolvable_ids:
+                trip_days = max((booking.check_out - booking.check_in).days + 1, 1)
+                if booking.guide_id:
+                    provider_key = (booking.destination_id, 'guide', booking.guide_id)
+                else:
+                    provider_key = (booking.destination_id, 'agency', booking.agency_id)
+                candidates = [
+                    package for package in grouped.get(provider_key, [])
+                    if package.duration_days in {trip_days, max(trip_days - 1, 1)}
+                ]
+                booking.tour_package, booking.tour_package_resolution = pick_tour_package(candidates, trip_days)
+            else:
+                booking.tour_package, booking.tour_package_resolution = None, 'not_applicable'
+            booking.tour_package_resolved_at = now
+
+        Booking.objects.bulk_update(batch, ['tour_package', 'tour_package_resolution', 'tour_package_resolved_at'])
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accommodation_booking', '0032_booking_effective_payout'),
+        ('destinations_and_attractions', '0016_new_package_highlights'),
+    ]
+
+    operations = [
+        migrations.RunPython(resolve_pending_tour_packages, migrations.RunPython.noop),
+    ]
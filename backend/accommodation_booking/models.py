@@ -1,9 +1,13 @@
-from django.db import models #type: ignore
+from datetime import timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import IntegrityError, models, transaction #type: ignore
 from user_authentication.models import User 
 from destinations_and_attractions.models import Destination, TourPackage
 from agency_management_module.models import TouristGuide 
 from django.core.exceptions import ValidationError #type: ignore
 from django.db.models import Q #type: ignore
+from django.utils import timezone #type: ignore
 
 from backend.location_policy import validate_zds_location_payload
 
@@ -68,6 +72,41 @@ class Accommodation(models.Model):
         return self.title
 
 
+# Fallback commission when a booking has no platform_fee recorded.
+PLATFORM_COMMISSION_RATE = Decimal('0.02')
+_CENT = Decimal('0.01')
+
+
+def compute_effective_payout(total_price, down_payment, platform_fee, guide_payout_amount):
+    """
+    What the provider is owed for a booking: ``guide_payout_amount`` once it is
+    set, otherwise the down payment net of the platform fee (2% of the total
+    when no fee is recorded).
+    """
+    guide_payout_amount = Decimal(str(guide_payout_amount or 0))
+    if guide_payout_amount > 0:
+        return guide_payout_amount.quantize(_CENT, rounding=ROUND_HALF_UP)
+    if platform_fee is None:
+        platform_fee = Decimal(str(total_price or 0)) * PLATFORM_COMMISSION_RATE
+    payout = Decimal(str(down_payment or 0)) - Decimal(str(platform_fee))
+    return payout.quantize(_CENT, rounding=ROUND_HALF_UP)
+
+
+def pick_tour_package(candidates, trip_days):
+    """
+    Chooses from a provider's candidate packages (newest first), preferring an
+    exact trip-length match. Returns ``(package, Booking resolution)``.
+    """
+    if not candidates:
+        return None, Booking.PACKAGE_NO_MATCH
+
+    exact = [package for package in candidates if package.duration_days == trip_days]
+    tier = exact or candidates
+    if len(tier) == 1:
+        return tier[0], Booking.PACKAGE_MATCHED
+    return tier[0], Booking.PACKAGE_AMBIGUOUS
+
+
 class Booking(models.Model):
     """Represents a booking request or confirmed reservation."""
     
@@ -81,6 +120,27 @@ class Booking(models.Model):
         ('Refunded', 'Refunded'),
     ]
 
+    # How ``tour_package`` was chosen. Guide/agency bookings often arrive without
+    # an explicit package; it is inferred once on write instead of on every read.
+    PACKAGE_PENDING = 'pending'
+    PACKAGE_EXPLICIT = 'explicit'
+    PACKAGE_MATCHED = 'matched'
+    PACKAGE_AMBIGUOUS = 'ambiguous_newest'
+    PACKAGE_NO_MATCH = 'no_match'
+    PACKAGE_NOT_APPLICABLE = 'not_applicable'
+    PACKAGE_RESOLUTION_CHOICES = [
+        (PACKAGE_PENDING, 'Pending resolution'),
+        (PACKAGE_EXPLICIT, 'Chosen by the tourist'),
+        (PACKAGE_MATCHED, 'Single matching package'),
+        (PACKAGE_AMBIGUOUS, 'Newest of several matches'),
+        (PACKAGE_NO_MATCH, 'No matching package'),
+        (PACKAGE_NOT_APPLICABLE, 'Not a guide/agency booking'),
+    ]
+    INFERRED_PACKAGE_RESOLUTIONS = (PACKAGE_MATCHED, PACKAGE_AMBIGUOUS, PACKAGE_NO_MATCH)
+    _PACKAGE_RESOLUTION_INPUTS = ('guide_id', 'agency_id', 'destination_id', 'check_in', 'check_out')
+    _AVAILABILITY_INPUTS = ('guide_id', 'agency_id', 'check_in', 'check_out', 'status')
+    _SEARCH_INPUTS = ('tourist_id', 'destination_id', 'accommodation_id')
+
     PAYOUT_CHANNEL_CHOICES = [
         ('GCash', 'GCash'),
         ('Bank', 'Bank Transfer'),
@@ -89,12 +149,21 @@ class Booking(models.Model):
         ('Other', 'Other'),
     ]
     
-    tourist = models.ForeignKey(User, limit_choices_to={'is_tourist': True}, related_name='tourist_bookings', on_delete=models.CASCADE)
+    # tourist/guide/agency lookups are served by the (role, -created_at) indexes in Meta.
+    tourist = models.ForeignKey(User, limit_choices_to={'is_tourist': True}, related_name='tourist_bookings', on_delete=models.CASCADE, db_index=False)
     accommodation = models.ForeignKey(Accommodation, on_delete=models.CASCADE, blank=True, null=True)
-    guide = models.ForeignKey(User, limit_choices_to={'is_local_guide': True, 'guide_approved': True}, related_name='guide_tours_booked', on_delete=models.CASCADE, blank=True, null=True)
-    agency = models.ForeignKey(User, limit_choices_to={'is_staff': True}, related_name='agency_bookings', on_delete=models.CASCADE, blank=True, null=True)
+    guide = models.ForeignKey(User, limit_choices_to={'is_local_guide': True, 'guide_approved': True}, related_name='guide_tours_booked', on_delete=models.CASCADE, blank=True, null=True, db_index=False)
+    agency = models.ForeignKey(User, limit_choices_to={'is_staff': True}, related_name='agency_bookings', on_delete=models.CASCADE, blank=True, null=True, db_index=False)
     destination = models.ForeignKey(Destination, on_delete=models.SET_NULL, null=True, blank=True, related_name="bookings")
     tour_package = models.ForeignKey(TourPackage, on_delete=models.SET_NULL, null=True, blank=True, related_name='bookings')
+    tour_package_resolution = models.CharField(
+        max_length=20,
+        choices=PACKAGE_RESOLUTION_CHOICES,
+        default=PACKAGE_PENDING,
+        db_index=True,
+        help_text='How tour_package was chosen; pending rows are picked up by the reconciler.',
+    )
+    tour_package_resolved_at = models.DateTimeField(null=True, blank=True)
     
     assigned_guides = models.ManyToManyField(User, related_name='assigned_bookings', blank=True, limit_choices_to={'is_local_guide': True, 'guide_approved': True})
     assigned_agency_guides = models.ManyToManyField(TouristGuide, related_name='assigned_bookings', blank=True)
@@ -117,6 +186,12 @@ class Booking(models.Model):
 
     platform_fee = models.DecimalField(max_digits=10, decimal_places=2, default=0.00, help_text="2% Commission for the App")
     guide_payout_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0.00, help_text="Amount Admin must send to Guide")
+    effective_payout = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        help_text='Stored compute_effective_payout(); rewritten on save when the price or payout fields change.',
+    )
     is_payout_settled = models.BooleanField(default=False, help_text="Has Admin sent the money to the Guide?")
     payout_settled_at = models.DateTimeField(null=True, blank=True, help_text="When the payout was marked as settled.")
     payout_channel = models.CharField(max_length=20, choices=PAYOUT_CHANNEL_CHOICES, null=True, blank=True, help_text="How the payout was sent to provider.")
@@ -141,6 +216,21 @@ class Booking(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     review_notification_sent = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # Booking lists: newest-first pages, created_at date ranges, and
+            # each role branch of the participant UNION walked in list order.
+            models.Index(fields=['-created_at'], name='booking_created_idx'),
+            models.Index(fields=['tourist', '-created_at'], name='booking_tourist_created_idx'),
+            models.Index(fields=['guide', '-created_at'], name='booking_guide_created_idx'),
+            models.Index(fields=['agency', '-created_at'], name='booking_agency_created_idx'),
+            # financial_only (status IN Confirmed/Completed), newest first.
+            models.Index(fields=['status', '-created_at'], name='booking_status_created_idx'),
+            # Financial dashboards: payout range filters and amount sorts.
+            models.Index(fields=['status', '-effective_payout'], name='booking_status_payout_idx'),
+            models.Index(fields=['-effective_payout'], name='booking_payout_idx'),
+        ]
+
     def clean(self):
         is_accommodation = self.accommodation is not None
         is_guide = self.guide is not None
@@ -165,16 +255,8 @@ class Booking(models.Model):
         if (is_guide or is_agency) and self.destination is None:
             raise ValidationError("A destination is required when booking a guide or agency.")
         
-        if self.guide and self.status == 'Confirmed':
-            overlapping_bookings = Booking.objects.filter(
-                guide=self.guide,
-                status='Confirmed',
-                check_in__lt=self.check_out, 
-                check_out__gt=self.check_in
-            ).exclude(pk=self.pk) 
-
-            if overlapping_bookings.exists():
-                raise ValidationError("The guide is unavailable for these dates. Please choose another date range.")
+        # Overlapping Confirmed guide bookings are rejected in save() by the
+        # GuideDayReservation unique constraint, not by a read-then-check here.
 
         has_meetup_payload = any(
             value not in (None, '')
@@ -194,9 +276,138 @@ class Booking(models.Model):
             self.meetup_longitude = normalized['longitude']
             self.meetup_municipality = normalized['municipality'] or None
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_saved_state()
+        return instance
+
+    def _current_package_inputs(self):
+        # Read __dict__ so deferred fields are not loaded one query at a time.
+        return tuple(self.__dict__.get(name) for name in self._PACKAGE_RESOLUTION_INPUTS + ('tour_package_id',))
+
+    def _remember_saved_state(self):
+        self._package_inputs = self._current_package_inputs()
+        # Compared by the availability index signal handlers to find the months to rebuild.
+        self._availability_inputs = self.availability_state()
+        self._search_inputs = self.search_state()
+
+    def availability_state(self):
+        return tuple(self.__dict__.get(name) for name in self._AVAILABILITY_INPUTS)
+
+    def search_state(self):
+        return tuple(self.__dict__.get(name) for name in self._SEARCH_INPUTS)
+
+    def find_tour_package(self):
+        """
+        Infers the package for a guide/agency booking without an explicit one:
+        the provider's active packages at the destination lasting the trip length
+        (or one day less, for check-out-exclusive bookings), newest first.
+        Returns ``(package, resolution)``.
+        """
+        if not (self.guide_id or self.agency_id) or not self.destination_id or not (self.check_in and self.check_out):
+            return None, self.PACKAGE_NOT_APPLICABLE
+
+        trip_days = max((self.check_out - self.check_in).days + 1, 1)
+        candidates = TourPackage.objects.filter(
+            main_destination_id=self.destination_id,
+            is_active=True,
+            duration_days__in={trip_days, max(trip_days - 1, 1)},
+        )
+        if self.guide_id:
+            candidates = candidates.filter(guide_id=self.guide_id)
+        else:
+            candidates = candidates.filter(agency__user_id=self.agency_id)
+
+        return pick_tour_package(list(candidates.order_by('-created_at', '-id')), trip_days)
+
+    def refresh_tour_package_resolution(self):
+        """
+        Re-resolves ``tour_package`` when the booking is new, still pending or its
+        provider/destination/dates changed. A package set by the caller is kept as
+        explicit. Returns the names of the fields it changed.
+        """
+        previous = getattr(self, '_package_inputs', None)
+        current = self._current_package_inputs()
+        if previous == current and self.tour_package_resolution != self.PACKAGE_PENDING:
+            return []
+
+        package_set_by_caller = bool(self.tour_package_id) and (previous is None or previous[-1] != current[-1])
+        if self.tour_package_id and (package_set_by_caller or self.tour_package_resolution == self.PACKAGE_EXPLICIT):
+            resolution = self.PACKAGE_EXPLICIT
+        else:
+            package, resolution = self.find_tour_package()
+            self.tour_package = package
+
+        self.tour_package_resolution = resolution
+        self.tour_package_resolved_at = timezone.now()
+        return ['tour_package', 'tour_package_resolution', 'tour_package_resolved_at']
+
+    def reserved_guide_days(self):
+        """
+        Days a Confirmed guide booking holds the guide for. Check-out is
+        exclusive, so back-to-back trips can share a changeover day; a same-day
+        booking holds its single day.
+        """
+        if not (self.guide_id and self.status == 'Confirmed' and self.check_in and self.check_out):
+            return []
+        last = max(self.check_out - timedelta(days=1), self.check_in)
+        return [self.check_in + timedelta(days=offset) for offset in range((last - self.check_in).days + 1)]
+
+    def sync_guide_reservations(self):
+        """
+        Makes this booking's GuideDayReservation rows match ``reserved_guide_days``.
+        A day already held by another booking fails the (guide, day) unique
+        constraint, so two concurrent confirmations cannot both succeed.
+        """
+        wanted = self.reserved_guide_days()
+        held = GuideDayReservation.objects.filter(booking_id=self.pk)
+        if not wanted:
+            held.delete()
+            return
+
+        held.exclude(guide_id=self.guide_id, day__in=wanted).delete()
+        kept = set(held.values_list('day', flat=True))
+        try:
+            with transaction.atomic():
+                GuideDayReservation.objects.bulk_create([
+                    GuideDayReservation(guide_id=self.guide_id, day=day, booking_id=self.pk)
+                    for day in wanted
+                    if day not in kept
+                ])
+        except IntegrityError:
+            # A concurrent save of this same booking (e.g. webhook and payment
+            # verification) may have reserved the days first; only another
+            # booking's rows are a real conflict.
+            taken = GuideDayReservation.objects.filter(guide_id=self.guide_id, day__in=wanted).exclude(booking_id=self.pk)
+            if taken.exists():
+                raise ValidationError("The guide is unavailable for these dates. Please choose another date range.")
+
+    def refresh_effective_payout(self):
+        """Recomputes ``effective_payout`` from the loaded price fields. Returns the fields it changed."""
+        inputs = ('total_price', 'down_payment', 'platform_fee', 'guide_payout_amount')
+        if any(name not in self.__dict__ for name in inputs):
+            # Deferred inputs were not loaded, so they cannot have changed in memory.
+            return []
+        payout = compute_effective_payout(*(self.__dict__[name] for name in inputs))
+        if self.__dict__.get('effective_payout') == payout:
+            return []
+        self.effective_payout = payout
+        return ['effective_payout']
+
     def save(self, *args, **kwargs):
         self.full_clean() 
-        super().save(*args, **kwargs)
+        changed = self.refresh_tour_package_resolution() + self.refresh_effective_payout()
+        if changed and kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = set(kwargs['update_fields']) | set(changed)
+        # A new booking holds no reservation rows yet, so one holding no days has nothing to sync.
+        needs_reservation_sync = not self._state.adding or bool(self.reserved_guide_days())
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if needs_reservation_sync and getattr(self, '_availability_inputs', None) != self.availability_state():
+                # A conflict raises here and rolls the booking write back with it.
+                self.sync_guide_reservations()
+        self._remember_saved_state()
             
     def __str__(self):
         parts = []
@@ -260,4 +471,69 @@ class BookingJourneyCheckpoint(models.Model):
         ]
 
     def __str__(self):
-        return f"Booking {self.booking_id} - Day {self.day_number} Stop {self.stop_index + 1}" 
\ No newline at end of file
+        return f"Booking {self.booking_id} - Day {self.day_number} Stop {self.stop_index + 1}" 
+
+class ProviderAvailabilityMonth(models.Model):
+    """
+    Occupied days of one guide or agency in one calendar month, as bitmasks
+    (bit ``day - 1`` set means the day is taken). Rebuilt from the provider's
+    bookings whenever a booking touching the month changes; see
+    ``accommodation_booking.availability``. No row means a free month.
+    """
+
+    provider = models.ForeignKey(User, related_name='availability_months', on_delete=models.CASCADE)
+    month = models.DateField(help_text='First day of the month.')
+    confirmed_mask = models.IntegerField(default=0, help_text='Days covered by Confirmed bookings.')
+    active_mask = models.IntegerField(default=0, help_text='Days covered by any booking still holding the provider.')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['provider', 'month']
+        constraints = [
+            models.UniqueConstraint(fields=['provider', 'month'], name='unique_provider_availability_month'),
+        ]
+
+    def __str__(self):
+        return f"{self.provider_id} {self.month:%Y-%m}"
+
+
+
+class GuideDayReservation(models.Model):
+    """
+    One row per day a guide is held by a Confirmed booking. The unique
+    (guide, day) constraint is what makes overlapping confirmations impossible,
+    including concurrent ones; see ``Booking.sync_guide_reservations``.
+    """
+
+    guide = models.ForeignKey(User, related_name='day_reservations', on_delete=models.CASCADE)
+    day = models.DateField()
+    booking = models.ForeignKey(Booking, related_name='guide_day_reservations', on_delete=models.CASCADE)
+
+    class Meta:
+        ordering = ['guide', 'day']
+        constraints = [
+            models.UniqueConstraint(fields=['guide', 'day'], name='unique_guide_day_reservation'),
+        ]
+
+    def __str__(self):
+        return f"{self.guide_id} {self.day} (booking {self.booking_id})"
+
+
+
+class BookingSearchDocument(models.Model):
+    """
+    Denormalized, normalized search text for one booking, kept in sync on
+    write so booking search reads one indexed table instead of joining four.
+    The full-text index over ``document`` is backend specific; see
+    ``accommodation_booking.search``.
+    """
+
+    booking = models.OneToOneField(Booking, primary_key=True, related_name='search_document', on_delete=models.CASCADE)
+    tourist_name = models.CharField(max_length=301, blank=True, default='')
+    destination_name = models.CharField(max_length=255, blank=True, default='')
+    accommodation_title = models.CharField(max_length=255, blank=True, default='')
+    document = models.TextField(blank=True, default='')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Booking {self.booking_id}: {self.document}"
@@ -0,0 +1,35 @@
+"""
+Consistency checks for the stored ``Booking.effective_payout`` column.
+
+``Booking.save()`` keeps the column current. Writes that skip it
+(``QuerySet.update``, ``bulk_update``, raw SQL) can leave it stale, which
+is what these helpers detect and repair.
+"""
+from .models import Booking, compute_effective_payout
+
+_PAYOUT_INPUTS = ('total_price', 'down_payment', 'platform_fee', 'guide_payout_amount')
+
+
+def find_payout_drift():
+    """
+    Compares every stored ``effective_payout`` with a fresh computation.
+
+    Returns a list of ``(booking_id, expected, actual)`` tuples.
+    """
+    drift = []
+    rows = Booking.objects.order_by('id').values_list('id', 'effective_payout', *_PAYOUT_INPUTS)
+    for booking_id, actual, *inputs in rows.iterator():
+        expected = compute_effective_payout(*inputs)
+        if expected != actual:
+            drift.append((booking_id, expected, actual))
+    return drift
+
+
+def repair_payouts(drift, batch_size=1000):
+    """Writes the expected values from ``find_payout_drift()`` back in batches."""
+    Booking.objects.bulk_update(
+        [Booking(id=booking_id, effective_payout=expected) for booking_id, expected, _actual in drift],
+        ['effective_payout'],
+        batch_size=batch_size,
+    )
+    return len(drift)
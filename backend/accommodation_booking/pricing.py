@@ -0,0 +1,322 @@
+"""
+Booking pricing, in ``Decimal`` throughout.
+
+A quote prices one combination of provider (guide or agency user), tour
+package, accommodation, dates and party size:
+
+- days: check-in to check-out inclusive, at least one;
+- accommodation: nightly ``price`` x days;
+- tour: daily rate x days. One guest pays the solo rate; a group pays the solo
+  rate plus ``additional fee per head`` for every extra guest. A package's
+  rates replace the provider's own;
+- down payment: the agency's ``down_payment_percentage`` of the total (30%
+  for guides and hosts), the rest is the balance due.
+
+``quote_booking`` prices an in-memory booking from the rows it already holds.
+``quote_many`` prices many combinations given by id, loading each missing
+rate source in one query per kind. Rates are kept in a per-process cache for
+``PRICING_RATE_CACHE_TTL`` seconds (at most ``PRICING_RATE_CACHE_MAX_ENTRIES``
+of them, least recently used first out) and dropped when a source row is saved or
+deleted in this process (signals.py); other processes may serve a rate up to
+one TTL old, which is acceptable for quotes but not for creating a booking,
+so ``quote_booking`` never reads the cache. Both paths price only active
+tour packages.
+"""
+import threading
+import time
+from collections import OrderedDict
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from destinations_and_attractions.models import TourPackage
+
+from .models import Accommodation
+
+DEFAULT_DOWN_PAYMENT_PERCENTAGE = Decimal('30.00')
+DEFAULT_RATE_CACHE_TTL = 60
+DEFAULT_RATE_CACHE_MAX_ENTRIES = 5000
+_ZERO = Decimal('0.00')
+_CENT = Decimal('0.01')
+
+
+def _money(value):
+    return Decimal(str(value or 0)).quantize(_CENT, rounding=ROUND_HALF_UP)
+
+
+def trip_days(check_in, check_out):
+    return max((check_out - check_in).days + 1, 1)
+
+
+# Rates are (solo per day, extra per head per day) tuples.
+def provider_rates(provider):
+    group_price = provider.price_per_day or 0
+    return (
+        _money(provider.solo_price_per_day or group_price),
+        _money(provider.multiple_additional_fee_per_head),
+    )
+
+
+def package_rates(package, fallback):
+    """A package's solo rate falls back to the provider's; its extra fee does not."""
+    return (
+        _money(package.solo_price) if package.solo_price else fallback[0],
+        _money(package.additional_fee_per_head),
+    )
+
+
+_EMPTY_QUOTE = {
+    'days': 0,
+    'accommodation_total': _ZERO,
+    'tour_daily_rate': _ZERO,
+    'tour_total': _ZERO,
+    'total_price': _ZERO,
+    'down_payment': _ZERO,
+    'balance_due': _ZERO,
+}
+
+
+def quote(*, check_in, check_out, num_guests, accommodation_price=None, tour_rates=None,
+          down_payment_percentage=DEFAULT_DOWN_PAYMENT_PERCENTAGE):
+    """Prices one combination from already resolved rates. Returns a dict of Decimals."""
+    days = trip_days(check_in, check_out)
+    accommodation_total = _money(accommodation_price) * days if accommodation_price is not None else _ZERO
+
+    daily_rate = _ZERO
+    if tour_rates is not None:
+        solo_rate, extra_per_head = tour_rates
+        daily_rate = solo_rate + max(num_guests - 1, 0) * extra_per_head
+    tour_total = daily_rate * days
+
+    total_price = _money(accommodation_total + tour_total)
+    down_payment = _money(total_price * Decimal(str(down_payment_percentage)) / Decimal('100'))
+    return {
+        'days': days,
+        'accommodation_total': _money(accommodation_total),
+        'tour_daily_rate': _money(daily_rate),
+        'tour_total': _money(tour_total),
+        'total_price': total_price,
+        'down_payment': down_payment,
+        'balance_due': total_price - down_payment,
+    }
+
+
+def agency_down_payment_percentage(agency_user):
+    profile = getattr(agency_user, 'agency_profile', None) if agency_user else None
+    if profile is None:
+        return DEFAULT_DOWN_PAYMENT_PERCENTAGE
+    return Decimal(str(profile.down_payment_percentage))
+
+
+def quote_booking(booking):
+    """Prices an unsaved or saved booking from its loaded provider, package and accommodation."""
+    if not booking.check_in or not booking.check_out:
+        return dict(_EMPTY_QUOTE)
+
+    provider = booking.guide or booking.agency
+    tour_rates = None
+    if provider:
+        tour_rates = provider_rates(provider)
+        if booking.tour_package:
+            tour_rates = package_rates(booking.tour_package, tour_rates)
+
+    return quote(
+        check_in=booking.check_in,
+        check_out=booking.check_out,
+        num_guests=booking.num_guests,
+        accommodation_price=booking.accommodation.price if booking.accommodation else None,
+        tour_rates=tour_rates,
+        down_payment_percentage=agency_down_payment_percentage(booking.agency),
+    )
+
+
+class RateCache:
+    """
+    Per-process ``(kind, id) -> rates`` map with a TTL, bounded to
+    ``max_entries`` by evicting the least recently used entry.
+    """
+
+    def __init__(self, max_entries=None):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _max_entries(self):
+        return self.max_entries or getattr(settings, 'PRICING_RATE_CACHE_MAX_ENTRIES', DEFAULT_RATE_CACHE_MAX_ENTRIES)
+
+    def get_many(self, kind, ids):
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for source_id in ids:
+                key = (kind, source_id)
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                if entry[0] <= now:
+                    del self._entries[key]
+                    continue
+                self._entries.move_to_end(key)
+                found[source_id] = entry[1]
+        return found
+
+    def set_many(self, kind, values, ttl):
+        now = time.monotonic()
+        expires_at = now + ttl
+        max_entries = self._max_entries()
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if entry[0] <= now]:
+                del self._entries[key]
+            for source_id, value in values.items():
+                self._entries[(kind, source_id)] = (expires_at, value)
+                self._entries.move_to_end((kind, source_id))
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, kind, source_id):
+        with self._lock:
+            self._entries.pop((kind, source_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+rate_cache = RateCache()
+
+
+def _load_providers(ids):
+    rows = (
+        get_user_model().objects
+        .filter(id__in=ids)
+        .values_list('id', 'price_per_day', 'solo_price_per_day', 'multiple_additional_fee_per_head', 'agency_profile__down_payment_percentage')
+    )
+    return {
+        user_id: (
+            (_money(solo or group or 0), _money(extra_per_head)),
+            Decimal(str(percentage)) if percentage is not None else DEFAULT_DOWN_PAYMENT_PERCENTAGE,
+        )
+        for user_id, group, solo, extra_per_head, percentage in rows
+    }
+
+
+def _load_packages(ids):
+    rows = (
+        TourPackage.objects
+        .filter(id__in=ids, is_active=True)
+        .values_list('id', 'guide_id', 'agency__user_id', 'solo_price', 'additional_fee_per_head')
+    )
+    return {
+        package_id: (guide_id, agency_user_id, _money(solo) if solo else None, _money(extra_per_head))
+        for package_id, guide_id, agency_user_id, solo, extra_per_head in rows
+    }
+
+
+def _load_accommodations(ids):
+    return {
+        accommodation_id: _money(price)
+        for accommodation_id, price in Accommodation.objects.filter(id__in=ids).values_list('id', 'price')
+    }
+
+
+_LOADERS = {
+    'provider': _load_providers,
+    'package': _load_packages,
+    'accommodation': _load_accommodations,
+}
+
+
+def cached_rates(kind, ids):
+    """Rates for ``ids`` of one kind: cache first, then one query for the misses."""
+    ids = set(ids)
+    found = rate_cache.get_many(kind, ids)
+    missing = ids - set(found)
+    if missing:
+        # Ids with no row are not cached: callers choose them, so caching
+        # them would let anyone grow the cache.
+        loaded = _LOADERS[kind](missing)
+        rate_cache.set_many(kind, loaded, getattr(settings, 'PRICING_RATE_CACHE_TTL', DEFAULT_RATE_CACHE_TTL))
+        found.update(loaded)
+    return found
+
+
+def quote_many(items):
+    """
+    Prices many combinations in one call. Each item is a dict with
+    ``check_in``, ``check_out``, ``num_guests`` and any of ``guide``,
+    ``agency``, ``tour_package`` and ``accommodation`` ids. A package given
+    without a provider is priced for its owner.
+
+    Returns one dict per item, in order: a quote, or ``{'error': message}``.
+    """
+    packages = cached_rates('package', {item['tour_package'] for item in items if item.get('tour_package')})
+    accommodations = cached_rates('accommodation', {item['accommodation'] for item in items if item.get('accommodation')})
+
+    provider_ids = set()
+    for item in items:
+        provider_id = item.get('guide') or item.get('agency')
+        package = packages.get(item.get('tour_package'))
+        if not provider_id and package:
+            provider_id = package[0] or package[1]
+        if provider_id:
+            provider_ids.add(provider_id)
+        if item.get('agency'):
+            provider_ids.add(item['agency'])
+    providers = cached_rates('provider', provider_ids)
+
+    return [_quote_item(item, providers, packages, accommodations) for item in items]
+
+
+def _quote_item(item, providers, packages, accommodations):
+    guide_id = item.get('guide')
+    agency_id = item.get('agency')
+
+    package = None
+    if item.get('tour_package'):
+        package = packages.get(item['tour_package'])
+        if package is None:
+            return {'error': 'Tour package not found.'}
+        package_guide_id, package_agency_user_id = package[0], package[1]
+        if not guide_id and not agency_id:
+            guide_id, agency_id = package_guide_id, package_agency_user_id
+        elif (guide_id or None) != package_guide_id and (agency_id or None) != package_agency_user_id:
+            return {'error': 'Tour package does not belong to this provider.'}
+
+    accommodation_price = None
+    if item.get('accommodation'):
+        accommodation_price = accommodations.get(item['accommodation'])
+        if accommodation_price is None:
+            return {'error': 'Accommodation not found.'}
+
+    tour_rates = None
+    provider_id = guide_id or agency_id
+    if provider_id:
+        provider = providers.get(provider_id)
+        if provider is None:
+            return {'error': 'Provider not found.'}
+        tour_rates = provider[0]
+        if package is not None:
+            tour_rates = (package[2] if package[2] is not None else tour_rates[0], package[3])
+    elif accommodation_price is None:
+        return {'error': 'A guide, agency, tour package or accommodation is required.'}
+
+    down_payment_percentage = DEFAULT_DOWN_PAYMENT_PERCENTAGE
+    if agency_id and providers.get(agency_id) is not None:
+        down_payment_percentage = providers[agency_id][1]
+
+    return quote(
+        check_in=item['check_in'],
+        check_out=item['check_out'],
+        num_guests=item['num_guests'],
+        accommodation_price=accommodation_price,
+        tour_rates=tour_rates,
+        down_payment_percentage=down_payment_percentage,
+    )
+
+
+def invalidate_rates(kind, source_id):
+    rate_cache.invalidate(kind, source_id)
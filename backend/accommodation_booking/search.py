@@ -0,0 +1,191 @@
+"""
+Booking search over ``BookingSearchDocument``.
+
+Each booking has one document row holding its id, tourist name, destination
+name and accommodation title as normalized text (lowercase, accents and
+punctuation stripped). Booking saves rewrite the row directly; renaming a
+tourist, destination or accommodation queues the ``booking.refresh_search``
+outbox job for the affected bookings.
+
+The full-text index behind it depends on the database:
+
+- PostgreSQL: a GIN index on ``to_tsvector('simple', document)``, queried
+  with prefix ``tsquery`` terms and ranked by ``ts_rank``.
+- SQLite: an external-content FTS5 table kept in sync by triggers, queried
+  with prefix terms and ranked by ``bm25``.
+
+Both are created by migration 0031.
+- Anything else (or SQLite built without FTS5): ``icontains`` per term on the
+  single document column, unranked.
+
+Every term is matched as a prefix and all terms must match.
+"""
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import Q, Value
+from django.db.models.fields import FloatField
+
+from system_management_module.services.outbox import enqueue_job, register_job_handler
+
+from .models import Booking, BookingSearchDocument
+
+REFRESH_JOB = 'booking.refresh_search'
+FTS_TABLE = 'booking_search_fts'
+DEFAULT_BATCH_SIZE = 500
+_MAX_TERMS = 8
+
+_sqlite_fts_ready = {}
+
+
+def normalize_search_text(value):
+    text = unicodedata.normalize('NFKD', str(value or ''))
+    text = ''.join(char for char in text if not unicodedata.combining(char)).lower()
+    return re.sub(r'[\W_]+', ' ', text).strip()
+
+
+def search_terms(raw_query):
+    return normalize_search_text(raw_query).split()[:_MAX_TERMS]
+
+
+def tourist_display_name(first_name, last_name):
+    return ' '.join(part for part in (first_name, last_name) if part).strip()
+
+
+def build_document(booking_id, tourist_name, destination_name, accommodation_title):
+    return ' '.join(
+        part for part in (
+            str(booking_id),
+            normalize_search_text(tourist_name),
+            normalize_search_text(destination_name),
+            normalize_search_text(accommodation_title),
+        )
+        if part
+    )
+
+
+def refresh_search_documents(bookings=None, *, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Rewrites the documents of ``bookings`` (a Booking queryset, default all) in
+    id-ordered batches: one read and one upsert per batch. Returns the row count.
+    """
+    bookings = Booking.objects.all() if bookings is None else bookings
+    rows = (
+        bookings
+        .order_by('id')
+        .values_list('id', 'tourist__first_name', 'tourist__last_name', 'destination__name', 'accommodation__title')
+    )
+
+    written = 0
+    last_id = 0
+    while True:
+        batch = list(rows.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            return written
+
+        documents = []
+        for booking_id, first_name, last_name, destination_name, accommodation_title in batch:
+            tourist_name = tourist_display_name(first_name, last_name)
+            documents.append(BookingSearchDocument(
+                booking_id=booking_id,
+                tourist_name=tourist_name[:301],
+                destination_name=(destination_name or '')[:255],
+                accommodation_title=(accommodation_title or '')[:255],
+                document=build_document(booking_id, tourist_name, destination_name, accommodation_title),
+            ))
+        BookingSearchDocument.objects.bulk_create(
+            documents,
+            update_conflicts=True,
+            unique_fields=['booking'],
+            update_fields=['tourist_name', 'destination_name', 'accommodation_title', 'document', 'updated_at'],
+        )
+        written += len(documents)
+        if len(batch) < batch_size:
+            return written
+        last_id = batch[-1][0]
+
+
+# source -> (stored column, current value of the renamed instance)
+_RENAME_SOURCES = {
+    'tourist': ('tourist_name', lambda user: tourist_display_name(user.first_name, user.last_name)),
+    'destination': ('destination_name', lambda destination: destination.name or ''),
+    'accommodation': ('accommodation_title', lambda accommodation: accommodation.title or ''),
+}
+
+
+def queue_refresh_for_renamed(source, instance):
+    """
+    Called when a tourist, destination or accommodation is saved: queues a
+    refresh of the bookings whose stored name no longer matches. Costs one
+    indexed existence query when nothing changed.
+    """
+    column, current_value = _RENAME_SOURCES[source]
+    stored_value = current_value(instance)[:BookingSearchDocument._meta.get_field(column).max_length]
+    stale = (
+        BookingSearchDocument.objects
+        .filter(**{f'booking__{source}_id': instance.pk})
+        .exclude(**{column: stored_value})
+    )
+    if stale.exists():
+        enqueue_job(
+            REFRESH_JOB,
+            {'source': source, 'id': instance.pk},
+            dedupe_key=f'{REFRESH_JOB}:{source}:{instance.pk}',
+        )
+
+
+@register_job_handler(REFRESH_JOB)
+def _run_refresh_job(payload):
+    source = payload.get('source')
+    if source not in _RENAME_SOURCES:
+        return
+    refresh_search_documents(Booking.objects.filter(**{f'{source}_id': payload.get('id')}))
+
+
+def _sqlite_fts_available():
+    key = connection.settings_dict['NAME']
+    if key not in _sqlite_fts_ready:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+            _sqlite_fts_ready[key] = cursor.fetchone() is not None
+    return _sqlite_fts_ready[key]
+
+
+def search_bookings(queryset, raw_query):
+    """
+    Filters ``queryset`` to bookings matching every term of ``raw_query`` as a
+    prefix, with a ``search_rank`` (higher is better) to order by. The booking
+    id is part of the document, so a numeric query finds that booking too.
+    """
+    terms = search_terms(raw_query)
+    if not terms:
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+        query = SearchQuery(' & '.join(f'{term}:*' for term in terms), search_type='raw', config='simple')
+        matches = (
+            BookingSearchDocument.objects
+            .annotate(vector=SearchVector('document', config='simple'))
+            .filter(vector=query)
+            .values('booking_id')
+        )
+        rank = SearchRank(SearchVector('search_document__document', config='simple'), query)
+        return queryset.filter(id__in=matches).annotate(search_rank=rank)
+
+    if connection.vendor == 'sqlite' and _sqlite_fts_available():
+        # Joined rather than ranked in a correlated subquery: that would re-run
+        # the MATCH once per matching booking. bm25() is lower-is-better.
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f'{FTS_TABLE}.rowid = {Booking._meta.db_table}.id', f'{FTS_TABLE} MATCH %s'],
+            params=[' '.join(f'"{term}"*' for term in terms)],
+            select={'search_rank': f'-bm25({FTS_TABLE})'},
+        )
+
+    matches = Q()
+    for term in terms:
+        matches &= Q(search_document__document__icontains=term)
+    return queryset.filter(matches).annotate(search_rank=Value(0.0, output_field=FloatField()))
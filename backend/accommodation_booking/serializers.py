@@ -1,16 +1,48 @@
 from rest_framework import serializers 
 from .models import Accommodation, Booking, BookingJourneyCheckpoint
-from destinations_and_attractions.models import Destination, TourPackage
+from destinations_and_attractions.models import Destination, TourPackage, TourStop
+from destinations_and_attractions.serializers import destination_cover_url, destination_cover_variants
 from django.contrib.auth import get_user_model
+from django.db.models import OuterRef, Prefetch, Subquery
 from datetime import date, timedelta
 from django.utils import timezone
 import json
 
 from agency_management_module.models import TouristGuide
 from backend.location_policy import validate_zds_location_payload
+from backend.projection import FieldProjectionMixin
+from payment.models import Payment
 
 User = get_user_model()
 
+
+def prefetch_booking_read_relations(queryset):
+    """
+    Loads everything ``BookingSerializer`` renders in a fixed number of queries,
+    independent of how many bookings are on the page.
+    """
+    latest_payment = Payment.objects.filter(related_booking=OuterRef('pk')).order_by('-timestamp', '-id')
+    ordered_stops = TourStop.objects.order_by('order', 'id')
+
+    return queryset.select_related(
+        'tourist__agency_profile',
+        'guide__agency_profile',
+        'agency__agency_profile',
+        'accommodation__host',
+        'accommodation__agency__user',
+        'accommodation__destination',
+        'destination',
+        'tour_package',
+        'payout_processed_by',
+    ).prefetch_related(
+        Prefetch('tour_package__stops', queryset=ordered_stops),
+        'assigned_guides',
+        'assigned_agency_guides',
+    ).annotate(
+        latest_refund_status=Subquery(latest_payment.values('refund_status')[:1]),
+    )
+
+
 class SimpleUserSerializer(serializers.ModelSerializer):
     agency_phone = serializers.CharField(source='agency_profile.phone', read_only=True)
 
@@ -24,19 +56,17 @@ class SimpleUserSerializer(serializers.ModelSerializer):
 
 class SimpleDestinationSerializer(serializers.ModelSerializer):
     image = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Destination
-        fields = ['id', 'name', 'category', 'image']
+        fields = ['id', 'name', 'category', 'image', 'image_variants']
 
     def get_image(self, obj):
-        first_img = obj.images.first() 
-        if first_img and first_img.image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(first_img.image.url)
-            return first_img.image.url
-        return None
+        return destination_cover_url(obj, self.context.get('request'))
+
+    def get_image_variants(self, obj):
+        return destination_cover_variants(obj, self.context.get('request'))
 
 class AccommodationSerializer(serializers.ModelSerializer):
     host_id = serializers.PrimaryKeyRelatedField(source='host', read_only=True)
@@ -275,7 +305,7 @@ class AccommodationSerializer(serializers.ModelSerializer):
 
         return attrs
 
-class BookingSerializer(serializers.ModelSerializer):
+class BookingSerializer(FieldProjectionMixin, serializers.ModelSerializer):
     tourist_id = serializers.PrimaryKeyRelatedField(source='tourist', read_only=True)
     tourist_username = serializers.CharField(source='tourist.username', read_only=True)
     
@@ -298,7 +328,7 @@ class BookingSerializer(serializers.ModelSerializer):
         model = Booking
         fields = [
             'id', 'tourist_id', 'tourist_username', 'tourist_detail', # ADDED tourist_detail
-            'accommodation', 'guide', 'agency', 'destination', 'tour_package',
+            'accommodation', 'guide', 'agency', 'destination', 'tour_package', 'tour_package_resolution',
             'accommodation_detail', 'guide_detail', 'agency_detail', 'provider_payout_account', 'destination_detail', 'tour_package_detail',
             'assigned_guides', 'assigned_guides_detail',
             'assigned_agency_guides', 'assigned_agency_guides_detail',
@@ -323,9 +353,25 @@ class BookingSerializer(serializers.ModelSerializer):
             'downpayment_paid_at', 'balance_paid_at', 
             'platform_fee', 'guide_payout_amount',
             'is_payout_settled', 'payout_settled_at', 'payout_channel', 'payout_reference_id', 'payout_processed_by',
-            'assigned_guides', 'assigned_agency_guides', 'destination_detail', 'tour_package',
+            'assigned_guides', 'assigned_agency_guides', 'destination_detail', 'tour_package', 'tour_package_resolution',
             'meetup_location', 'meetup_municipality', 'meetup_latitude', 'meetup_longitude', 'meetup_time', 'meetup_instructions' 
         ]
+        expandable_fields = [
+            'tourist_detail', 'accommodation_detail', 'guide_detail', 'agency_detail', 'provider_payout_account',
+            'destination_detail', 'tour_package_detail', 'assigned_guides_detail', 'assigned_agency_guides_detail',
+            'payout_processed_by_detail',
+        ]
+        field_sources = {
+            'tourist_detail': ['tourist__agency_profile'],
+            'guide_detail': ['guide__agency_profile'],
+            'agency_detail': ['agency__agency_profile'],
+            'provider_payout_account': ['guide', 'agency', 'accommodation__host'],
+            'tour_package_detail': ['guide', 'agency', 'check_in', 'check_out', 'tour_package__stops'],
+            'refund_status': ['latest_refund_status'],
+            'payout_processed_by_detail': ['payout_processed_by'],
+            'assigned_guides_detail': ['assigned_guides'],
+            'assigned_agency_guides_detail': ['assigned_agency_guides'],
+        }
 
     def validate_additional_guest_names(self, value):
         if isinstance(value, str):
@@ -410,30 +456,10 @@ class BookingSerializer(serializers.ModelSerializer):
         if not obj.guide and not obj.agency:
             return None
 
-        selected = None
-        if obj.tour_package:
-            selected = obj.tour_package
-        elif obj.tour_package_id:
-            selected = TourPackage.objects.filter(id=obj.tour_package_id).first()
-
+        # Inferred packages are stored on save, so reads never guess here.
+        selected = obj.tour_package
         trip_days = max((obj.check_out - obj.check_in).days + 1, 1)
 
-        if not selected and obj.destination:
-            candidates = TourPackage.objects.filter(
-                main_destination=obj.destination,
-                is_active=True,
-                duration_days=trip_days,
-            )
-            if obj.guide:
-                candidates = candidates.filter(guide=obj.guide)
-            elif obj.agency:
-                candidates = candidates.filter(agency__user=obj.agency)
-
-            candidates = candidates.order_by('-created_at', '-id')
-
-            if candidates.count() == 1:
-                selected = candidates.first()
-
         if not selected:
             return None
 
@@ -461,7 +487,7 @@ class BookingSerializer(serializers.ModelSerializer):
         # NEW: Fetch the related TourStops so we have the images!
         stops_data = []
         request = self.context.get('request')
-        for stop in selected.stops.all().order_by('order'):
+        for stop in sorted(selected.stops.all(), key=lambda stop: (stop.order, stop.id)):
             img_url = None
             if stop.image:
                 img_url = stop.image.url
@@ -487,6 +513,9 @@ class BookingSerializer(serializers.ModelSerializer):
         }
 
     def get_refund_status(self, obj):
+        if hasattr(obj, 'latest_refund_status'):
+            return obj.latest_refund_status or 'none'
+
         latest_payment = obj.payments.order_by('-timestamp', '-id').first()
         if not latest_payment:
             return 'none'
@@ -781,4 +810,25 @@ class BookingJourneyCheckpointSerializer(serializers.ModelSerializer):
             instance.updated_by = user
 
         instance.save()
-        return instance
\ No newline at end of file
+        return instance
+
+BOOKING_QUOTE_MAX_ITEMS = 100
+
+
+class BookingQuoteItemSerializer(serializers.Serializer):
+    guide = serializers.IntegerField(required=False, allow_null=True, min_value=1)
+    agency = serializers.IntegerField(required=False, allow_null=True, min_value=1)
+    tour_package = serializers.IntegerField(required=False, allow_null=True, min_value=1)
+    accommodation = serializers.IntegerField(required=False, allow_null=True, min_value=1)
+    check_in = serializers.DateField()
+    check_out = serializers.DateField()
+    num_guests = serializers.IntegerField(min_value=1, max_value=1000)
+
+    def validate(self, attrs):
+        if attrs['check_out'] < attrs['check_in']:
+            raise serializers.ValidationError({"check_out": "Check-out cannot be before check-in."})
+        return attrs
+
+
+class BookingQuoteRequestSerializer(serializers.Serializer):
+    items = BookingQuoteItemSerializer(many=True, allow_empty=False, max_length=BOOKING_QUOTE_MAX_ITEMS)
@@ -0,0 +1,91 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from agency_management_module.models import Agency
+from destinations_and_attractions.models import Destination, TourPackage
+from user_authentication.models import User
+
+from .availability import sync_booking_availability
+from .models import Accommodation, Booking
+from .pricing import invalidate_rates
+from .search import queue_refresh_for_renamed, refresh_search_documents
+from .tour_packages import mark_bookings_stale_for_package
+
+
+@receiver(post_save, sender=TourPackage)
+def reconcile_bookings_for_saved_package(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    mark_bookings_stale_for_package(instance)
+
+
+@receiver(post_delete, sender=TourPackage)
+def reconcile_bookings_for_deleted_package(sender, instance, **kwargs):
+    mark_bookings_stale_for_package(instance)
+
+
+@receiver(post_save, sender=Booking)
+def update_availability_for_saved_booking(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = None if created else getattr(instance, '_availability_inputs', None)
+    sync_booking_availability(previous, instance.availability_state())
+
+
+@receiver(post_delete, sender=Booking)
+def update_availability_for_deleted_booking(sender, instance, **kwargs):
+    sync_booking_availability(getattr(instance, '_availability_inputs', None) or instance.availability_state(), None)
+
+
+@receiver(post_save, sender=Booking)
+def update_search_document_for_saved_booking(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created or getattr(instance, '_search_inputs', None) != instance.search_state():
+        refresh_search_documents(Booking.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=User)
+def refresh_search_for_renamed_tourist(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Most User saves (last_login, counters, flags) pass update_fields without names.
+    if raw or (update_fields is not None and not {'first_name', 'last_name'} & set(update_fields)):
+        return
+    queue_refresh_for_renamed('tourist', instance)
+
+
+@receiver(post_save, sender=Destination)
+def refresh_search_for_renamed_destination(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    queue_refresh_for_renamed('destination', instance)
+
+
+@receiver(post_save, sender=Accommodation)
+def refresh_search_for_renamed_accommodation(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    queue_refresh_for_renamed('accommodation', instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_provider_rates(sender, instance, **kwargs):
+    invalidate_rates('provider', instance.pk)
+
+
+@receiver(post_save, sender=Agency)
+@receiver(post_delete, sender=Agency)
+def invalidate_agency_rates(sender, instance, **kwargs):
+    invalidate_rates('provider', instance.user_id)
+
+
+@receiver(post_save, sender=TourPackage)
+@receiver(post_delete, sender=TourPackage)
+def invalidate_package_rates(sender, instance, **kwargs):
+    invalidate_rates('package', instance.pk)
+
+
+@receiver(post_save, sender=Accommodation)
+@receiver(post_delete, sender=Accommodation)
+def invalidate_accommodation_rates(sender, instance, **kwargs):
+    invalidate_rates('accommodation', instance.pk)
@@ -1,16 +1,48 @@
+import importlib
+import io
+import shutil
+import tempfile
+import threading
+import time
 from datetime import date, timedelta
+from decimal import Decimal
+from unittest import skipUnless
 
+from django.apps import apps as django_apps
 from django.contrib.auth import get_user_model
+from django.core.cache import cache as django_cache
 from django.core.exceptions import ValidationError
-from django.test import TestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.urls import reverse
-from rest_framework.test import APIClient
-
-from agency_management_module.models import Agency
-from destinations_and_attractions.models import Destination, TourPackage
-
-from .models import Accommodation, Booking, BookingJourneyCheckpoint
-from .serializers import BookingSerializer
+from PIL import Image
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from agency_management_module.models import Agency, TouristGuide
+from destinations_and_attractions.models import Destination, DestinationImage, TourPackage, TourStop
+from payment.models import Payment
+from system_management_module.models import OutboxJob
+from system_management_module.services.outbox import EMAIL_JOB, process_outbox
+
+from . import availability, pricing
+from .booking_events import BOOKING_CREATED
+from .models import (
+	Accommodation,
+	Booking,
+	BookingJourneyCheckpoint,
+	BookingSearchDocument,
+	GuideDayReservation,
+	ProviderAvailabilityMonth,
+	compute_effective_payout,
+)
+from .serializers import BookingSerializer, SimpleDestinationSerializer
+from .search import REFRESH_JOB
+from .tour_packages import RESOLVE_JOB
+from .views import BookingViewSet
 
 User = get_user_model()
 
@@ -88,6 +120,113 @@ class AccommodationBookingModelTests(TestCase):
 		self.assertTrue(booking.id)
 
 
+
+class GuideDayReservationTests(TestCase):
+	def setUp(self):
+		self.client = APIClient()
+		self.tourist = User.objects.create_user(username="reserve_tourist", password="Pass12345")
+		self.guide = User.objects.create_user(
+			username="reserve_guide",
+			password="Pass12345",
+			is_local_guide=True,
+			guide_approved=True,
+		)
+		self.destination = Destination.objects.create(
+			name="Merloquet Falls",
+			description="Falls",
+			category="Nature",
+			location="Zamboanga City",
+			municipality="Zamboanga City",
+			latitude="7.150000",
+			longitude="122.250000",
+		)
+		self.start = date.today() + timedelta(days=10)
+
+	def _booking(self, first, last, status="Pending_Payment"):
+		return Booking.objects.create(
+			tourist=self.tourist,
+			guide=self.guide,
+			destination=self.destination,
+			check_in=self.start + timedelta(days=first),
+			check_out=self.start + timedelta(days=last),
+			num_guests=1,
+			status=status,
+		)
+
+	def _reserved(self, booking):
+		return list(GuideDayReservation.objects.filter(booking=booking).values_list("day", flat=True))
+
+	def test_confirming_reserves_days_and_cancelling_releases_them(self):
+		booking = self._booking(0, 2)
+		self.assertEqual(self._reserved(booking), [])
+
+		booking.status = "Confirmed"
+		booking.save()
+		self.assertEqual(self._reserved(booking), [self.start, self.start + timedelta(days=1)])
+
+		booking.status = "Cancelled"
+		booking.save()
+		self.assertEqual(self._reserved(booking), [])
+		self._booking(0, 2, status="Confirmed")
+
+	def test_back_to_back_trips_share_the_changeover_day(self):
+		self._booking(0, 2, status="Confirmed")
+		follow_up = self._booking(2, 4, status="Confirmed")
+
+		self.assertEqual(self._reserved(follow_up), [self.start + timedelta(days=2), self.start + timedelta(days=3)])
+
+	def test_stale_confirmations_cannot_both_succeed(self):
+		first = self._booking(0, 3)
+		second = self._booking(1, 4)
+		# Both copies were loaded before either confirmation, as two concurrent
+		# payment callbacks would see them.
+		first_copy = Booking.objects.get(pk=first.pk)
+		second_copy = Booking.objects.get(pk=second.pk)
+
+		first_copy.status = "Confirmed"
+		first_copy.save()
+		second_copy.status = "Confirmed"
+		with self.assertRaises(ValidationError):
+			second_copy.save()
+
+		second.refresh_from_db()
+		self.assertEqual(second.status, "Pending_Payment")
+		self.assertEqual(self._reserved(second), [])
+
+	def test_moving_dates_moves_the_reservation(self):
+		booking = self._booking(0, 2, status="Confirmed")
+
+		booking.check_in = self.start + timedelta(days=5)
+		booking.check_out = self.start + timedelta(days=5)
+		booking.save()
+
+		self.assertEqual(self._reserved(booking), [self.start + timedelta(days=5)])
+		self._booking(0, 2, status="Confirmed")
+
+	def test_unique_constraint_guards_direct_inserts(self):
+		booking = self._booking(0, 1, status="Confirmed")
+
+		with self.assertRaises(IntegrityError), transaction.atomic():
+			GuideDayReservation.objects.create(guide=self.guide, day=self.start, booking=booking)
+
+	def test_status_update_returns_400_when_dates_were_taken(self):
+		self._booking(0, 2, status="Confirmed")
+		pending = self._booking(1, 3)
+		self.client.force_authenticate(user=self.guide)
+
+		response = self.client.patch(
+			reverse("booking-status-update", kwargs={"pk": pending.pk}),
+			{"status": "Confirmed"},
+			format="json",
+		)
+
+		self.assertEqual(response.status_code, 400)
+		self.guide.refresh_from_db()
+		self.assertEqual(self.guide.booking_count, 0)
+		pending.refresh_from_db()
+		self.assertEqual(pending.status, "Pending_Payment")
+
+
 class AccommodationBookingSerializerTests(TestCase):
 	def setUp(self):
 		self.guide = User.objects.create_user(
@@ -194,6 +333,24 @@ class AccommodationBookingSerializerTests(TestCase):
 		self.assertFalse(serializer.is_valid())
 		self.assertIn("num_guests", serializer.errors)
 
+	def test_destination_image_variants_are_absolute_like_image(self):
+		Destination.objects.filter(id=self.destination.id).update(
+			cover_image_url="/media/destination_images/island.jpg",
+			cover_card_url="/media/destination_images/island_card.jpg",
+			cover_thumbnail_url="/media/destination_images/island_thumb.jpg",
+		)
+		self.destination.refresh_from_db()
+		request = Request(APIRequestFactory().get("/api/bookings/"))
+
+		data = SimpleDestinationSerializer(self.destination, context={"request": request}).data
+
+		self.assertEqual(data["image"], "http://testserver/media/destination_images/island.jpg")
+		self.assertEqual(data["image_variants"], {
+			"thumbnail": "http://testserver/media/destination_images/island_thumb.jpg",
+			"card": "http://testserver/media/destination_images/island_card.jpg",
+			"full": data["image"],
+		})
+
 
 class AccommodationBookingApiTests(TestCase):
 	def setUp(self):
@@ -236,6 +393,1143 @@ class AccommodationBookingApiTests(TestCase):
 		self.assertEqual(float(response.data["down_payment"]), 0.0)
 
 
+class BookingListQueryCountTests(TestCase):
+	def setUp(self):
+		self.client = APIClient()
+		self.admin = User.objects.create_superuser(username="booking_admin", password="Pass12345", email="admin@example.com")
+		self.client.force_authenticate(user=self.admin)
+		self.destination = Destination.objects.create(
+			name="Pasonanca Park",
+			description="Park",
+			category="Nature",
+			location="Pasonanca, Zamboanga City",
+			municipality="Zamboanga City",
+			latitude="6.960000",
+			longitude="122.080000",
+		)
+		DestinationImage.objects.create(destination=self.destination, image="destination_images/park.jpg")
+		self.agency_user = User.objects.create_user(username="list_agency", password="Pass12345", is_staff=True)
+		self.agency = Agency.objects.create(
+			user=self.agency_user,
+			business_name="Zamboanga Tours",
+			owner_name="Ana Cruz",
+			email="list-agency@example.com",
+		)
+		self.agency_guide = TouristGuide.objects.create(
+			agency=self.agency,
+			first_name="Lito",
+			last_name="Reyes",
+			contact_number="09170000000",
+		)
+		self.accommodation = Accommodation.objects.create(
+			host=User.objects.create_user(username="list_host", password="Pass12345"),
+			destination=self.destination,
+			title="Garden Inn",
+			description="Rooms",
+			location="Tetuan, Zamboanga City",
+			latitude="6.920000",
+			longitude="122.080000",
+			price="1500.00",
+			photo="accommodations/inn.jpg",
+		)
+		self.created = 0
+
+	def _add_bookings(self, count):
+		for _ in range(count):
+			self.created += 1
+			index = self.created
+			tourist = User.objects.create_user(username=f"list_tourist_{index}", password="Pass12345")
+			guide = User.objects.create_user(
+				username=f"list_guide_{index}",
+				password="Pass12345",
+				is_local_guide=True,
+				guide_approved=True,
+			)
+			package = TourPackage.objects.create(
+				guide=guide,
+				main_destination=self.destination,
+				name=f"Park walk {index}",
+				description="Walk",
+				duration="1 day",
+				duration_days=2,
+				max_group_size=5,
+				price_per_day="1000.00",
+				solo_price="800.00",
+			)
+			TourStop.objects.create(tour=package, name="Gate", order=1)
+			check_in = date.today() + timedelta(days=index)
+			guide_booking = Booking.objects.create(
+				tourist=tourist,
+				guide=guide,
+				destination=self.destination,
+				check_in=check_in,
+				check_out=check_in + timedelta(days=1),
+				num_guests=1,
+			)
+			guide_booking.assigned_guides.add(guide)
+			Payment.objects.create(
+				payer=tourist,
+				payment_type="Booking",
+				related_booking=guide_booking,
+				amount="500.00",
+				refund_status="requested",
+			)
+
+			agency_booking = Booking.objects.create(
+				tourist=tourist,
+				agency=self.agency_user,
+				destination=self.destination,
+				check_in=check_in,
+				check_out=check_in,
+				num_guests=2,
+			)
+			agency_booking.assigned_agency_guides.add(self.agency_guide)
+
+			Booking.objects.create(
+				tourist=tourist,
+				accommodation=self.accommodation,
+				check_in=check_in,
+				check_out=check_in + timedelta(days=1),
+				num_guests=1,
+			)
+
+	def _list_query_count(self, page_size):
+		with CaptureQueriesContext(connection) as queries:
+			response = self.client.get(reverse("booking-list"), {"page_size": page_size})
+		self.assertEqual(response.status_code, 200)
+		return len(queries), response.json()["results"]
+
+	def test_booking_list_query_count_is_independent_of_page_size(self):
+		self._add_bookings(2)
+		small_count, small_page = self._list_query_count(6)
+		self._add_bookings(8)
+		large_count, large_page = self._list_query_count(30)
+
+		self.assertEqual(len(small_page), 6)
+		self.assertEqual(len(large_page), 30)
+		self.assertEqual(small_count, large_count)
+
+	def test_booking_list_renders_prefetched_details(self):
+		self._add_bookings(1)
+		_count, page = self._list_query_count(10)
+		by_target = {
+			("guide" if row["guide"] else "agency" if row["agency"] else "accommodation"): row
+			for row in page
+		}
+
+		guide_row = by_target["guide"]
+		self.assertEqual(guide_row["refund_status"], "requested")
+		self.assertEqual(guide_row["tour_package_detail"]["name"], "Park walk 1")
+		self.assertEqual([stop["name"] for stop in guide_row["tour_package_detail"]["stops"]], ["Gate"])
+		self.assertEqual(len(guide_row["assigned_guides_detail"]), 1)
+		self.assertTrue(guide_row["destination_detail"]["image"].endswith("park.jpg"))
+
+		agency_row = by_target["agency"]
+		self.assertEqual(agency_row["refund_status"], "none")
+		self.assertEqual(agency_row["agency_detail"]["business_name"], "Zamboanga Tours")
+		self.assertEqual(agency_row["assigned_agency_guides_detail"][0]["contact_number"], "09170000000")
+
+		accommodation_row = by_target["accommodation"]
+		self.assertTrue(accommodation_row["accommodation_detail"]["destination_detail"]["image"].endswith("park.jpg"))
+
+
+	def test_projected_list_drops_unrendered_relations(self):
+		self._add_bookings(2)
+		full_count, _page = self._list_query_count(10)
+		with CaptureQueriesContext(connection) as queries:
+			response = self.client.get(reverse("booking-list"), {"page_size": 10, "fields": "id,status,refund_status"})
+		self.assertEqual(response.status_code, 200)
+		rows = response.json()["results"]
+
+		self.assertEqual({tuple(sorted(row)) for row in rows}, {("id", "refund_status", "status")})
+		self.assertIn("requested", {row["refund_status"] for row in rows})
+		self.assertEqual(len(queries), full_count - 3)
+
+
+class BookingListQueryPlanTests(TestCase):
+	"""EXPLAIN checks that each supported BookingViewSet filter and sort reaches bookings through an index."""
+
+	# PostgreSQL plans from statistics, so it gets a realistically sized table.
+	POSTGRES_USERS = 200
+	POSTGRES_BOOKINGS = 20000
+	PAGE_SIZE = 20
+
+	@classmethod
+	def setUpTestData(cls):
+		cls.admin = User.objects.create_superuser(username="plan_admin", password="Pass12345", email="plan@example.com")
+		cls.member = User.objects.create_user(username="plan_member", password="Pass12345")
+		if connection.vendor == "postgresql":
+			cls._load_postgres_bookings()
+
+	@classmethod
+	def _load_postgres_bookings(cls):
+		users = User.objects.bulk_create([
+			User(username=f"plan_user_{index}", is_staff=index % 10 == 0)
+			for index in range(cls.POSTGRES_USERS)
+		])
+		check_in = date(2030, 1, 1)
+		bookings = Booking.objects.bulk_create([
+			Booking(
+				tourist=users[index % len(users)],
+				guide=users[(index * 7 + 3) % len(users)] if index % 2 else None,
+				agency=users[(index % 20) * 10] if not index % 2 else None,
+				check_in=check_in + timedelta(days=index % 365),
+				check_out=check_in + timedelta(days=index % 365 + 1),
+				num_guests=1 + index % 4,
+				# Financial statuses are rare, as they are in production.
+				status=("Confirmed", "Completed")[index % 2] if index % 100 == 0 else "Pending_Payment",
+				effective_payout=Decimal(500 + index % 5000),
+			)
+			for index in range(cls.POSTGRES_BOOKINGS)
+		], batch_size=2000)
+		Booking.objects.bulk_create([
+			Booking(tourist=cls.member, check_in=check_in, check_out=check_in, num_guests=1),
+			Booking(tourist=users[1], guide=cls.member, check_in=check_in, check_out=check_in, num_guests=1),
+			Booking(tourist=users[2], agency=cls.member, check_in=check_in, check_out=check_in, num_guests=1),
+		])
+		bookings[0].assigned_guides.add(cls.member)
+		with connection.cursor() as cursor:
+			# bulk_create stamps every row with the same created_at.
+			cursor.execute(
+				"UPDATE accommodation_booking_booking SET created_at = now() - id * interval '37 minutes'"
+			)
+			cursor.execute("ANALYZE accommodation_booking_booking")
+			cursor.execute(f"ANALYZE {Booking.assigned_guides.through._meta.db_table}")
+
+	def setUp(self):
+		self.factory = APIRequestFactory()
+
+	def _queryset(self, user, **params):
+		request = Request(self.factory.get("/", params))
+		request.user = user
+		return BookingViewSet(request=request, format_kwarg=None, action="list").get_queryset()
+
+	def _plan(self, user, **params):
+		queryset = self._queryset(user, **params)
+		if connection.vendor == "postgresql":
+			# A full listing of a large table is rightly a seq scan; clients read a page.
+			plan = queryset[:self.PAGE_SIZE].explain()
+		else:
+			plan = queryset.explain()
+		if connection.vendor == "postgresql":
+			self.assertNotRegex(plan, r"Seq Scan on accommodation_booking_booking\b")
+		elif user.is_superuser:
+			self.assertNotRegex(plan, r"(?m)\bSCAN (accommodation_booking_booking|U\d+)$")
+		else:
+			# Member lists must not walk all bookings, even in index order.
+			self.assertNotRegex(plan, r"\bSCAN (accommodation_booking_booking|U\d+)\b")
+		return plan
+
+	def _assert_uses_index(self, plan, *candidates):
+		self.assertTrue(any(name in plan for name in candidates), f"None of {candidates} in plan:\n{plan}")
+
+	def test_participant_filter_is_a_union_of_indexed_role_lookups(self):
+		queryset = self._queryset(self.member)
+		self.assertIn("UNION", str(queryset.query))
+		self.assertNotIn("DISTINCT", str(queryset.query))
+
+		plan = self._plan(self.member)
+		for index_name in (
+			"booking_tourist_created_idx",
+			"booking_guide_created_idx",
+			"booking_agency_created_idx",
+			"assigned_guides_user_id",
+		):
+			self._assert_uses_index(plan, index_name)
+
+		guide_plan = self._plan(self.member, view_as="guide")
+		self.assertNotIn("booking_tourist_created_idx", guide_plan)
+
+	def test_member_filters_and_sorts_stay_on_indexes(self):
+		for params in (
+			{"sort": "oldest"},
+			{"financial_only": "1"},
+			{"payout_status": "pending"},
+			{"date_from": "2031-01-01", "date_to": "2031-01-31"},
+			{"financial_only": "1", "sort": "amount_desc"},
+			{"search": "Pasonanca"},
+		):
+			with self.subTest(params=params):
+				self._plan(self.member, **params)
+
+	def test_admin_lists_use_created_and_status_indexes(self):
+		self._assert_uses_index(self._plan(self.admin), "booking_created_idx")
+		self._assert_uses_index(self._plan(self.admin, sort="oldest"), "booking_created_idx")
+		self._assert_uses_index(
+			self._plan(self.admin, date_from="2031-01-01", date_to="2031-01-31"),
+			"booking_created_idx",
+		)
+		self._assert_uses_index(
+			self._plan(self.admin, financial_only="1"),
+			"booking_status_created_idx",
+			"booking_status_payout_idx",
+			"booking_created_idx",
+		)
+
+	def test_admin_search_uses_the_fulltext_index(self):
+		plan = self._plan(self.admin, search="pasonanca park")
+		if connection.vendor == "postgresql":
+			self.assertIn("booking_search_document_fts", plan)
+		else:
+			self.assertIn("booking_search_fts VIRTUAL TABLE INDEX", plan)
+
+	def test_admin_amount_sorts_use_the_stored_payout_index(self):
+		self._assert_uses_index(self._plan(self.admin, sort="amount_desc"), "booking_payout_idx")
+		self._assert_uses_index(self._plan(self.admin, sort="amount_asc"), "booking_payout_idx")
+		self._assert_uses_index(
+			self._plan(self.admin, financial_only="1", sort="amount_desc"),
+			"booking_status_payout_idx",
+			"booking_payout_idx",
+		)
+
+	def test_postgres_plans_use_each_new_index(self):
+		if connection.vendor != "postgresql":
+			self.skipTest("SQLite plans are checked by the other tests.")
+
+		member_plan = self._plan(self.member)
+		for index_name in ("booking_tourist_created_idx", "booking_guide_created_idx", "booking_agency_created_idx"):
+			self.assertIn(index_name, member_plan)
+		self.assertIn("booking_created_idx", self._plan(self.admin))
+		self.assertIn("booking_payout_idx", self._plan(self.admin, sort="amount_desc"))
+		self.assertIn("booking_status_payout_idx", self._plan(self.admin, financial_only="1", sort="amount_desc"))
+		# Status tabs read one status newest first.
+		status_plan = Booking.objects.filter(status="Confirmed").order_by("-created_at")[:self.PAGE_SIZE].explain()
+		self.assertIn("booking_status_created_idx", status_plan)
+
+	def test_union_lists_each_booking_once(self):
+		member = User.objects.create_user(username="plan_union_member", password="Pass12345")
+		destination = Destination.objects.create(
+			name="Fort Pilar",
+			description="Shrine",
+			category="Historical",
+			location="Zamboanga City",
+			municipality="Zamboanga City",
+			latitude="6.900000",
+			longitude="122.080000",
+		)
+		booking = Booking.objects.create(
+			tourist=member,
+			agency=User.objects.create_user(username="plan_agency", password="Pass12345", is_staff=True),
+			destination=destination,
+			check_in=date(2031, 1, 10),
+			check_out=date(2031, 1, 11),
+			num_guests=1,
+		)
+		booking.assigned_guides.add(member)
+
+		self.assertEqual(list(self._queryset(member).values_list("id", flat=True)), [booking.id])
+		self.assertEqual(list(self._queryset(member, date_from="2031-01-01").values_list("id", flat=True)), [])
+
+
+class BookingSearchTests(TestCase):
+	def setUp(self):
+		self.client = APIClient()
+		self.admin = User.objects.create_superuser(username="search_admin", password="Pass12345", email="search@example.com")
+		self.client.force_authenticate(user=self.admin)
+		self.santa_cruz = Destination.objects.create(
+			name="Santa Cruz Island",
+			description="Pink sand beach",
+			category="Beach",
+			location="Zamboanga City",
+			municipality="Zamboanga City",
+			latitude="6.870000",
+			longitude="122.050000",
+		)
+		self.fort = Destination.objects.create(
+			name="Fort Pilar",
+			description="Shrine",
+			category="Historical",
+			location="Zamboanga City",
+			municipality="Zamboanga City",
+			latitude="6.900000",
+			longitude="122.080000",
+		)
+		self.ana = User.objects.create_user(username="search_ana", password="Pass12345", first_name="Ana", last_name="Cruz")
+		self.jose = User.objects.create_user(username="search_jose", password="Pass12345", first_name="José", last_name="Dela Peña")
+		self.guide = User.objects.create_user(
+			username="search_guide",
+			password="Pass12345",
+			is_local_guide=True,
+			guide_approved=True,
+		)
+
+	def _booking(self, tourist, destination):
+		return Booking.objects.create(
+			tourist=tourist,
+			guide=self.guide,
+			destination=destination,
+			check_in=date.today() + timedelta(days=5),
+			check_out=date.today() + timedelta(days=6),
+			num_guests=1,
+		)
+
+	def _search(self, term, **params):
+		response = self.client.get(reverse("booking-list"), {"search": term, "page_size": 50, **params})
+		self.assertEqual(response.status_code, 200)
+		return [row["id"] for row in response.json()["results"]]
+
+	def test_document_is_written_on_save(self):
+		booking = self._booking(self.jose, self.fort)
+
+		document = BookingSearchDocument.objects.get(booking=booking)
+		self.assertEqual(document.document, f"{booking.id} jose dela pena fort pilar")
+
+		booking.destination = self.santa_cruz
+		booking.save()
+		document.refresh_from_db()
+		self.assertEqual(document.destination_name, "Santa Cruz Island")
+
+	def test_prefix_terms_all_match_ignoring_accents(self):
+		jose_fort = self._booking(self.jose, self.fort)
+		jose_island = self._booking(self.jose, self.santa_cruz)
+		ana_fort = self._booking(self.ana, self.fort)
+
+		self.assertEqual(set(self._search("Jos")), {jose_fort.id, jose_island.id})
+		self.assertEqual(self._search("pena for"), [jose_fort.id])
+		self.assertEqual(set(self._search("pilar")), {jose_fort.id, ana_fort.id})
+		self.assertEqual(self._search(str(ana_fort.id)), [ana_fort.id])
+		self.assertEqual(self._search("zzz"), [])
+
+	def test_results_are_ranked_by_relevance_unless_sorted(self):
+		strong = self._booking(self.ana, self.santa_cruz)
+		weak = self._booking(self.ana, self.fort)
+
+		self.assertEqual(self._search("cruz"), [strong.id, weak.id])
+		self.assertEqual(self._search("cruz", sort="latest"), [weak.id, strong.id])
+
+	def test_renames_refresh_documents_through_the_outbox(self):
+		booking = self._booking(self.ana, self.fort)
+
+		self.fort.name = "Fuerte del Pilar"
+		self.fort.save()
+		self.ana.save(update_fields=["last_login"])
+		self.assertEqual(OutboxJob.objects.filter(kind=REFRESH_JOB).count(), 1)
+		self.assertEqual(self._search("fuerte"), [])
+
+		process_outbox()
+
+		self.assertEqual(self._search("fuerte"), [booking.id])
+		self.assertEqual(self._search("fort"), [])
+
+	def test_rebuild_command_restores_missing_documents(self):
+		booking = self._booking(self.ana, self.fort)
+		BookingSearchDocument.objects.all().delete()
+
+		call_command("rebuild_booking_search", stdout=io.StringIO())
+
+		self.assertEqual(self._search("ana"), [booking.id])
+
+
+class BookingCreatedPipelineTests(TestCase):
+	def setUp(self):
+		media_root = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, media_root, True)
+		storage = override_settings(
+			MEDIA_ROOT=media_root,
+			STORAGES={
+				"default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+				"staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+			},
+		)
+		storage.enable()
+		self.addCleanup(storage.disable)
+
+		self.client = APIClient()
+		self.tourist = User.objects.create_user(username="created_tourist", password="Pass12345", first_name="Ana", last_name="Cruz")
+		self.client.force_authenticate(user=self.tourist)
+		self.guide = User.objects.create_user(
+			username="created_guide",
+			password="Pass12345",
+			email="created-guide@example.com",
+			is_local_guide=True,
+			guide_approved=True,
+			guide_tier="paid",
+			available_days=["All"],
+			price_per_day="1000.00",
+			solo_price_per_day="1200.00",
+		)
+		self.destination = Destination.objects.create(
+			name="Great Santa Cruz Island",
+			description="Pink sand",
+			category="Beach",
+			location="Zamboanga City",
+			municipality="Zamboanga City",
+			latitude="6.870000",
+			longitude="122.050000",
+		)
+
+	def _id_image(self):
+		buffer = io.BytesIO()
+		Image.new("RGB", (4, 4), (200, 200, 200)).save(buffer, format="PNG")
+		return SimpleUploadedFile("id.png", buffer.getvalue(), content_type="image/png")
+
+	def _create(self, **data):
+		payload = {
+			"guide": self.guide.id,
+			"destination": self.destination.id,
+			"check_in": str(date.today() + timedelta(days=5)),
+			"check_out": str(date.today() + timedelta(days=6)),
+			"num_guests": 1,
+			**data,
+		}
+		return self.client.post(reverse("booking-list"), payload, format="multipart")
+
+	def test_create_prices_in_one_insert_and_defers_side_effects(self):
+		response = self._create(tourist_valid_id_image=self._id_image())
+
+		self.assertEqual(response.status_code, 201)
+		booking = Booking.objects.get(pk=response.data["id"])
+		self.assertEqual(booking.total_price, Decimal("2400.00"))
+		self.assertEqual(booking.down_payment, Decimal("720.00"))
+		self.assertEqual(
+			set(OutboxJob.objects.values_list("kind", flat=True)),
+			{f"{BOOKING_CREATED}.copy_tourist_id", f"{BOOKING_CREATED}.notify_provider"},
+		)
+		self.tourist.refresh_from_db()
+		self.assertFalse(self.tourist.valid_id_image)
+
+		process_outbox()
+
+		self.tourist.refresh_from_db()
+		self.assertEqual(self.tourist.valid_id_image.name, booking.tourist_valid_id_image.name)
+		email = OutboxJob.objects.get(kind=EMAIL_JOB)
+		self.assertEqual(email.payload["recipient_list"], ["created-guide@example.com"])
+		self.assertIn("Ana Cruz", email.payload["message"])
+
+	def test_rejected_target_leaves_no_booking_or_jobs(self):
+		self.guide.guide_tier = "free"
+		self.guide.booking_count = 1
+		self.guide.save(update_fields=["guide_tier", "booking_count"])
+
+		response = self._create()
+
+		self.assertEqual(response.status_code, 400)
+		self.assertFalse(Booking.objects.exists())
+		self.assertFalse(OutboxJob.objects.exists())
+
+
+class BookingPricingTests(TestCase):
+	def setUp(self):
+		pricing.rate_cache.clear()
+		self.addCleanup(pricing.rate_cache.clear)
+		self.client = APIClient()
+		self.tourist = User.objects.create_user(username="pricing_tourist", password="Pass12345")
+		self.guide = User.objects.create_user(
+			username="pricing_guide",
+			password="Pass12345",
+			is_local_guide=True,
+			guide_approved=True,
+			guide_tier="paid",
+			available_days=["All"],
+			solo_price_per_day="1200.00",
+			multiple_additional_fee_per_head="150.00",
+		)
+		self.agency_user = User.objects.create_user(username="pricing_agency", password="Pass12345", is_staff=True)
+		self.agency = Agency.objects.create(
+			user=self.agency_user,
+			business_name="Pricing Tours",
+			owner_name="Ana Cruz",
+			email="pricing-agency@example.com",
+			down_payment_percentage="50.00",
+		)
+		self.destination = Destination.objects.create(
+			name="Once Islas",
+			description="Island cluster",
+			category="Beach",
+			location="Zamboanga City",
+			municipality="Zamboanga City",
+			latitude="6.950000",
+			longitude="122.200000",
+		)
+		self.package = TourPackage.objects.create(
+			guide=self.guide,
+			main_destination=self.destination,
+			name="Once Islas Hop",
+			description="Island hopping",
+			duration="2 days",
+			duration_days=2,
+			max_group_size=10,
+			price_per_day="3000.00",
+			solo_price="3500.00",
+			additional_fee_per_head="250.00",
+		)
+		self.agency_package = TourPackage.objects.create(
+			agency=self.agency,
+			main_destination=self.destination,
+			name="Agency Islands",
+			description="Agency tour",
+			duration="1 day",
+			duration_days=1,
+			max_group_size=10,
+			price_per_day="2000.00",
+			solo_price="2200.00",
+			additional_fee_per_head="100.00",
+		)
+		self.days = {
+			"check_in": date.today() + timedelta(days=7),
+			"check_out": date.today() + timedelta(days=8),
+		}
+
+	def _quotes(self, *items):
+		response = self.client.post(reverse("booking-quotes"), {"items": list(items)}, format="json")
+		self.assertEqual(response.status_code, 200)
+		return response.json()["results"]
+
+	def _item(self, **fields):
+		return {
+			"check_in": str(self.days["check_in"]),
+			"check_out": str(self.days["check_out"]),
+			"num_guests": 3,
+			**fields,
+		}
+
+	def test_quote_uses_package_rates_and_agency_down_payment(self):
+		self.assertEqual(
+			pricing.quote(num_guests=3, tour_rates=(Decimal("3500.00"), Decimal("250.00")), **self.days),
+			{
+				"days": 2,
+				"accommodation_total": Decimal("0.00"),
+				"tour_daily_rate": Decimal("4000.00"),
+				"tour_total": Decimal("8000.00"),
+				"total_price": Decimal("8000.00"),
+				"down_payment": Decimal("2400.00"),
+				"balance_due": Decimal("5600.00"),
+			},
+		)
+
+		draft = Booking(agency=self.agency_user, tour_package=self.agency_package, num_guests=1, **self.days)
+		quoted = pricing.quote_booking(draft)
+		self.assertEqual(quoted["total_price"], Decimal("4400.00"))
+		self.assertEqual(quoted["down_payment"], Decimal("2200.00"))
+
+	def test_create_ignores_client_totals(self):
+		self.client.force_authenticate(user=self.tourist)
+		response = self.client.post(reverse("booking-list"), {
+			"guide": self.guide.id,
+			"destination": self.destination.id,
+			"tour_package_id": self.package.id,
+			"check_in": str(self.days["check_in"]),
+			"check_out": str(self.days["check_out"]),
+			"num_guests": 3,
+			"total_price": "1.00",
+			"down_payment": "1.00",
+			"balance_due": "0.00",
+		}, format="json")
+
+		self.assertEqual(response.status_code, 201)
+		self.assertEqual(response.data["total_price"], "8000.00")
+		self.assertEqual(response.data["down_payment"], "2400.00")
+		self.assertEqual(response.data["balance_due"], "5600.00")
+
+	def test_batch_quotes_price_each_item_or_report_why_not(self):
+		results = self._quotes(
+			self._item(guide=self.guide.id),
+			self._item(tour_package=self.package.id),
+			self._item(agency=self.agency_user.id, tour_package=self.agency_package.id, num_guests=1),
+			self._item(guide=self.guide.id, tour_package=self.agency_package.id),
+			self._item(tour_package=999999),
+			self._item(),
+		)
+
+		self.assertEqual(results[0]["total_price"], "3000.00")
+		self.assertEqual(results[1]["total_price"], "8000.00")
+		self.assertEqual(results[2]["down_payment"], "2200.00")
+		self.assertEqual(results[3], {"error": "Tour package does not belong to this provider."})
+		self.assertEqual(results[4], {"error": "Tour package not found."})
+		self.assertIn("error", results[5])
+
+	def test_rates_are_cached_until_their_source_changes(self):
+		items = [self._item(guide=self.guide.id), self._item(tour_package=self.package.id)]
+		with CaptureQueriesContext(connection) as first:
+			self._quotes(*items)
+		with CaptureQueriesContext(connection) as second:
+			self._quotes(*items)
+		self.assertLessEqual(len(first.captured_queries), 2)
+		self.assertEqual(len(second.captured_queries), 0)
+
+		self.package.solo_price = "4000.00"
+		self.package.save()
+		self.assertEqual(self._quotes(items[1])[0]["total_price"], "9000.00")
+
+	def test_batch_size_is_bounded(self):
+		response = self.client.post(
+			reverse("booking-quotes"),
+			{"items": [self._item(guide=self.guide.id)] * 101},
+			format="json",
+		)
+		self.assertEqual(response.status_code, 400)
+
+	def test_rate_cache_is_bounded_and_skips_missing_ids(self):
+		cache = pricing.RateCache(max_entries=2)
+		cache.set_many("provider", {1: "a", 2: "b"}, 60)
+		cache.get_many("provider", [1])
+		cache.set_many("provider", {3: "c"}, 60)
+		self.assertEqual(len(cache), 2)
+		self.assertEqual(cache.get_many("provider", [1, 2, 3]), {1: "a", 3: "c"})
+
+		cache.set_many("package", {4: "d"}, 0)
+		cache.set_many("package", {5: "e"}, 60)
+		self.assertEqual(cache.get_many("package", [4, 5]), {5: "e"})
+
+		pricing.cached_rates("package", {999999, 999998})
+		self.assertEqual(len(pricing.rate_cache), 0)
+
+	@override_settings(BOOKING_QUOTE_THROTTLE_RATE="2/min")
+	def test_quote_endpoint_is_throttled(self):
+		django_cache.clear()
+		self.addCleanup(django_cache.clear)
+		for _ in range(2):
+			self._quotes(self._item(guide=self.guide.id))
+		response = self.client.post(reverse("booking-quotes"), {"items": [self._item(guide=self.guide.id)]}, format="json")
+		self.assertEqual(response.status_code, 429)
+
+	def test_inactive_package_is_neither_quoted_nor_booked(self):
+		self.package.is_active = False
+		self.package.save()
+		self.assertEqual(self._quotes(self._item(tour_package=self.package.id)), [{"error": "Tour package not found."}])
+
+		self.client.force_authenticate(user=self.tourist)
+		booking = {
+			"guide": self.guide.id,
+			"destination": self.destination.id,
+			"check_in": str(self.days["check_in"]),
+			"check_out": str(self.days["check_out"]),
+			"num_guests": 3,
+		}
+		response = self.client.post(reverse("booking-list"), {**booking, "tour_package_id": self.package.id}, format="json")
+		self.assertEqual(response.status_code, 201)
+		self.assertIsNone(response.data["tour_package"])
+		self.assertEqual(response.data["total_price"], self._quotes(self._item(guide=self.guide.id))[0]["total_price"])
+
+
+class BookingEffectivePayoutTests(TestCase):
+	def setUp(self):
+		self.client = APIClient()
+		self.admin = User.objects.create_superuser(username="payout_admin", password="Pass12345", email="payout@example.com")
+		self.client.force_authenticate(user=self.admin)
+		self.tourist = User.objects.create_user(username="payout_tourist", password="Pass12345")
+		self.guide = User.objects.create_user(
+			username="payout_guide",
+			password="Pass12345",
+			is_local_guide=True,
+			guide_approved=True,
+		)
+		self.destination = Destination.objects.create(
+			name="Merloquet Falls",
+			description="Waterfall",
+			category="Nature",
+			location="Zamboanga City",
+			municipality="Zamboanga City",
+			latitude="6.950000",
+			longitude="122.300000",
+		)
+
+	def _booking(self, days_ahead, **prices):
+		return Booking.objects.create(
+			tourist=self.tourist,
+			guide=self.guide,
+			destination=self.destination,
+			check_in=date.today() + timedelta(days=days_ahead),
+			check_out=date.today() + timedelta(days=days_ahead + 1),
+			num_guests=1,
+			status="Confirmed",
+			**prices,
+		)
+
+	def _list(self, **params):
+		response = self.client.get(reverse("booking-list"), {"page_size": 50, **params})
+		self.assertEqual(response.status_code, 200)
+		return [row["id"] for row in response.json()["results"]]
+
+	def test_payout_is_stored_on_save(self):
+		booking = self._booking(5, total_price=Decimal("1000.00"), down_payment=Decimal("300.00"))
+		self.assertEqual(booking.effective_payout, Decimal("300.00"))
+
+		booking.platform_fee = Decimal("50.00")
+		booking.save(update_fields=["platform_fee"])
+		booking.refresh_from_db()
+		self.assertEqual(booking.effective_payout, Decimal("250.00"))
+
+		booking.guide_payout_amount = Decimal("275.50")
+		booking.save()
+		booking.refresh_from_db()
+		self.assertEqual(booking.effective_payout, Decimal("275.50"))
+
+	def test_missing_platform_fee_falls_back_to_the_commission_rate(self):
+		self.assertEqual(compute_effective_payout(Decimal("1000.00"), Decimal("300.00"), None, 0), Decimal("280.00"))
+		self.assertEqual(compute_effective_payout(Decimal("1000.00"), Decimal("300.00"), None, Decimal("90.00")), Decimal("90.00"))
+
+	def test_financial_filters_and_amount_sorts_use_the_stored_payout(self):
+		small = self._booking(5, total_price=Decimal("500.00"), down_payment=Decimal("110.00"), platform_fee=Decimal("10.00"))
+		large = self._booking(8, total_price=Decimal("2000.00"), down_payment=Decimal("600.00"), platform_fee=Decimal("40.00"))
+		unpaid = self._booking(11, total_price=Decimal("800.00"))
+
+		self.assertEqual(self._list(financial_only="1", sort="amount_desc"), [large.id, small.id])
+		self.assertEqual(self._list(financial_only="1", sort="amount_asc"), [small.id, large.id])
+		self.assertEqual(self._list(min_amount="200"), [large.id])
+		self.assertEqual(self._list(max_amount="200", sort="amount_asc"), [unpaid.id, small.id])
+
+	def test_check_command_reports_and_repairs_drift(self):
+		booking = self._booking(5, total_price=Decimal("1000.00"), down_payment=Decimal("300.00"))
+		Booking.objects.filter(pk=booking.pk).update(down_payment=Decimal("400.00"))
+
+		output = io.StringIO()
+		call_command("check_booking_payouts", stdout=output)
+		self.assertIn(f"booking={booking.id} expected=400.00 actual=300.00", output.getvalue())
+		booking.refresh_from_db()
+		self.assertEqual(booking.effective_payout, Decimal("300.00"))
+
+		call_command("check_booking_payouts", "--repair", stdout=io.StringIO())
+		booking.refresh_from_db()
+		self.assertEqual(booking.effective_payout, Decimal("400.00"))
+
+		output = io.StringIO()
+		call_command("check_booking_payouts", stdout=output)
+		self.assertIn("consistent", output.getvalue())
+
+
+class BookingTourPackageResolutionTests(TestCase):
+	def setUp(self):
+		self.tourist = User.objects.create_user(username="resolve_tourist", password="Pass12345")
+		self.guide = User.objects.create_user(
+			username="resolve_guide",
+			password="Pass12345",
+			is_local_guide=True,
+			guide_approved=True,
+		)
+		self.destination = Destination.objects.create(
+			name="Merloquet Falls",
+			description="Falls",
+			category="Nature",
+			location="Zamboanga City",
+			municipality="Zamboanga City",
+			latitude="7.150000",
+			longitude="122.250000",
+		)
+
+	def _package(self, name, duration_days):
+		return TourPackage.objects.create(
+			guide=self.guide,
+			main_destination=self.destination,
+			name=name,
+			description="Trip",
+			duration=f"{duration_days} days",
+			duration_days=duration_days,
+			max_group_size=5,
+			price_per_day="1000.00",
+			solo_price="800.00",
+		)
+
+	def _booking(self, days, **extra):
+		check_in = date.today() + timedelta(days=10)
+		return Booking.objects.create(
+			tourist=self.tourist,
+			guide=self.guide,
+			destination=self.destination,
+			check_in=check_in,
+			check_out=check_in + timedelta(days=days - 1),
+			num_guests=1,
+			**extra
+		)
+
+	def test_package_is_resolved_on_create_and_when_dates_change(self):
+		day_trip = self._package("Day trip", 1)
+		overnight = self._package("Overnight", 2)
+
+		booking = self._booking(1)
+		self.assertEqual((booking.tour_package, booking.tour_package_resolution), (day_trip, Booking.PACKAGE_MATCHED))
+
+		booking.check_out = booking.check_in + timedelta(days=1)
+		booking.save(update_fields=["check_out"])
+		booking.refresh_from_db()
+		self.assertEqual((booking.tour_package, booking.tour_package_resolution), (overnight, Booking.PACKAGE_MATCHED))
+
+	def test_explicit_package_is_kept_and_ambiguity_is_recorded(self):
+		self._package("Older", 1)
+		newest = self._package("Newest", 1)
+		chosen = self._package("Chosen", 3)
+
+		ambiguous = self._booking(1)
+		explicit = self._booking(1, tour_package=chosen)
+		explicit.num_guests = 2
+		explicit.save()
+
+		self.assertEqual((ambiguous.tour_package, ambiguous.tour_package_resolution), (newest, Booking.PACKAGE_AMBIGUOUS))
+		self.assertEqual((explicit.tour_package, explicit.tour_package_resolution), (chosen, Booking.PACKAGE_EXPLICIT))
+
+	def test_package_changes_are_reconciled_by_outbox_job(self):
+		booking = self._booking(1)
+		self.assertEqual(booking.tour_package_resolution, Booking.PACKAGE_NO_MATCH)
+
+		package = self._package("New day trip", 1)
+		booking.refresh_from_db()
+		self.assertEqual(booking.tour_package_resolution, Booking.PACKAGE_PENDING)
+		self.assertTrue(OutboxJob.objects.filter(kind=RESOLVE_JOB, status="pending").exists())
+
+		process_outbox()
+		booking.refresh_from_db()
+		self.assertEqual((booking.tour_package, booking.tour_package_resolution), (package, Booking.PACKAGE_MATCHED))
+
+		package.is_active = False
+		package.save()
+		process_outbox()
+		booking.refresh_from_db()
+		self.assertEqual((booking.tour_package, booking.tour_package_resolution), (None, Booking.PACKAGE_NO_MATCH))
+
+	def test_backfill_command_resumes_in_batches(self):
+		package = self._package("Day trip", 1)
+		bookings = [self._booking(1) for _ in range(3)]
+		Booking.objects.filter(id__in=[b.id for b in bookings]).update(
+			tour_package=None,
+			tour_package_resolution=Booking.PACKAGE_PENDING,
+		)
+
+		call_command("backfill_booking_tour_package", "--batch-size", "2", stdout=io.StringIO())
+		self.assertEqual(Booking.objects.filter(tour_package_resolution=Booking.PACKAGE_PENDING).count(), 3)
+
+		call_command("backfill_booking_tour_package", "--apply", "--batch-size", "2", "--max-batches", "1", stdout=io.StringIO())
+		self.assertEqual(Booking.objects.filter(tour_package_resolution=Booking.PACKAGE_PENDING).count(), 1)
+
+		with CaptureQueriesContext(connection) as queries:
+			call_command("backfill_booking_tour_package", "--apply", "--batch-size", "2", stdout=io.StringIO())
+		self.assertFalse(Booking.objects.filter(tour_package_resolution=Booking.PACKAGE_PENDING).exists())
+		self.assertEqual(Booking.objects.filter(tour_package=package).count(), 3)
+		self.assertLess(len(queries), 10)
+
+	def test_migration_resolves_bookings_left_pending_by_upgrade(self):
+		package = self._package("Day trip", 1)
+		legacy = self._booking(1)
+		Booking.objects.filter(id=legacy.id).update(tour_package=None, tour_package_resolution=Booking.PACKAGE_PENDING)
+
+		migration = importlib.import_module("accommodation_booking.migrations.0033_resolve_pending_tour_packages")
+		migration.resolve_pending_tour_packages(django_apps, connection.schema_editor())
+
+		legacy.refresh_from_db()
+		self.assertEqual((legacy.tour_package, legacy.tour_package_resolution), (package, Booking.PACKAGE_MATCHED))
+		self.assertIsNotNone(legacy.tour_package_resolved_at)
+
+
+class ProviderAvailabilityIndexTests(TestCase):
+	def setUp(self):
+		self.client = APIClient()
+		self.tourist = User.objects.create_user(username="calendar_tourist", password="Pass12345")
+		self.guide = User.objects.create_user(
+			username="calendar_guide",
+			password="Pass12345",
+			is_local_guide=True,
+			guide_approved=True,
+		)
+		self.agency_user = User.objects.create_user(username="calendar_agency", password="Pass12345", is_staff=True)
+		self.destination = Destination.objects.create(
+			name="Once Islas",
+			description="Islands",
+			category="Islands",
+			location="Zamboanga City",
+			municipality="Zamboanga City",
+			latitude="6.980000",
+			longitude="122.200000",
+		)
+		self.start = date(2031, 10, 30)
+
+	def _booking(self, check_in, check_out, status="Pending_Payment", **provider):
+		provider = provider or {"guide": self.guide}
+		return Booking.objects.create(
+			tourist=self.tourist,
+			destination=self.destination,
+			check_in=check_in,
+			check_out=check_out,
+			num_guests=1,
+			status=status,
+			**provider
+		)
+
+	def _days(self, *days):
+		return [self.start + timedelta(days=offset) for offset in days]
+
+	def test_status_transitions_update_the_index(self):
+		booking = self._booking(self.start, self.start + timedelta(days=3))
+		self.assertEqual(availability.blocked_dates(self.guide.id), [])
+		self.assertEqual(availability.blocked_dates(self.guide.id, include_held=True), self._days(0, 1, 2, 3))
+
+		booking.status = "Confirmed"
+		booking.save()
+		self.assertEqual(availability.blocked_dates(self.guide.id), self._days(0, 1, 2, 3))
+		self.assertEqual(ProviderAvailabilityMonth.objects.filter(provider=self.guide).count(), 2)
+		self.assertFalse(availability.is_range_free(self.guide.id, date(2031, 11, 2), date(2031, 11, 5)))
+		self.assertTrue(availability.is_range_free(self.guide.id, date(2031, 11, 3), date(2031, 11, 5)))
+
+		booking.check_in = booking.check_in + timedelta(days=10)
+		booking.check_out = booking.check_out + timedelta(days=10)
+		booking.save()
+		self.assertEqual(availability.blocked_dates(self.guide.id), self._days(10, 11, 12, 13))
+
+		booking.status = "Cancelled"
+		booking.save()
+		self.assertEqual(availability.blocked_dates(self.guide.id, include_held=True), [])
+		self.assertFalse(ProviderAvailabilityMonth.objects.filter(provider=self.guide).exists())
+
+	def test_overlapping_bookings_keep_shared_days_held(self):
+		first = self._booking(self.start, self.start + timedelta(days=2), agency=self.agency_user)
+		self._booking(self.start + timedelta(days=1), self.start + timedelta(days=4), agency=self.agency_user)
+
+		first.delete()
+
+		self.assertEqual(availability.blocked_dates(self.agency_user.id, include_held=True), self._days(1, 2, 3, 4))
+
+	def test_bookings_in_the_same_month_both_reach_the_mask(self):
+		with CaptureQueriesContext(connection) as queries:
+			self._booking(date(2031, 11, 3), date(2031, 11, 4), agency=self.agency_user)
+		self._booking(date(2031, 11, 10), date(2031, 11, 10), agency=self.agency_user)
+
+		self.assertEqual(
+			availability.blocked_dates(self.agency_user.id, include_held=True),
+			[date(2031, 11, 3), date(2031, 11, 4), date(2031, 11, 10)],
+		)
+		if connection.features.has_select_for_update:
+			self.assertTrue(any("FOR UPDATE" in query["sql"] for query in queries.captured_queries))
+
+	def test_blocked_dates_cost_one_query_regardless_of_history(self):
+		for offset in range(0, 60, 3):
+			self._booking(self.start + timedelta(days=offset), self.start + timedelta(days=offset + 1), status="Confirmed")
+
+		with self.assertNumQueries(1):
+			days = availability.blocked_dates(self.guide.id, date(2031, 11, 1), date(2031, 11, 30))
+		self.assertEqual(days[0], date(2031, 11, 2))
+		self.assertTrue(all(day.month == 11 for day in days))
+
+	def test_calendar_endpoints_read_the_index(self):
+		self._booking(self.start, self.start + timedelta(days=2), status="Confirmed")
+		self.client.force_authenticate(user=self.tourist)
+
+		blocked = self.client.get(reverse("booking-guide-blocked-dates"), {"guide_id": self.guide.id})
+		self.assertEqual(blocked.json(), ["2031-10-30", "2031-10-31", "2031-11-01"])
+
+		window = self.client.get(
+			reverse("booking-provider-availability"),
+			{"provider_id": self.guide.id, "month": "2031-10", "months": 2, "check_in": "2031-11-02", "check_out": "2031-11-03"},
+		).json()
+		self.assertEqual([month["month"] for month in window["months"]], ["2031-10", "2031-11"])
+		self.assertEqual(window["months"][1]["blocked_dates"], ["2031-11-01"])
+		self.assertTrue(window["is_range_free"])
+
+	def test_build_command_recovers_from_bulk_writes(self):
+		self._booking(self.start, self.start, status="Confirmed")
+		ProviderAvailabilityMonth.objects.all().delete()
+
+		call_command("build_availability_index", stdout=io.StringIO())
+
+		self.assertEqual(availability.blocked_dates(self.guide.id), [self.start])
+
+
+	def test_blocked_ranges_merges_days_across_months(self):
+		self._booking(self.start, self.start + timedelta(days=2), status="Confirmed")
+		self._booking(self.start + timedelta(days=3), self.start + timedelta(days=3), status="Confirmed")
+		self._booking(self.start + timedelta(days=40), self.start + timedelta(days=41), status="Confirmed")
+		self.client.force_authenticate(user=self.tourist)
+
+		response = self.client.get(
+			reverse("booking-blocked-ranges"),
+			{"provider_id": self.guide.id, "start": "2031-10-31", "end": "2031-12-31"},
+		)
+
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(
+			response.json()["ranges"],
+			[
+				{"start": "2031-10-31", "end": "2031-11-02"},
+				{"start": "2031-12-09", "end": "2031-12-10"},
+			],
+		)
+
+		bitmask = self.client.get(
+			reverse("booking-blocked-ranges"),
+			{"provider_id": self.guide.id, "start": "2031-11-01", "end": "2031-11-30", "encoding": "bitmask"},
+		).json()
+		self.assertEqual(bitmask["months"], [{"month": "2031-11", "mask": 0b11}])
+
+	def test_blocked_ranges_revalidates_with_etag(self):
+		booking = self._booking(self.start, self.start + timedelta(days=1), status="Confirmed")
+		self.client.force_authenticate(user=self.tourist)
+		params = {"provider_id": self.guide.id, "start": "2031-10-01", "end": "2031-11-30"}
+
+		first = self.client.get(reverse("booking-blocked-ranges"), params)
+		etag = first["ETag"]
+
+		with self.assertNumQueries(1):
+			cached = self.client.get(reverse("booking-blocked-ranges"), params, HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(cached.status_code, 304)
+
+		booking.status = "Cancelled"
+		booking.save()
+
+		changed = self.client.get(reverse("booking-blocked-ranges"), params, HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(changed.status_code, 200)
+		self.assertNotEqual(changed["ETag"], etag)
+		self.assertEqual(changed.json()["ranges"], [])
+
+	def test_blocked_ranges_rejects_unbounded_windows(self):
+		self.client.force_authenticate(user=self.tourist)
+
+		response = self.client.get(
+			reverse("booking-blocked-ranges"),
+			{"provider_id": self.guide.id, "start": "2031-01-01", "end": "2033-01-01"},
+		)
+
+		self.assertEqual(response.status_code, 400)
+
+
+@skipUnless(connection.features.has_select_for_update, "Needs row locks to serialize the rebuilds.")
+class ProviderAvailabilityConcurrencyTests(TransactionTestCase):
+	def setUp(self):
+		self.tourist = User.objects.create_user(username="race_tourist", password="Pass12345")
+		self.agency_user = User.objects.create_user(username="race_agency", password="Pass12345", is_staff=True)
+		self.destination = Destination.objects.create(
+			name="Sta. Cruz Island",
+			description="Pink beach",
+			category="Beaches",
+			location="Zamboanga City",
+			municipality="Zamboanga City",
+			latitude="6.880000",
+			longitude="122.050000",
+		)
+
+	def _save_booking(self, day, *, saved=None, hold_seconds=0):
+		try:
+			with transaction.atomic():
+				Booking.objects.create(
+					tourist=self.tourist,
+					agency=self.agency_user,
+					destination=self.destination,
+					check_in=day,
+					check_out=day,
+					num_guests=1,
+				)
+				if saved is not None:
+					saved.set()
+				time.sleep(hold_seconds)
+		finally:
+			connection.close()
+
+	def test_concurrent_saves_for_one_provider_keep_both_bookings(self):
+		first_saved = threading.Event()
+		first = threading.Thread(
+			target=self._save_booking,
+			args=(date(2031, 11, 3),),
+			kwargs={"saved": first_saved, "hold_seconds": 0.5},
+		)
+		first.start()
+		first_saved.wait(5)
+		second = threading.Thread(target=self._save_booking, args=(date(2031, 11, 10),))
+		second.start()
+		first.join()
+		second.join()
+
+		self.assertEqual(
+			availability.blocked_dates(self.agency_user.id, include_held=True),
+			[date(2031, 11, 3), date(2031, 11, 10)],
+		)
+
+
 class AgencyConcurrentBookingsApiTests(TestCase):
 	def setUp(self):
 		self.client = APIClient()
@@ -0,0 +1,145 @@
+"""
+Keeps ``Booking.tour_package`` resolved ahead of reads.
+
+``Booking.save`` resolves the package when a booking is created or its
+provider, destination or dates change. Bookings whose answer may have gone
+stale (a package was added, edited or removed) are marked ``pending`` and
+re-resolved in batches by the ``booking.resolve_tour_packages`` outbox job,
+or by ``python manage.py backfill_booking_tour_package --apply``.
+"""
+from django.db.models import F, Q
+from django.utils import timezone
+
+from destinations_and_attractions.models import TourPackage
+from system_management_module.services.outbox import enqueue_job, register_job_handler
+
+from .models import Booking, pick_tour_package
+
+RESOLVE_JOB = 'booking.resolve_tour_packages'
+DEFAULT_BATCH_SIZE = 500
+# Finished bookings keep the package they were priced and run with.
+_FINISHED_STATUSES = ('Completed', 'Cancelled', 'Declined', 'Refunded')
+_RESOLUTION_FIELDS = ['tour_package', 'tour_package_resolution', 'tour_package_resolved_at']
+
+
+def _candidate_packages_for(bookings):
+    """One query for every package any booking in the batch could resolve to."""
+    providers = Q(guide_id__in={booking.guide_id for booking in bookings if booking.guide_id})
+    agency_user_ids = {booking.agency_id for booking in bookings if booking.agency_id and not booking.guide_id}
+    if agency_user_ids:
+        providers |= Q(agency__user_id__in=agency_user_ids)
+
+    packages = (
+        TourPackage.objects
+        .filter(providers, main_destination_id__in={booking.destination_id for booking in bookings}, is_active=True)
+        .annotate(agency_user_id=F('agency__user_id'))
+        .order_by('-created_at', '-id')
+    )
+
+    grouped = {}
+    for package in packages:
+        if package.guide_id:
+            grouped.setdefault((package.main_destination_id, 'guide', package.guide_id), []).append(package)
+        if package.agency_user_id:
+            grouped.setdefault((package.main_destination_id, 'agency', package.agency_user_id), []).append(package)
+    return grouped
+
+
+def _resolve_batch(bookings, now):
+    resolvable = [
+        booking for booking in bookings
+        if (booking.guide_id or booking.agency_id) and booking.destination_id
+    ]
+    grouped = _candidate_packages_for(resolvable) if resolvable else {}
+    resolvable_ids = {booking.id for booking in resolvable}
+
+    for booking in bookings:
+        # Pending rows only ever hold an inferred package (or none), so re-infer it.
+        if booking.id in resolvable_ids:
+            trip_days = max((booking.check_out - booking.check_in).days + 1, 1)
+            if booking.guide_id:
+                provider_key = (booking.destination_id, 'guide', booking.guide_id)
+            else:
+                provider_key = (booking.destination_id, 'agency', booking.agency_id)
+            candidates = [
+                package for package in grouped.get(provider_key, [])
+                if package.duration_days in {trip_days, max(trip_days - 1, 1)}
+            ]
+            booking.tour_package, booking.tour_package_resolution = pick_tour_package(candidates, trip_days)
+        else:
+            booking.tour_package, booking.tour_package_resolution = None, Booking.PACKAGE_NOT_APPLICABLE
+        booking.tour_package_resolved_at = now
+
+
+def resolve_pending_bookings(*, batch_size=DEFAULT_BATCH_SIZE, after_id=0, max_batches=None, apply=True, on_batch=None):
+    """
+    Resolves ``pending`` bookings in id order, ``batch_size`` at a time, with one
+    candidate query and one bulk update per batch. Safe to stop and rerun:
+    resolved rows leave the pending set, and ``after_id`` skips ahead.
+    Returns a summary with per-resolution counts and the last id processed.
+    """
+    summary = {'batches': 0, 'processed': 0, 'last_id': after_id, 'resolutions': {}}
+
+    while max_batches is None or summary['batches'] < max_batches:
+        batch = list(
+            Booking.objects
+            .filter(tour_package_resolution=Booking.PACKAGE_PENDING, id__gt=summary['last_id'])
+            .only('id', 'guide_id', 'agency_id', 'destination_id', 'check_in', 'check_out', 'tour_package_id')
+            .order_by('id')[:batch_size]
+        )
+        if not batch:
+            break
+
+        _resolve_batch(batch, timezone.now())
+        if apply:
+            Booking.objects.bulk_update(batch, _RESOLUTION_FIELDS)
+
+        summary['batches'] += 1
+        summary['processed'] += len(batch)
+        summary['last_id'] = batch[-1].id
+        for booking in batch:
+            resolution = booking.tour_package_resolution
+            summary['resolutions'][resolution] = summary['resolutions'].get(resolution, 0) + 1
+        if on_batch is not None:
+            on_batch(summary)
+
+    return summary
+
+
+def requeue_inferred_bookings(queryset=None):
+    """Marks open bookings with an inferred package as pending again. Returns the row count."""
+    queryset = Booking.objects.all() if queryset is None else queryset
+    return (
+        queryset
+        .filter(tour_package_resolution__in=Booking.INFERRED_PACKAGE_RESOLUTIONS)
+        .exclude(status__in=_FINISHED_STATUSES)
+        .update(tour_package_resolution=Booking.PACKAGE_PENDING)
+    )
+
+
+def mark_bookings_stale_for_package(package):
+    """
+    Called when a package changes: open bookings that inferred this package, or
+    whose provider and destination match it, are re-resolved by the reconciler.
+    """
+    matches = Q(tour_package_id=package.pk)
+    if package.main_destination_id and (package.guide_id or package.agency_id):
+        provider = Q(guide_id=package.guide_id) if package.guide_id else Q(agency__agency_profile__id=package.agency_id)
+        matches |= provider & Q(destination_id=package.main_destination_id)
+    affected = Booking.objects.filter(matches)
+    inferred = requeue_inferred_bookings(affected)
+    # Explicit choices whose package was deleted fall back to inference.
+    orphaned = (
+        affected
+        .filter(tour_package__isnull=True, tour_package_resolution=Booking.PACKAGE_EXPLICIT)
+        .exclude(status__in=_FINISHED_STATUSES)
+        .update(tour_package_resolution=Booking.PACKAGE_PENDING)
+    )
+    if inferred or orphaned:
+        enqueue_job(RESOLVE_JOB, dedupe_key=RESOLVE_JOB)
+    return inferred + orphaned
+
+
+@register_job_handler(RESOLVE_JOB)
+def _run_resolve_job(payload):
+    resolve_pending_bookings(batch_size=payload.get('batch_size', DEFAULT_BATCH_SIZE))
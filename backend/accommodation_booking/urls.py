@@ -3,6 +3,7 @@ from rest_framework.routers import DefaultRouter #type: ignore
 from .views import (
     AccommodationViewSet, 
     BookingViewSet, 
+    BookingQuoteView,
     BookingStatusUpdateView, 
     AssignGuidesView,
     AccommodationDropdownListView,
@@ -19,6 +20,7 @@ router.register(r'bookings', BookingViewSet, basename='booking')
 
 urlpatterns = [
     path('accommodations/list/', AccommodationDropdownListView.as_view(), name='accommodation-dropdown-list'),
+    path('bookings/quotes/', BookingQuoteView.as_view(), name='booking-quotes'),
     path(
         'bookings/<int:pk>/status/', 
         BookingStatusUpdateView.as_view(), 
@@ -3,8 +3,8 @@ from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser 
-from django.db.models import Q, F, Value, DecimalField, ExpressionWrapper, Case, When #type: ignore
-from django.db.models.functions import Coalesce #type: ignore
+from rest_framework.throttling import SimpleRateThrottle
+from django.core.exceptions import ValidationError as ModelValidationError #type: ignore
 from django.db import transaction
 from datetime import date, timedelta, datetime
 from django.utils import timezone #type: ignore
@@ -14,17 +14,31 @@ from django.conf import settings
 from decimal import Decimal
 import json
 
+from . import availability, pricing
+from .booking_events import publish_booking_created
 from .models import Accommodation, Booking, BookingJourneyCheckpoint
-from .serializers import AccommodationSerializer, BookingSerializer, BookingJourneyCheckpointSerializer
+from .search import search_bookings
+from .serializers import (
+    AccommodationSerializer,
+    BookingQuoteRequestSerializer,
+    BookingSerializer,
+    BookingJourneyCheckpointSerializer,
+    prefetch_booking_read_relations,
+)
 from system_management_module.models import SystemAlert
 from system_management_module.services.push_notifications import send_push_to_user, build_alert_push_data
 from system_management_module.services.email_preferences import send_preference_aware_email
 from destinations_and_attractions.models import TourPackage  
 from backend.pagination import OptionalPageNumberPagination
+from backend.projection import FieldProjectionViewMixin, project_queryset
 from backend.location_policy import validate_zds_location_payload
 
 from rest_framework.views import APIView
 
+# Window bounds for the blocked-ranges calendar endpoint.
+BLOCKED_RANGES_DEFAULT_DAYS = 180
+BLOCKED_RANGES_MAX_DAYS = 366
+
 
 def format_booking_date_display(check_in, check_out):
     if not check_in:
@@ -54,26 +68,9 @@ def generate_itinerary_html_and_plain(instance):
     itinerary_html = ""
     itinerary_plain = ""
     
+    # Resolved on save (Booking.refresh_tour_package_resolution).
     selected_package = instance.tour_package
-    
-    if not selected_package and instance.destination:
-        provider = instance.guide or instance.agency
-        if provider:
-            trip_days = max((instance.check_out - instance.check_in).days + 1, 1)
-            candidates = TourPackage.objects.filter(
-                main_destination=instance.destination,
-                is_active=True,
-                duration_days__in=[trip_days, max(trip_days - 1, 1)]
-            )
-            if instance.guide:
-                candidates = candidates.filter(guide=instance.guide)
-            elif instance.agency:
-                candidates = candidates.filter(agency__user=instance.agency)
-                
-            candidates = candidates.order_by('-created_at', '-id')
-            if candidates.exists():
-                selected_package = candidates.first()
-            
+
     if selected_package and selected_package.itinerary_timeline:
         timeline = selected_package.itinerary_timeline
         
@@ -132,22 +129,6 @@ def generate_itinerary_html_and_plain(instance):
 def _parse_booking_itinerary_timeline(booking):
     selected_package = booking.tour_package
 
-    if not selected_package and booking.destination:
-        provider = booking.guide or booking.agency
-        if provider:
-            trip_days = max((booking.check_out - booking.check_in).days + 1, 1)
-            candidates = TourPackage.objects.filter(
-                main_destination=booking.destination,
-                is_active=True,
-                duration_days=trip_days,
-            )
-            if booking.guide:
-                candidates = candidates.filter(guide=booking.guide)
-            elif booking.agency:
-                candidates = candidates.filter(agency__user=booking.agency)
-
-            selected_package = candidates.order_by('-created_at', '-id').first()
-
     if not selected_package:
         return []
 
@@ -420,7 +401,28 @@ class AccommodationDropdownListView(generics.ListAPIView):
         return Accommodation.objects.filter(host=user).order_by('title')
 
 
-class BookingViewSet(viewsets.ModelViewSet):
+def participant_booking_ids(user, *, as_tourist=True):
+    """
+    Ids of the bookings ``user`` takes part in, as a UNION of one indexed
+    subquery per role. This replaces an OR across joined roles with DISTINCT,
+    which forced a scan of every booking and a dedupe of the joined rows.
+    """
+    roles = [
+        Booking.objects.filter(accommodation__host=user).values('id'),
+        Booking.objects.filter(guide=user).values('id'),
+        Booking.objects.filter(agency=user).values('id'),
+        Booking.assigned_guides.through.objects.filter(user=user).values('booking_id'),
+    ]
+    if as_tourist:
+        roles.insert(0, Booking.objects.filter(tourist=user).values('id'))
+    return roles[0].union(*roles[1:])
+
+
+def _local_day_start(day):
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+
+class BookingViewSet(FieldProjectionViewMixin, viewsets.ModelViewSet):
     serializer_class = BookingSerializer
     permission_classes = [permissions.IsAuthenticated]
     parser_classes = (MultiPartParser, FormParser, JSONParser)
@@ -428,26 +430,11 @@ class BookingViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
-        qs = Booking.objects.select_related('tourist', 'accommodation', 'guide', 'agency').prefetch_related('payments')
+        qs = project_queryset(prefetch_booking_read_relations(Booking.objects.all()), self.request, BookingSerializer)
 
         if not user.is_superuser:
             view_as = self.request.query_params.get('view_as')
-
-            if view_as == 'guide':
-                qs = qs.filter(
-                    Q(accommodation__host=user) |
-                    Q(guide=user) |
-                    Q(agency=user) |
-                    Q(assigned_guides=user)
-                ).distinct()
-            else:
-                qs = qs.filter(
-                    Q(tourist=user) |
-                    Q(accommodation__host=user) |
-                    Q(guide=user) |
-                    Q(agency=user) |
-                    Q(assigned_guides=user)
-                ).distinct()
+            qs = qs.filter(id__in=participant_booking_ids(user, as_tourist=view_as != 'guide'))
 
         financial_only = str(self.request.query_params.get('financial_only', '')).lower() in {'1', 'true', 'yes'}
         payout_status = str(self.request.query_params.get('payout_status', '')).strip().lower()
@@ -456,42 +443,12 @@ class BookingViewSet(viewsets.ModelViewSet):
         date_to_raw = str(self.request.query_params.get('date_to', '')).strip()
         min_amount_raw = str(self.request.query_params.get('min_amount', '')).strip()
         max_amount_raw = str(self.request.query_params.get('max_amount', '')).strip()
-        sort = str(self.request.query_params.get('sort', 'latest')).strip().lower()
+        # Searches default to best match first.
+        sort = str(self.request.query_params.get('sort', 'relevance' if search_term else 'latest')).strip().lower()
 
+        # effective_payout is a stored, indexed column kept current by Booking.save().
         if financial_only:
-            qs = qs.filter(status__in=['Confirmed', 'Completed'])
-
-        needs_payout_annotation = (
-            financial_only
-            or payout_status in {'settled', 'pending'}
-            or bool(min_amount_raw or max_amount_raw)
-            or sort in {'amount_desc', 'amount_asc'}
-        )
-
-        if needs_payout_annotation:
-            commission_fallback = ExpressionWrapper(
-                F('total_price') * Value(Decimal('0.02')),
-                output_field=DecimalField(max_digits=12, decimal_places=2),
-            )
-            commission_expr = Coalesce(
-                F('platform_fee'),
-                commission_fallback,
-                output_field=DecimalField(max_digits=12, decimal_places=2),
-            )
-
-            qs = qs.annotate(
-                effective_payout=Case(
-                    When(guide_payout_amount__gt=0, then=F('guide_payout_amount')),
-                    default=ExpressionWrapper(
-                        F('down_payment') - commission_expr,
-                        output_field=DecimalField(max_digits=12, decimal_places=2),
-                    ),
-                    output_field=DecimalField(max_digits=12, decimal_places=2),
-                )
-            )
-
-            if financial_only:
-                qs = qs.filter(effective_payout__gt=0)
+            qs = qs.filter(status__in=['Confirmed', 'Completed'], effective_payout__gt=0)
 
         if payout_status == 'settled':
             qs = qs.filter(is_payout_settled=True)
@@ -512,41 +469,35 @@ class BookingViewSet(viewsets.ModelViewSet):
         parsed_from = parse_iso_date(date_from_raw)
         parsed_to = parse_iso_date(date_to_raw)
 
+        # Compare against local day boundaries rather than created_at__date, so
+        # the created_at indexes can serve the range.
         if parsed_from:
-            qs = qs.filter(created_at__date__gte=parsed_from)
+            qs = qs.filter(created_at__gte=_local_day_start(parsed_from))
         if parsed_to:
-            qs = qs.filter(created_at__date__lte=parsed_to)
+            qs = qs.filter(created_at__lt=_local_day_start(parsed_to + timedelta(days=1)))
 
         if search_term:
-            search_filter = (
-                Q(tourist__first_name__icontains=search_term)
-                | Q(tourist__last_name__icontains=search_term)
-                | Q(destination__name__icontains=search_term)
-                | Q(accommodation__title__icontains=search_term)
-            )
-
-            if search_term.isdigit():
-                search_filter = search_filter | Q(id=int(search_term))
-
-            qs = qs.filter(search_filter)
+            qs = search_bookings(qs, search_term)
 
-        if min_amount_raw and needs_payout_annotation:
+        if min_amount_raw:
             try:
                 qs = qs.filter(effective_payout__gte=Decimal(min_amount_raw))
             except Exception:
                 pass
 
-        if max_amount_raw and needs_payout_annotation:
+        if max_amount_raw:
             try:
                 qs = qs.filter(effective_payout__lte=Decimal(max_amount_raw))
             except Exception:
                 pass
 
+        if sort == 'relevance' and search_term:
+            return qs.order_by('-search_rank', '-created_at')
         if sort == 'oldest':
             return qs.order_by('created_at')
-        if sort == 'amount_desc' and needs_payout_annotation:
+        if sort == 'amount_desc':
             return qs.order_by('-effective_payout', '-created_at')
-        if sort == 'amount_asc' and needs_payout_annotation:
+        if sort == 'amount_asc':
             return qs.order_by('effective_payout', '-created_at')
 
         return qs.order_by('-created_at')
@@ -585,6 +536,10 @@ class BookingViewSet(viewsets.ModelViewSet):
         if check_out < check_in:
             return Response({'detail': 'check_out cannot be earlier than check_in.'}, status=400)
 
+        # Most dates have nobody booked; the availability index answers that without scanning bookings.
+        if availability.is_range_free(agency_id, check_in, check_out, include_held=True):
+            return Response([])
+
         queryset = Booking.objects.select_related('tourist').filter(
             agency_id=agency_id,
             check_in__lte=check_out,
@@ -634,6 +589,11 @@ class BookingViewSet(viewsets.ModelViewSet):
         return Response(response_data)
 
     def perform_create(self, serializer):
+        """
+        Validates, prices and inserts the booking in one transaction and one
+        save. Profile and provider side effects run after commit through
+        ``publish_booking_created`` (see booking_events.py).
+        """
         user = self.request.user
 
         uploaded_id_image = serializer.validated_data.get('tourist_valid_id_image')
@@ -656,20 +616,9 @@ class BookingViewSet(viewsets.ModelViewSet):
 
             return candidate
 
-        uploaded_id_image = sanitize_uploaded_file('tourist_valid_id_image', uploaded_id_image)
+        sanitize_uploaded_file('tourist_valid_id_image', uploaded_id_image)
         sanitize_uploaded_file('tourist_selfie_image', uploaded_selfie_image)
 
-        if uploaded_id_image:
-            user.valid_id_image = uploaded_id_image
-            user.save(update_fields=['valid_id_image'])
-            
-            # FIX: Rewind the file pointer back to the start so it can be read again for the Booking model!
-            uploaded_id_image.seek(0)
-
-        passed_total = self.request.data.get('total_price')
-        passed_down_payment = self.request.data.get('down_payment')
-        passed_balance = self.request.data.get('balance_due')
-
         # 3. Detect Food Skip-Provider mode
         destination = serializer.validated_data.get('destination')
         is_food_skip = False
@@ -677,142 +626,47 @@ class BookingViewSet(viewsets.ModelViewSet):
             if destination and destination.category and 'food' in destination.category.lower():
                 is_food_skip = True
 
+        # Unsaved copy of the booking, used to validate and price it before the single insert.
+        draft = Booking(tourist=user, **serializer.validated_data)
+        self.validate_booking_target(draft)
+
         # Assign status Confirmed immediately for skip mode
-        instance = serializer.save(tourist=user, status='Confirmed' if is_food_skip else 'Pending_Payment')
+        extra = {'tourist': user, 'status': 'Confirmed' if is_food_skip else 'Pending_Payment'}
 
         requested_tour_id = self.request.data.get('tour_package_id')
-        
+
         if requested_tour_id and requested_tour_id != 'null':
-            candidates = TourPackage.objects.filter(id=requested_tour_id, main_destination=instance.destination)
-            if instance.guide:
-                candidates = candidates.filter(guide=instance.guide)
-            elif instance.agency:
-                candidates = candidates.filter(agency__user=instance.agency)
-            
+            # Active packages only, as in pricing.quote_many.
+            candidates = TourPackage.objects.filter(id=requested_tour_id, main_destination=draft.destination, is_active=True)
+            if draft.guide:
+                candidates = candidates.filter(guide=draft.guide)
+            elif draft.agency:
+                candidates = candidates.filter(agency__user=draft.agency)
+
             selected_tour = candidates.first()
             if selected_tour:
-                instance.tour_package = selected_tour
-        
+                extra['tour_package'] = draft.tour_package = selected_tour
+
         # Zero out fields for skip mode bypassing standard pricing
         if is_food_skip:
-            instance.total_price = Decimal('0.00')
-            instance.down_payment = Decimal('0.00')
-            instance.balance_due = Decimal('0.00')
-            instance.downpayment_paid_at = timezone.now()
-        elif passed_total and passed_down_payment and passed_balance:
-            instance.total_price = Decimal(str(passed_total)).quantize(Decimal('0.01'))
-            instance.down_payment = Decimal(str(passed_down_payment)).quantize(Decimal('0.01'))
-            instance.balance_due = Decimal(str(passed_balance)).quantize(Decimal('0.01'))
+            extra['total_price'] = Decimal('0.00')
+            extra['down_payment'] = Decimal('0.00')
+            extra['balance_due'] = Decimal('0.00')
+            extra['downpayment_paid_at'] = timezone.now()
         else:
-            raw_total_price = self.calculate_booking_price(instance)
-            total_price = Decimal(str(raw_total_price)).quantize(Decimal('0.01'))
-            
-            dp_percentage = Decimal('30.00')
-            if instance.agency and hasattr(instance.agency, 'agency_profile'):
-                dp_percentage = Decimal(str(instance.agency.agency_profile.down_payment_percentage))
-            
-            down_payment = (total_price * (dp_percentage / Decimal('100'))).quantize(Decimal('0.01'))
-            balance_due = (total_price - down_payment).quantize(Decimal('0.01'))
-            
-            instance.total_price = total_price
-            instance.down_payment = down_payment
-            instance.balance_due = balance_due
-            
-        instance.save()
-        self.validate_booking_target(instance)
-
-        # 4. Provider notifications naturally guarded because provider resolves to None in skip mode.
-        provider = instance.guide or instance.agency or (instance.accommodation.host if instance.accommodation else None)
-        tourist_name = f"{user.first_name} {user.last_name}".strip() or user.username
-        if provider and provider.email:
-            try:
-                booking_date_display = format_booking_date_display(instance.check_in, instance.check_out)
-                
-                itin_html, itin_plain = generate_itinerary_html_and_plain(instance)
-
-                subject = "New Booking Request Received - LocaLynk"
-                
-                plain_message = (
-                    f"Hi {provider.username},\n\n"
-                    f"You have received a new booking request from {tourist_name}!\n\n"
-                    f"Details:\n"
-                    f"- Destination: {instance.destination or 'N/A'}\n"
-                    f"- Dates: {booking_date_display}\n"
-                    f"- Guests: {instance.num_guests}\n"
-                    f"{itin_plain}\n\n"
-                    f"This booking is currently 'Pending Payment'. You will receive another notification once the tourist completes their down payment.\n\n"
-                    f"Please check your dashboard for more details."
-                )
+            # Client-sent totals are ignored: the server prices every booking.
+            if not draft.tour_package_id:
+                # Price with the package Booking.save() will infer.
+                draft.tour_package = draft.find_tour_package()[0]
+            quoted = pricing.quote_booking(draft)
+            extra['total_price'] = quoted['total_price']
+            extra['down_payment'] = quoted['down_payment']
+            extra['balance_due'] = quoted['balance_due']
 
-                html_message = f"""
-                <!DOCTYPE html>
-                <html>
-                <head>
-                    <style>
-                        body {{ font-family: 'Helvetica Neue', Helvetica, Arial, sans-serif; background-color: #f4f7f6; margin: 0; padding: 20px; color: #333; }}
-                        .container {{ max-width: 600px; margin: 0 auto; background: #ffffff; border-radius: 8px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); overflow: hidden; }}
-                        .header {{ background-color: #0072FF; padding: 20px; text-align: center; color: #ffffff; font-size: 22px; font-weight: bold; }}
-                        .content {{ padding: 30px; font-size: 15px; color: #444; line-height: 1.5; }}
-                        .details-box {{ background-color: #f8fafc; padding: 20px; border-radius: 8px; border: 1px solid #e2e8f0; margin: 20px 0; }}
-                        .btn {{ display: inline-block; background-color: #0072FF; color: #ffffff; padding: 12px 24px; text-decoration: none; border-radius: 6px; font-weight: bold; margin-top: 20px; text-align: center; }}
-                        .footer {{ padding: 15px; text-align: center; color: #888; font-size: 12px; background-color: #f8fafc; border-top: 1px solid #e2e8f0; }}
-                    </style>
-                </head>
-                <body>
-                    <div class="container">
-                        <div class="header">New Booking Request</div>
-                        <div class="content">
-                            <h2 style="color: #333; margin-top: 0;">Hi {provider.username},</h2>
-                            <p>You have received a new booking request from <strong>{tourist_name}</strong>.</p>
-                            
-                            <div class="details-box">
-                                <p style="margin: 5px 0;"><strong>Destination:</strong> {instance.destination or 'N/A'}</p>
-                                <p style="margin: 5px 0;"><strong>Dates:</strong> {booking_date_display}</p>
-                                <p style="margin: 5px 0;"><strong>Guests:</strong> {instance.num_guests}</p>
-                                
-                                <div style="display: inline-block; background-color: #f59e0b; color: white; padding: 4px 8px; border-radius: 4px; font-size: 12px; font-weight: bold; margin-top: 10px;">Pending Payment</div>
-                                
-                                {itin_html}
-                            </div>
-
-                            <p>The tourist is currently processing their down payment. We will notify you again once the payment is confirmed.</p>
-                            
-                            <div style="text-align: center;">
-                                <a href="{getattr(settings, 'FRONTEND_URL', 'http://localhost:5173')}/portal" class="btn">View Dashboard</a>
-                            </div>
-                        </div>
-                        <div class="footer">&copy; 2026 LocaLynk Partner Network.</div>
-                    </div>
-                </body>
-                </html>
-                """
+        with transaction.atomic():
+            instance = serializer.save(**extra)
+            publish_booking_created(instance)
 
-                send_preference_aware_email(
-                    subject=subject,
-                    message=plain_message,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[provider.email],
-                    fail_silently=True,
-                    html_message=html_message,
-                )
-            except Exception as e:
-                print(f"Failed to send request notification email: {e}")
-
-        if provider:
-            provider_name = provider.get_full_name() or provider.username
-            send_push_to_user(
-                user=provider,
-                title='New Booking Request',
-                body=f"{tourist_name} sent a new booking request.",
-                data=build_alert_push_data(
-                    alert_type='new_booking_request',
-                    related_model='Booking',
-                    related_object_id=instance.id,
-                    extra={'provider_name': provider_name},
-                ),
-                event_key=f"booking-request:{instance.id}",
-            )
-        
     def destroy(self, request, *args, **kwargs):
         booking = self.get_object()
         user = request.user
@@ -836,21 +690,106 @@ class BookingViewSet(viewsets.ModelViewSet):
         if not guide_id:
             return Response({"error": "guide_id is required"}, status=400)
             
-        bookings = Booking.objects.filter(
-            guide_id=guide_id, 
-            status='Confirmed'
-        ).values('check_in', 'check_out')
-        
-        blocked_dates = []
-        for b in bookings:
-            start = b['check_in']
-            end = b['check_out']
-            curr = start
-            while curr <= end: 
-                blocked_dates.append(curr.isoformat())
-                curr += timedelta(days=1)
-                
-        return Response(blocked_dates)
+        try:
+            guide_id = int(guide_id)
+        except (TypeError, ValueError):
+            return Response({"error": "guide_id must be a valid integer"}, status=400)
+
+        return Response([day.isoformat() for day in availability.blocked_dates(guide_id)])
+
+    @action(detail=False, methods=['get'], url_path='provider-availability')
+    def provider_availability(self, request):
+        """Month windows of blocked/held days for the calendar, plus an optional range check."""
+        try:
+            provider_id = int(request.query_params.get('provider_id'))
+        except (TypeError, ValueError):
+            return Response({'detail': 'provider_id is required.'}, status=400)
+
+        month_raw = str(request.query_params.get('month') or '').strip()
+        try:
+            first_month = date.fromisoformat(f"{month_raw}-01") if month_raw else timezone.localdate().replace(day=1)
+        except ValueError:
+            return Response({'detail': 'month must be in YYYY-MM format.'}, status=400)
+
+        try:
+            months = max(1, min(int(request.query_params.get('months', 1)), 12))
+        except (TypeError, ValueError):
+            months = 1
+
+        payload = {
+            'provider_id': provider_id,
+            'months': availability.month_window(provider_id, first_month, months),
+        }
+
+        check_in_raw = request.query_params.get('check_in')
+        if check_in_raw:
+            try:
+                check_in = date.fromisoformat(check_in_raw)
+                check_out = date.fromisoformat(request.query_params.get('check_out') or check_in_raw)
+            except ValueError:
+                return Response({'detail': 'check_in/check_out must be in YYYY-MM-DD format.'}, status=400)
+            if check_out < check_in:
+                return Response({'detail': 'check_out cannot be earlier than check_in.'}, status=400)
+            payload['is_range_free'] = availability.is_range_free(provider_id, check_in, check_out)
+
+        return Response(payload)
+
+    @action(detail=False, methods=['get'], url_path='blocked-ranges')
+    def blocked_ranges(self, request):
+        """
+        Bounded replacement for guide_blocked_dates: blocked days inside
+        [start, end] as merged ranges (default) or per-month bitmasks, with an
+        ETag that only changes when a booking change touches the window.
+        """
+        try:
+            provider_id = int(request.query_params.get('provider_id') or request.query_params.get('guide_id'))
+        except (TypeError, ValueError):
+            return Response({'detail': 'provider_id is required.'}, status=400)
+
+        try:
+            start_raw = request.query_params.get('start')
+            start = date.fromisoformat(start_raw) if start_raw else timezone.localdate()
+            end_raw = request.query_params.get('end')
+            end = date.fromisoformat(end_raw) if end_raw else start + timedelta(days=BLOCKED_RANGES_DEFAULT_DAYS - 1)
+        except ValueError:
+            return Response({'detail': 'start/end must be in YYYY-MM-DD format.'}, status=400)
+        if end < start:
+            return Response({'detail': 'end cannot be earlier than start.'}, status=400)
+        if (end - start).days + 1 > BLOCKED_RANGES_MAX_DAYS:
+            return Response({'detail': f'The window cannot exceed {BLOCKED_RANGES_MAX_DAYS} days.'}, status=400)
+
+        # Not "format": DRF reserves that parameter for renderer selection.
+        encoding = str(request.query_params.get('encoding') or 'ranges').strip().lower()
+        if encoding not in ('ranges', 'bitmask'):
+            return Response({'detail': 'encoding must be "ranges" or "bitmask".'}, status=400)
+        include_held = str(request.query_params.get('include_held', '')).lower() in ('1', 'true', 'yes')
+
+        etag = (
+            f'"{provider_id}:{start.isoformat()}:{end.isoformat()}:{encoding}:{int(include_held)}:'
+            f'{availability.calendar_version(provider_id, start, end)}"'
+        )
+        headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+        if_none_match = request.headers.get('If-None-Match', '')
+        if etag in [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]:
+            return Response(status=304, headers=headers)
+
+        payload = {
+            'provider_id': provider_id,
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'encoding': encoding,
+        }
+        if encoding == 'ranges':
+            payload['ranges'] = [
+                {'start': first.isoformat(), 'end': last.isoformat()}
+                for first, last in availability.blocked_ranges(provider_id, start, end, include_held=include_held)
+            ]
+        else:
+            payload['months'] = [
+                {'month': month.strftime('%Y-%m'), 'mask': mask}
+                for month, mask in availability.blocked_month_masks(provider_id, start, end, include_held=include_held)
+            ]
+        return Response(payload, headers=headers)
 
     @action(detail=True, methods=['post'])
     def mark_paid(self, request, pk=None):
@@ -1097,58 +1036,43 @@ class BookingViewSet(viewsets.ModelViewSet):
             
         raise PermissionDenied("Use the status endpoint for updates.")
 
-    def calculate_booking_price(self, instance):
-        if not instance.check_in or not instance.check_out:
-            return 0
-        
-        days = max((instance.check_out - instance.check_in).days + 1, 1)
-        total_price = 0
 
-        if instance.accommodation:
-            acc_cost = instance.accommodation.price * days
-            total_price += acc_cost
-        
-        provider = instance.guide or instance.agency
-        
-        if provider:
-            tour_package = instance.tour_package
-            requested_tour_id = self.request.data.get('tour_package_id')
-            
-            if not tour_package and requested_tour_id and requested_tour_id != 'null':
-                tour_package = TourPackage.objects.filter(id=requested_tour_id).first()
-            
-            if not tour_package and instance.destination:
-                candidates = TourPackage.objects.filter(
-                    main_destination=instance.destination,
-                    duration_days__in=[days, max(days - 1, 1)],
-                    is_active=True,
-                )
-                if instance.guide:
-                    candidates = candidates.filter(guide=instance.guide)
-                elif instance.agency:
-                    candidates = candidates.filter(agency__user=instance.agency)
-                
-                tour_package = candidates.order_by('-created_at').first()
-            
-            base_group_price = getattr(provider, 'price_per_day', 0) or 0
-            solo_price = getattr(provider, 'solo_price_per_day', base_group_price) or base_group_price
-            extra_fee = getattr(provider, 'multiple_additional_fee_per_head', 0) or 0
-            
-            if tour_package:
-                base_group_price = tour_package.price_per_day or base_group_price
-                solo_price = tour_package.solo_price or solo_price
-                extra_fee = tour_package.additional_fee_per_head or 0
-            
-            if instance.num_guests == 1:
-                daily_rate = solo_price 
-            else:
-                extra_pax = max(0, instance.num_guests - 1)
-                daily_rate = solo_price + (extra_pax * extra_fee) 
-            
-            tour_total = daily_rate * days
-            total_price += tour_total
+class BookingQuoteThrottle(SimpleRateThrottle):
+    """``BOOKING_QUOTE_THROTTLE_RATE`` per user, or per client IP when anonymous."""
+    scope = 'booking_quote'
+
+    def get_rate(self):
+        return getattr(settings, 'BOOKING_QUOTE_THROTTLE_RATE', '60/min')
 
-        return float(total_price)
+    def get_cache_key(self, request, view):
+        ident = request.user.pk if request.user and request.user.is_authenticated else self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class BookingQuoteView(APIView):
+    """
+    Prices many booking combinations in one call, e.g. every card on a search
+    results page. Totals are quotes only; the booking is priced again on create.
+    """
+    permission_classes = [permissions.AllowAny]
+    throttle_classes = [BookingQuoteThrottle]
+
+    def post(self, request):
+        serializer = BookingQuoteRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results = []
+        for item, quoted in zip(serializer.validated_data['items'], pricing.quote_many(serializer.validated_data['items'])):
+            if 'error' in quoted:
+                results.append({'error': quoted['error']})
+                continue
+            results.append({
+                'check_in': item['check_in'],
+                'check_out': item['check_out'],
+                'num_guests': item['num_guests'],
+                **{key: str(value) if isinstance(value, Decimal) else value for key, value in quoted.items()},
+            })
+        return Response({'results': results})
 
 
 class BookingStatusUpdateView(generics.UpdateAPIView):
@@ -1178,19 +1102,20 @@ class BookingStatusUpdateView(generics.UpdateAPIView):
             raise ValidationError({"status": "Status is required."})
 
         if new_status == 'Confirmed':
-            try:
-                instance.clean()
-            except ValidationError as e:
-                return Response({"error": "Dates are no longer available."}, status=400)
-
             instance.status = 'Confirmed'
             if not instance.downpayment_paid_at:
                 instance.downpayment_paid_at = timezone.now()
 
+            # The guide's days are reserved inside save(); a concurrent confirmation
+            # of the same days fails there instead of passing a stale read.
+            try:
+                instance.save()
+            except ModelValidationError:
+                return Response({"error": "Dates are no longer available."}, status=400)
+
             if instance.guide:
                 instance.guide.booking_count += 1
                 instance.guide.save()
-            instance.save()
             BookingViewSet().create_booking_alert(instance)
             return Response(self.get_serializer(instance).data)
 
@@ -2,6 +2,10 @@ from rest_framework import generics, permissions #type: ignore
 from rest_framework.exceptions import PermissionDenied, ValidationError #type: ignore
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
+from destinations_and_attractions.models import TourPackage
+from destinations_and_attractions.serializers import prefetch_tour_package_read_relations
+from system_management_module.services.catalog_cache import CatalogCacheMixin
 from system_management_module.services.email_preferences import send_preference_aware_email
 
 from .models import Agency, TouristGuide
@@ -12,14 +16,19 @@ FREE_TIER_GUIDE_LIMIT = 2
 User = get_user_model()
 
 
-class AgencyListView(generics.ListAPIView):
+class AgencyListView(CatalogCacheMixin, generics.ListAPIView):
     """
     Returns ALL agencies. 
     Used by: Admin Panel (to approve) and Mobile App (to select agency).
     """
-    queryset = Agency.objects.all().order_by('-created_at')
+    queryset = Agency.objects.select_related('user').prefetch_related(
+        Prefetch('tour_packages', queryset=prefetch_tour_package_read_relations(TourPackage.objects.order_by('id'))),
+    ).order_by('-created_at')
     serializer_class = AgencySerializer
     permission_classes = [permissions.AllowAny]
+    catalog_names = ('agency', 'tour_package', 'tour_stop', 'destination', 'destination_image')
+    # The agency's user fields (is_active, rating, review_count) have no counter.
+    catalog_last_modified = False
 
 
 class AgencyDetailView(generics.RetrieveAPIView):
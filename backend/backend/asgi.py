@@ -2,6 +2,8 @@
 ASGI config for backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP is served by Django; WebSocket connections to ``/ws/events/`` stream
+realtime message and alert events (see ``backend/realtime.py``).
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -13,4 +15,21 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported after Django is set up so app models and settings are ready.
+from backend.realtime import REALTIME_WEBSOCKET_PATH, UserEventSocket  # noqa: E402
+
+event_socket = UserEventSocket()
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'websocket':
+        if scope.get('path') == REALTIME_WEBSOCKET_PATH:
+            return await event_socket(scope, receive, send)
+
+        await receive()
+        await send({'type': 'websocket.close', 'code': 4404})
+        return
+
+    return await django_application(scope, receive, send)
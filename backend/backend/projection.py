@@ -0,0 +1,149 @@
+"""
+Sparse fieldsets for read endpoints: ``?fields=`` and ``?expand=``.
+
+A serializer that mixes in ``FieldProjectionMixin`` renders every field
+unless the request sends one of the two parameters, so existing clients are
+unaffected. A projected GET renders:
+
+- ``fields=id,name,image``: only those fields;
+- ``expand=images``: every field except the heavy ones listed in
+  ``Meta.expandable_fields``, plus the expanded ones;
+- both: ``fields`` plus ``expand``.
+
+Unknown names are ignored. Writes are never projected. Only the serializer a
+view creates through ``FieldProjectionViewMixin.get_serializer`` is projected
+(it is built with ``projection_root=True``); nested serializers, including
+ones a method field builds by hand with the view's context, render in full.
+
+``project_queryset`` narrows the queryset to what a projected response reads:
+prefetches for relations no rendered field uses are dropped and, when the
+queryset has no ``select_related``, ``.only()`` loads just the rendered
+columns. It learns what a field reads from its ``source``; method fields and
+properties declare theirs in ``Meta.field_sources`` (a dict of field name to
+lookup paths). A rendered field that reads something undeclared leaves the
+queryset untouched.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def _param_names(request, param):
+    raw = getattr(request, 'query_params', {}).get(param)
+    if raw is None:
+        return None
+    return {name.strip() for name in raw.split(',') if name.strip()}
+
+
+def requested_fields(request, field_names, expandable_fields=()):
+    """
+    The field names a projected response renders, or None when ``request``
+    does not ask for a projection. ``field_names`` is every field the
+    serializer declares.
+    """
+    if getattr(request, 'method', None) not in SAFE_METHODS:
+        return None
+    fields = _param_names(request, FIELDS_PARAM)
+    expand = _param_names(request, EXPAND_PARAM)
+    if fields is None and expand is None:
+        return None
+
+    if fields is None:
+        fields = set(field_names) - set(expandable_fields)
+    return (fields | (expand or set())) & set(field_names)
+
+
+class FieldProjectionMixin:
+    """Applies ``?fields=`` / ``?expand=`` to a ModelSerializer built with ``projection_root=True``."""
+
+    def __init__(self, *args, projection_root=False, **kwargs):
+        self.projection_root = projection_root
+        super().__init__(*args, **kwargs)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self.projection_root:
+            return fields
+        selected = requested_fields(
+            self.context.get('request'),
+            fields,
+            getattr(self.Meta, 'expandable_fields', ()),
+        )
+        if selected is None:
+            return fields
+        return {name: field for name, field in fields.items() if name in selected}
+
+
+class FieldProjectionViewMixin:
+    """Marks the serializer a generic view creates as the one the request projects."""
+
+    def get_serializer(self, *args, **kwargs):
+        if issubclass(self.get_serializer_class(), FieldProjectionMixin):
+            kwargs.setdefault('projection_root', True)
+        return super().get_serializer(*args, **kwargs)
+
+
+def _field_lookups(serializer_class, fields, selected):
+    """Lookup paths the selected fields read, or None if any of them is unknown."""
+    declared = getattr(serializer_class.Meta, 'field_sources', {})
+    lookups = set()
+    for name in selected:
+        if fields[name].write_only:
+            continue
+        if name in declared:
+            lookups.update(declared[name])
+            continue
+        source = fields[name].source
+        if source == '*':
+            return None
+        lookups.add(source.replace('.', '__'))
+    return lookups
+
+
+def project_queryset(queryset, request, serializer_class):
+    """
+    Narrows ``queryset`` to what ``serializer_class`` renders for ``request``.
+    Returns it unchanged when the request is not projected.
+    """
+    fields = serializer_class().fields
+    selected = requested_fields(
+        request,
+        fields,
+        getattr(serializer_class.Meta, 'expandable_fields', ()),
+    )
+    if selected is None:
+        return queryset
+    lookups = _field_lookups(serializer_class, fields, selected)
+    if lookups is None:
+        return queryset
+
+    def is_read(path):
+        return any(lookup == path or lookup.startswith(f'{path}__') for lookup in lookups)
+
+    prefetches = [
+        lookup for lookup in queryset._prefetch_related_lookups
+        if is_read(getattr(lookup, 'prefetch_to', lookup))
+    ]
+    if len(prefetches) != len(queryset._prefetch_related_lookups):
+        queryset = queryset.prefetch_related(None).prefetch_related(*prefetches)
+
+    if queryset.query.select_related is not False:
+        return queryset
+
+    opts = queryset.model._meta
+    columns = {opts.pk.name}
+    for lookup in lookups:
+        root = lookup.split('__')[0]
+        try:
+            field = opts.get_field(root)
+        except FieldDoesNotExist:
+            # An annotation is loaded regardless of .only(); anything else is
+            # a property we cannot see through.
+            if root in queryset.query.annotations:
+                continue
+            return queryset
+        if field.concrete:
+            columns.add(field.name)
+    return queryset.only(*columns)
@@ -0,0 +1,273 @@
+"""
+Per-user realtime event fan-out served over WebSockets from ``backend/asgi.py``.
+
+Apps publish small JSON events (new messages, alerts, unread counters) with
+``publish_user_event``; every socket connected for that user receives them.
+The broker is pluggable through ``settings.REALTIME_BROKER``:
+
+- ``InMemoryEventBroker`` delivers inside the current process (tests, single
+  worker deployments).
+- ``RedisEventBroker`` uses Redis pub/sub so events reach sockets held by any
+  worker process. Requires the optional ``redis`` package.
+
+Polling endpoints stay the source of truth; events are best-effort hints.
+"""
+import asyncio
+import json
+import logging
+import threading
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+REALTIME_WEBSOCKET_PATH = '/ws/events/'
+_CLOSE_UNAUTHORIZED = 4401
+
+
+def user_channel(user_id):
+    return f"user:{user_id}"
+
+
+def role_channel(role):
+    return f"role:{role}"
+
+
+class BaseEventBroker:
+    def publish(self, channel, message):
+        """Publish an already-encoded text ``message``. Must be callable from sync code."""
+        raise NotImplementedError
+
+    def subscribe(self, channels):
+        """Return a subscription exposing ``async get()`` and ``async close()``."""
+        raise NotImplementedError
+
+
+class _InMemorySubscription:
+    def __init__(self, broker, channels):
+        self._broker = broker
+        self.channels = tuple(channels)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+
+    async def get(self):
+        return await self.queue.get()
+
+    async def close(self):
+        self._broker._remove(self)
+
+
+class InMemoryEventBroker(BaseEventBroker):
+    """Process-local broker. Thread-safe publish into any event loop."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+
+    def subscribe(self, channels):
+        subscription = _InMemorySubscription(self, channels)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def _remove(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscriptions.get(channel)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscriptions[channel]
+
+    def subscriber_count(self, channel):
+        with self._lock:
+            return len(self._subscriptions.get(channel, ()))
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscriptions.get(channel, ()))
+
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.queue.put_nowait, message)
+            except RuntimeError:
+                # The socket's loop already shut down; it will unsubscribe itself.
+                continue
+
+
+class _RedisSubscription:
+    def __init__(self, pubsub, channels):
+        self._pubsub = pubsub
+        self.channels = tuple(channels)
+        self._subscribed = False
+
+    async def get(self):
+        if not self._subscribed:
+            await self._pubsub.subscribe(*self.channels)
+            self._subscribed = True
+
+        while True:
+            message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=None)
+            if message and message.get('type') == 'message':
+                data = message.get('data')
+                return data.decode() if isinstance(data, bytes) else data
+
+    async def close(self):
+        try:
+            await self._pubsub.unsubscribe()
+        finally:
+            await self._pubsub.aclose()
+
+
+class RedisEventBroker(BaseEventBroker):
+    """Cross-process broker backed by Redis pub/sub."""
+
+    def __init__(self, url=None):
+        try:
+            import redis
+            import redis.asyncio as redis_asyncio
+        except ImportError as exc:
+            raise ImproperlyConfigured(
+                'RedisEventBroker requires the "redis" package. Install it or set '
+                'REALTIME_BROKER to backend.realtime.InMemoryEventBroker.'
+            ) from exc
+
+        self._url = url or getattr(settings, 'REALTIME_REDIS_URL', 'redis://localhost:6379/0')
+        self._client = redis.Redis.from_url(self._url)
+        self._async_module = redis_asyncio
+
+    def publish(self, channel, message):
+        try:
+            self._client.publish(channel, message)
+        except Exception as exc:
+            logger.warning('Realtime publish to %s failed: %s', channel, exc)
+
+    def subscribe(self, channels):
+        client = self._async_module.Redis.from_url(self._url)
+        return _RedisSubscription(client.pubsub(), channels)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                broker_path = getattr(settings, 'REALTIME_BROKER', 'backend.realtime.InMemoryEventBroker')
+                _broker = import_string(broker_path)()
+    return _broker
+
+
+def set_broker(broker):
+    """Swap the process-wide broker (used by tests)."""
+    global _broker
+    with _broker_lock:
+        _broker = broker
+
+
+def encode_event(event_type, data):
+    return json.dumps({'type': event_type, 'data': data}, cls=DjangoJSONEncoder)
+
+
+def publish_event(channel, event_type, data):
+    """
+    Publish once the surrounding transaction commits (immediately in autocommit).
+
+    ``data`` may be a callable; it is then evaluated at commit time so counters
+    reflect the committed state.
+    """
+    def _send():
+        try:
+            payload = data() if callable(data) else data
+            get_broker().publish(channel, encode_event(event_type, payload))
+        except Exception as exc:
+            logger.warning('Realtime event %s to %s failed: %s', event_type, channel, exc)
+
+    transaction.on_commit(_send)
+
+
+def publish_user_event(user_id, event_type, data):
+    if user_id:
+        publish_event(user_channel(user_id), event_type, data)
+
+
+def publish_role_event(role, event_type, data):
+    if role:
+        publish_event(role_channel(role), event_type, data)
+
+
+def _authenticate_token(raw_token):
+    from rest_framework_simplejwt.authentication import JWTAuthentication #type: ignore
+    from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError #type: ignore
+
+    authenticator = JWTAuthentication()
+    try:
+        validated = authenticator.get_validated_token(raw_token)
+        user = authenticator.get_user(validated)
+    except (AuthenticationFailed, InvalidToken, TokenError):
+        return None
+
+    if not user or not user.is_active:
+        return None
+    return user
+
+
+def _channels_for_user(user):
+    role = 'Guide' if getattr(user, 'is_local_guide', False) else 'Tourist'
+    return [user_channel(user.id), role_channel(role)]
+
+
+class UserEventSocket:
+    """
+    ASGI WebSocket application streaming a user's realtime events.
+
+    Connect to ``/ws/events/?token=<access token>``. The server pushes JSON
+    ``{"type": ..., "data": ...}`` frames; sending ``ping`` returns ``pong``.
+    """
+
+    async def __call__(self, scope, receive, send):
+        message = await receive()
+        if message.get('type') != 'websocket.connect':
+            return
+
+        query = parse_qs((scope.get('query_string') or b'').decode())
+        raw_token = (query.get('token') or [''])[0]
+        user = await sync_to_async(_authenticate_token)(raw_token) if raw_token else None
+        if user is None:
+            await send({'type': 'websocket.close', 'code': _CLOSE_UNAUTHORIZED})
+            return
+
+        subscription = get_broker().subscribe(_channels_for_user(user))
+        await send({'type': 'websocket.accept'})
+
+        pump = asyncio.create_task(self._pump(subscription, send))
+        try:
+            while True:
+                message = await receive()
+                if message.get('type') == 'websocket.disconnect':
+                    break
+                if message.get('type') == 'websocket.receive' and message.get('text') == 'ping':
+                    await send({'type': 'websocket.send', 'text': 'pong'})
+        finally:
+            pump.cancel()
+            try:
+                await pump
+            except asyncio.CancelledError:
+                pass
+            await subscription.close()
+
+    async def _pump(self, subscription, send):
+        while True:
+            text = await subscription.get()
+            await send({'type': 'websocket.send', 'text': text})
@@ -253,4 +253,51 @@ CRON_SECRET_KEY = config('CRON_SECRET_KEY')
 
 # Optional Expo access token for authenticated Expo Push API requests.
 EXPO_ACCESS_TOKEN = config('EXPO_ACCESS_TOKEN', default='')
-MAPBOX_ACCESS_TOKEN = config('MAPBOX_ACCESS_TOKEN', default='')
\ No newline at end of file
+# Expo Push API base URL; tests point this at a local fake server.
+EXPO_API_BASE_URL = config('EXPO_API_BASE_URL', default='https://exp.host/--/api/v2')
+MAPBOX_ACCESS_TOKEN = config('MAPBOX_ACCESS_TOKEN', default='')
+
+# Seconds a provider, package or accommodation rate stays in each process's
+# quote cache (accommodation_booking/pricing.py).
+PRICING_RATE_CACHE_TTL = config('PRICING_RATE_CACHE_TTL', default=60, cast=int)
+PRICING_RATE_CACHE_MAX_ENTRIES = config('PRICING_RATE_CACHE_MAX_ENTRIES', default=5000, cast=int)
+# Requests per client to the public batch quote endpoint.
+BOOKING_QUOTE_THROTTLE_RATE = config('BOOKING_QUOTE_THROTTLE_RATE', default='60/min')
+
+# Location search geocoding cache (destinations_and_attractions/geocoding.py).
+GEOCODING_CACHE_BACKEND = config('GEOCODING_CACHE_BACKEND', default='destinations_and_attractions.geocoding.TieredGeocodeCache')
+GEOCODING_CACHE_TTL = config('GEOCODING_CACHE_TTL', default=7 * 24 * 60 * 60, cast=int)
+GEOCODING_NEGATIVE_CACHE_TTL = config('GEOCODING_NEGATIVE_CACHE_TTL', default=60 * 60, cast=int)
+GEOCODING_CACHE_MEMORY_MAX_ENTRIES = config('GEOCODING_CACHE_MEMORY_MAX_ENTRIES', default=2048, cast=int)
+GEOCODING_CACHE_DATABASE_MAX_ENTRIES = config('GEOCODING_CACHE_DATABASE_MAX_ENTRIES', default=50000, cast=int)
+# Location search skips the external geocoders once the local gazetteer
+# (python manage.py build_gazetteer) returns at least this many matches.
+GAZETTEER_SUFFICIENT_RESULTS = config('GAZETTEER_SUFFICIENT_RESULTS', default=3, cast=int)
+# External geocoders are queried concurrently; the search returns whatever has
+# arrived once the overall deadline passes (destinations_and_attractions/geocoding_providers.py).
+GEOCODING_DEADLINE_SECONDS = config('GEOCODING_DEADLINE_SECONDS', default=3.0, cast=float)
+GEOCODING_REQUEST_TIMEOUT_SECONDS = config('GEOCODING_REQUEST_TIMEOUT_SECONDS', default=8.0, cast=float)
+GEOCODING_MAX_WORKERS = config('GEOCODING_MAX_WORKERS', default=8, cast=int)
+
+# Realtime WebSocket fan-out (backend/realtime.py). The in-memory broker only
+# reaches sockets held by the same process; use
+# 'backend.realtime.RedisEventBroker' (requires the redis package) when running
+# several ASGI workers.
+REALTIME_BROKER = config('REALTIME_BROKER', default='backend.realtime.InMemoryEventBroker')
+REALTIME_REDIS_URL = config('REALTIME_REDIS_URL', default='redis://localhost:6379/0')
+
+# Outbox (system_management_module/services/outbox.py). Jobs are always durable;
+# the inline flush only delivers them sooner from the web process. Run
+# `python manage.py run_outbox_worker` (or ping the cron endpoint) to pick up
+# retries and anything left behind by a restart. Push receipts are checked by a
+# delayed outbox job about 15 minutes after each dispatch, so the worker or the
+# cron endpoint must keep running at least that often.
+OUTBOX_INLINE_FLUSH = config('OUTBOX_INLINE_FLUSH', default=True, cast=bool)
+OUTBOX_CONCURRENCY = config('OUTBOX_CONCURRENCY', default=4, cast=int)
+
+# Public catalog responses (system_management_module/services/catalog_cache.py)
+# are cached as rendered JSON in this Django cache alias and keyed by the
+# catalog version counters, so edits show up immediately. The TTL only bounds
+# fields read from models without a counter (guide names, ratings). 0 disables.
+CATALOG_CACHE_ALIAS = config('CATALOG_CACHE_ALIAS', default='default')
+CATALOG_CACHE_TTL = config('CATALOG_CACHE_TTL', default=300, cast=int)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Message
+from .models import Conversation, Message
 
 # Register your models here.
 class MessageAdmin(admin.ModelAdmin):
@@ -7,5 +7,13 @@ class MessageAdmin(admin.ModelAdmin):
     list_filter = ('is_read', 'timestamp')
     search_fields = ('sender__username', 'accommodation__title')
 
+
+class ConversationAdmin(admin.ModelAdmin):
+    list_display = ('user', 'partner', 'last_message_timestamp', 'unread_count', 'is_deleted')
+    list_filter = ('is_deleted',)
+    search_fields = ('user__username', 'partner__username')
+    raw_id_fields = ('user', 'partner', 'last_message')
+
 admin.site.register(Message, MessageAdmin)
+admin.site.register(Conversation, ConversationAdmin)
 
@@ -0,0 +1,227 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+
+from .events import publish_conversation_unread
+from .models import Conversation, Message
+
+SUMMARY_FIELDS = ('last_message_id', 'last_message_timestamp', 'unread_count', 'is_deleted')
+
+
+def visible_thread(user_id, partner_id):
+    """Messages between the two users that ``user_id`` has not hidden."""
+    return Message.objects.filter(
+        (Q(sender=user_id, receiver=partner_id) & Q(deleted_by_sender=False)) |
+        (Q(sender=partner_id, receiver=user_id) & Q(deleted_by_receiver=False))
+    )
+
+
+def _empty_summary():
+    return {
+        'last_message_id': None,
+        'last_message_timestamp': None,
+        'unread_count': 0,
+        'is_deleted': True,
+    }
+
+
+def summarize_conversation(user_id, partner_id):
+    """Derives one side of a conversation from the raw Message table."""
+    latest = (
+        visible_thread(user_id, partner_id)
+        .order_by('-timestamp', '-id')
+        .values('id', 'timestamp')
+        .first()
+    )
+    unread_count = Message.objects.filter(
+        sender=partner_id,
+        receiver=user_id,
+        is_read=False,
+        deleted_by_receiver=False,
+    ).count()
+
+    if not latest:
+        summary = _empty_summary()
+        summary['unread_count'] = unread_count
+        return summary
+
+    return {
+        'last_message_id': latest['id'],
+        'last_message_timestamp': latest['timestamp'],
+        'unread_count': unread_count,
+        'is_deleted': False,
+    }
+
+
+def refresh_conversation(user_id, partner_id):
+    """Recomputes one side from scratch; used when messages are hidden."""
+    has_messages = Message.objects.filter(
+        Q(sender=user_id, receiver=partner_id) | Q(sender=partner_id, receiver=user_id)
+    ).exists()
+    if not has_messages:
+        Conversation.objects.filter(user_id=user_id, partner_id=partner_id).delete()
+        return None
+
+    conversation, _ = Conversation.objects.update_or_create(
+        user_id=user_id,
+        partner_id=partner_id,
+        defaults=summarize_conversation(user_id, partner_id),
+    )
+    return conversation
+
+
+def _apply_new_message(user_id, partner_id, message, unread_increment):
+    updated = Conversation.objects.filter(user_id=user_id, partner_id=partner_id).update(
+        last_message_id=message.id,
+        last_message_timestamp=message.timestamp,
+        unread_count=F('unread_count') + unread_increment,
+        is_deleted=False,
+    )
+    if updated:
+        return
+
+    try:
+        with transaction.atomic():
+            Conversation.objects.create(
+                user_id=user_id,
+                partner_id=partner_id,
+                **summarize_conversation(user_id, partner_id),
+            )
+    except IntegrityError:
+        # A concurrent writer created the row first; fall back to the update path.
+        Conversation.objects.filter(user_id=user_id, partner_id=partner_id).update(
+            last_message_id=message.id,
+            last_message_timestamp=message.timestamp,
+            unread_count=F('unread_count') + unread_increment,
+            is_deleted=False,
+        )
+
+
+def record_new_message(message):
+    _apply_new_message(message.sender_id, message.receiver_id, message, unread_increment=0)
+    _apply_new_message(message.receiver_id, message.sender_id, message, unread_increment=1)
+
+
+def mark_conversation_read(user_id, partner_id, up_to_id=None):
+    """
+    Marks the partner's messages to ``user_id`` as read in one UPDATE, optionally
+    only up to (and including) ``up_to_id``. Safe to repeat.
+
+    Returns ``(marked, remaining_unread)``.
+    """
+    unread = Message.objects.filter(
+        sender=partner_id,
+        receiver=user_id,
+        is_read=False,
+        deleted_by_receiver=False,
+    )
+    if up_to_id is not None:
+        unread = unread.filter(id__lte=up_to_id)
+
+    marked = unread.update(is_read=True)
+    if not marked:
+        return 0, get_unread_count(user_id, partner_id)
+
+    if up_to_id is None:
+        remaining = 0
+    else:
+        remaining = Message.objects.filter(
+            sender=partner_id,
+            receiver=user_id,
+            is_read=False,
+            deleted_by_receiver=False,
+        ).count()
+
+    Conversation.objects.filter(user_id=user_id, partner_id=partner_id).update(unread_count=remaining)
+    publish_conversation_unread(user_id, partner_id, remaining)
+    return marked, remaining
+
+
+def hide_conversation(user_id, partner_id):
+    Conversation.objects.filter(user_id=user_id, partner_id=partner_id).update(
+        last_message=None,
+        last_message_timestamp=None,
+        unread_count=0,
+        is_deleted=True,
+    )
+    publish_conversation_unread(user_id, partner_id, 0)
+
+
+def get_unread_count(user_id, partner_id):
+    value = (
+        Conversation.objects
+        .filter(user_id=user_id, partner_id=partner_id)
+        .values_list('unread_count', flat=True)
+        .first()
+    )
+    if value is None:
+        return summarize_conversation(user_id, partner_id)['unread_count']
+    return value
+
+
+def build_conversation_snapshot():
+    """
+    Derives every conversation side from a single ordered pass over Message.
+
+    Returns a dict keyed by ``(user_id, partner_id)`` with the same fields as
+    ``summarize_conversation``.
+    """
+    snapshot = {}
+    rows = (
+        Message.objects
+        .order_by('timestamp', 'id')
+        .values_list(
+            'id', 'sender_id', 'receiver_id', 'timestamp',
+            'is_read', 'deleted_by_sender', 'deleted_by_receiver',
+        )
+    )
+
+    for message_id, sender_id, receiver_id, timestamp, is_read, hidden_by_sender, hidden_by_receiver in rows.iterator():
+        sender_side = snapshot.setdefault((sender_id, receiver_id), _empty_summary())
+        receiver_side = snapshot.setdefault((receiver_id, sender_id), _empty_summary())
+
+        if not hidden_by_sender:
+            sender_side.update(last_message_id=message_id, last_message_timestamp=timestamp, is_deleted=False)
+
+        if not hidden_by_receiver:
+            receiver_side.update(last_message_id=message_id, last_message_timestamp=timestamp, is_deleted=False)
+            if not is_read:
+                receiver_side['unread_count'] += 1
+
+    return snapshot
+
+
+@transaction.atomic
+def rebuild_conversations(batch_size=1000):
+    snapshot = build_conversation_snapshot()
+    Conversation.objects.all().delete()
+    Conversation.objects.bulk_create(
+        [
+            Conversation(user_id=user_id, partner_id=partner_id, **summary)
+            for (user_id, partner_id), summary in snapshot.items()
+        ],
+        batch_size=batch_size,
+    )
+    return len(snapshot)
+
+
+def find_conversation_drift():
+    """
+    Compares stored Conversation rows against the raw Message table.
+
+    Returns a list of ``(user_id, partner_id, expected, actual)`` tuples where
+    ``expected``/``actual`` are summary dicts, or ``None`` for a missing row.
+    """
+    expected_rows = build_conversation_snapshot()
+    actual_rows = {
+        (row['user_id'], row['partner_id']): {field: row[field] for field in SUMMARY_FIELDS}
+        for row in Conversation.objects.values('user_id', 'partner_id', *SUMMARY_FIELDS).iterator()
+    }
+
+    drift = []
+    for key in sorted(set(expected_rows) | set(actual_rows)):
+        expected = expected_rows.get(key)
+        actual = actual_rows.get(key)
+        if expected != actual:
+            drift.append((key[0], key[1], expected, actual))
+
+    return drift
@@ -0,0 +1,16 @@
+from backend.realtime import publish_user_event
+
+from .serializers import MessageSerializer
+
+
+def publish_message_created(message):
+    payload = MessageSerializer(message).data
+    publish_user_event(message.receiver_id, 'message.created', payload)
+    publish_user_event(message.sender_id, 'message.created', payload)
+
+
+def publish_conversation_unread(user_id, partner_id, unread_count):
+    publish_user_event(user_id, 'conversation.unread', {
+        'partner_id': partner_id,
+        'unread_count': unread_count,
+    })
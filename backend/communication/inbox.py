@@ -0,0 +1,79 @@
+import base64
+import binascii
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from .models import Conversation
+
+INBOX_DEFAULT_LIMIT = 20
+INBOX_MAX_LIMIT = 100
+
+
+class InvalidInboxCursor(ValueError):
+    pass
+
+
+def conversation_inbox_queryset(user):
+    """
+    Returns the user's visible conversations, newest first, with the partner
+    profile and latest message joined in.
+
+    Reads the materialized Conversation rows (see ``communication.conversations``),
+    so the inbox is a single indexed range scan regardless of how many partners
+    or messages the user has.
+    """
+    return (
+        Conversation.objects
+        .filter(user=user, is_deleted=False, last_message_timestamp__isnull=False)
+        .select_related('partner__agency_profile', 'last_message')
+        .order_by('-last_message_timestamp', '-partner_id')
+    )
+
+
+def encode_inbox_cursor(timestamp, partner_id):
+    raw = f"{timestamp.isoformat()}|{partner_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_inbox_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        timestamp_text, partner_text = raw.rsplit('|', 1)
+        timestamp = parse_datetime(timestamp_text)
+        partner_id = int(partner_text)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidInboxCursor('Invalid cursor.')
+
+    if timestamp is None:
+        raise InvalidInboxCursor('Invalid cursor.')
+
+    return timestamp, partner_id
+
+
+def paginate_inbox(queryset, cursor=None, limit=INBOX_DEFAULT_LIMIT):
+    """
+    Keyset pagination over (last_message_timestamp, partner_id), both descending.
+
+    Returns ``(rows, next_cursor)``; ``next_cursor`` is ``None`` on the last page.
+    """
+    limit = max(1, min(int(limit), INBOX_MAX_LIMIT))
+
+    if cursor:
+        timestamp, partner_id = decode_inbox_cursor(cursor)
+        queryset = queryset.filter(
+            Q(last_message_timestamp__lt=timestamp) |
+            Q(last_message_timestamp=timestamp, partner_id__lt=partner_id)
+        )
+
+    rows = list(queryset[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more and rows:
+        tail = rows[-1]
+        next_cursor = encode_inbox_cursor(tail.last_message_timestamp, tail.partner_id)
+
+    return rows, next_cursor
@@ -0,0 +1,91 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand #type: ignore
+from django.db import connection, transaction #type: ignore
+from django.test.utils import CaptureQueriesContext
+
+from communication.conversations import rebuild_conversations
+from communication.inbox import conversation_inbox_queryset, paginate_inbox
+from communication.models import Message
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed throwaway conversations for growing partner counts and report the '
+        'query count and latency of the first inbox page. Nothing is persisted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--partners',
+            type=int,
+            nargs='+',
+            default=[10, 100, 500],
+            help='Partner counts to benchmark.',
+        )
+        parser.add_argument(
+            '--messages-per-partner',
+            type=int,
+            default=5,
+            help='Messages seeded in every conversation.',
+        )
+        parser.add_argument(
+            '--page-size',
+            type=int,
+            default=20,
+            help='Inbox page size to fetch.',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Timed runs per partner count (best run is reported).',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('partners | queries | best_ms')
+
+        for partner_count in options['partners']:
+            with transaction.atomic():
+                queries, best_ms = self._run_case(
+                    partner_count,
+                    options['messages_per_partner'],
+                    options['page_size'],
+                    max(options['repeat'], 1),
+                )
+                transaction.set_rollback(True)
+
+            self.stdout.write(f'{partner_count:>8} | {queries:>7} | {best_ms:>7.2f}')
+
+    def _run_case(self, partner_count, messages_per_partner, page_size, repeat):
+        owner = User.objects.create_user(username=f'inbox_bench_owner_{partner_count}')
+        partners = User.objects.bulk_create([
+            User(username=f'inbox_bench_{partner_count}_{index}')
+            for index in range(partner_count)
+        ])
+
+        messages = []
+        for partner in partners:
+            for index in range(messages_per_partner):
+                if index % 2:
+                    messages.append(Message(sender=partner, receiver=owner, content='ping'))
+                else:
+                    messages.append(Message(sender=owner, receiver=partner, content='pong'))
+        Message.objects.bulk_create(messages, batch_size=1000)
+        # bulk_create skips post_save, so derive the summary rows directly.
+        rebuild_conversations()
+
+        best_ms = None
+        queries = 0
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                paginate_inbox(conversation_inbox_queryset(owner), limit=page_size)
+                elapsed_ms = (time.perf_counter() - started) * 1000
+            queries = len(captured.captured_queries)
+            best_ms = elapsed_ms if best_ms is None else min(best_ms, elapsed_ms)
+
+        return queries, best_ms
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand #type: ignore
+
+from communication.conversations import find_conversation_drift, refresh_conversation
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare Conversation summary rows against the raw Message table. '
+        'By default this only reports drift.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repair',
+            action='store_true',
+            help='Recompute every drifted row from Message.',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=20,
+            help='Maximum number of drifted rows to print.',
+        )
+
+    def handle(self, *args, **options):
+        drift = find_conversation_drift()
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('Conversation table is consistent with Message.'))
+            return
+
+        self.stdout.write(self.style.WARNING(f'Found {len(drift)} drifted conversation row(s).'))
+        for user_id, partner_id, expected, actual in drift[:options['limit']]:
+            self.stdout.write(f'- user={user_id} partner={partner_id} expected={expected} actual={actual}')
+
+        if options['repair']:
+            for user_id, partner_id, _expected, _actual in drift:
+                refresh_conversation(user_id, partner_id)
+            self.stdout.write(self.style.SUCCESS(f'Repaired {len(drift)} conversation row(s).'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand #type: ignore
+
+from communication.conversations import rebuild_conversations
+
+
+class Command(BaseCommand):
+    help = 'Rebuild every Conversation summary row from the raw Message table.'
+
+    def handle(self, *args, **options):
+        total = rebuild_conversations()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {total} conversation row(s).'))
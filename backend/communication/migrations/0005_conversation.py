@@ -0,0 +1,66 @@
+# Generated by Django 5.2.6 on 2026-10-18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_conversations(apps, schema_editor):
+    Message = apps.get_model('communication', 'Message')
+    Conversation = apps.get_model('communication', 'Conversation')
+
+    summaries = {}
+    rows = Message.objects.order_by('timestamp', 'id').values_list(
+        'id', 'sender_id', 'receiver_id', 'timestamp',
+        'is_read', 'deleted_by_sender', 'deleted_by_receiver',
+    )
+    for message_id, sender_id, receiver_id, timestamp, is_read, hidden_by_sender, hidden_by_receiver in rows.iterator():
+        for key, hidden in (((sender_id, receiver_id), hidden_by_sender), ((receiver_id, sender_id), hidden_by_receiver)):
+            summary = summaries.setdefault(key, {
+                'last_message_id': None,
+                'last_message_timestamp': None,
+                'unread_count': 0,
+                'is_deleted': True,
+            })
+            if hidden:
+                continue
+            summary.update(last_message_id=message_id, last_message_timestamp=timestamp, is_deleted=False)
+            if key[0] == receiver_id and not is_read:
+                summary['unread_count'] += 1
+
+    Conversation.objects.bulk_create(
+        [
+            Conversation(user_id=user_id, partner_id=partner_id, **summary)
+            for (user_id, partner_id), summary in summaries.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communication', '0004_message_soft_delete_flags'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Conversation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_message_timestamp', models.DateTimeField(blank=True, null=True)),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+                ('is_deleted', models.BooleanField(default=False, help_text='True when this user has hidden every message of the thread.')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('last_message', models.ForeignKey(blank=True, help_text='Latest message in the thread that is still visible to this user.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='communication.message')),
+                ('partner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversations', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-last_message_timestamp', '-partner'], name='conversation_inbox_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'partner'), name='unique_conversation_user_partner')],
+            },
+        ),
+        migrations.RunPython(populate_conversations, migrations.RunPython.noop),
+    ]
@@ -24,4 +24,41 @@ class Message(models.Model):
         ]
 
     def __str__(self):
-        return f"Msg from {self.sender.username}"
\ No newline at end of file
+        return f"Msg from {self.sender.username}"
+
+class Conversation(models.Model):
+    """
+    Materialized inbox row: one per (user, partner) side of a thread.
+
+    Kept in sync incrementally by ``communication.conversations`` whenever
+    messages are created, read or hidden, so inbox and unread lookups never
+    need to scan the Message table.
+    """
+    user = models.ForeignKey(User, related_name='conversations', on_delete=models.CASCADE)
+    partner = models.ForeignKey(User, related_name='+', on_delete=models.CASCADE)
+    last_message = models.ForeignKey(
+        Message,
+        related_name='+',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        help_text="Latest message in the thread that is still visible to this user."
+    )
+    last_message_timestamp = models.DateTimeField(null=True, blank=True)
+    unread_count = models.PositiveIntegerField(default=0)
+    is_deleted = models.BooleanField(
+        default=False,
+        help_text="True when this user has hidden every message of the thread."
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-last_message_timestamp', '-partner'], name='conversation_inbox_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'partner'], name='unique_conversation_user_partner'),
+        ]
+
+    def __str__(self):
+        return f"Conversation {self.user_id} -> {self.partner_id}"
@@ -0,0 +1,20 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .conversations import get_unread_count, record_new_message
+from .events import publish_conversation_unread, publish_message_created
+from .models import Message
+
+
+@receiver(post_save, sender=Message)
+def sync_conversation_for_new_message(sender, instance, created, **kwargs):
+    # Runs before system_management_module's alert signal (INSTALLED_APPS order),
+    # so the alert can read the fresh unread count from Conversation.
+    if created:
+        record_new_message(instance)
+        publish_message_created(instance)
+        publish_conversation_unread(
+            instance.receiver_id,
+            instance.sender_id,
+            get_unread_count(instance.receiver_id, instance.sender_id),
+        )
@@ -1,10 +1,21 @@
+import asyncio
+import json
+from io import StringIO
+
+from asgiref.sync import async_to_sync, sync_to_async
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
 
+from backend.realtime import REALTIME_WEBSOCKET_PATH, InMemoryEventBroker, UserEventSocket, get_broker, set_broker
 from agency_management_module.models import Agency
-from .models import Message
+from .conversations import find_conversation_drift
+from .models import Conversation, Message
 from .serializers import MessageSerializer
 
 User = get_user_model()
@@ -187,3 +198,244 @@ class CommunicationApiTests(TestCase):
 		self.assertEqual(thread_response.status_code, 200)
 		self.assertTrue(len(thread_response.data) > 0)
 		self.assertEqual(thread_response.data[0].get("sender_display_name"), "Blue Harbor Travels")
+
+
+class ConversationInboxTests(TestCase):
+	def setUp(self):
+		self.client = APIClient()
+		self.user = User.objects.create_user(username="inbox_owner", password="Pass12345")
+
+	def _seed_partners(self, count, start=0):
+		partners = []
+		for index in range(start, start + count):
+			partner = User.objects.create_user(username=f"inbox_partner_{index}", password="Pass12345")
+			Message.objects.create(sender=partner, receiver=self.user, content=f"Hello {index}")
+			partners.append(partner)
+		return partners
+
+	def test_inbox_reports_latest_message_and_unread_count(self):
+		partner = User.objects.create_user(username="inbox_partner", password="Pass12345")
+		Message.objects.create(sender=partner, receiver=self.user, content="First")
+		Message.objects.create(sender=partner, receiver=self.user, content="Second")
+		Message.objects.create(sender=self.user, receiver=partner, content="Reply")
+
+		self.client.force_authenticate(user=self.user)
+		response = self.client.get(reverse("conversation-list"))
+
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(len(response.data), 1)
+		self.assertEqual(response.data[0]["id"], partner.id)
+		self.assertEqual(response.data[0]["last_message"], "Reply")
+		self.assertEqual(response.data[0]["unread_count"], 2)
+
+	def test_keyset_pagination_walks_every_conversation_once(self):
+		partners = self._seed_partners(5)
+		self.client.force_authenticate(user=self.user)
+
+		seen = []
+		cursor = None
+		while True:
+			params = {"limit": 2}
+			if cursor:
+				params["cursor"] = cursor
+			response = self.client.get(reverse("conversation-list"), params)
+			self.assertEqual(response.status_code, 200)
+			seen.extend(item["id"] for item in response.data["results"])
+			cursor = response.data["next_cursor"]
+			if not cursor:
+				break
+
+		self.assertEqual(seen, [partner.id for partner in reversed(partners)])
+
+	def test_invalid_cursor_is_rejected(self):
+		self.client.force_authenticate(user=self.user)
+		response = self.client.get(reverse("conversation-list"), {"cursor": "not-a-cursor"})
+		self.assertEqual(response.status_code, 400)
+
+	def test_inbox_query_count_does_not_grow_with_partners(self):
+		self.client.force_authenticate(user=self.user)
+
+		self._seed_partners(2)
+		with CaptureQueriesContext(connection) as small:
+			self.client.get(reverse("conversation-list"), {"limit": 50})
+
+		self._seed_partners(28, start=2)
+		with CaptureQueriesContext(connection) as large:
+			response = self.client.get(reverse("conversation-list"), {"limit": 50})
+
+		self.assertEqual(len(response.data["results"]), 30)
+		self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+
+
+class ConversationSummaryTests(TestCase):
+	def setUp(self):
+		self.client = APIClient()
+		self.user = User.objects.create_user(username="summary_user", password="Pass12345")
+		self.partner = User.objects.create_user(username="summary_partner", password="Pass12345")
+
+	def _conversation(self, user, partner):
+		return Conversation.objects.get(user=user, partner=partner)
+
+	def test_new_message_updates_both_sides(self):
+		message = Message.objects.create(sender=self.partner, receiver=self.user, content="Hi")
+
+		receiver_side = self._conversation(self.user, self.partner)
+		sender_side = self._conversation(self.partner, self.user)
+		self.assertEqual(receiver_side.last_message_id, message.id)
+		self.assertEqual(receiver_side.unread_count, 1)
+		self.assertEqual(sender_side.last_message_id, message.id)
+		self.assertEqual(sender_side.unread_count, 0)
+
+	def test_reading_thread_resets_unread_count(self):
+		Message.objects.create(sender=self.partner, receiver=self.user, content="One")
+		Message.objects.create(sender=self.partner, receiver=self.user, content="Two")
+
+		self.client.force_authenticate(user=self.user)
+		self.client.get(reverse("message-thread", kwargs={"partner_id": self.partner.id}))
+
+		self.assertEqual(self._conversation(self.user, self.partner).unread_count, 0)
+
+	def test_deleting_messages_keeps_summary_consistent(self):
+		first = Message.objects.create(sender=self.user, receiver=self.partner, content="First")
+		second = Message.objects.create(sender=self.user, receiver=self.partner, content="Second")
+
+		self.client.force_authenticate(user=self.user)
+		self.client.delete(reverse("message-delete", kwargs={"message_id": second.id}) + "?scope=everyone")
+		self.assertEqual(self._conversation(self.partner, self.user).last_message_id, first.id)
+
+		self.client.delete(reverse("conversation-delete", kwargs={"partner_id": self.partner.id}))
+		self.assertTrue(self._conversation(self.user, self.partner).is_deleted)
+		self.assertFalse(self._conversation(self.partner, self.user).is_deleted)
+		self.assertEqual(find_conversation_drift(), [])
+
+	def test_rebuild_and_drift_check(self):
+		Message.objects.create(sender=self.partner, receiver=self.user, content="Hello")
+		Conversation.objects.filter(user=self.user).update(unread_count=7)
+
+		drift = find_conversation_drift()
+		self.assertEqual(len(drift), 1)
+		self.assertEqual(drift[0][:2], (self.user.id, self.partner.id))
+
+		call_command("rebuild_conversations", stdout=StringIO())
+		self.assertEqual(find_conversation_drift(), [])
+		self.assertEqual(self._conversation(self.user, self.partner).unread_count, 1)
+
+
+class MessageThreadWindowTests(TestCase):
+	def setUp(self):
+		self.client = APIClient()
+		self.user = User.objects.create_user(username="window_user", password="Pass12345")
+		self.partner = User.objects.create_user(username="window_partner", password="Pass12345")
+		self.messages = [
+			Message.objects.create(sender=self.partner, receiver=self.user, content=f"Message {index}")
+			for index in range(7)
+		]
+		self.client.force_authenticate(user=self.user)
+		self.url = reverse("message-thread", kwargs={"partner_id": self.partner.id})
+
+	def test_limit_returns_latest_page_without_marking_read(self):
+		response = self.client.get(self.url, {"limit": 3})
+
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual([item["id"] for item in response.data["results"]], [m.id for m in self.messages[-3:]])
+		self.assertTrue(response.data["has_more"])
+		self.assertEqual(Message.objects.filter(is_read=False).count(), 7)
+
+	def test_before_id_walks_backwards(self):
+		response = self.client.get(self.url, {"before_id": self.messages[3].id, "limit": 2})
+
+		self.assertEqual([item["id"] for item in response.data["results"]], [self.messages[1].id, self.messages[2].id])
+		self.assertTrue(response.data["has_more"])
+
+	def test_after_id_returns_only_delta(self):
+		response = self.client.get(self.url, {"after_id": self.messages[4].id})
+
+		self.assertEqual([item["id"] for item in response.data["results"]], [self.messages[5].id, self.messages[6].id])
+		self.assertFalse(response.data["has_more"])
+
+	def test_window_rejects_foreign_anchor(self):
+		outsider = User.objects.create_user(username="window_outsider", password="Pass12345")
+		foreign = Message.objects.create(sender=outsider, receiver=self.partner, content="Elsewhere")
+
+		response = self.client.get(self.url, {"after_id": foreign.id})
+		self.assertEqual(response.status_code, 400)
+
+	def test_page_query_count_is_constant(self):
+		with CaptureQueriesContext(connection) as short_page:
+			self.client.get(self.url, {"limit": 2})
+		with CaptureQueriesContext(connection) as long_page:
+			self.client.get(self.url, {"limit": 7})
+
+		self.assertEqual(len(short_page.captured_queries), len(long_page.captured_queries))
+
+	def test_mark_read_up_to_id_is_idempotent(self):
+		read_url = reverse("message-thread-read", kwargs={"partner_id": self.partner.id})
+
+		first = self.client.post(read_url, {"up_to_id": self.messages[3].id}, format="json")
+		self.assertEqual(first.data, {"marked_read": 4, "unread_count": 3})
+
+		second = self.client.post(read_url, {"up_to_id": self.messages[3].id}, format="json")
+		self.assertEqual(second.data, {"marked_read": 0, "unread_count": 3})
+		self.assertEqual(Conversation.objects.get(user=self.user, partner=self.partner).unread_count, 3)
+
+
+class RealtimeMessageEventTests(TestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(username="socket_user", password="Pass12345")
+		self.partner = User.objects.create_user(username="socket_partner", password="Pass12345")
+		self.previous_broker = get_broker()
+		set_broker(InMemoryEventBroker())
+
+	def tearDown(self):
+		set_broker(self.previous_broker)
+
+	def _send_committed_message(self):
+		with self.captureOnCommitCallbacks(execute=True):
+			return Message.objects.create(sender=self.partner, receiver=self.user, content="Live hello")
+
+	def _socket_scope(self, token):
+		return {
+			"type": "websocket",
+			"path": REALTIME_WEBSOCKET_PATH,
+			"query_string": f"token={token}".encode(),
+		}
+
+	def test_socket_streams_new_message_and_unread_count(self):
+		token = str(AccessToken.for_user(self.user))
+
+		async def scenario():
+			inbound = asyncio.Queue()
+			outbound = asyncio.Queue()
+			await inbound.put({"type": "websocket.connect"})
+			socket_task = asyncio.create_task(UserEventSocket()(self._socket_scope(token), inbound.get, outbound.put))
+
+			accepted = await asyncio.wait_for(outbound.get(), 5)
+			message = await sync_to_async(self._send_committed_message)()
+			frames = [await asyncio.wait_for(outbound.get(), 5) for _ in range(2)]
+
+			await inbound.put({"type": "websocket.disconnect"})
+			await asyncio.wait_for(socket_task, 5)
+			return accepted, message, [json.loads(frame["text"]) for frame in frames]
+
+		accepted, message, events = async_to_sync(scenario)()
+
+		self.assertEqual(accepted["type"], "websocket.accept")
+		self.assertEqual(events[0]["type"], "message.created")
+		self.assertEqual(events[0]["data"]["id"], message.id)
+		self.assertEqual(events[1], {
+			"type": "conversation.unread",
+			"data": {"partner_id": self.partner.id, "unread_count": 1},
+		})
+		self.assertEqual(get_broker().subscriber_count(f"user:{self.user.id}"), 0)
+
+	def test_socket_rejects_missing_token(self):
+		async def scenario():
+			inbound = asyncio.Queue()
+			outbound = asyncio.Queue()
+			await inbound.put({"type": "websocket.connect"})
+			await UserEventSocket()(self._socket_scope(""), inbound.get, outbound.put)
+			return await outbound.get()
+
+		closed = async_to_sync(scenario)()
+		self.assertEqual(closed["type"], "websocket.close")
@@ -0,0 +1,59 @@
+from django.db.models import Q
+
+from .conversations import visible_thread
+from .models import Message
+
+THREAD_DEFAULT_LIMIT = 30
+THREAD_MAX_LIMIT = 100
+
+
+class InvalidThreadWindow(ValueError):
+    pass
+
+
+def _anchor_timestamp(user_id, partner_id, message_id):
+    timestamp = (
+        Message.objects
+        .filter(pk=message_id)
+        .filter(Q(sender=user_id, receiver=partner_id) | Q(sender=partner_id, receiver=user_id))
+        .values_list('timestamp', flat=True)
+        .first()
+    )
+    if timestamp is None:
+        raise InvalidThreadWindow('Message does not belong to this conversation.')
+    return timestamp
+
+
+def thread_window(user_id, partner_id, before_id=None, after_id=None, limit=THREAD_DEFAULT_LIMIT):
+    """
+    Returns one page of a thread in chronological order, plus a ``has_more`` flag.
+
+    - ``after_id``: messages newer than that message (delta sync for polling).
+    - ``before_id``: messages older than that message (scrolling back).
+    - neither: the most recent ``limit`` messages.
+
+    Windows are keyset ranges on (timestamp, id), so each page is an index range
+    scan on ``message_thread_idx`` and costs the same however long the thread is.
+    """
+    if before_id is not None and after_id is not None:
+        raise InvalidThreadWindow('Use either before_id or after_id, not both.')
+
+    limit = max(1, min(int(limit), THREAD_MAX_LIMIT))
+    thread = visible_thread(user_id, partner_id).select_related('sender__agency_profile')
+
+    if after_id is not None:
+        anchor = _anchor_timestamp(user_id, partner_id, after_id)
+        rows = list(
+            thread
+            .filter(Q(timestamp__gt=anchor) | Q(timestamp=anchor, id__gt=after_id))
+            .order_by('timestamp', 'id')[:limit + 1]
+        )
+        return rows[:limit], len(rows) > limit
+
+    if before_id is not None:
+        anchor = _anchor_timestamp(user_id, partner_id, before_id)
+        thread = thread.filter(Q(timestamp__lt=anchor) | Q(timestamp=anchor, id__lt=before_id))
+
+    rows = list(thread.order_by('-timestamp', '-id')[:limit + 1])
+    has_more = len(rows) > limit
+    return list(reversed(rows[:limit])), has_more
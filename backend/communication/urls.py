@@ -3,6 +3,7 @@ from .views import (
     ConversationDeleteView,
     ConversationListView,
     MessageDeleteView,
+    MessageThreadReadView,
     MessageThreadView,
     send_support_email,
 )
@@ -20,6 +21,12 @@ urlpatterns = [
         name='message-thread'
     ),
 
+    path(
+        'conversations/<int:partner_id>/read/',
+        MessageThreadReadView.as_view(),
+        name='message-thread-read'
+    ),
+
     path(
         'conversations/<int:partner_id>/delete/',
         ConversationDeleteView.as_view(),
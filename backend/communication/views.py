@@ -4,14 +4,26 @@ from rest_framework.exceptions import NotFound, ValidationError #type: ignore
 from rest_framework.decorators import api_view, permission_classes #type: ignore
 from rest_framework.permissions import IsAuthenticated, AllowAny #type: ignore
 from rest_framework.views import APIView #type: ignore
-from django.db.models import Q
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ObjectDoesNotExist
-from django.core.mail import send_mail
 from django.conf import settings
 from system_management_module.services.email_preferences import send_preference_aware_email
+from system_management_module.services.outbox import enqueue_email
+from .conversations import (
+    hide_conversation,
+    mark_conversation_read,
+    refresh_conversation,
+    visible_thread,
+)
+from .inbox import (
+    INBOX_DEFAULT_LIMIT,
+    InvalidInboxCursor,
+    conversation_inbox_queryset,
+    paginate_inbox,
+)
 from .models import Message
 from .serializers import MessageSerializer
+from .threads import THREAD_DEFAULT_LIMIT, InvalidThreadWindow, thread_window
 from backend.pagination import OptionalPageNumberPagination
 
 User = get_user_model()
@@ -71,77 +83,65 @@ def _safe_profile_picture_value(user):
         return None
 
 
-def _messages_visible_to_user(user):
-    return Message.objects.filter(
-        (Q(sender=user) & Q(deleted_by_sender=False)) |
-        (Q(receiver=user) & Q(deleted_by_receiver=False))
-    )
-
 class ConversationListView(generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
     pagination_class = OptionalPageNumberPagination
 
-    def list(self, request, *args, **kwargs):
-        user = request.user
+    @staticmethod
+    def _serialize_conversation(conversation):
+        partner = conversation.partner
+        last_message = conversation.last_message
+        timestamp = conversation.last_message_timestamp
+        return {
+            'id': partner.id,
+            'username': partner.username,
+            'full_name': partner.get_full_name(),
+            'display_name': _display_name_for_user(partner),
+            'profile_picture': _safe_profile_picture_value(partner),
+            'last_message': last_message.content if last_message else '',
+            'last_message_timestamp': timestamp,
+            'last_message_ts': timestamp.timestamp() if timestamp else 0,
+            'unread_count': conversation.unread_count,
+        }
 
-        visible_messages = _messages_visible_to_user(user)
-
-        partners_raw = visible_messages.values_list('sender', 'receiver').distinct()
-        
-        partner_ids = set()
-        for s, r in partners_raw:
-            if s != user.id:
-                partner_ids.add(s)
-            if r != user.id:
-                partner_ids.add(r)
-                
-        partners = User.objects.filter(id__in=partner_ids).select_related('agency_profile')
-
-        data = []
-        for partner in partners:
-            thread = visible_messages.filter(
-                Q(sender=user, receiver=partner) |
-                Q(sender=partner, receiver=user)
-            )
-            latest = thread.order_by('-timestamp').first()
-            unread_count = Message.objects.filter(
-                sender=partner,
-                receiver=user,
-                is_read=False,
-                deleted_by_receiver=False,
-            ).count()
-
-            if not latest:
-                continue
-
-            data.append({
-                'id': partner.id,
-                'username': partner.username,
-                'full_name': partner.get_full_name(),
-                'display_name': _display_name_for_user(partner),
-                'profile_picture': _safe_profile_picture_value(partner),
-                'last_message': latest.content if latest else '',
-                'last_message_timestamp': latest.timestamp if latest else None,
-                'last_message_ts': latest.timestamp.timestamp() if latest else 0,
-                'unread_count': unread_count,
+    def list(self, request, *args, **kwargs):
+        queryset = conversation_inbox_queryset(request.user)
+
+        # Keyset mode: ?limit=N[&cursor=...] pages on (last_message_ts, partner_id).
+        if 'cursor' in request.query_params or 'limit' in request.query_params:
+            try:
+                limit = int(request.query_params.get('limit') or INBOX_DEFAULT_LIMIT)
+            except (TypeError, ValueError):
+                raise ValidationError({"limit": "limit must be an integer."})
+
+            try:
+                rows, next_cursor = paginate_inbox(
+                    queryset,
+                    cursor=request.query_params.get('cursor') or None,
+                    limit=limit,
+                )
+            except InvalidInboxCursor as exc:
+                raise ValidationError({"cursor": str(exc)})
+
+            return Response({
+                'results': [self._serialize_conversation(conversation) for conversation in rows],
+                'next_cursor': next_cursor,
             })
 
-        data.sort(
-            key=lambda item: item.get('last_message_ts') or 0,
-            reverse=True,
-        )
-
         paginator = self.pagination_class()
-        page = paginator.paginate_queryset(data, request, view=self)
+        page = paginator.paginate_queryset(queryset, request, view=self)
         if page is not None:
-            return paginator.get_paginated_response(page)
+            return paginator.get_paginated_response(
+                [self._serialize_conversation(conversation) for conversation in page]
+            )
 
-        return Response(data)
+        return Response([self._serialize_conversation(conversation) for conversation in queryset])
 
 
 class MessageThreadView(generics.ListCreateAPIView):
     serializer_class = MessageSerializer
     permission_classes = [permissions.IsAuthenticated]
+    window_query_params = ('before_id', 'after_id', 'limit')
 
     def get_queryset(self):
         user = self.request.user
@@ -150,19 +150,46 @@ class MessageThreadView(generics.ListCreateAPIView):
         if not partner_id:
             return Message.objects.none()
 
-        queryset = Message.objects.filter(
-            (Q(sender=user.id, receiver=partner_id) & Q(deleted_by_sender=False)) |
-            (Q(sender=partner_id, receiver=user.id) & Q(deleted_by_receiver=False))
+        return visible_thread(user.id, partner_id).select_related(
+            'sender__agency_profile',
         ).order_by('timestamp')
-        
-        Message.objects.filter(
-            receiver=user.id,
-            sender=partner_id,
-            is_read=False,
-            deleted_by_receiver=False,
-        ).update(is_read=True)
-        
-        return queryset
+
+    def _parse_window_param(self, name):
+        raw = self.request.query_params.get(name)
+        if raw in (None, ''):
+            return None
+        try:
+            value = int(raw)
+        except (TypeError, ValueError):
+            raise ValidationError({name: f"{name} must be an integer."})
+        if value < 1:
+            raise ValidationError({name: f"{name} must be a positive integer."})
+        return value
+
+    def list(self, request, *args, **kwargs):
+        if not any(name in request.query_params for name in self.window_query_params):
+            # Legacy full-thread read: still marks everything read for older clients.
+            mark_conversation_read(request.user.id, self.kwargs.get('partner_id'))
+            return super().list(request, *args, **kwargs)
+
+        # Windowed read (?limit, ?before_id, ?after_id) never writes; clients
+        # acknowledge explicitly through MessageThreadReadView.
+        try:
+            messages, has_more = thread_window(
+                request.user.id,
+                self.kwargs.get('partner_id'),
+                before_id=self._parse_window_param('before_id'),
+                after_id=self._parse_window_param('after_id'),
+                limit=self._parse_window_param('limit') or THREAD_DEFAULT_LIMIT,
+            )
+        except InvalidThreadWindow as exc:
+            raise ValidationError({"detail": str(exc)})
+
+        serializer = self.get_serializer(messages, many=True)
+        return Response({
+            'results': serializer.data,
+            'has_more': has_more,
+        })
 
     def perform_create(self, serializer):
         user = self.request.user
@@ -179,6 +206,30 @@ class MessageThreadView(generics.ListCreateAPIView):
         serializer.save(sender=user, receiver=receiver)
 
 
+class MessageThreadReadView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, partner_id):
+        up_to_id = request.data.get('up_to_id')
+        if up_to_id not in (None, ''):
+            try:
+                up_to_id = int(up_to_id)
+            except (TypeError, ValueError):
+                raise ValidationError({"up_to_id": "up_to_id must be an integer."})
+        else:
+            up_to_id = None
+
+        marked, remaining = mark_conversation_read(request.user.id, partner_id, up_to_id=up_to_id)
+
+        return Response(
+            {
+                "marked_read": marked,
+                "unread_count": remaining,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
 class ConversationDeleteView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -204,6 +255,8 @@ class ConversationDeleteView(APIView):
         ).update(deleted_by_receiver=True)
 
         hidden_messages = hidden_from_sender + hidden_from_receiver
+        if hidden_messages:
+            hide_conversation(user.id, partner_id)
 
         return Response(
             {
@@ -246,6 +299,8 @@ class MessageDeleteView(APIView):
 
             if changed:
                 message.save(update_fields=['deleted_by_sender', 'deleted_by_receiver'])
+                refresh_conversation(message.sender_id, message.receiver_id)
+                refresh_conversation(message.receiver_id, message.sender_id)
 
             return Response(
                 {
@@ -267,6 +322,8 @@ class MessageDeleteView(APIView):
 
         if update_fields:
             message.save(update_fields=update_fields)
+            partner_id = message.receiver_id if message.sender_id == user.id else message.sender_id
+            refresh_conversation(user.id, partner_id)
 
         return Response(
             {
@@ -377,12 +434,11 @@ def send_support_email(request):
 
     try:
         # Send to Admin
-        send_mail(
+        enqueue_email(
             subject=admin_subject,
             message=admin_plain_message,
             from_email=settings.DEFAULT_FROM_EMAIL,
             recipient_list=[settings.ADMIN_SUPPORT], 
-            fail_silently=False,
             html_message=admin_html_message
         )
         
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.utils.html import mark_safe 
-from .models import Destination, Attraction, DestinationImage, TourPackage, TourStop, LocationCorrectionRequest
+from .models import Destination, Attraction, DestinationImage, TourPackage, TourStop, LocationCorrectionRequest, GeocodeCacheEntry, GazetteerPlace
 
 # ==============================================
 # 1. DESTINATION ADMIN (Global Data)
@@ -43,6 +43,18 @@ class LocationCorrectionRequestAdmin(admin.ModelAdmin):
     search_fields = ('proposed_location', 'proposed_municipality', 'submitted_by__username')
     readonly_fields = ('created_at', 'updated_at', 'reviewed_at', 'applied_at')
 
+
+class GeocodeCacheEntryAdmin(admin.ModelAdmin):
+    list_display = ('provider', 'query', 'hit_count', 'last_used_at', 'expires_at')
+    list_filter = ('provider',)
+    search_fields = ('query',)
+
+
+class GazetteerPlaceAdmin(admin.ModelAdmin):
+    list_display = ('name', 'source', 'municipality', 'popularity', 'updated_at')
+    list_filter = ('source',)
+    search_fields = ('name', 'label')
+
 # ==============================================
 # 2. TOUR ADMIN (Guide Data)
 # ==============================================
@@ -77,4 +89,6 @@ admin.site.register(TourPackage, TourPackageAdmin)
 admin.site.register(Attraction)
 admin.site.register(DestinationImage)
 admin.site.register(TourStop)
-admin.site.register(LocationCorrectionRequest, LocationCorrectionRequestAdmin)
\ No newline at end of file
+admin.site.register(LocationCorrectionRequest, LocationCorrectionRequestAdmin)
+admin.site.register(GeocodeCacheEntry, GeocodeCacheEntryAdmin)
+admin.site.register(GazetteerPlace, GazetteerPlaceAdmin)
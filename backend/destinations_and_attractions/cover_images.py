@@ -0,0 +1,89 @@
+"""
+Destination cover images.
+
+A destination's cover is its first image by id. ``Destination`` stores the
+cover's id and its URL in three sizes, so serializers render a cover without
+querying ``DestinationImage`` or asking the storage backend for a URL:
+
+- full: the stored file's URL;
+- card and thumbnail: the same image resized by Cloudinary. Other storages
+  serve the original file for every size.
+
+``DestinationImage.save`` and ``delete`` refresh their destination's cover.
+Bulk changes that bypass them (queryset ``delete``, ``update``) are repaired
+by ``refresh_destination_covers`` and the command of the same name.
+"""
+from system_management_module.services.catalog_cache import bump_catalog_version
+
+from .models import Destination, DestinationImage
+
+CARD_TRANSFORMATION = 'c_fill,w_640,h_400,q_auto,f_auto'
+THUMBNAIL_TRANSFORMATION = 'c_fill,w_160,h_120,q_auto,f_auto'
+DEFAULT_BATCH_SIZE = 500
+
+_CLOUDINARY_UPLOAD = '/image/upload/'
+COVER_FIELDS = ['cover_image', 'cover_image_url', 'cover_card_url', 'cover_thumbnail_url']
+
+
+def variant_url(url, transformation):
+    if not url or _CLOUDINARY_UPLOAD not in url:
+        return url
+    return url.replace(_CLOUDINARY_UPLOAD, f'{_CLOUDINARY_UPLOAD}{transformation}/', 1)
+
+
+def cover_values(image):
+    """The stored cover fields for ``image`` (a DestinationImage or None)."""
+    url = image.image.url if image is not None and image.image else ''
+    return {
+        'cover_image': image,
+        'cover_image_url': url,
+        'cover_card_url': variant_url(url, CARD_TRANSFORMATION),
+        'cover_thumbnail_url': variant_url(url, THUMBNAIL_TRANSFORMATION),
+    }
+
+
+def refresh_destination_cover(destination_id):
+    image = DestinationImage.objects.filter(destination_id=destination_id).order_by('id').first()
+    # update() rather than save(): the location policy has nothing to check here.
+    Destination.objects.filter(pk=destination_id).update(**cover_values(image))
+
+
+def refresh_destination_covers(destinations=None, *, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Recomputes the covers of ``destinations`` (a Destination queryset, default
+    all) in id-ordered batches and writes only the ones that changed. Returns
+    the number of destinations updated.
+    """
+    destinations = Destination.objects.all() if destinations is None else destinations
+    destinations = destinations.order_by('id').only('id', *COVER_FIELDS)
+
+    updated = 0
+    last_id = 0
+    while True:
+        batch = list(destinations.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            return updated
+
+        first_images = {}
+        for image in DestinationImage.objects.filter(destination__in=batch).order_by('destination_id', 'id'):
+            first_images.setdefault(image.destination_id, image)
+
+        changed = []
+        for destination in batch:
+            image = first_images.get(destination.id)
+            values = cover_values(image)
+            unchanged = destination.cover_image_id == (image.id if image else None) and all(
+                getattr(destination, field) == values[field] for field in COVER_FIELDS[1:]
+            )
+            if not unchanged:
+                for field, value in values.items():
+                    setattr(destination, field, value)
+                changed.append(destination)
+
+        if changed:
+            Destination.objects.bulk_update(changed, COVER_FIELDS)
+            bump_catalog_version('destination')
+        updated += len(changed)
+        if len(batch) < batch_size:
+            return updated
+        last_id = batch[-1].id
@@ -0,0 +1,382 @@
+"""
+Local place index for location autocomplete inside Zamboanga City.
+
+``GazetteerPlace`` rows are rebuilt by ``python manage.py build_gazetteer``
+from destinations, approved accommodations, past booking meetup points and
+optional imported place lists (CSV, GeoJSON or Overpass JSON). Each process
+loads them once into a ``GazetteerIndex`` that answers prefix and trigram
+(typo-tolerant) lookups in memory, so ``LocationSearchView`` only calls the
+external geocoders when the index has too few matches.
+"""
+import csv
+import json
+import math
+import threading
+import time
+from bisect import bisect_left
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Max
+
+from backend.location_policy import CITY_SCOPE_LABEL, extract_municipality_from_text, validate_zds_coordinates
+
+from .geocoding import normalize_geocode_query
+from .models import Destination, GazetteerPlace
+
+DERIVED_SOURCES = ('destination', 'accommodation', 'meetup')
+# Small tie-breakers so curated places outrank imported ones with the same name.
+_SOURCE_WEIGHTS = {
+    'destination': 0.15,
+    'accommodation': 0.1,
+    'meetup': 0.05,
+    'imported': 0.0,
+}
+_MIN_TRIGRAM_SIMILARITY = 0.3
+_MIN_TRIGRAM_CONTAINMENT = 0.6
+_RELOAD_CHECK_SECONDS = 60
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+
+def _place_row(source, source_ref, name, latitude, longitude, label='', municipality='', popularity=0):
+    """Returns a validated row dict, or ``None`` for unnamed or out-of-bounds places."""
+    name = str(name or '').strip()
+    if not name or not normalize_geocode_query(name):
+        return None
+
+    try:
+        lat_value, lng_value = validate_zds_coordinates(latitude, longitude)
+    except ValueError:
+        return None
+    if lat_value is None:
+        return None
+
+    label = str(label or '').strip() or name
+    return {
+        'source': source,
+        'source_ref': str(source_ref)[:255],
+        'name': name[:255],
+        'label': label[:255],
+        'municipality': (municipality or extract_municipality_from_text(label) or CITY_SCOPE_LABEL)[:120],
+        'latitude': lat_value.quantize(Decimal('0.000001')),
+        'longitude': lng_value.quantize(Decimal('0.000001')),
+        'popularity': max(int(popularity or 0), 0),
+    }
+
+
+def collect_derived_places():
+    from accommodation_booking.models import Accommodation, Booking
+
+    destinations = (
+        Destination.objects
+        .exclude(latitude__isnull=True)
+        .exclude(longitude__isnull=True)
+        .annotate(booking_total=Count('bookings'))
+        .values_list('id', 'name', 'location', 'municipality', 'latitude', 'longitude', 'booking_total')
+    )
+    for dest_id, name, location, municipality, lat, lng, booking_total in destinations.iterator():
+        row = _place_row('destination', dest_id, name, lat, lng, label=location, municipality=municipality, popularity=booking_total)
+        if row:
+            yield row
+
+    accommodations = (
+        Accommodation.objects
+        .filter(is_approved=True)
+        .exclude(latitude__isnull=True)
+        .exclude(longitude__isnull=True)
+        .annotate(booking_total=Count('booking'))
+        .values_list('id', 'title', 'location', 'municipality', 'latitude', 'longitude', 'booking_total')
+    )
+    for acc_id, title, location, municipality, lat, lng, booking_total in accommodations.iterator():
+        row = _place_row('accommodation', acc_id, title, lat, lng, label=location, municipality=municipality, popularity=booking_total)
+        if row:
+            yield row
+
+    # Meetup points are grouped by name; only the place is indexed, never the booking.
+    meetups = (
+        Booking.objects
+        .exclude(meetup_location__isnull=True)
+        .exclude(meetup_location='')
+        .exclude(meetup_latitude__isnull=True)
+        .exclude(meetup_longitude__isnull=True)
+        .values_list('meetup_location', 'meetup_municipality', 'meetup_latitude', 'meetup_longitude')
+        .order_by('-id')
+    )
+    grouped = {}
+    for location, municipality, lat, lng in meetups.iterator():
+        key = normalize_geocode_query(location)
+        if key in grouped:
+            grouped[key]['popularity'] += 1
+            continue
+        row = _place_row('meetup', key, location, lat, lng, municipality=municipality, popularity=1)
+        if row:
+            grouped[key] = row
+    yield from grouped.values()
+
+
+def _first_present(mapping, *keys):
+    for key in keys:
+        value = mapping.get(key)
+        if value not in (None, ''):
+            return value
+    return None
+
+
+def load_place_file(path):
+    """
+    Parses an importable place list:
+
+    - CSV with ``name``, ``latitude``/``lat``, ``longitude``/``lon``/``lng`` and
+      optional ``id``, ``label``, ``municipality``, ``popularity`` columns;
+    - GeoJSON ``FeatureCollection`` of points with a ``name`` property;
+    - Overpass API JSON (``elements`` with ``lat``/``lon`` or ``center`` and ``tags.name``).
+    """
+    rows = []
+    if str(path).lower().endswith('.csv'):
+        with open(path, newline='', encoding='utf-8') as handle:
+            for index, record in enumerate(csv.DictReader(handle)):
+                name = _first_present(record, 'name')
+                row = _place_row(
+                    'imported',
+                    _first_present(record, 'id') or f"csv:{normalize_geocode_query(name)}:{index}",
+                    name,
+                    _first_present(record, 'latitude', 'lat'),
+                    _first_present(record, 'longitude', 'lon', 'lng'),
+                    label=_first_present(record, 'label'),
+                    municipality=_first_present(record, 'municipality'),
+                    popularity=_first_present(record, 'popularity') or 0,
+                )
+                if row:
+                    rows.append(row)
+        return rows
+
+    with open(path, encoding='utf-8') as handle:
+        payload = json.load(handle)
+
+    for feature in payload.get('features') or []:
+        geometry = feature.get('geometry') or {}
+        if geometry.get('type') != 'Point':
+            continue
+        lng, lat = (geometry.get('coordinates') or [None, None])[:2]
+        properties = feature.get('properties') or {}
+        name = _first_present(properties, 'name', 'name:en')
+        row = _place_row(
+            'imported',
+            feature.get('id') or properties.get('@id') or f"geojson:{normalize_geocode_query(name)}:{lat}:{lng}",
+            name,
+            lat,
+            lng,
+            label=_first_present(properties, 'label', 'display_name'),
+        )
+        if row:
+            rows.append(row)
+
+    for element in payload.get('elements') or []:
+        tags = element.get('tags') or {}
+        center = element.get('center') or {}
+        row = _place_row(
+            'imported',
+            f"osm:{element.get('type', 'node')}/{element.get('id')}",
+            _first_present(tags, 'name', 'name:en'),
+            element.get('lat', center.get('lat')),
+            element.get('lon', center.get('lon')),
+        )
+        if row:
+            rows.append(row)
+
+    return rows
+
+
+@transaction.atomic
+def rebuild_gazetteer(imported_rows=None, replace_imported=False, batch_size=1000):
+    """
+    Replaces every derived place and upserts ``imported_rows``. Returns a dict of
+    row counts per source.
+    """
+    derived = list(collect_derived_places())
+    GazetteerPlace.objects.filter(source__in=DERIVED_SOURCES).delete()
+    GazetteerPlace.objects.bulk_create([GazetteerPlace(**row) for row in derived], batch_size=batch_size)
+
+    if replace_imported:
+        GazetteerPlace.objects.filter(source='imported').delete()
+
+    if imported_rows:
+        unique_rows = {row['source_ref']: row for row in imported_rows}
+        GazetteerPlace.objects.bulk_create(
+            [GazetteerPlace(**row) for row in unique_rows.values()],
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['source', 'source_ref'],
+            update_fields=['name', 'label', 'municipality', 'latitude', 'longitude', 'popularity', 'updated_at'],
+        )
+
+    counts = {source: 0 for source, _ in GazetteerPlace.SOURCE_CHOICES}
+    for row in GazetteerPlace.objects.values('source').annotate(total=Count('id')):
+        counts[row['source']] = row['total']
+    return counts
+
+
+class GazetteerIndex:
+    """Immutable in-memory index over place rows."""
+
+    def __init__(self, places):
+        self.places = []
+        token_pairs = []
+        self._trigram_postings = {}
+
+        for place in places:
+            normalized = normalize_geocode_query(place['name'])
+            if not normalized:
+                continue
+            index = len(self.places)
+            place = dict(place, normalized=normalized, trigrams=_trigrams(normalized))
+            self.places.append(place)
+
+            for token in set(normalized.split()):
+                token_pairs.append((token, index))
+            for trigram in place['trigrams']:
+                self._trigram_postings.setdefault(trigram, []).append(index)
+
+        token_pairs.sort()
+        self._tokens = [token for token, _ in token_pairs]
+        self._token_places = [index for _, index in token_pairs]
+
+    def __len__(self):
+        return len(self.places)
+
+    def _places_with_token_prefix(self, prefix):
+        start = bisect_left(self._tokens, prefix)
+        matches = set()
+        for position in range(start, len(self._tokens)):
+            if not self._tokens[position].startswith(prefix):
+                break
+            matches.add(self._token_places[position])
+        return matches
+
+    def _prefix_matches(self, normalized_query):
+        candidates = None
+        for token in normalized_query.split():
+            token_matches = self._places_with_token_prefix(token)
+            candidates = token_matches if candidates is None else candidates & token_matches
+            if not candidates:
+                return {}
+
+        scores = {}
+        for index in candidates:
+            name = self.places[index]['normalized']
+            if name == normalized_query:
+                scores[index] = 1.2
+            elif name.startswith(normalized_query):
+                scores[index] = 1.0
+            else:
+                scores[index] = 0.8
+        return scores
+
+    def _trigram_matches(self, normalized_query):
+        query_trigrams = _trigrams(normalized_query)
+        shared = {}
+        for trigram in query_trigrams:
+            for index in self._trigram_postings.get(trigram, ()):
+                shared[index] = shared.get(index, 0) + 1
+
+        scores = {}
+        for index, overlap in shared.items():
+            place_trigrams = self.places[index]['trigrams']
+            similarity = overlap / (len(query_trigrams) + len(place_trigrams) - overlap)
+            # Share of the query found in the name, so a misspelt word still matches a longer name.
+            containment = overlap / len(query_trigrams)
+            if similarity >= _MIN_TRIGRAM_SIMILARITY or containment >= _MIN_TRIGRAM_CONTAINMENT:
+                # Kept below the prefix scores (>= 0.8) so exact prefixes rank first.
+                scores[index] = min(max(similarity, containment * 0.75), 0.75)
+        return scores
+
+    def search(self, query, limit=8):
+        normalized_query = normalize_geocode_query(query)
+        if not normalized_query or not self.places:
+            return []
+
+        scores = self._prefix_matches(normalized_query)
+        if len(scores) < limit:
+            for index, similarity in self._trigram_matches(normalized_query).items():
+                scores[index] = max(scores.get(index, 0), similarity)
+
+        ranked = sorted(
+            scores.items(),
+            key=lambda item: (
+                -(item[1]
+                  + 0.1 * math.log1p(self.places[item[0]]['popularity'])
+                  + _SOURCE_WEIGHTS.get(self.places[item[0]]['source'], 0)),
+                self.places[item[0]]['normalized'],
+            ),
+        )
+        return [self._as_result(self.places[index]) for index, _ in ranked[:limit]]
+
+    @staticmethod
+    def _as_result(place):
+        result = {
+            'id': f"gazetteer_{place['source']}_{place['source_ref']}",
+            'label': place['label'] or place['name'],
+            'name': place['name'],
+            'municipality': place['municipality'] or CITY_SCOPE_LABEL,
+            'latitude': float(place['latitude']),
+            'longitude': float(place['longitude']),
+            'source': place['source'],
+        }
+        if place['source'] == 'destination':
+            # Same shape as the live destination suggestions in LocationSearchView.
+            result['id'] = f"local_dest_{place['source_ref']}"
+            result['name'] = place['label'] or place['name']
+            result['is_existing'] = True
+            result['existing_name'] = place['name']
+        return result
+
+
+_index = None
+_index_version = None
+_index_checked_at = 0.0
+_index_lock = threading.Lock()
+
+
+def _current_version():
+    summary = GazetteerPlace.objects.aggregate(total=Count('id'), latest=Max('updated_at'))
+    return summary['total'], summary['latest']
+
+
+def load_gazetteer_index():
+    places = GazetteerPlace.objects.values(
+        'source', 'source_ref', 'name', 'label', 'municipality', 'latitude', 'longitude', 'popularity',
+    )
+    return GazetteerIndex(places.iterator())
+
+
+def get_gazetteer_index():
+    """
+    Returns the process-wide index, reloading it at most once a minute when
+    ``build_gazetteer`` has changed the table.
+    """
+    global _index, _index_version, _index_checked_at
+    now = time.monotonic()
+    if _index is not None and now - _index_checked_at < _RELOAD_CHECK_SECONDS:
+        return _index
+
+    with _index_lock:
+        if _index is not None and now - _index_checked_at < _RELOAD_CHECK_SECONDS:
+            return _index
+        version = _current_version()
+        if _index is None or version != _index_version:
+            _index = load_gazetteer_index()
+            _index_version = version
+        _index_checked_at = now
+    return _index
+
+
+def reset_gazetteer_index():
+    global _index, _index_version, _index_checked_at
+    with _index_lock:
+        _index = None
+        _index_version = None
+        _index_checked_at = 0.0
@@ -0,0 +1,336 @@
+"""
+Cache for the outbound geocoding lookups behind ``LocationSearchView``.
+
+Autocomplete fires a Mapbox/Nominatim round trip per keystroke, and the same
+handful of Zamboanga places is searched over and over. Provider results are
+cached per ``(provider, normalized query, limit)``:
+
+- ``InProcessGeocodeCache``: LRU dict with TTL, per worker process.
+- ``DatabaseGeocodeCache``: ``GeocodeCacheEntry`` rows shared by all workers.
+- ``TieredGeocodeCache`` (default): in-process first, database behind it.
+
+Empty and partial results are cached for a shorter TTL (negative caching);
+provider outages (``GeocodingUnavailable``) are never cached. Concurrent misses for the
+same key are coalesced into one outbound lookup. The backend is selected with
+``settings.GEOCODING_CACHE_BACKEND``.
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import GeocodeCacheEntry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60
+DEFAULT_NEGATIVE_TTL_SECONDS = 60 * 60
+DEFAULT_MEMORY_MAX_ENTRIES = 2048
+DEFAULT_DATABASE_MAX_ENTRIES = 50000
+# Entries promoted from the database tier live briefly in memory so expiry stays database-driven.
+_PROMOTED_TTL_SECONDS = 5 * 60
+_PRUNE_EVERY_WRITES = 200
+_COALESCE_WAIT_SECONDS = 30
+
+
+class GeocodingUnavailable(Exception):
+    """Raised by a fetcher when no provider request succeeded; never cached."""
+
+
+class PartialResults(list):
+    """Results from a lookup that hit its deadline or lost a provider; cached with the short TTL."""
+
+    partial = True
+
+
+def normalize_geocode_query(query):
+    text = str(query or '').strip().lower()
+    text = re.sub(r'[^\w]+', ' ', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def build_geocode_cache_key(provider, query, limit):
+    key = f"{provider}:{limit}:{normalize_geocode_query(query)}"
+    if len(key) > 255:
+        key = f"{provider}:{limit}:sha1:{hashlib.sha1(key.encode()).hexdigest()}"
+    return key
+
+
+class BaseGeocodeCache:
+    def get(self, key):
+        """Return the cached result list (possibly empty), or ``None`` on a miss."""
+        raise NotImplementedError
+
+    def set(self, key, results, ttl, provider='', query=''):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class InProcessGeocodeCache(BaseGeocodeCache):
+    def __init__(self, max_entries=None):
+        self.max_entries = max_entries or getattr(settings, 'GEOCODING_CACHE_MEMORY_MAX_ENTRIES', DEFAULT_MEMORY_MAX_ENTRIES)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, results = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return results
+
+    def set(self, key, results, ttl, provider='', query=''):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, list(results))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DatabaseGeocodeCache(BaseGeocodeCache):
+    def __init__(self, max_entries=None):
+        self.max_entries = max_entries or getattr(settings, 'GEOCODING_CACHE_DATABASE_MAX_ENTRIES', DEFAULT_DATABASE_MAX_ENTRIES)
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        now = timezone.now()
+        row = (
+            GeocodeCacheEntry.objects
+            .filter(key=key, expires_at__gt=now)
+            .values_list('id', 'results')
+            .first()
+        )
+        if row is None:
+            return None
+
+        entry_id, results = row
+        GeocodeCacheEntry.objects.filter(id=entry_id).update(hit_count=F('hit_count') + 1, last_used_at=now)
+        return results
+
+    def set(self, key, results, ttl, provider='', query=''):
+        now = timezone.now()
+        GeocodeCacheEntry.objects.update_or_create(
+            key=key,
+            defaults={
+                'provider': provider[:30],
+                'query': query[:255],
+                'results': list(results),
+                'expires_at': now + timedelta(seconds=ttl),
+                'last_used_at': now,
+            },
+        )
+
+        with self._lock:
+            self._writes += 1
+            should_prune = self._writes % _PRUNE_EVERY_WRITES == 0
+        if should_prune:
+            self.prune()
+
+    def prune(self):
+        """Drops expired rows, then the least recently used rows beyond ``max_entries``."""
+        GeocodeCacheEntry.objects.filter(expires_at__lte=timezone.now()).delete()
+        cutoff = (
+            GeocodeCacheEntry.objects
+            .order_by('-last_used_at')
+            .values_list('last_used_at', flat=True)[self.max_entries:self.max_entries + 1]
+        )
+        cutoff = list(cutoff)
+        if cutoff:
+            GeocodeCacheEntry.objects.filter(last_used_at__lte=cutoff[0]).delete()
+
+    def clear(self):
+        GeocodeCacheEntry.objects.all().delete()
+
+
+class TieredGeocodeCache(BaseGeocodeCache):
+    def __init__(self, memory=None, database=None):
+        self.memory = memory if memory is not None else InProcessGeocodeCache()
+        self.database = database if database is not None else DatabaseGeocodeCache()
+
+    def get(self, key):
+        results = self.memory.get(key)
+        if results is not None:
+            return results
+
+        results = self.database.get(key)
+        if results is not None:
+            self.memory.set(key, results, _PROMOTED_TTL_SECONDS)
+        return results
+
+    def set(self, key, results, ttl, provider='', query=''):
+        self.database.set(key, results, ttl, provider=provider, query=query)
+        self.memory.set(key, results, min(ttl, _PROMOTED_TTL_SECONDS))
+
+    def clear(self):
+        self.memory.clear()
+        self.database.clear()
+
+
+class GeocodeCacheStats:
+    _COUNTERS = ('hits', 'negative_hits', 'misses', 'coalesced', 'provider_errors')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._values = {name: 0 for name in self._COUNTERS}
+            self._fetch_seconds = 0.0
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self._values[name] += amount
+
+    def add_fetch_time(self, seconds):
+        with self._lock:
+            self._fetch_seconds += seconds
+
+    def snapshot(self):
+        with self._lock:
+            values = dict(self._values)
+            fetch_seconds = self._fetch_seconds
+
+        lookups = values['hits'] + values['misses']
+        values['hit_rate'] = round(values['hits'] / lookups, 4) if lookups else 0.0
+        values['avg_fetch_ms'] = round(fetch_seconds * 1000 / values['misses'], 2) if values['misses'] else 0.0
+        return values
+
+
+class _InFlightLookup:
+    def __init__(self):
+        self.done = threading.Event()
+        self.results = None
+        self.error = None
+
+
+class GeocodingCache:
+    """Front door used by the view: cache lookup, request coalescing and stats."""
+
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else TieredGeocodeCache()
+        self.stats = GeocodeCacheStats()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'GEOCODING_CACHE_TTL', DEFAULT_TTL_SECONDS)
+
+    @property
+    def negative_ttl(self):
+        return getattr(settings, 'GEOCODING_NEGATIVE_CACHE_TTL', DEFAULT_NEGATIVE_TTL_SECONDS)
+
+    def get_or_fetch(self, provider, query, limit, fetch):
+        """
+        Returns cached results for the lookup, calling ``fetch()`` on a miss.
+        ``fetch`` returns a list of JSON-serializable dicts or raises
+        ``GeocodingUnavailable``.
+        """
+        key = build_geocode_cache_key(provider, query, limit)
+        cached = self.backend.get(key)
+        if cached is not None:
+            self.stats.incr('hits')
+            if not cached:
+                self.stats.incr('negative_hits')
+            return [dict(item) for item in cached]
+
+        with self._lock:
+            lookup = self._inflight.get(key)
+            is_leader = lookup is None
+            if is_leader:
+                lookup = _InFlightLookup()
+                self._inflight[key] = lookup
+
+        if not is_leader:
+            self.stats.incr('coalesced')
+            if not lookup.done.wait(_COALESCE_WAIT_SECONDS):
+                raise GeocodingUnavailable('Timed out waiting for an in-flight lookup.')
+            if lookup.error is not None:
+                raise lookup.error
+            return [dict(item) for item in lookup.results]
+
+        self.stats.incr('misses')
+        started = time.perf_counter()
+        try:
+            fetched = fetch()
+            results = list(fetched)
+            lookup.results = results
+            partial = getattr(fetched, 'partial', False)
+            ttl = self.ttl if results and not partial else self.negative_ttl
+            try:
+                self.backend.set(key, results, ttl, provider=provider, query=normalize_geocode_query(query))
+            except Exception as exc:
+                # A cache write failure must not fail the search itself.
+                logger.warning('Geocoding cache write for %s failed: %s', key, exc)
+            return [dict(item) for item in results]
+        except GeocodingUnavailable as exc:
+            self.stats.incr('provider_errors')
+            lookup.error = exc
+            raise
+        except Exception as exc:
+            lookup.error = GeocodingUnavailable(str(exc))
+            raise
+        finally:
+            self.stats.add_fetch_time(time.perf_counter() - started)
+            with self._lock:
+                self._inflight.pop(key, None)
+            lookup.done.set()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_geocoding_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                backend_path = getattr(
+                    settings,
+                    'GEOCODING_CACHE_BACKEND',
+                    'destinations_and_attractions.geocoding.TieredGeocodeCache',
+                )
+                _cache = GeocodingCache(import_string(backend_path)())
+    return _cache
+
+
+def set_geocoding_cache(cache):
+    """Swap the process-wide cache (used by tests); ``None`` rebuilds it from settings."""
+    global _cache
+    with _cache_lock:
+        _cache = cache
+
+
+def get_geocoding_stats():
+    cache = get_geocoding_cache()
+    stats = cache.stats.snapshot()
+    memory = getattr(cache.backend, 'memory', cache.backend)
+    if isinstance(memory, InProcessGeocodeCache):
+        stats['memory_entries'] = len(memory)
+    stats['database_entries'] = GeocodeCacheEntry.objects.filter(expires_at__gt=timezone.now()).count()
+    return stats
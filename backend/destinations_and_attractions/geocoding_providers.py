@@ -0,0 +1,346 @@
+"""
+Concurrent lookups against the external geocoders used by location search.
+
+Every ``(provider, candidate query)`` pair is sent at once over a pooled
+``requests.Session`` per provider, under one overall deadline
+(``GEOCODING_DEADLINE_SECONDS``). Results are merged and deduplicated by
+coordinate as they arrive; when the deadline passes the best partial answer
+is returned. A per-provider circuit breaker skips a provider after repeated
+failures so an outage does not add its timeout to every search.
+"""
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import quote
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from backend.location_policy import (
+    CITY_SCOPE_LABEL,
+    ZDS_MAPBOX_BBOX,
+    extract_municipality_from_text,
+    validate_zds_coordinates,
+)
+
+from .geocoding import GeocodingUnavailable, PartialResults
+
+DEFAULT_DEADLINE_SECONDS = 3.0
+DEFAULT_REQUEST_TIMEOUT_SECONDS = 8.0
+DEFAULT_MAX_WORKERS = 8
+_BREAKER_FAILURE_THRESHOLD = 3
+_BREAKER_RESET_SECONDS = 30
+
+
+class CircuitBreaker:
+    """
+    Closed: requests flow. After ``failure_threshold`` consecutive failures the
+    breaker opens and rejects requests for ``reset_timeout`` seconds, then lets
+    a single trial request through (half-open) to decide whether to close.
+    """
+
+    def __init__(self, name, failure_threshold=_BREAKER_FAILURE_THRESHOLD, reset_timeout=_BREAKER_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return 'closed'
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow(self):
+        with self._lock:
+            state = self._state()
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+    def snapshot(self):
+        with self._lock:
+            return {'state': self._state(), 'consecutive_failures': self._failures}
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name):
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name)
+            _breakers[name] = breaker
+        return breaker
+
+
+def reset_circuit_breakers():
+    with _breakers_lock:
+        _breakers.clear()
+
+
+def get_provider_health():
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    return {name: breaker.snapshot() for name, breaker in breakers.items()}
+
+
+def _build_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=DEFAULT_MAX_WORKERS)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class GeocodingProvider:
+    name = ''
+
+    def __init__(self):
+        self.session = _get_session(self.name)
+
+    def fetch(self, candidate_query, limit, timeout):
+        """Returns normalized result dicts; raises ``requests.RequestException`` on failure."""
+        raise NotImplementedError
+
+
+class MapboxProvider(GeocodingProvider):
+    name = 'mapbox'
+
+    def __init__(self, access_token):
+        super().__init__()
+        self.access_token = access_token
+
+    def fetch(self, candidate_query, limit, timeout):
+        center_lng = (ZDS_MAPBOX_BBOX[0] + ZDS_MAPBOX_BBOX[2]) / 2
+        center_lat = (ZDS_MAPBOX_BBOX[1] + ZDS_MAPBOX_BBOX[3]) / 2
+        response = self.session.get(
+            f"https://api.mapbox.com/geocoding/v5/mapbox.places/{quote(candidate_query)}.json",
+            params={
+                'access_token': self.access_token,
+                'country': 'PH',
+                'bbox': ','.join(str(value) for value in ZDS_MAPBOX_BBOX),
+                'types': 'place,locality,neighborhood,address,poi',
+                'autocomplete': 'true',
+                'proximity': f"{center_lng},{center_lat}",
+                'limit': limit,
+            },
+            timeout=timeout,
+        )
+        response.raise_for_status()
+        payload = response.json()
+
+        results = []
+        for feature in payload.get('features', []) if isinstance(payload, dict) else []:
+            center = feature.get('center') or []
+            if len(center) != 2:
+                continue
+
+            longitude, latitude = center[0], center[1]
+            try:
+                lat_value, lng_value = validate_zds_coordinates(latitude, longitude)
+            except ValueError:
+                continue
+
+            label = feature.get('place_name') or feature.get('text') or ''
+            results.append(
+                {
+                    'id': feature.get('id'),
+                    'label': label,
+                    'name': feature.get('text') or label,
+                    'municipality': extract_municipality_from_text(label) or CITY_SCOPE_LABEL,
+                    'latitude': float(lat_value),
+                    'longitude': float(lng_value),
+                }
+            )
+        return results
+
+
+class NominatimProvider(GeocodingProvider):
+    name = 'nominatim'
+
+    def fetch(self, candidate_query, limit, timeout):
+        # Nominatim expects viewbox as: left,top,right,bottom
+        viewbox = f"{ZDS_MAPBOX_BBOX[0]},{ZDS_MAPBOX_BBOX[3]},{ZDS_MAPBOX_BBOX[2]},{ZDS_MAPBOX_BBOX[1]}"
+        response = self.session.get(
+            'https://nominatim.openstreetmap.org/search',
+            params={
+                'q': candidate_query,
+                'format': 'jsonv2',
+                'limit': limit,
+                'countrycodes': 'ph',
+                'addressdetails': 1,
+                'viewbox': viewbox,
+                'bounded': 1,
+            },
+            headers={
+                'Accept': 'application/json',
+                'Accept-Language': 'en',
+                'User-Agent': 'localynk-backend/1.0',
+            },
+            timeout=timeout,
+        )
+        response.raise_for_status()
+        payload = response.json()
+
+        results = []
+        for item in payload if isinstance(payload, list) else []:
+            try:
+                lat_value, lng_value = validate_zds_coordinates(item.get('lat'), item.get('lon'))
+            except ValueError:
+                continue
+
+            label = item.get('display_name') or candidate_query
+            results.append(
+                {
+                    'id': str(item.get('place_id') or f"{lat_value}:{lng_value}"),
+                    'label': label,
+                    'name': item.get('name') or label,
+                    'municipality': extract_municipality_from_text(label) or CITY_SCOPE_LABEL,
+                    'latitude': float(lat_value),
+                    'longitude': float(lng_value),
+                }
+            )
+        return results
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def _get_session(name):
+    with _sessions_lock:
+        session = _sessions.get(name)
+        if session is None:
+            session = _build_session()
+            _sessions[name] = session
+        return session
+
+
+def build_geocoding_providers(mapbox_token=''):
+    """Configured providers in priority order (earlier providers rank first)."""
+    providers = []
+    if mapbox_token:
+        providers.append(MapboxProvider(mapbox_token))
+    providers.append(NominatimProvider())
+    return providers
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'GEOCODING_MAX_WORKERS', DEFAULT_MAX_WORKERS),
+                thread_name_prefix='geocoding',
+            )
+        return _executor
+
+
+def _run_lookup(provider, breaker, candidate_query, limit, timeout):
+    try:
+        results = provider.fetch(candidate_query, limit, timeout)
+    except (requests.RequestException, ValueError):
+        breaker.record_failure()
+        raise
+    breaker.record_success()
+    return results
+
+
+def _coordinate_key(item):
+    return f"{item['latitude']:.4f},{item['longitude']:.4f}"
+
+
+def search_providers(providers, candidate_queries, limit, deadline=None):
+    """
+    Queries every provider with every candidate query concurrently and returns
+    up to ``limit`` merged results, earlier providers and candidates first.
+
+    Raises ``GeocodingUnavailable`` when nothing was found and at least one
+    provider failed or was skipped. A result list is flagged ``partial`` when
+    the deadline expired first or some lookups failed, so callers can avoid
+    caching it for long.
+    """
+    deadline = deadline if deadline is not None else getattr(settings, 'GEOCODING_DEADLINE_SECONDS', DEFAULT_DEADLINE_SECONDS)
+    request_timeout = getattr(settings, 'GEOCODING_REQUEST_TIMEOUT_SECONDS', DEFAULT_REQUEST_TIMEOUT_SECONDS)
+    started = time.monotonic()
+
+    executor = _get_executor()
+    pending = {}
+    skipped = False
+    for provider_rank, provider in enumerate(providers):
+        breaker = get_circuit_breaker(provider.name)
+        for candidate_rank, candidate_query in enumerate(candidate_queries):
+            if not breaker.allow():
+                skipped = True
+                continue
+            future = executor.submit(
+                _run_lookup, provider, breaker, candidate_query, limit, min(request_timeout, deadline),
+            )
+            pending[future] = (provider_rank, candidate_rank)
+
+    merged = {}
+    failed = False
+    while pending:
+        remaining = deadline - (time.monotonic() - started)
+        if remaining <= 0:
+            break
+
+        done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        for future in done:
+            provider_rank, candidate_rank = pending.pop(future)
+            try:
+                lookup_results = future.result()
+            except Exception:
+                failed = True
+                continue
+
+            for position, item in enumerate(lookup_results):
+                rank = (provider_rank, candidate_rank, position)
+                key = _coordinate_key(item)
+                if key not in merged or rank < merged[key][0]:
+                    merged[key] = (rank, item)
+
+    timed_out = bool(pending)
+    for future in pending:
+        future.cancel()
+
+    ordered = [item for _, item in sorted(merged.values(), key=lambda entry: entry[0])][:limit]
+    if not ordered and (failed or skipped or timed_out):
+        raise GeocodingUnavailable('No geocoding provider answered in time.')
+
+    if failed or skipped or timed_out:
+        return PartialResults(ordered)
+    return ordered
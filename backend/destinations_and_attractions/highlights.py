@@ -0,0 +1,95 @@
+"""
+Daily "new package highlights" snapshot.
+
+The highlights endpoint lists the active tour packages created yesterday in
+HIGHLIGHTS_TIMEZONE. That set only changes at local midnight, so each day is
+built once into ``NewPackageHighlight`` rows and marked built by a
+``NewPackageHighlightDay``:
+
+- ``python manage.py build_package_highlights`` builds yesterday and is meant
+  to run from cron at 00:00 in HIGHLIGHTS_TIMEZONE;
+- the endpoint builds a day that is still missing on first read.
+
+Once a day is built, ``TourPackage.save`` patches it through
+``sync_package_highlight``: a package saved late into a built day is added,
+and a deactivated, re-homed or re-dated package is moved or dropped. Deleted
+packages take their row with them. Writes that bypass ``save`` (queryset
+``update``) must call ``sync_package_highlight`` or rebuild the day.
+
+Owner names are not copied; the endpoint joins them when it reads a day.
+"""
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import NewPackageHighlight, NewPackageHighlightDay, TourPackage
+
+HIGHLIGHTS_TIMEZONE = ZoneInfo('Asia/Manila')
+
+
+def local_day(moment):
+    return timezone.localtime(moment, HIGHLIGHTS_TIMEZONE).date()
+
+
+def day_window(day):
+    """``[start, end)`` of ``day`` in HIGHLIGHTS_TIMEZONE."""
+    start = datetime.combine(day, time.min, tzinfo=HIGHLIGHTS_TIMEZONE)
+    return start, datetime.combine(day + timedelta(days=1), time.min, tzinfo=HIGHLIGHTS_TIMEZONE)
+
+
+def _highlight_values(package):
+    return {
+        'day': local_day(package.created_at),
+        'destination_id': package.main_destination_id,
+        'name': package.name,
+        'duration_days': package.duration_days,
+        'package_created_at': package.created_at,
+    }
+
+
+def build_highlight_snapshot(day):
+    """Rebuilds the highlights of ``day`` from TourPackage. Returns the row count."""
+    start, end = day_window(day)
+    packages = TourPackage.objects.filter(
+        main_destination__isnull=False,
+        is_active=True,
+        created_at__gte=start,
+        created_at__lt=end,
+    ).only('id', 'main_destination_id', 'name', 'duration_days', 'created_at')
+
+    with transaction.atomic():
+        NewPackageHighlight.objects.filter(day=day).delete()
+        rows = NewPackageHighlight.objects.bulk_create([
+            NewPackageHighlight(package_id=package.id, **_highlight_values(package))
+            for package in packages
+        ])
+        NewPackageHighlightDay.objects.update_or_create(day=day, defaults={'built_at': timezone.now()})
+    return len(rows)
+
+
+def ensure_highlight_snapshot(day):
+    """Builds ``day`` unless it is already built; one query when it is."""
+    if NewPackageHighlightDay.objects.filter(day=day).exists():
+        return
+    try:
+        with transaction.atomic():
+            build_highlight_snapshot(day)
+    except IntegrityError:
+        # A concurrent request built the same day first.
+        pass
+
+
+def sync_package_highlight(package):
+    """Brings ``package``'s highlight row in line with the package, if its day is built."""
+    day = local_day(package.created_at)
+    listed = (
+        package.is_active
+        and package.main_destination_id is not None
+        and NewPackageHighlightDay.objects.filter(day=day).exists()
+    )
+    if listed:
+        NewPackageHighlight.objects.update_or_create(package_id=package.pk, defaults=_highlight_values(package))
+    else:
+        NewPackageHighlight.objects.filter(package_id=package.pk).delete()
@@ -0,0 +1,79 @@
+import time
+
+from django.db import connection, reset_queries, transaction #type: ignore
+from django.core.management.base import BaseCommand #type: ignore
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIRequestFactory
+
+from destinations_and_attractions.models import Attraction, Destination, DestinationImage
+from destinations_and_attractions.views import DestinationViewSet
+
+VARIANTS = [
+    ('full', {}),
+    ('expand=', {'expand': ''}),
+    ('fields=card', {'fields': 'id,name,category,municipality,average_rating,image,image_variants,is_featured'}),
+]
+
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Render GET /destinations/ in full and with ?expand= / ?fields= projections and report '
+        'bytes, p50/p95 render time and queries per request. Nothing is persisted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--destinations', type=int, default=200, help='Destinations to list.')
+        parser.add_argument('--requests', type=int, default=30, help='Requests per variant.')
+
+    def handle(self, *args, **options):
+        # Measures rendering, so the catalog cache stays out of the way.
+        with override_settings(CATALOG_CACHE_TTL=0), transaction.atomic():
+            self._seed(max(options['destinations'], 1))
+            results = [(label, *self._measure(params, max(options['requests'], 1))) for label, params in VARIANTS]
+            transaction.set_rollback(True)
+
+        for label, size, latencies, queries in results:
+            self.stdout.write(
+                f'{label:<12} bytes={size} p50_ms={_percentile(latencies, 0.50):.2f} '
+                f'p95_ms={_percentile(latencies, 0.95):.2f} queries_per_request={queries}'
+            )
+
+    def _seed(self, count):
+        for index in range(count):
+            destination = Destination.objects.create(
+                name=f'Payload Bench {index}',
+                description='A long destination description for list payload benchmarking. ' * 8,
+                category='Nature',
+                location='Zamboanga City',
+                municipality='Zamboanga City',
+                latitude='6.910000',
+                longitude='122.070000',
+            )
+            for image in range(4):
+                DestinationImage.objects.create(destination=destination, image=f'destination_images/bench_{index}_{image}.jpg')
+            Attraction.objects.bulk_create([
+                Attraction(destination=destination, name=f'Attraction {attraction}', description='Attraction details. ' * 20)
+                for attraction in range(5)
+            ])
+
+    def _measure(self, params, request_count):
+        factory = APIRequestFactory()
+        view = DestinationViewSet.as_view({'get': 'list'})
+        latencies = []
+        size = queries = 0
+        for _ in range(request_count):
+            request = factory.get('/api/destinations/', params)
+            reset_queries()
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = view(request)
+                response.render()
+                latencies.append((time.perf_counter() - started) * 1000)
+            size = len(response.content)
+            queries = len(captured.captured_queries)
+        return size, latencies, queries
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from destinations_and_attractions.gazetteer import load_place_file, rebuild_gazetteer
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the local place index used by location autocomplete from "
+        "destinations, accommodations and booking meetup points, optionally "
+        "importing CSV/GeoJSON/Overpass place lists."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--import",
+            dest="import_paths",
+            action="append",
+            default=[],
+            help="Place list to import (.csv, GeoJSON or Overpass .json). Repeatable.",
+        )
+        parser.add_argument(
+            "--replace-imported",
+            action="store_true",
+            help="Drop previously imported places before importing.",
+        )
+
+    def handle(self, *args, **options):
+        imported_rows = []
+        for path in options["import_paths"]:
+            try:
+                rows = load_place_file(path)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Could not read {path}: {exc}")
+            self.stdout.write(f"{path}: {len(rows)} place(s) inside the city bounds")
+            imported_rows.extend(rows)
+
+        counts = rebuild_gazetteer(
+            imported_rows=imported_rows,
+            replace_imported=options["replace_imported"],
+        )
+
+        summary = ", ".join(f"{source}={total}" for source, total in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Gazetteer rebuilt: {summary}"))
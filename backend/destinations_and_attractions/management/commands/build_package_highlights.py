@@ -0,0 +1,28 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError #type: ignore
+from django.utils import timezone #type: ignore
+
+from destinations_and_attractions.highlights import HIGHLIGHTS_TIMEZONE, build_highlight_snapshot, local_day
+
+
+class Command(BaseCommand):
+    help = (
+        'Build the new package highlights snapshot for one day (default: yesterday in '
+        f'{HIGHLIGHTS_TIMEZONE}). Schedule it at 00:00 {HIGHLIGHTS_TIMEZONE}; rebuilding a day replaces it.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Local day to build, as YYYY-MM-DD.')
+
+    def handle(self, *args, **options):
+        if options['date']:
+            try:
+                day = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError('--date must be YYYY-MM-DD.')
+        else:
+            day = local_day(timezone.now()) - timedelta(days=1)
+
+        count = build_highlight_snapshot(day)
+        self.stdout.write(self.style.SUCCESS(f'Built {count} new package highlight(s) for {day}.'))
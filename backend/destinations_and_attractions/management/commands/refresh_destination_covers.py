@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand #type: ignore
+
+from destinations_and_attractions.cover_images import DEFAULT_BATCH_SIZE, refresh_destination_covers
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute every destination\'s stored cover image and URL variants from its images. '
+        'Only destinations whose stored cover is stale are written.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Destinations read and written per batch.',
+        )
+
+    def handle(self, *args, **options):
+        updated = refresh_destination_covers(batch_size=max(options['batch_size'], 1))
+        self.stdout.write(self.style.SUCCESS(f'Refreshed {updated} destination cover(s).'))
@@ -1,7 +1,9 @@
 from django.core.management.base import BaseCommand
 from datetime import timedelta
 
-from destinations_and_attractions.models import TourPackage
+from destinations_and_attractions.highlights import sync_package_highlight
+from destinations_and_attractions.models import NewPackageHighlight, TourPackage
+from system_management_module.services.catalog_cache import bump_catalog_version
 from destinations_and_attractions.views import _get_previous_day_window
 
 
@@ -49,6 +51,12 @@ class Command(BaseCommand):
                 created_at=start_today + timedelta(hours=1)
             )
 
+        # update() skips the signals that move cached tour lists on
+        # and the save() that patches built highlight days.
+        bump_catalog_version("tour_package")
+        for package in TourPackage.objects.filter(id__in=[pkg.id for pkg in pkgs[:3]]):
+            sync_package_highlight(package)
+
         y_count = TourPackage.objects.filter(
             main_destination_id=dest_id,
             is_active=True,
@@ -59,4 +67,8 @@ class Command(BaseCommand):
         self.stdout.write(self.style.SUCCESS("=== Simulation Complete ==="))
         self.stdout.write(f"Destination: {dest_id}")
         self.stdout.write(f"Target date: {target_date}")
-        self.stdout.write(f"Yesterday count: {y_count}")
\ No newline at end of file
+        self.stdout.write(f"Yesterday count: {y_count}")
+        self.stdout.write(
+            "Highlight snapshot count: "
+            f"{NewPackageHighlight.objects.filter(day=target_date, destination_id=dest_id).count()}"
+        )
\ No newline at end of file
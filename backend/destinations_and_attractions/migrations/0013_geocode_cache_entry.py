@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('destinations_and_attractions', '0012_remove_tourpackage_copied_from_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodeCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, unique=True)),
+                ('provider', models.CharField(max_length=30)),
+                ('query', models.CharField(max_length=255)),
+                ('results', models.JSONField(blank=True, default=list)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('hit_count', models.PositiveIntegerField(default=0)),
+                ('last_used_at', models.DateTimeField(db_index=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
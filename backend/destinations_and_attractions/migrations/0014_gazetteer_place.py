@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('destinations_and_attractions', '0013_geocode_cache_entry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GazetteerPlace',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('destination', 'Destination'), ('accommodation', 'Accommodation'), ('meetup', 'Booking Meetup'), ('imported', 'Imported')], max_length=20)),
+                ('source_ref', models.CharField(max_length=255)),
+                ('name', models.CharField(max_length=255)),
+                ('label', models.CharField(blank=True, default='', max_length=255)),
+                ('municipality', models.CharField(blank=True, default='', max_length=120)),
+                ('latitude', models.DecimalField(decimal_places=6, max_digits=9)),
+                ('longitude', models.DecimalField(decimal_places=6, max_digits=9)),
+                ('popularity', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('source', 'source_ref'), name='unique_gazetteer_source_ref')],
+            },
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.6 on 2026-10-18
+
+import django.db.models.deletion
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+_UPLOAD = '/image/upload/'
+
+
+def _variant(url, transformation):
+    if _UPLOAD not in url:
+        return url
+    return url.replace(_UPLOAD, f'{_UPLOAD}{transformation}/', 1)
+
+
+def backfill_destination_covers(apps, schema_editor):
+    """Stores each destination's first image as its cover (same rules as cover_images.cover_values)."""
+    Destination = apps.get_model('destinations_and_attractions', 'Destination')
+    DestinationImage = apps.get_model('destinations_and_attractions', 'DestinationImage')
+
+    covers = {}
+    rows = DestinationImage.objects.order_by('destination_id', 'id').values_list('destination_id', 'id', 'image')
+    for destination_id, image_id, name in rows.iterator():
+        covers.setdefault(destination_id, (image_id, name))
+
+    batch = []
+    for destination_id, (image_id, name) in covers.items():
+        url = default_storage.url(name) if name else ''
+        batch.append(Destination(
+            id=destination_id,
+            cover_image_id=image_id,
+            cover_image_url=url,
+            cover_card_url=_variant(url, 'c_fill,w_640,h_400,q_auto,f_auto'),
+            cover_thumbnail_url=_variant(url, 'c_fill,w_160,h_120,q_auto,f_auto'),
+        ))
+        if len(batch) >= 500:
+            Destination.objects.bulk_update(batch, ['cover_image', 'cover_image_url', 'cover_card_url', 'cover_thumbnail_url'])
+            batch = []
+    Destination.objects.bulk_update(batch, ['cover_image', 'cover_image_url', 'cover_card_url', 'cover_thumbnail_url'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('destinations_and_attractions', '0014_gazetteer_place'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='destination',
+            name='cover_card_url',
+            field=models.CharField(blank=True, default='', max_length=500),
+        ),
+        migrations.AddField(
+            model_name='destination',
+            name='cover_image',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='destinations_and_attractions.destinationimage'),
+        ),
+        migrations.AddField(
+            model_name='destination',
+            name='cover_image_url',
+            field=models.CharField(blank=True, default='', max_length=500),
+        ),
+        migrations.AddField(
+            model_name='destination',
+            name='cover_thumbnail_url',
+            field=models.CharField(blank=True, default='', max_length=500),
+        ),
+        migrations.RunPython(backfill_destination_covers, migrations.RunPython.noop),
+    ]
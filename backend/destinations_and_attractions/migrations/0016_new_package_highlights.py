@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2026-10-18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('destinations_and_attractions', '0015_destination_cover_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewPackageHighlightDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('built_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='NewPackageHighlight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('name', models.CharField(max_length=255)),
+                ('duration_days', models.PositiveIntegerField(default=1)),
+                ('package_created_at', models.DateTimeField()),
+                ('destination', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='destinations_and_attractions.destination')),
+                ('package', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='new_highlight', to='destinations_and_attractions.tourpackage')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'destination', '-package_created_at'], name='new_highlight_day_dest_idx')],
+            },
+        ),
+    ]
@@ -38,9 +38,26 @@ class Destination(models.Model):
     longitude = models.DecimalField(max_digits=9, decimal_places=6, blank=True, null=True)
     average_rating = models.DecimalField(max_digits=3, decimal_places=2, default=0.00)
     is_featured = models.BooleanField(default=False)
+
+    # The first image by id and its URLs, kept in sync by DestinationImage.save()
+    # and delete() so lists never query images for a cover (see cover_images.py).
+    cover_image = models.ForeignKey('DestinationImage', related_name='+', on_delete=models.SET_NULL, null=True, blank=True)
+    cover_image_url = models.CharField(max_length=500, blank=True, default='')
+    cover_card_url = models.CharField(max_length=500, blank=True, default='')
+    cover_thumbnail_url = models.CharField(max_length=500, blank=True, default='')
     
     created_at = models.DateTimeField(auto_now_add=True)
 
+    @property
+    def cover_image_variants(self):
+        if not self.cover_image_url:
+            return None
+        return {
+            'thumbnail': self.cover_thumbnail_url,
+            'card': self.cover_card_url,
+            'full': self.cover_image_url,
+        }
+
     def _apply_location_policy(self):
         normalized = validate_zds_location_payload(
             location=self.location,
@@ -67,6 +84,19 @@ class DestinationImage(models.Model):
     image = models.ImageField(upload_to='destination_images/')
     caption = models.CharField(max_length=255, blank=True, null=True)
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Imported here: cover_images imports this module.
+        from .cover_images import refresh_destination_cover
+        refresh_destination_cover(self.destination_id)
+
+    def delete(self, *args, **kwargs):
+        destination_id = self.destination_id
+        result = super().delete(*args, **kwargs)
+        from .cover_images import refresh_destination_cover
+        refresh_destination_cover(destination_id)
+        return result
+
     def __str__(self):
         return f"Image for {self.destination.name}"
 
@@ -114,6 +144,9 @@ class TourPackage(models.Model):
     def save(self, *args, **kwargs):
         self.clean()
         super().save(*args, **kwargs)
+        # Imported here: highlights imports this module.
+        from .highlights import sync_package_highlight
+        sync_package_highlight(self)
 
     def __str__(self):
         owner = self.agency.business_name if self.agency else self.guide.username
@@ -238,4 +271,79 @@ class LocationCorrectionRequest(models.Model):
         super().save(*args, **kwargs)
 
     def __str__(self):
-        return f"Location correction #{self.id} ({self.target_type})"
\ No newline at end of file
+        return f"Location correction #{self.id} ({self.target_type})"
+
+class GeocodeCacheEntry(models.Model):
+    """Persistent tier of the location search cache (see geocoding.py)."""
+    key = models.CharField(max_length=255, unique=True)
+    provider = models.CharField(max_length=30)
+    query = models.CharField(max_length=255)
+    results = models.JSONField(default=list, blank=True)
+    expires_at = models.DateTimeField(db_index=True)
+    hit_count = models.PositiveIntegerField(default=0)
+    last_used_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.provider}: {self.query}"
+
+
+class GazetteerPlace(models.Model):
+    """
+    One named place inside the Zamboanga City bounding box, used by the local
+    autocomplete index. Rebuilt by ``python manage.py build_gazetteer``.
+    """
+    SOURCE_CHOICES = [
+        ('destination', 'Destination'),
+        ('accommodation', 'Accommodation'),
+        ('meetup', 'Booking Meetup'),
+        ('imported', 'Imported'),
+    ]
+
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    source_ref = models.CharField(max_length=255)
+    name = models.CharField(max_length=255)
+    label = models.CharField(max_length=255, blank=True, default='')
+    municipality = models.CharField(max_length=120, blank=True, default='')
+    latitude = models.DecimalField(max_digits=9, decimal_places=6)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6)
+    popularity = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'source_ref'], name='unique_gazetteer_source_ref'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.source})"
+
+
+class NewPackageHighlightDay(models.Model):
+    """A local day whose new package highlights have been built (see highlights.py)."""
+    day = models.DateField(unique=True)
+    built_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Highlights for {self.day}"
+
+
+class NewPackageHighlight(models.Model):
+    """
+    One active tour package created on ``day`` in HIGHLIGHTS_TIMEZONE, copied
+    from the package when the day is built and patched on each package save.
+    """
+    day = models.DateField()
+    package = models.OneToOneField(TourPackage, related_name='new_highlight', on_delete=models.CASCADE)
+    destination = models.ForeignKey(Destination, related_name='+', on_delete=models.CASCADE)
+    name = models.CharField(max_length=255)
+    duration_days = models.PositiveIntegerField(default=1)
+    package_created_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['day', 'destination', '-package_created_at'], name='new_highlight_day_dest_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.day})"
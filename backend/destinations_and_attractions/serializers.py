@@ -1,13 +1,55 @@
 from rest_framework import serializers 
 from .models import Destination, DestinationImage, Attraction, TourPackage, TourStop, LocationCorrectionRequest
 from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
 import json
 
 from backend.location_policy import validate_zds_location_payload
+from backend.projection import FieldProjectionMixin
 
 User = get_user_model()
 
 
+def _is_prefetched(obj, relation):
+    return relation in getattr(obj, '_prefetched_objects_cache', {})
+
+
+def destination_cover_url(destination, request, field='cover_image_url'):
+    """A destination's stored cover URL (see cover_images.py), absolute when a request is given."""
+    url = getattr(destination, field, '') if destination else ''
+    if not url:
+        return None
+    return request.build_absolute_uri(url) if request else url
+
+
+COVER_VARIANT_FIELDS = {
+    'thumbnail': 'cover_thumbnail_url',
+    'card': 'cover_card_url',
+    'full': 'cover_image_url',
+}
+
+
+def destination_cover_variants(destination, request):
+    """``Destination.cover_image_variants`` with each URL built like ``destination_cover_url``."""
+    if not destination_cover_url(destination, None):
+        return None
+    return {
+        variant: destination_cover_url(destination, request, field)
+        for variant, field in COVER_VARIANT_FIELDS.items()
+    }
+
+
+def prefetch_tour_package_read_relations(queryset):
+    """
+    Loads everything ``TourPackageSerializer`` renders in a fixed number of
+    queries: one join for the guide, agency and destination (whose cover is
+    stored on it), plus one query for stops, however many packages are listed.
+    """
+    return queryset.select_related('guide', 'agency', 'main_destination').prefetch_related(
+        Prefetch('stops', queryset=TourStop.objects.order_by('order', 'id')),
+    )
+
+
 class DestinationImageSerializer(serializers.ModelSerializer):
     image = serializers.SerializerMethodField()
 
@@ -26,7 +68,7 @@ class AttractionSerializer(serializers.ModelSerializer):
         model = Attraction
         fields = ['id', 'name', 'description', 'photo']
 
-class DestinationSerializer(serializers.ModelSerializer):
+class DestinationSerializer(FieldProjectionMixin, serializers.ModelSerializer):
     # Accept custom admin-defined categories instead of enforcing static model choices.
     category = serializers.CharField(max_length=50)
     images = DestinationImageSerializer(many=True, read_only=True)
@@ -48,6 +90,7 @@ class DestinationSerializer(serializers.ModelSerializer):
             'images', 'uploaded_images', 'existing_images', 'attractions', 'is_featured'
         ]
         read_only_fields = ['average_rating']
+        expandable_fields = ['images', 'attractions']
 
     def validate_category(self, value):
         normalized = str(value or '').strip()
@@ -108,8 +151,9 @@ class DestinationSerializer(serializers.ModelSerializer):
             
         return instance
 
-class DestinationListSerializer(serializers.ModelSerializer):
+class DestinationListSerializer(FieldProjectionMixin, serializers.ModelSerializer):
     image = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
     images = DestinationImageSerializer(many=True, read_only=True)
     attractions = AttractionSerializer(many=True, read_only=True)
 
@@ -118,17 +162,20 @@ class DestinationListSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'name', 'location', 'description', 'category', 
             'municipality', 'latitude', 'longitude', 'average_rating',
-            'image', 'images', 'attractions', 'is_featured'
+            'image', 'image_variants', 'images', 'attractions', 'is_featured'
         ]
         read_only_fields = ['average_rating']
+        expandable_fields = ['images', 'attractions']
+        field_sources = {
+            'image': ['cover_image_url'],
+            'image_variants': ['cover_image_url', 'cover_card_url', 'cover_thumbnail_url'],
+        }
 
     def get_image(self, obj):
-        first_img = obj.images.first()
-        if first_img and first_img.image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(first_img.image.url)
-        return None
+        return destination_cover_url(obj, self.context.get('request'))
+
+    def get_image_variants(self, obj):
+        return destination_cover_variants(obj, self.context.get('request'))
 
 class TourStopSerializer(serializers.ModelSerializer):
     image = serializers.SerializerMethodField()
@@ -143,13 +190,13 @@ class TourStopSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(obj.image.url)
         return None
 
-class TourPackageSerializer(serializers.ModelSerializer):
+class TourPackageSerializer(FieldProjectionMixin, serializers.ModelSerializer):
     stops = TourStopSerializer(many=True, read_only=True)
     guide_name = serializers.CharField(source='guide.get_full_name', read_only=True)
     guide_avatar = serializers.SerializerMethodField()
     
     agency_name = serializers.CharField(source='agency.business_name', read_only=True)
-    agency_user_id = serializers.IntegerField(source='agency.user.id', read_only=True) # ADDED: Links to User ID
+    agency_user_id = serializers.IntegerField(source='agency.user_id', read_only=True) # ADDED: Links to User ID
 
     destination_name = serializers.CharField(source='main_destination.name', read_only=True)
     destination_image = serializers.SerializerMethodField()
@@ -172,16 +219,14 @@ class TourPackageSerializer(serializers.ModelSerializer):
             'created_at'
         ]
         read_only_fields = ['guide', 'agency', 'created_at', 'main_destination']
+        expandable_fields = ['stops', 'itinerary_timeline']
+        field_sources = {
+            'guide_avatar': ['guide__profile_picture'],
+            'destination_image': ['main_destination__cover_image_url'],
+        }
 
     def get_destination_image(self, obj):
-        if obj.main_destination:
-            first_img = obj.main_destination.images.first()
-            if first_img and first_img.image:
-                request = self.context.get('request')
-                if request:
-                    return request.build_absolute_uri(first_img.image.url)
-                return first_img.image.url
-        return None
+        return destination_cover_url(obj.main_destination, self.context.get('request'))
 
     def get_guide_avatar(self, obj):
         if obj.guide and obj.guide.profile_picture:
@@ -297,6 +342,10 @@ class GuideSerializer(serializers.ModelSerializer):
         return f"{obj.first_name} {obj.last_name}"
     
     def get_tours(self, obj):
+        # GuideListView prefetches the tours already filtered to the requested destination.
+        if _is_prefetched(obj, 'tours'):
+            return TourPackageSerializer(obj.tours.all(), many=True, context=self.context).data
+
         request = self.context.get('request')
         destination_id = request.query_params.get('main_destination') if request else None
         
@@ -1,15 +1,51 @@
+import io
 import json
+import os
+import tempfile
+import threading
+import time
 from datetime import timedelta
 from unittest.mock import patch
 
 import requests
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
-from rest_framework.test import APIClient
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
 
-from .models import Destination, TourPackage, LocationCorrectionRequest
-from .serializers import TourPackageSerializer
+from .cover_images import refresh_destination_covers
+from .gazetteer import GazetteerIndex, get_gazetteer_index, reset_gazetteer_index
+from .geocoding import (
+	DatabaseGeocodeCache,
+	GeocodingCache,
+	GeocodingUnavailable,
+	InProcessGeocodeCache,
+	TieredGeocodeCache,
+	set_geocoding_cache,
+)
+from .geocoding_providers import (
+	CircuitBreaker,
+	GeocodingProvider,
+	get_circuit_breaker,
+	reset_circuit_breakers,
+	search_providers,
+)
+from .models import (
+	Destination,
+	DestinationImage,
+	GazetteerPlace,
+	GeocodeCacheEntry,
+	LocationCorrectionRequest,
+	NewPackageHighlight,
+	NewPackageHighlightDay,
+	TourPackage,
+	TourStop,
+)
+from .serializers import DestinationListSerializer, DestinationSerializer, GuideSerializer, TourPackageSerializer
 from .views import _get_previous_day_window
 
 User = get_user_model()
@@ -276,6 +312,284 @@ class DestinationsApiTests(TestCase):
 		self.assertEqual(self.destination.location, "Pagadian City Plaza")
 
 
+class GuideListQueryCountTests(TestCase):
+	def setUp(self):
+		self.client = APIClient()
+		self.destinations = []
+		for name in ("Fort Pilar", "Pasonanca Park"):
+			destination = Destination.objects.create(
+				name=name,
+				description="Landmark",
+				category="Historical",
+				location="Zamboanga City",
+				municipality="Zamboanga City",
+				latitude="6.900000",
+				longitude="122.080000",
+			)
+			DestinationImage.objects.create(destination=destination, image=f"destination_images/{name.split()[0].lower()}.jpg")
+			DestinationImage.objects.create(destination=destination, image="destination_images/extra.jpg")
+			self.destinations.append(destination)
+		self.guide_count = 0
+
+	def _add_guides(self, count, tours_per_guide):
+		for _ in range(count):
+			self.guide_count += 1
+			guide = User.objects.create_user(
+				username=f"listed_guide_{self.guide_count}",
+				password="Pass12345",
+				first_name="Listed",
+				last_name=f"Guide {self.guide_count}",
+				is_local_guide=True,
+				guide_approved=True,
+				is_guide_visible=True,
+			)
+			for index in range(tours_per_guide):
+				tour = TourPackage.objects.create(
+					guide=guide,
+					main_destination=self.destinations[index % 2],
+					name=f"Tour {self.guide_count}.{index}",
+					description="Walk",
+					duration="1 day",
+					duration_days=1,
+					max_group_size=10,
+					price_per_day="1000.00",
+					solo_price="1200.00",
+				)
+				TourStop.objects.create(tour=tour, name="Second", order=2, image="tour_stops/second.jpg")
+				TourStop.objects.create(tour=tour, name="First", order=1, image="tour_stops/first.jpg")
+
+	def _list(self, **params):
+		with CaptureQueriesContext(connection) as queries:
+			response = self.client.get(reverse("guide-list"), params)
+		self.assertEqual(response.status_code, 200)
+		return len(queries), response.json()
+
+	def test_query_count_is_independent_of_guides_and_tours(self):
+		self._add_guides(1, 1)
+		small_count, small = self._list()
+		self._add_guides(5, 4)
+		large_count, large = self._list()
+
+		self.assertEqual(len(small), 1)
+		self.assertEqual(len(large), 6)
+		self.assertEqual(small_count, large_count)
+		self.assertLessEqual(large_count, 4)
+
+		tour = large[-1]["tours"][0]
+		self.assertEqual(tour["guide_name"], large[-1]["guide_name"])
+		self.assertEqual([stop["name"] for stop in tour["stops"]], ["First", "Second"])
+		self.assertTrue(tour["destination_image"].endswith("fort.jpg"))
+
+	def test_destination_filter_limits_guides_and_their_tours(self):
+		self._add_guides(2, 1)
+		self._add_guides(2, 3)
+		pasonanca = self.destinations[1]
+
+		count, guides = self._list(main_destination=pasonanca.id)
+
+		self.assertEqual(len(guides), 2)
+		self.assertLessEqual(count, 4)
+		for guide in guides:
+			self.assertEqual({tour["main_destination"] for tour in guide["tours"]}, {pasonanca.id})
+
+
+class DestinationCoverImageTests(TestCase):
+	def setUp(self):
+		self.destination = Destination.objects.create(
+			name="Santa Cruz Island",
+			description="Pink sand",
+			category="Beaches",
+			location="Zamboanga City",
+			municipality="Zamboanga City",
+			latitude="6.870000",
+			longitude="122.050000",
+		)
+
+	def _add_image(self, name):
+		return DestinationImage.objects.create(destination=self.destination, image=f"destination_images/{name}.jpg")
+
+	def test_first_image_becomes_the_cover_with_resized_variants(self):
+		first = self._add_image("beach")
+		self._add_image("boat")
+
+		self.destination.refresh_from_db()
+		self.assertEqual(self.destination.cover_image_id, first.id)
+		self.assertEqual(self.destination.cover_image_url, first.image.url)
+		variants = self.destination.cover_image_variants
+		self.assertEqual(variants["full"], first.image.url)
+		self.assertIn("/image/upload/c_fill,w_640,h_400,q_auto,f_auto/", variants["card"])
+		self.assertIn("/image/upload/c_fill,w_160,h_120,q_auto,f_auto/", variants["thumbnail"])
+		self.assertTrue(variants["thumbnail"].endswith("beach.jpg"))
+
+	def test_deleting_images_moves_then_clears_the_cover(self):
+		first = self._add_image("beach")
+		second = self._add_image("boat")
+
+		first.delete()
+		self.destination.refresh_from_db()
+		self.assertEqual(self.destination.cover_image_id, second.id)
+		self.assertTrue(self.destination.cover_image_url.endswith("boat.jpg"))
+
+		second.delete()
+		self.destination.refresh_from_db()
+		self.assertIsNone(self.destination.cover_image_id)
+		self.assertEqual(self.destination.cover_image_url, "")
+		self.assertIsNone(self.destination.cover_image_variants)
+
+	def test_serializer_update_removing_the_cover_refreshes_it(self):
+		first = self._add_image("beach")
+		second = self._add_image("boat")
+
+		serializer = DestinationSerializer(
+			self.destination,
+			data={"existing_images": [second.image.url]},
+			partial=True,
+		)
+		self.assertTrue(serializer.is_valid(), serializer.errors)
+		serializer.save()
+
+		self.assertFalse(DestinationImage.objects.filter(id=first.id).exists())
+		self.destination.refresh_from_db()
+		self.assertEqual(self.destination.cover_image_id, second.id)
+
+	def test_lists_render_covers_without_querying_images(self):
+		self._add_image("beach")
+		guide = User.objects.create_user(username="cover_guide", password="Pass12345", is_local_guide=True)
+		TourPackage.objects.create(
+			guide=guide,
+			main_destination=self.destination,
+			name="Island Hop",
+			description="Boat",
+			duration="1 day",
+			duration_days=1,
+			max_group_size=10,
+			price_per_day="1000.00",
+			solo_price="1200.00",
+		)
+		destinations = list(Destination.objects.prefetch_related("images", "attractions"))
+		tours = list(TourPackage.objects.select_related("guide", "agency", "main_destination").prefetch_related("stops"))
+
+		with self.assertNumQueries(0):
+			destination_data = DestinationListSerializer(destinations, many=True, context={"request": None}).data[0]
+			tour_data = TourPackageSerializer(tours, many=True).data[0]
+
+		self.assertTrue(destination_data["image"].endswith("beach.jpg"))
+		self.assertIn("c_fill,w_160", destination_data["image_variants"]["thumbnail"])
+		self.assertEqual(tour_data["destination_image"], destination_data["image"])
+
+	def test_image_variants_are_absolute_like_image(self):
+		Destination.objects.filter(id=self.destination.id).update(
+			cover_image_url="/media/destination_images/beach.jpg",
+			cover_card_url="/media/destination_images/beach_card.jpg",
+			cover_thumbnail_url="/media/destination_images/beach_thumb.jpg",
+		)
+		self.destination.refresh_from_db()
+		request = Request(APIRequestFactory().get("/api/destinations/"))
+
+		data = DestinationListSerializer(self.destination, context={"request": request}).data
+
+		self.assertEqual(data["image"], "http://testserver/media/destination_images/beach.jpg")
+		self.assertEqual(data["image_variants"], {
+			"thumbnail": "http://testserver/media/destination_images/beach_thumb.jpg",
+			"card": "http://testserver/media/destination_images/beach_card.jpg",
+			"full": data["image"],
+		})
+
+	def test_refresh_destination_covers_repairs_bulk_changes(self):
+		self._add_image("beach")
+		# Queryset deletes skip DestinationImage.delete(), leaving the cover stale.
+		DestinationImage.objects.filter(destination=self.destination).delete()
+
+		self.assertEqual(refresh_destination_covers(), 1)
+		self.destination.refresh_from_db()
+		self.assertIsNone(self.destination.cover_image_id)
+		self.assertEqual(self.destination.cover_image_url, "")
+		self.assertEqual(refresh_destination_covers(), 0)
+
+
+# Counts the list's own queries, without the catalog cache's version lookup.
+@override_settings(CATALOG_CACHE_TTL=0)
+class ListProjectionTests(TestCase):
+	def setUp(self):
+		self.client = APIClient()
+		self.guide = User.objects.create_user(username="projection_guide", password="Pass12345", is_local_guide=True)
+		self.destinations = []
+		for name in ("Fort Pilar", "Merloquet Falls"):
+			destination = Destination.objects.create(
+				name=name,
+				description="A long description " * 20,
+				category="Historical",
+				location="Zamboanga City",
+				municipality="Zamboanga City",
+				latitude="6.900000",
+				longitude="122.080000",
+			)
+			DestinationImage.objects.create(destination=destination, image=f"destination_images/{name.split()[0].lower()}.jpg")
+			destination.attractions.create(name="Museum", description="Exhibits " * 30)
+			tour = TourPackage.objects.create(
+				guide=self.guide,
+				main_destination=destination,
+				name=f"{name} Walk",
+				description="Walk",
+				duration="1 day",
+				duration_days=1,
+				max_group_size=10,
+				price_per_day="1000.00",
+				solo_price="1200.00",
+			)
+			TourStop.objects.create(tour=tour, name="Gate", order=1, image="tour_stops/gate.jpg")
+			self.destinations.append(destination)
+
+	def _get(self, url, params=None):
+		with CaptureQueriesContext(connection) as queries:
+			response = self.client.get(url, params or {})
+		self.assertEqual(response.status_code, 200)
+		return len(queries), response.json()
+
+	def test_destination_list_is_unchanged_without_projection(self):
+		_count, rows = self._get(reverse("destination-list"))
+
+		self.assertIn("images", rows[0])
+		self.assertIn("attractions", rows[0])
+		self.assertIn("description", rows[0])
+
+	def test_fields_renders_only_the_named_fields_from_one_query(self):
+		count, rows = self._get(reverse("destination-list"), {"fields": "id,name,image,unknown"})
+
+		self.assertEqual(count, 1)
+		self.assertEqual(set(rows[0]), {"id", "name", "image"})
+		self.assertTrue(rows[0]["image"].endswith("fort.jpg"))
+
+	def test_expand_adds_heavy_fields_to_the_light_ones(self):
+		light_count, light = self._get(reverse("destination-list"), {"expand": ""})
+		_count, expanded = self._get(reverse("destination-list"), {"expand": "images"})
+
+		self.assertEqual(light_count, 1)
+		self.assertNotIn("images", light[0])
+		self.assertNotIn("attractions", light[0])
+		self.assertIn("image_variants", light[0])
+		self.assertEqual(len(expanded[0]["images"]), 1)
+		self.assertNotIn("attractions", expanded[0])
+
+	def test_tour_lists_skip_stops_unless_rendered(self):
+		url = reverse("guide-tours-list", args=[self.guide.id])
+		light_count, light = self._get(url, {"fields": "id,name,destination_image"})
+		full_count, full = self._get(url)
+
+		self.assertEqual(light_count, full_count - 1)
+		self.assertEqual(set(light[0]), {"id", "name", "destination_image"})
+		self.assertEqual([stop["name"] for stop in full[0]["stops"]], ["Gate"])
+
+	def test_hand_built_nested_serializers_are_not_projected(self):
+		request = Request(APIRequestFactory().get("/", {"fields": "id"}))
+		tours = GuideSerializer(self.guide, context={"request": request}).data["tours"]
+
+		self.assertEqual(len(tours), 2)
+		self.assertIn("stops", tours[0])
+		self.assertIn("description", tours[0])
+		self.assertEqual(set(tours[0]), set(TourPackageSerializer(self.guide.tours.first()).data))
+
+
 class DestinationHighlightsApiTests(TestCase):
 	def setUp(self):
 		self.client = APIClient()
@@ -417,12 +731,121 @@ class DestinationHighlightsApiTests(TestCase):
 		self.assertEqual([pkg.get("id") for pkg in packages], [latest_pkg.id, second_pkg.id])
 
 
+class NewPackageHighlightSnapshotTests(TestCase):
+	def setUp(self):
+		self.client = APIClient()
+		self.guide = User.objects.create_user(
+			username="snapshot_guide",
+			password="Pass12345",
+			first_name="Ana",
+			last_name="Reyes",
+			is_local_guide=True,
+			guide_approved=True,
+		)
+		self.destination = Destination.objects.create(
+			name="Once Islas",
+			description="Island hopping",
+			category="Beaches",
+			location="Zamboanga City",
+			municipality="Zamboanga City",
+			latitude="6.950000",
+			longitude="122.150000",
+		)
+		self.start_yesterday, self.start_today, self.target_date = _get_previous_day_window()
+
+	def _create_tour_package(self, name):
+		return TourPackage.objects.create(
+			guide=self.guide,
+			main_destination=self.destination,
+			name=name,
+			description="Sample",
+			duration="1 day",
+			duration_days=1,
+			max_group_size=6,
+			price_per_day="2500.00",
+			solo_price="3000.00",
+		)
+
+	def _highlights(self):
+		response = self.client.get(
+			reverse("destination-new-package-highlights"),
+			{"destination_id": self.destination.id},
+		)
+		self.assertEqual(response.status_code, 200)
+		return response.json()
+
+	def _highlighted_ids(self):
+		return [
+			package["id"]
+			for entry in self._highlights()["destinations"]
+			for package in entry["packages"]
+		]
+
+	def test_command_builds_yesterday_and_endpoint_reads_it(self):
+		package = self._create_tour_package("Snapshot Tour")
+		TourPackage.objects.filter(id=package.id).update(created_at=self.start_yesterday + timedelta(hours=7))
+
+		call_command("build_package_highlights", stdout=io.StringIO())
+
+		self.assertTrue(NewPackageHighlightDay.objects.filter(day=self.target_date).exists())
+		self.assertEqual(list(NewPackageHighlight.objects.values_list("package_id", flat=True)), [package.id])
+		with self.assertNumQueries(2):
+			payload = self._highlights()
+		entry = payload["destinations"][0]
+		self.assertEqual(payload["destination_counts"], {str(self.destination.id): 1})
+		self.assertEqual(entry["destination_name"], "Once Islas")
+		self.assertEqual(entry["packages"][0]["owner_name"], "Ana Reyes")
+		self.assertEqual(entry["packages"][0]["guide_id"], self.guide.id)
+
+	def test_first_read_builds_a_missing_day_once(self):
+		self.assertEqual(self._highlights()["destinations"], [])
+		self.assertTrue(NewPackageHighlightDay.objects.filter(day=self.target_date).exists())
+
+		# Built days are not rescanned; only saves patch them.
+		package = self._create_tour_package("Bypassed Tour")
+		TourPackage.objects.filter(id=package.id).update(created_at=self.start_yesterday + timedelta(hours=7))
+		self.assertEqual(self._highlighted_ids(), [])
+
+	def test_saves_patch_a_built_day(self):
+		call_command("build_package_highlights", stdout=io.StringIO())
+		package = self._create_tour_package("Late Tour")
+		self.assertEqual(self._highlighted_ids(), [])
+
+		package.created_at = self.start_today - timedelta(minutes=1)
+		package.save()
+		self.assertEqual(self._highlighted_ids(), [package.id])
+
+		package.name = "Renamed Late Tour"
+		package.save()
+		self.assertEqual(self._highlights()["destinations"][0]["packages"][0]["name"], "Renamed Late Tour")
+
+		package.is_active = False
+		package.save()
+		self.assertEqual(self._highlighted_ids(), [])
+
+	def test_simulate_command_patches_the_snapshot(self):
+		call_command("build_package_highlights", stdout=io.StringIO())
+		packages = [self._create_tour_package(f"Simulated {index}") for index in range(3)]
+
+		call_command("simulate_yesterday_created_packages", dest_id=self.destination.id, stdout=io.StringIO())
+
+		payload = self._highlights()
+		self.assertEqual(payload["destination_counts"], {str(self.destination.id): 2})
+		self.assertEqual(self._highlighted_ids(), [packages[1].id, packages[2].id])
+
+
 class LocationSearchFallbackTests(TestCase):
 	def setUp(self):
 		self.client = APIClient()
+		set_geocoding_cache(GeocodingCache(InProcessGeocodeCache()))
+		reset_gazetteer_index()
+		reset_circuit_breakers()
+
+	def tearDown(self):
+		set_geocoding_cache(None)
 
 	@override_settings(MAPBOX_ACCESS_TOKEN='')
-	@patch('destinations_and_attractions.views.requests.get')
+	@patch('destinations_and_attractions.geocoding_providers.requests.Session.get')
 	def test_location_search_uses_nominatim_when_mapbox_not_configured(self, mock_get):
 		mock_get.return_value = _MockHttpResponse(
 			[
@@ -446,7 +869,7 @@ class LocationSearchFallbackTests(TestCase):
 		self.assertEqual(str(payload[0]['longitude']), '122.090000')
 
 	@override_settings(MAPBOX_ACCESS_TOKEN='dummy-token')
-	@patch('destinations_and_attractions.views.requests.get', side_effect=requests.RequestException('upstream down'))
+	@patch('destinations_and_attractions.geocoding_providers.requests.Session.get', side_effect=requests.RequestException('upstream down'))
 	def test_location_search_returns_502_when_all_providers_fail(self, _mock_get):
 		response = self.client.get(reverse('location-search'), {'q': 'Pasonanca'})
 
@@ -455,3 +878,294 @@ class LocationSearchFallbackTests(TestCase):
 			response.json().get('detail'),
 			'Location search providers are currently unavailable.',
 		)
+
+
+class GeocodingCacheTests(TestCase):
+	def setUp(self):
+		self.client = APIClient()
+		self.cache = GeocodingCache(TieredGeocodeCache())
+		set_geocoding_cache(self.cache)
+		reset_gazetteer_index()
+		reset_circuit_breakers()
+
+	def tearDown(self):
+		set_geocoding_cache(None)
+
+	def _nominatim_payload(self):
+		return _MockHttpResponse(
+			[
+				{
+					'place_id': 321,
+					'name': 'Fort Pilar',
+					'display_name': 'Fort Pilar, Zamboanga City, Philippines',
+					'lat': '6.902000',
+					'lon': '122.080000',
+				}
+			]
+		)
+
+	@override_settings(MAPBOX_ACCESS_TOKEN='')
+	@patch('destinations_and_attractions.geocoding_providers.requests.Session.get')
+	def test_repeated_search_is_served_from_cache(self, mock_get):
+		mock_get.return_value = self._nominatim_payload()
+
+		first = self.client.get(reverse('location-search'), {'q': 'Fort Pilar'})
+		calls_after_first = mock_get.call_count
+		second = self.client.get(reverse('location-search'), {'q': '  fort   PILAR '})
+
+		self.assertEqual(first.json(), second.json())
+		self.assertEqual(second.json()[0]['name'], 'Fort Pilar')
+		self.assertEqual(mock_get.call_count, calls_after_first)
+		self.assertEqual(GeocodeCacheEntry.objects.count(), 1)
+		stats = self.cache.stats.snapshot()
+		self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+	@override_settings(MAPBOX_ACCESS_TOKEN='')
+	@patch('destinations_and_attractions.geocoding_providers.requests.Session.get')
+	def test_empty_results_are_negatively_cached(self, mock_get):
+		mock_get.return_value = _MockHttpResponse([])
+
+		self.client.get(reverse('location-search'), {'q': 'Nowhere'})
+		calls_after_first = mock_get.call_count
+		response = self.client.get(reverse('location-search'), {'q': 'Nowhere'})
+
+		self.assertEqual(response.json(), [])
+		self.assertEqual(mock_get.call_count, calls_after_first)
+		self.assertEqual(self.cache.stats.snapshot()['negative_hits'], 1)
+
+	@override_settings(MAPBOX_ACCESS_TOKEN='dummy-token')
+	@patch('destinations_and_attractions.geocoding_providers.requests.Session.get', side_effect=requests.RequestException('upstream down'))
+	def test_provider_outage_is_not_cached(self, mock_get):
+		self.assertEqual(self.client.get(reverse('location-search'), {'q': 'Pasonanca'}).status_code, 502)
+		calls_after_first = mock_get.call_count
+		self.assertEqual(self.client.get(reverse('location-search'), {'q': 'Pasonanca'}).status_code, 502)
+
+		self.assertGreater(mock_get.call_count, calls_after_first)
+		self.assertFalse(GeocodeCacheEntry.objects.exists())
+
+	def test_database_tier_is_shared_across_process_caches(self):
+		self.cache.get_or_fetch('mapbox', 'Pasonanca', 8, lambda: [{'id': 'a', 'latitude': 6.95, 'longitude': 122.09}])
+
+		other_process = GeocodingCache(TieredGeocodeCache(memory=InProcessGeocodeCache(), database=DatabaseGeocodeCache()))
+		results = other_process.get_or_fetch('mapbox', 'pasonanca', 8, lambda: self.fail('should not fetch'))
+
+		self.assertEqual(results[0]['id'], 'a')
+		self.assertEqual(GeocodeCacheEntry.objects.get().hit_count, 1)
+
+	def test_memory_tier_evicts_least_recently_used(self):
+		memory = InProcessGeocodeCache(max_entries=2)
+		memory.set('a', [1], 60)
+		memory.set('b', [2], 60)
+		memory.get('a')
+		memory.set('c', [3], 60)
+
+		self.assertEqual(memory.get('a'), [1])
+		self.assertIsNone(memory.get('b'))
+		self.assertEqual(memory.get('c'), [3])
+
+	def test_concurrent_misses_are_coalesced(self):
+		cache = GeocodingCache(InProcessGeocodeCache())
+		release = threading.Event()
+		fetch_calls = []
+
+		def slow_fetch():
+			fetch_calls.append(1)
+			release.wait(5)
+			return [{'id': 'shared'}]
+
+		outcomes = []
+		threads = [
+			threading.Thread(target=lambda: outcomes.append(cache.get_or_fetch('nominatim', 'Sta Cruz', 8, slow_fetch)))
+			for _ in range(4)
+		]
+		for thread in threads:
+			thread.start()
+		while cache.stats.snapshot()['coalesced'] < 3:
+			threading.Event().wait(0.01)
+		release.set()
+		for thread in threads:
+			thread.join(5)
+
+		self.assertEqual(len(fetch_calls), 1)
+		self.assertEqual([result[0]['id'] for result in outcomes], ['shared'] * 4)
+
+	def test_failed_lookup_is_shared_with_waiters(self):
+		cache = GeocodingCache(InProcessGeocodeCache())
+
+		def failing_fetch():
+			raise GeocodingUnavailable('down')
+
+		with self.assertRaises(GeocodingUnavailable):
+			cache.get_or_fetch('mapbox', 'Tetuan', 8, failing_fetch)
+		self.assertEqual(cache.stats.snapshot()['provider_errors'], 1)
+
+	def test_cache_stats_endpoint_is_admin_only(self):
+		user = User.objects.create_user(username='geo_stats_user', password='Pass12345')
+		admin = User.objects.create_superuser(username='geo_stats_admin', password='Pass12345', email='geo@example.com')
+
+		self.client.force_authenticate(user=user)
+		self.assertEqual(self.client.get(reverse('location-search-cache-stats')).status_code, 403)
+
+		self.client.force_authenticate(user=admin)
+		response = self.client.get(reverse('location-search-cache-stats'))
+		self.assertEqual(response.status_code, 200)
+		self.assertIn('hit_rate', response.json())
+
+
+class _StubProvider(GeocodingProvider):
+	def __init__(self, name, results=None, delay=0, error=None):
+		self.name = name
+		self.results = results or {}
+		self.delay = delay
+		self.error = error
+		self.calls = []
+
+	def fetch(self, candidate_query, limit, timeout):
+		self.calls.append(candidate_query)
+		if self.delay:
+			threading.Event().wait(self.delay)
+		if self.error is not None:
+			raise self.error
+		return [dict(item) for item in self.results.get(candidate_query, [])]
+
+
+def _place(place_id, latitude, longitude):
+	return {'id': place_id, 'name': place_id, 'label': place_id, 'municipality': 'Zamboanga City', 'latitude': latitude, 'longitude': longitude}
+
+
+class GeocodingProviderFanOutTests(TestCase):
+	def setUp(self):
+		reset_circuit_breakers()
+
+	def tearDown(self):
+		reset_circuit_breakers()
+
+	def test_results_are_merged_by_priority_and_deduped_by_coordinates(self):
+		mapbox = _StubProvider('mapbox', {
+			'Pasonanca': [_place('mb-park', 6.96, 122.08)],
+			'Pasonanca, Zamboanga City': [_place('mb-school', 6.95, 122.09)],
+		})
+		nominatim = _StubProvider('nominatim', {
+			'Pasonanca': [_place('osm-park', 6.96, 122.08), _place('osm-road', 6.97, 122.07)],
+		})
+
+		results = search_providers([mapbox, nominatim], ['Pasonanca', 'Pasonanca, Zamboanga City'], 8)
+
+		self.assertEqual([item['id'] for item in results], ['mb-park', 'mb-school', 'osm-road'])
+		self.assertFalse(getattr(results, 'partial', False))
+		self.assertEqual(len(mapbox.calls) + len(nominatim.calls), 4)
+
+	def test_deadline_returns_partial_answer_from_fast_provider(self):
+		slow = _StubProvider('mapbox', {'Tetuan': [_place('slow', 6.92, 122.08)]}, delay=2)
+		fast = _StubProvider('nominatim', {'Tetuan': [_place('fast', 6.93, 122.07)]})
+
+		with self.settings(GEOCODING_DEADLINE_SECONDS=0.3):
+			started_at = time.monotonic()
+			results = search_providers([slow, fast], ['Tetuan'], 8)
+			elapsed = time.monotonic() - started_at
+
+		self.assertLess(elapsed, 1.5)
+		self.assertEqual([item['id'] for item in results], ['fast'])
+		self.assertTrue(results.partial)
+
+	def test_nothing_answered_raises_unavailable(self):
+		down = _StubProvider('nominatim', error=requests.ConnectionError('down'))
+
+		with self.assertRaises(GeocodingUnavailable):
+			search_providers([down], ['Tetuan'], 8)
+
+	def test_open_breaker_skips_failing_provider(self):
+		down = _StubProvider('mapbox', error=requests.Timeout('slow'))
+		healthy = _StubProvider('nominatim', {'Tumaga': [_place('ok', 6.94, 122.07)]})
+
+		for _ in range(3):
+			search_providers([down, healthy], ['Tumaga'], 8)
+		calls_when_open = len(down.calls)
+		results = search_providers([down, healthy], ['Tumaga'], 8)
+
+		self.assertEqual(get_circuit_breaker('mapbox').state, 'open')
+		self.assertEqual(len(down.calls), calls_when_open)
+		self.assertEqual([item['id'] for item in results], ['ok'])
+		self.assertTrue(results.partial)
+
+	def test_breaker_half_opens_after_cooldown(self):
+		breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=0)
+		breaker.record_failure()
+
+		self.assertTrue(breaker.allow())
+		self.assertFalse(breaker.allow())
+		breaker.record_success()
+		self.assertEqual(breaker.state, 'closed')
+
+
+class GazetteerTests(TestCase):
+	def setUp(self):
+		self.client = APIClient()
+		reset_gazetteer_index()
+		set_geocoding_cache(GeocodingCache(InProcessGeocodeCache()))
+		self.destination = Destination.objects.create(
+			name="Pasonanca Park",
+			description="Tree house and pools",
+			category="Nature",
+			location="Pasonanca, Zamboanga City",
+			municipality="Zamboanga City",
+			latitude="6.951000",
+			longitude="122.090000",
+		)
+
+	def tearDown(self):
+		reset_gazetteer_index()
+		set_geocoding_cache(None)
+
+	def _import_csv(self, rows):
+		handle = tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, newline="", encoding="utf-8")
+		self.addCleanup(os.remove, handle.name)
+		with handle:
+			handle.write("id,name,latitude,longitude,popularity\n")
+			for row in rows:
+				handle.write(",".join(str(value) for value in row) + "\n")
+		call_command("build_gazetteer", "--import", handle.name, stdout=io.StringIO())
+
+	def test_build_indexes_destinations_and_imported_places_inside_bounds(self):
+		self._import_csv([
+			("osm:1", "Fort Pilar Shrine", "6.902100", "122.080200", 5),
+			("osm:2", "Manila Bay", "14.580000", "120.970000", 9),
+		])
+
+		sources = dict(GazetteerPlace.objects.values_list("name", "source"))
+		self.assertEqual(sources, {"Pasonanca Park": "destination", "Fort Pilar Shrine": "imported"})
+
+	def test_prefix_and_fuzzy_matches_are_ranked(self):
+		index = GazetteerIndex([
+			{"source": "imported", "source_ref": "1", "name": "Pasonanca Natural Park", "label": "", "municipality": "", "latitude": 6.96, "longitude": 122.08, "popularity": 0},
+			{"source": "imported", "source_ref": "2", "name": "Paseo del Mar", "label": "", "municipality": "", "latitude": 6.90, "longitude": 122.07, "popularity": 50},
+			{"source": "imported", "source_ref": "3", "name": "Great Santa Cruz Island", "label": "", "municipality": "", "latitude": 6.87, "longitude": 122.05, "popularity": 0},
+		])
+
+		self.assertEqual([r["name"] for r in index.search("pas", 5)], ["Paseo del Mar", "Pasonanca Natural Park"])
+		self.assertEqual([r["name"] for r in index.search("pasonanka", 5)][:1], ["Pasonanca Natural Park"])
+		self.assertEqual([r["name"] for r in index.search("santa cruz", 5)], ["Great Santa Cruz Island"])
+		self.assertEqual(index.search("zzzz", 5), [])
+
+	@override_settings(MAPBOX_ACCESS_TOKEN="dummy-token", GAZETTEER_SUFFICIENT_RESULTS=2)
+	@patch("destinations_and_attractions.geocoding_providers.requests.Session.get")
+	def test_location_search_answers_locally_without_providers(self, mock_get):
+		self._import_csv([
+			("osm:10", "Pasonanca Tree House", "6.955000", "122.085000", 1),
+		])
+
+		response = self.client.get(reverse("location-search"), {"q": "pasonanca"})
+
+		self.assertEqual(response.status_code, 200)
+		names = [item["name"] for item in response.json()]
+		self.assertIn("Pasonanca Tree House", names)
+		self.assertTrue(any(item.get("is_existing") for item in response.json()))
+		mock_get.assert_not_called()
+
+	def test_index_reloads_after_rebuild(self):
+		self.assertEqual(len(get_gazetteer_index()), 0)
+
+		call_command("build_gazetteer", stdout=io.StringIO())
+		reset_gazetteer_index()
+
+		self.assertEqual(len(get_gazetteer_index()), 1)
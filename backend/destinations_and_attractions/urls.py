@@ -11,6 +11,7 @@ from .views import (
     CategoryChoicesView,
     MunicipalityChoicesView,
     LocationSearchView,
+    LocationSearchCacheStatsView,
     LocationCorrectionListCreateView,
     LocationCorrectionReviewView,
     CreateTourView,
@@ -37,6 +38,7 @@ urlpatterns = [
     path('categories/', CategoryChoicesView.as_view(), name='category-choices'),
     path('locations/municipalities/', MunicipalityChoicesView.as_view(), name='location-municipality-choices'),
     path('locations/search/', LocationSearchView.as_view(), name='location-search'),
+    path('locations/search/cache-stats/', LocationSearchCacheStatsView.as_view(), name='location-search-cache-stats'),
     path('location-corrections/', LocationCorrectionListCreateView.as_view(), name='location-correction-list-create'),
     path('location-corrections/<int:pk>/review/', LocationCorrectionReviewView.as_view(), name='location-correction-review'),
     
@@ -5,18 +5,14 @@ from rest_framework.parsers import MultiPartParser, FormParser, JSONParser #type
 from rest_framework.exceptions import PermissionDenied, ValidationError
 from django_filters.rest_framework import DjangoFilterBackend #type: ignore
 from django.contrib.auth import get_user_model
-from django.db.models import Q, Count
+from django.db.models import Q, Count, Prefetch
 from django.db import transaction
 from django.conf import settings
 from django.shortcuts import get_object_or_404
 from django.utils import timezone #type: ignore
 from datetime import date, timedelta
-from zoneinfo import ZoneInfo
-from urllib.parse import quote
 
-import requests
-
-from .models import Destination, DestinationCategory, Attraction, TourPackage, TourStop, LocationCorrectionRequest
+from .models import Destination, DestinationCategory, Attraction, TourPackage, TourStop, LocationCorrectionRequest, NewPackageHighlight
 from .serializers import (
     DestinationSerializer, 
     DestinationListSerializer, 
@@ -25,20 +21,24 @@ from .serializers import (
     GuideSerializer,
     LocationCorrectionCreateSerializer,
     LocationCorrectionRequestSerializer,
+    prefetch_tour_package_read_relations,
 )
 from backend.pagination import OptionalPageNumberPagination
+from backend.projection import FieldProjectionViewMixin, project_queryset
+from system_management_module.services.catalog_cache import CatalogCacheMixin, cached_catalog_response
+from .gazetteer import get_gazetteer_index
+from .highlights import HIGHLIGHTS_TIMEZONE, ensure_highlight_snapshot
+from .geocoding import GeocodingUnavailable, get_geocoding_cache, get_geocoding_stats
+from .geocoding_providers import build_geocoding_providers, get_provider_health, search_providers
 from backend.location_policy import (
     CITY_SCOPE_LABEL,
     ZDS_MAPBOX_BBOX,
-    extract_municipality_from_text,
     get_zds_municipality_choices,
     is_trusted_location_editor,
-    validate_zds_coordinates,
 )
 
 User = get_user_model()
 
-HIGHLIGHTS_TIMEZONE = ZoneInfo('Asia/Manila')
 DEFAULT_DESTINATION_HIGHLIGHT_LIMIT = 3
 MAX_DESTINATION_HIGHLIGHT_LIMIT = 10
 
@@ -263,7 +263,13 @@ class CategoryChoicesView(APIView):
         return categories
 
     def get(self, request):
-        return Response(self._build_category_choices())
+        return cached_catalog_response(
+            request,
+            type(self).__name__,
+            ('destination', 'destination_category'),
+            lambda: Response(self._build_category_choices()),
+            cache_control='private, no-cache',
+        )
 
     def post(self, request):
         if not request.user.is_staff:
@@ -308,7 +314,11 @@ class CategoryChoicesView(APIView):
 class MunicipalityChoicesView(APIView):
     permission_classes = [permissions.AllowAny]
 
-    def get(self, _request):
+    def get(self, request):
+        # Static data: no catalog counter, so only the ETag and TTL apply.
+        return cached_catalog_response(request, type(self).__name__, (), self._build_choices)
+
+    def _build_choices(self):
         return Response(
             {
                 'municipalities': get_zds_municipality_choices(),
@@ -326,80 +336,6 @@ class MunicipalityChoicesView(APIView):
 class LocationSearchView(APIView):
     permission_classes = [permissions.AllowAny]
 
-    def _search_with_nominatim(self, candidate_queries, limit):
-        results = []
-        seen_result_ids = set()
-
-        # Nominatim expects viewbox as: left,top,right,bottom
-        viewbox = f"{ZDS_MAPBOX_BBOX[0]},{ZDS_MAPBOX_BBOX[3]},{ZDS_MAPBOX_BBOX[2]},{ZDS_MAPBOX_BBOX[1]}"
-        headers = {
-            'Accept': 'application/json',
-            'Accept-Language': 'en',
-            'User-Agent': 'localynk-backend/1.0',
-        }
-
-        for candidate_query in candidate_queries:
-            params = {
-                'q': candidate_query,
-                'format': 'jsonv2',
-                'limit': limit,
-                'countrycodes': 'ph',
-                'addressdetails': 1,
-                'viewbox': viewbox,
-                'bounded': 1,
-            }
-
-            try:
-                response = requests.get(
-                    'https://nominatim.openstreetmap.org/search',
-                    params=params,
-                    headers=headers,
-                    timeout=8,
-                )
-                response.raise_for_status()
-                payload = response.json()
-            except requests.RequestException:
-                continue
-
-            if not isinstance(payload, list):
-                continue
-
-            for item in payload:
-                latitude = item.get('lat')
-                longitude = item.get('lon')
-
-                try:
-                    lat_value, lng_value = validate_zds_coordinates(latitude, longitude)
-                except ValueError:
-                    continue
-
-                result_id = str(item.get('place_id') or f"{lat_value}:{lng_value}")
-                if result_id in seen_result_ids:
-                    continue
-
-                seen_result_ids.add(result_id)
-
-                label = item.get('display_name') or candidate_query
-                municipality = extract_municipality_from_text(label) or CITY_SCOPE_LABEL
-
-                results.append(
-                    {
-                        'id': result_id,
-                        'label': label,
-                        'name': item.get('name') or label,
-                        'municipality': municipality,
-                        'latitude': lat_value,
-                        'longitude': lng_value,
-                    }
-                )
-
-                if len(results) >= limit:
-                    return results
-
-        return results
-
-    # Replace your existing LocationSearchView.get method with this updated version:
-
     def get(self, request):
         query = str(request.query_params.get('q') or request.query_params.get('query') or '').strip()
         if len(query) < 2:
@@ -454,98 +390,59 @@ class LocationSearchView(APIView):
             except (TypeError, ValueError):
                 pass
 
-        center_lng = (ZDS_MAPBOX_BBOX[0] + ZDS_MAPBOX_BBOX[2]) / 2
-        center_lat = (ZDS_MAPBOX_BBOX[1] + ZDS_MAPBOX_BBOX[3]) / 2
-
-        features = []
-        seen_feature_ids = set()
-        had_successful_mapbox_request = False
-
-        if mapbox_token and len(results) < limit:
-            base_params = {
-                'access_token': mapbox_token,
-                'country': 'PH',
-                'bbox': ','.join(str(value) for value in ZDS_MAPBOX_BBOX),
-                'types': 'place,locality,neighborhood,address,poi',
-                'autocomplete': 'true',
-                'proximity': f"{center_lng},{center_lat}",
-                'limit': limit,
-            }
-
-            for candidate_query in candidate_queries:
-                endpoint = f"https://api.mapbox.com/geocoding/v5/mapbox.places/{quote(candidate_query)}.json"
-
-                try:
-                    provider_response = requests.get(endpoint, params=base_params, timeout=8)
-                    provider_response.raise_for_status()
-                    payload = provider_response.json()
-                    had_successful_mapbox_request = True
-                except requests.RequestException:
-                    continue
-
-                for feature in payload.get('features', []):
-                    feature_id = str(feature.get('id') or '')
-                    if feature_id and feature_id in seen_feature_ids:
-                        continue
+        # 2. Local place index (destinations, accommodations, meetup points, imported places).
+        for item in get_gazetteer_index().search(query, limit):
+            if len(results) >= limit:
+                break
 
-                    if feature_id:
-                        seen_feature_ids.add(feature_id)
+            coord_key = f"{item['latitude']:.4f},{item['longitude']:.4f}"
+            if coord_key in seen_coordinates:
+                continue
+            seen_coordinates.add(coord_key)
+            results.append(item)
 
-                    features.append(feature)
+        # 3. External providers only when the local index is short on matches:
+        # every provider and candidate query is tried concurrently under one
+        # deadline, served from the geocoding cache when possible.
+        enough_local_results = min(limit, getattr(settings, 'GAZETTEER_SUFFICIENT_RESULTS', 3))
+        if len(results) >= enough_local_results:
+            return Response(results)
 
-                if len(features) >= limit:
-                    break
+        providers = build_geocoding_providers(mapbox_token)
+        try:
+            provider_results = get_geocoding_cache().get_or_fetch(
+                '+'.join(provider.name for provider in providers),
+                query,
+                limit,
+                lambda: search_providers(providers, candidate_queries, limit),
+            )
+        except GeocodingUnavailable:
+            if not results and mapbox_token:
+                return Response(
+                    {'detail': 'Location search providers are currently unavailable.'},
+                    status=status.HTTP_502_BAD_GATEWAY,
+                )
+            provider_results = []
 
-        for feature in features:
+        for item in provider_results:
             if len(results) >= limit:
                 break
 
-            center = feature.get('center') or []
-            if len(center) != 2:
-                continue
-
-            longitude, latitude = center[0], center[1]
-            try:
-                lat_value, lng_value = validate_zds_coordinates(latitude, longitude)
-            except ValueError:
-                continue
-
             # Prevent duplicating identical coordinates
-            coord_key = f"{lat_value:.4f},{lng_value:.4f}"
+            coord_key = f"{item['latitude']:.4f},{item['longitude']:.4f}"
             if coord_key in seen_coordinates:
                 continue
             seen_coordinates.add(coord_key)
+            results.append(item)
 
-            label = feature.get('place_name') or feature.get('text') or ''
-            municipality = extract_municipality_from_text(label)
-            if not municipality:
-                municipality = CITY_SCOPE_LABEL
+        return Response(results)
 
-            results.append(
-                {
-                    'id': feature.get('id'),
-                    'label': label,
-                    'name': feature.get('text') or label,
-                    'municipality': municipality,
-                    'latitude': lat_value,
-                    'longitude': lng_value,
-                }
-            )
-
-        if results:
-            return Response(results)
-
-        nominatim_results = self._search_with_nominatim(candidate_queries, limit)
-        if nominatim_results:
-            return Response(nominatim_results)
 
-        if mapbox_token and not had_successful_mapbox_request:
-            return Response(
-                {'detail': 'Location search providers are currently unavailable.'},
-                status=status.HTTP_502_BAD_GATEWAY,
-            )
+class LocationSearchCacheStatsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
 
-        return Response([])
+    def get(self, request):
+        return Response({**get_geocoding_stats(), 'providers': get_provider_health()})
 
 
 class LocationCorrectionListCreateView(APIView):
@@ -637,7 +534,7 @@ class LocationCorrectionReviewView(APIView):
         serializer = LocationCorrectionRequestSerializer(correction)
         return Response(serializer.data)
 
-class DestinationViewSet(viewsets.ModelViewSet):
+class DestinationViewSet(FieldProjectionViewMixin, viewsets.ModelViewSet):
     queryset = Destination.objects.all().prefetch_related('images', 'attractions')
     permission_classes = [IsAdminOrReadOnly]
     pagination_class = OptionalPageNumberPagination
@@ -650,6 +547,17 @@ class DestinationViewSet(viewsets.ModelViewSet):
             return DestinationListSerializer
         return DestinationSerializer
 
+    def list(self, request, *args, **kwargs):
+        return cached_catalog_response(
+            request,
+            type(self).__name__,
+            ('destination', 'destination_image', 'attraction'),
+            lambda: super(DestinationViewSet, self).list(request, *args, **kwargs),
+        )
+
+    def get_queryset(self):
+        return project_queryset(super().get_queryset(), self.request, self.get_serializer_class())
+
 class AttractionViewSet(viewsets.ModelViewSet):
     queryset = Attraction.objects.all()
     serializer_class = AttractionSerializer
@@ -682,77 +590,78 @@ class DestinationNewPackageHighlightsView(APIView):
             maximum=MAX_DESTINATION_HIGHLIGHT_LIMIT,
         )
 
-        start_previous_day, start_today, target_date = _get_previous_day_window()
-
-        highlight_queryset = TourPackage.objects.filter(
-            main_destination__isnull=False,
-            is_active=True,
-            created_at__gte=start_previous_day,
-            created_at__lt=start_today,
-        ).select_related(
-            'main_destination',
-            'guide',
-            'agency__user',
-        )
+        _, _, target_date = _get_previous_day_window()
+        ensure_highlight_snapshot(target_date)
 
+        highlight_rows = NewPackageHighlight.objects.filter(day=target_date)
         if destination_ids:
-            highlight_queryset = highlight_queryset.filter(main_destination_id__in=destination_ids)
-
-        highlight_queryset = highlight_queryset.order_by('main_destination_id', '-created_at', '-id')
-
-        counts_by_destination = {
-            item['main_destination_id']: item['total']
-            for item in highlight_queryset.order_by().values('main_destination_id').annotate(total=Count('id'))
-        }
+            highlight_rows = highlight_rows.filter(destination_id__in=destination_ids)
+
+        highlight_rows = highlight_rows.order_by('destination_id', '-package_created_at', '-package_id').values(
+            'package_id',
+            'name',
+            'duration_days',
+            'package_created_at',
+            'destination_id',
+            'destination__name',
+            'package__guide_id',
+            'package__guide__first_name',
+            'package__guide__last_name',
+            'package__guide__username',
+            'package__agency_id',
+            'package__agency__business_name',
+            'package__agency__user_id',
+        )
 
+        counts_by_destination = {}
         payload_by_destination = {}
 
-        for package in highlight_queryset:
-            destination_id = package.main_destination_id
-            if not destination_id:
-                continue
+        for row in highlight_rows:
+            destination_id = row['destination_id']
+            counts_by_destination[destination_id] = counts_by_destination.get(destination_id, 0) + 1
 
             if destination_id not in payload_by_destination:
                 payload_by_destination[destination_id] = {
                     'destination_id': destination_id,
-                    'destination_name': package.main_destination.name if package.main_destination else '',
-                    'new_packages_count': int(counts_by_destination.get(destination_id, 0)),
+                    'destination_name': row['destination__name'] or '',
+                    'new_packages_count': 0,
                     'packages': [],
                 }
 
             destination_entry = payload_by_destination[destination_id]
+            destination_entry['new_packages_count'] += 1
 
             if len(destination_entry['packages']) >= per_destination_limit:
                 continue
 
             owner_type = 'guide'
             owner_name = ''
-            guide_id = package.guide_id
+            guide_id = row['package__guide_id']
             agency_user_id = None
 
-            if package.agency_id:
+            if row['package__agency_id']:
                 owner_type = 'agency'
-                owner_name = str(getattr(package.agency, 'business_name', '') or '').strip()
+                owner_name = str(row['package__agency__business_name'] or '').strip()
                 guide_id = None
-                agency_user_id = getattr(package.agency, 'user_id', None)
-            elif package.guide_id:
-                full_name = package.guide.get_full_name() if package.guide else ''
-                owner_name = str(full_name or '').strip() or str(getattr(package.guide, 'username', '') or '').strip()
+                agency_user_id = row['package__agency__user_id']
+            elif guide_id:
+                full_name = f"{row['package__guide__first_name'] or ''} {row['package__guide__last_name'] or ''}"
+                owner_name = full_name.strip() or str(row['package__guide__username'] or '').strip()
 
             if not owner_name:
                 owner_name = 'Local Provider'
 
             destination_entry['packages'].append(
                 {
-                    'id': package.id,
-                    'name': package.name,
-                    'duration_days': package.duration_days,
-                    'created_at': package.created_at,
+                    'id': row['package_id'],
+                    'name': row['name'],
+                    'duration_days': row['duration_days'],
+                    'created_at': row['package_created_at'],
                     'owner_type': owner_type,
                     'owner_name': owner_name,
                     'guide_id': guide_id,
                     'agency_user_id': agency_user_id,
-                    'agency_id': package.agency_id,
+                    'agency_id': row['package__agency_id'],
                     'destination_id': destination_id,
                     'destination_name': destination_entry['destination_name'],
                 }
@@ -796,7 +705,7 @@ class CreateTourView(generics.CreateAPIView):
         else:
             serializer.save(guide=user)
 
-class MyToursListView(generics.ListAPIView):
+class MyToursListView(FieldProjectionViewMixin, generics.ListAPIView):
     serializer_class = TourPackageSerializer
     permission_classes = [IsGuideOrAgency] # CHANGED
 
@@ -804,12 +713,23 @@ class MyToursListView(generics.ListAPIView):
         # SMART LOGIC: Fetch tours based on user type
         user = self.request.user
         if hasattr(user, 'agency_profile'):
-            return TourPackage.objects.filter(agency=user.agency_profile)
-        return TourPackage.objects.filter(guide=user)
+            queryset = TourPackage.objects.filter(agency=user.agency_profile)
+        else:
+            queryset = TourPackage.objects.filter(guide=user)
+        return project_queryset(prefetch_tour_package_read_relations(queryset), self.request, TourPackageSerializer)
 
-class ToursByDestinationListView(generics.ListAPIView):
+class ToursByDestinationListView(CatalogCacheMixin, FieldProjectionViewMixin, generics.ListAPIView):
     serializer_class = TourPackageSerializer
     permission_classes = [permissions.AllowAny]
+    catalog_names = ('tour_package', 'tour_stop', 'destination', 'destination_image')
+    # Guide names and avatars have no counter.
+    catalog_last_modified = False
+
+    def catalog_cache_extra(self):
+        # "Yesterday" moves at midnight without any package changing.
+        if _is_previous_day_requested(self.request.query_params.get('new_packages')):
+            return _get_previous_day_window()[2].isoformat()
+        return ''
 
     def get_queryset(self):
         destination_id = self.kwargs['destination_id']
@@ -819,26 +739,32 @@ class ToursByDestinationListView(generics.ListAPIView):
             start_previous_day, start_today, _ = _get_previous_day_window()
             queryset = queryset.filter(created_at__gte=start_previous_day, created_at__lt=start_today)
 
-        return queryset.order_by('-created_at', '-id')
+        queryset = prefetch_tour_package_read_relations(queryset.order_by('-created_at', '-id'))
+        return project_queryset(queryset, self.request, TourPackageSerializer)
 
-class GuideToursListView(generics.ListAPIView):
+class GuideToursListView(CatalogCacheMixin, FieldProjectionViewMixin, generics.ListAPIView):
     serializer_class = TourPackageSerializer
     permission_classes = [permissions.AllowAny]
+    catalog_names = ('tour_package', 'tour_stop', 'destination', 'destination_image')
+    # Guide names and avatars have no counter.
+    catalog_last_modified = False
 
     def get_queryset(self):
         guide_id = self.kwargs['guide_id']
-        return TourPackage.objects.filter(guide__id=guide_id, is_active=True)
+        queryset = prefetch_tour_package_read_relations(TourPackage.objects.filter(guide__id=guide_id, is_active=True))
+        return project_queryset(queryset, self.request, TourPackageSerializer)
 
-class GuideDestinationsListView(generics.ListAPIView):
+class GuideDestinationsListView(FieldProjectionViewMixin, generics.ListAPIView):
     serializer_class = DestinationListSerializer 
     permission_classes = [permissions.AllowAny]
 
     def get_queryset(self):
         guide_id = self.kwargs['guide_id']
-        return Destination.objects.filter(
+        queryset = Destination.objects.filter(
             tour_packages__guide__id=guide_id,
             tour_packages__is_active=True
-        ).distinct()
+        ).distinct().prefetch_related('images', 'attractions')
+        return project_queryset(queryset, self.request, DestinationListSerializer)
 
 class TourDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = TourPackage.objects.all()
@@ -875,6 +801,13 @@ class GuideListView(generics.ListAPIView):
     pagination_class = OptionalPageNumberPagination
 
     def get_queryset(self):
+        # Fixed query budget whatever the page holds: guides (with their busy
+        # count), their tours, the tours' stops and destination images.
+        destination_id = self.request.query_params.get('main_destination')
+        tours = TourPackage.objects.order_by('id')
+        if destination_id:
+            tours = tours.filter(main_destination__id=destination_id)
+
         queryset = User.objects.filter(
             is_local_guide=True,
             is_guide_visible=True,
@@ -888,13 +821,18 @@ class GuideListView(generics.ListAPIView):
                 ),
                 distinct=True,
             )
-        ).prefetch_related('tours').distinct()
+        ).prefetch_related(
+            Prefetch('tours', queryset=prefetch_tour_package_read_relations(tours)),
+        )
         
-        destination_id = self.request.query_params.get('main_destination')
         if destination_id:
+            # A subquery rather than a join, so guides need no DISTINCT.
             queryset = queryset.filter(
-                tours__main_destination__id=destination_id,
-                tours__is_active=True
-            ).distinct()
+                id__in=TourPackage.objects.filter(
+                    main_destination__id=destination_id,
+                    is_active=True,
+                    guide__isnull=False,
+                ).values('guide_id')
+            )
         
         return queryset
\ No newline at end of file
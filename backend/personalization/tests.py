@@ -106,3 +106,25 @@ class PersonalizationApiTests(TestCase):
 
 		self.assertEqual(response.status_code, 400)
 		self.assertIn("preferred_location", response.data)
+
+
+class OnboardingDestinationsApiTests(TestCase):
+	def setUp(self):
+		self.client = APIClient()
+		self.user = User.objects.create_user(username="onboarding_api", password="Pass12345")
+		self.destination = Destination.objects.create(
+			name="Manila",
+			description="Capital",
+			category="Historical",
+			location="Zamboanga City",
+			municipality="Zamboanga City",
+			latitude="6.910000",
+			longitude="122.070000",
+		)
+
+	def test_onboarding_destinations_accept_projection_and_pages(self):
+		self.client.force_authenticate(user=self.user)
+		response = self.client.get(reverse("onboarding-destinations"), {"fields": "id,name", "page_size": 1})
+
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.json()["results"], [{"id": self.destination.id, "name": "Manila"}])
@@ -7,18 +7,26 @@ from destinations_and_attractions.models import Destination
 from destinations_and_attractions.serializers import DestinationSerializer
 from .serializers import PersonalizationDetailSerializer
 from backend.location_policy import validate_zds_location_payload
+from backend.pagination import OptionalPageNumberPagination
+from backend.projection import FieldProjectionViewMixin, project_queryset
 
-class OnboardingDestinationsView(generics.ListAPIView):
+class OnboardingDestinationsView(FieldProjectionViewMixin, generics.ListAPIView):
     """
     Returns destinations sorted by Featured, Category, then Rating.
-    Frontend will perform grouping and limiting.
+    Frontend will perform grouping and limiting. Accepts ``page_size`` and
+    ``fields``/``expand`` (backend/projection.py) for lighter payloads.
     """
     permission_classes = [IsAuthenticated]
     serializer_class = DestinationSerializer
-    pagination_class = None
+    pagination_class = OptionalPageNumberPagination
 
     def get_queryset(self):
-        return Destination.objects.all().order_by('-is_featured', 'category', '-average_rating')
+        queryset = (
+            Destination.objects
+            .prefetch_related('images', 'attractions')
+            .order_by('-is_featured', 'category', '-average_rating', 'id')
+        )
+        return project_queryset(queryset, self.request, DestinationSerializer)
 
 class UpdatePersonalizationView(views.APIView):
     permission_classes = [IsAuthenticated]
@@ -1,13 +1,34 @@
 from django.contrib import admin
+from django.utils import timezone
 from .models import (
 	SystemAlert,
 	GuideReviewRequest,
 	PushDeviceToken,
 	PushNotificationDeliveryLog,
+	OutboxJob,
 )
 
 # Register your models here.
 admin.site.register(SystemAlert)
 admin.site.register(GuideReviewRequest)
 admin.site.register(PushDeviceToken)
-admin.site.register(PushNotificationDeliveryLog)
\ No newline at end of file
+admin.site.register(PushNotificationDeliveryLog)
+
+
+@admin.register(OutboxJob)
+class OutboxJobAdmin(admin.ModelAdmin):
+	list_display = ('id', 'kind', 'status', 'attempts', 'max_attempts', 'available_at', 'completed_at')
+	list_filter = ('status', 'kind')
+	readonly_fields = ('created_at', 'updated_at', 'completed_at', 'locked_at')
+	actions = ['requeue_jobs']
+
+	@admin.action(description='Requeue selected dead-lettered jobs')
+	def requeue_jobs(self, request, queryset):
+		updated = queryset.filter(status='dead').update(
+			status='pending',
+			attempts=0,
+			available_at=timezone.now(),
+			last_error=None,
+			updated_at=timezone.now(),
+		)
+		self.message_user(request, f'{updated} job(s) requeued.')
@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand #type: ignore
+
+from system_management_module.services.push_notifications import (
+    RECEIPT_CHECK_DELAY,
+    check_push_receipts,
+    dispatch_queued_push_logs,
+    get_push_metrics,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Send every due queued/retrying push notification to Expo in batches, '
+        'then resolve pending Expo receipts.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Logs claimed per dispatch pass.',
+        )
+        parser.add_argument(
+            '--receipt-delay-minutes',
+            type=int,
+            default=int(RECEIPT_CHECK_DELAY.total_seconds() // 60),
+            help='Only check receipts for tickets at least this old.',
+        )
+        parser.add_argument(
+            '--skip-receipts',
+            action='store_true',
+            help='Only dispatch queued logs.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(options['batch_size'], 1)
+
+        dispatched = 0
+        while True:
+            handled = dispatch_queued_push_logs(limit=batch_size)
+            dispatched += handled
+            if handled < batch_size:
+                break
+
+        self.stdout.write(self.style.SUCCESS(f'Dispatched {dispatched} push notification(s).'))
+
+        if not options['skip_receipts']:
+            resolved = check_push_receipts(
+                min_age=timedelta(minutes=max(options['receipt_delay_minutes'], 0)),
+            )
+            self.stdout.write(self.style.SUCCESS(f'Resolved {resolved} push receipt(s).'))
+
+        metrics = get_push_metrics()
+        self.stdout.write(
+            f"messages_sent={metrics['messages_sent']} "
+            f"send_requests={metrics['send_requests']} "
+            f"messages_per_second={metrics['messages_per_second']}"
+        )
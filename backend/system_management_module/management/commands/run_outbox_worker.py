@@ -0,0 +1,62 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand #type: ignore
+
+from system_management_module.services.outbox import process_outbox
+
+
+class Command(BaseCommand):
+    help = (
+        'Deliver pending outbox jobs (emails, push dispatch). Runs until stopped, '
+        'or drains the queue once with --once.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Jobs claimed per pass.',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=getattr(settings, 'OUTBOX_CONCURRENCY', 4),
+            help='Maximum jobs delivered at the same time.',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Seconds to sleep when no job is due.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain every due job and exit.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(options['batch_size'], 1)
+        concurrency = max(options['concurrency'], 1)
+        totals = {'done': 0, 'pending': 0, 'dead': 0}
+
+        try:
+            while True:
+                outcomes = process_outbox(limit=batch_size, concurrency=concurrency)
+                for key, value in outcomes.items():
+                    totals[key] += value
+
+                if any(outcomes.values()):
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+
+        style = self.style.WARNING if totals['dead'] else self.style.SUCCESS
+        self.stdout.write(style(
+            f"Outbox: {totals['done']} delivered, {totals['pending']} rescheduled, {totals['dead']} dead-lettered."
+        ))
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.6 on 2026-10-18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('system_management_module', '0003_pushdevicetoken_pushnotificationdeliverylog'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pushnotificationdeliverylog',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, help_text='Earliest time a queued/retrying log may be sent again.', null=True),
+        ),
+        migrations.AddField(
+            model_name='pushnotificationdeliverylog',
+            name='receipt_status',
+            field=models.CharField(blank=True, choices=[('pending', 'Pending'), ('ok', 'OK'), ('error', 'Error'), ('expired', 'Expired')], max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='pushnotificationdeliverylog',
+            name='sent_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='pushnotificationdeliverylog',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('sending', 'Sending'), ('retrying', 'Retrying'), ('sent', 'Sent'), ('failed', 'Failed'), ('dropped', 'Dropped')], default='queued', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='pushnotificationdeliverylog',
+            index=models.Index(fields=['status', 'next_attempt_at'], name='push_log_dispatch_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pushnotificationdeliverylog',
+            index=models.Index(fields=['receipt_status', 'sent_at'], name='push_log_receipt_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.6 on 2026-10-18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def release_duplicate_event_keys(apps, schema_editor):
+    """Keeps the oldest non-failed log per (token, event key) so the constraint can be added."""
+    PushNotificationDeliveryLog = apps.get_model('system_management_module', 'PushNotificationDeliveryLog')
+
+    seen = set()
+    duplicate_ids = []
+    rows = (
+        PushNotificationDeliveryLog.objects
+        .filter(event_key__isnull=False, device_token__isnull=False)
+        .exclude(status='failed')
+        .order_by('id')
+        .values_list('id', 'device_token_id', 'event_key')
+    )
+    for log_id, device_token_id, event_key in rows.iterator():
+        key = (device_token_id, event_key)
+        if key in seen:
+            duplicate_ids.append(log_id)
+        else:
+            seen.add(key)
+
+    if duplicate_ids:
+        PushNotificationDeliveryLog.objects.filter(id__in=duplicate_ids).update(event_key=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('system_management_module', '0005_outbox_job'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(release_duplicate_event_keys, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='pushnotificationdeliverylog',
+            constraint=models.UniqueConstraint(condition=models.Q(('event_key__isnull', False), models.Q(('status', 'failed'), _negated=True)), fields=('device_token', 'event_key'), name='unique_push_log_token_event'),
+        ),
+    ]
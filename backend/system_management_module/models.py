@@ -1,6 +1,7 @@
 from django.db import models
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from system_management_module.services.email_preferences import send_preference_aware_email
 
 User = get_user_model()
@@ -158,12 +159,20 @@ class PushDeviceToken(models.Model):
 class PushNotificationDeliveryLog(models.Model):
     STATUS_CHOICES = [
         ('queued', 'Queued'),
+        ('sending', 'Sending'),
         ('retrying', 'Retrying'),
         ('sent', 'Sent'),
         ('failed', 'Failed'),
         ('dropped', 'Dropped'),
     ]
 
+    RECEIPT_STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('ok', 'OK'),
+        ('error', 'Error'),
+        ('expired', 'Expired'),
+    ]
+
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
     device_token = models.ForeignKey(PushDeviceToken, on_delete=models.SET_NULL, null=True, blank=True)
     event_key = models.CharField(max_length=255, null=True, blank=True, db_index=True)
@@ -173,10 +182,90 @@ class PushNotificationDeliveryLog(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
     attempts = models.PositiveSmallIntegerField(default=0)
     expo_ticket_id = models.CharField(max_length=255, blank=True, null=True)
+    receipt_status = models.CharField(max_length=20, choices=RECEIPT_STATUS_CHOICES, blank=True, null=True)
+    next_attempt_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        help_text="Earliest time a queued/retrying log may be sent again."
+    )
+    sent_at = models.DateTimeField(blank=True, null=True)
     error_message = models.TextField(blank=True, null=True)
     response_payload = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='push_log_dispatch_idx'),
+            models.Index(fields=['receipt_status', 'sent_at'], name='push_log_receipt_idx'),
+        ]
+        constraints = [
+            # A failed log may be retried with the same event key; anything else is a duplicate.
+            models.UniqueConstraint(
+                fields=['device_token', 'event_key'],
+                condition=models.Q(event_key__isnull=False) & ~models.Q(status='failed'),
+                name='unique_push_log_token_event',
+            ),
+        ]
+
+    def __str__(self):
+        return f"PushLog<{self.id}> {self.status} - {self.title}"
+
+class OutboxJob(models.Model):
+    """
+    Side effect (email, push dispatch) recorded in the same transaction as the
+    change that caused it and delivered later by the outbox worker.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('dead', 'Dead Letter'),
+    ]
+
+    kind = models.CharField(max_length=50, db_index=True)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    dedupe_key = models.CharField(
+        max_length=255,
+        blank=True,
+        null=True,
+        help_text="At most one pending job may hold a given key; cleared once the job is claimed."
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    available_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='outbox_claim_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dedupe_key'],
+                condition=models.Q(status='pending'),
+                name='unique_pending_outbox_dedupe_key',
+            ),
+        ]
+
+    def __str__(self):
+        return f"OutboxJob<{self.id}> {self.kind} - {self.status}"
+
+
+class CatalogVersion(models.Model):
+    """
+    Change counter for one public catalog model, bumped whenever a row of it is
+    saved or deleted. Cached catalog responses are keyed by the counters they
+    depend on (services/catalog_cache.py).
+    """
+    name = models.CharField(max_length=50, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
     def __str__(self):
-        return f"PushLog<{self.id}> {self.status} - {self.title}"
\ No newline at end of file
+        return f"{self.name} v{self.version}"
@@ -0,0 +1,20 @@
+from backend.realtime import publish_role_event, publish_user_event
+from system_management_module.models import SystemAlert
+
+
+def publish_alert_created(alert):
+    from system_management_module.serializers import SystemAlertSerializer
+
+    payload = SystemAlertSerializer(alert).data
+    if alert.recipient_id:
+        publish_user_event(alert.recipient_id, 'alert.created', payload)
+    else:
+        publish_role_event(alert.target_type, 'alert.created', payload)
+
+
+def publish_alert_unread_count(user_id):
+    publish_user_event(
+        user_id,
+        'alert.unread_count',
+        lambda: {'unread_count': SystemAlert.objects.filter(recipient_id=user_id, is_read=False).count()},
+    )
@@ -0,0 +1,237 @@
+"""
+Rendered-response cache for public, read-mostly catalog endpoints.
+
+Every catalog model has a ``CatalogVersion`` counter, bumped in the same
+transaction as any save or delete of one of its rows (``connect_catalog_signals``).
+A cached endpoint names the counters its response depends on; the cache key
+holds their current values, so an edit simply makes the old entries
+unreachable and no invalidation is ever sent. Each request costs one query for
+the counters, and a hit skips the queryset, serialization and JSON rendering.
+
+Entries hold the JSON bytes and a strong ETag over them, so every process
+computes the same ETag for the same content. Responses carry ``ETag`` and a
+matching ``If-None-Match`` gets ``304 Not Modified``. Endpoints whose counters
+cover everything they render (``last_modified=True``) also send
+``Last-Modified`` once the counters exist and honour ``If-Modified-Since``;
+the others would answer 304 for data the counters never saw change.
+
+Writes that bypass ``save``/``delete`` (queryset ``update``, ``bulk_create``)
+must call ``bump_catalog_version`` themselves. Fields read from models without
+a counter (guide names, agency ratings) refresh within ``CATALOG_CACHE_TTL``.
+"""
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils import timezone
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from system_management_module.models import CatalogVersion
+
+DEFAULT_CACHE_TTL = 300
+_KEY_PREFIX = 'catalog:v1:'
+
+# Counter name -> model whose saves and deletes bump it.
+CATALOG_MODELS = {
+    'destination': 'destinations_and_attractions.Destination',
+    'destination_image': 'destinations_and_attractions.DestinationImage',
+    'destination_category': 'destinations_and_attractions.DestinationCategory',
+    'attraction': 'destinations_and_attractions.Attraction',
+    'tour_package': 'destinations_and_attractions.TourPackage',
+    'tour_stop': 'destinations_and_attractions.TourStop',
+    'agency': 'agency_management_module.Agency',
+}
+
+
+class CatalogCacheStats:
+    """Per-process hit and render-time counters for each cached endpoint."""
+
+    _COUNTERS = ('hits', 'misses', 'not_modified', 'bypassed')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+
+    def record(self, endpoint, outcome, seconds=0.0):
+        with self._lock:
+            values = self._endpoints.setdefault(
+                endpoint,
+                {**{name: 0 for name in self._COUNTERS}, 'render_seconds': 0.0, 'hit_seconds': 0.0},
+            )
+            values[outcome] += 1
+            if outcome == 'misses':
+                values['render_seconds'] += seconds
+            elif outcome in ('hits', 'not_modified'):
+                values['hit_seconds'] += seconds
+
+    def snapshot(self):
+        with self._lock:
+            endpoints = {name: dict(values) for name, values in self._endpoints.items()}
+
+        report = {}
+        for name, values in endpoints.items():
+            served = values['hits'] + values['not_modified']
+            lookups = served + values['misses']
+            avg_render_ms = values.pop('render_seconds') * 1000 / values['misses'] if values['misses'] else 0.0
+            avg_hit_ms = values.pop('hit_seconds') * 1000 / served if served else 0.0
+            report[name] = {
+                **values,
+                'hit_rate': round(served / lookups, 4) if lookups else 0.0,
+                'avg_render_ms': round(avg_render_ms, 2),
+                'avg_hit_ms': round(avg_hit_ms, 2),
+                # What the hits would have cost had each been rendered like an average miss.
+                'estimated_saved_ms': round(served * max(avg_render_ms - avg_hit_ms, 0.0), 2) if values['misses'] else 0.0,
+            }
+        return report
+
+
+stats = CatalogCacheStats()
+
+
+def get_catalog_cache_stats():
+    return stats.snapshot()
+
+
+def bump_catalog_version(name):
+    """Moves ``name`` to a new version; runs in the caller's transaction."""
+    updated = CatalogVersion.objects.filter(name=name).update(version=F('version') + 1, updated_at=timezone.now())
+    if not updated:
+        version, created = CatalogVersion.objects.get_or_create(name=name, defaults={'version': 1})
+        if not created:
+            CatalogVersion.objects.filter(pk=version.pk).update(version=F('version') + 1, updated_at=timezone.now())
+
+
+def catalog_versions(names):
+    """``{name: (version, updated_at)}`` for the counters that exist."""
+    return {
+        name: (version, updated_at)
+        for name, version, updated_at in CatalogVersion.objects.filter(name__in=names).values_list('name', 'version', 'updated_at')
+    }
+
+
+def _bump_for(name):
+    def receiver(sender, **kwargs):
+        if kwargs.get('raw'):
+            return
+        bump_catalog_version(name)
+    return receiver
+
+
+def connect_catalog_signals():
+    for name, model in CATALOG_MODELS.items():
+        receiver = _bump_for(name)
+        post_save.connect(receiver, sender=model, weak=False, dispatch_uid=f'catalog_version:{name}:save')
+        post_delete.connect(receiver, sender=model, weak=False, dispatch_uid=f'catalog_version:{name}:delete')
+
+
+def _cache_key(request, names, versions, extra):
+    parts = [
+        ','.join(names),
+        ';'.join(
+            f'{name}={versions[name][0]}@{versions[name][1].isoformat()}' if name in versions else f'{name}=0'
+            for name in names
+        ),
+        # Serializers build absolute media URLs from the request host.
+        request.build_absolute_uri(),
+        str(extra),
+    ]
+    return _KEY_PREFIX + hashlib.sha256('|'.join(parts).encode()).hexdigest()
+
+
+def _is_not_modified(request, etag, last_modified):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        return etag in [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')] or if_none_match.strip() == '*'
+    # Without a trustworthy Last-Modified only the ETag can prove freshness.
+    if last_modified is None:
+        return False
+    if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return if_modified_since is not None and int(last_modified) <= if_modified_since
+
+
+def cached_catalog_response(request, endpoint, names, build, *, extra='', cache_control='public, no-cache',
+                            last_modified=True):
+    """
+    Serves ``build()`` (a view body returning a DRF ``Response``) from the
+    catalog cache. ``names`` are the counters the response depends on and
+    ``extra`` anything else it varies by besides the URL. Pass
+    ``last_modified=False`` when the response also reads rows no counter
+    covers; it is then validated by ETag only.
+    """
+    ttl = getattr(settings, 'CATALOG_CACHE_TTL', DEFAULT_CACHE_TTL)
+    renderer = getattr(request, 'accepted_renderer', None)
+    if request.method not in ('GET', 'HEAD') or ttl <= 0 or not isinstance(renderer, JSONRenderer):
+        stats.record(endpoint, 'bypassed')
+        return build()
+
+    started = time.perf_counter()
+    cache = caches[getattr(settings, 'CATALOG_CACHE_ALIAS', 'default')]
+    names = sorted(names)
+    versions = catalog_versions(names)
+    key = _cache_key(request, names, versions, extra)
+    updated = [updated_at for _version, updated_at in versions.values()]
+    last_modified = max(updated).timestamp() if updated and last_modified else None
+
+    entry = cache.get(key)
+    if entry is None:
+        response = build()
+        if response.status_code != 200 or not isinstance(response, Response):
+            stats.record(endpoint, 'bypassed')
+            return response
+        body = JSONRenderer().render(response.data)
+        entry = (body, f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+        cache.set(key, entry, ttl)
+        outcome = 'misses'
+    else:
+        outcome = 'hits'
+
+    body, etag = entry
+    headers = {'ETag': etag, 'Cache-Control': cache_control}
+    if last_modified is not None:
+        headers['Last-Modified'] = http_date(last_modified)
+
+    if _is_not_modified(request, etag, last_modified):
+        response = HttpResponseNotModified(headers=headers)
+        if outcome == 'hits':
+            outcome = 'not_modified'
+    else:
+        response = HttpResponse(body, content_type='application/json', headers=headers)
+    stats.record(endpoint, outcome, time.perf_counter() - started)
+    return response
+
+
+class CatalogCacheMixin:
+    """
+    Serves a generic or API view's GET from the catalog cache. Views set
+    ``catalog_names`` (the counters in CATALOG_MODELS their response reads) and
+    may override ``catalog_cache_extra`` for inputs other than the URL. Views
+    that render rows outside those counters set ``catalog_last_modified = False``.
+    """
+    catalog_names = ()
+    catalog_cache_control = 'public, no-cache'
+    catalog_last_modified = True
+
+    def catalog_cache_extra(self):
+        return ''
+
+    def get(self, request, *args, **kwargs):
+        return cached_catalog_response(
+            request,
+            type(self).__name__,
+            self.catalog_names,
+            lambda: super(CatalogCacheMixin, self).get(request, *args, **kwargs),
+            extra=self.catalog_cache_extra(),
+            cache_control=self.catalog_cache_control,
+            last_modified=self.catalog_last_modified,
+        )
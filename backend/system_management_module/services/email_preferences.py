@@ -1,5 +1,4 @@
 from django.contrib.auth import get_user_model
-from django.core.mail import send_mail
 
 User = get_user_model()
 
@@ -49,15 +48,22 @@ def send_preference_aware_email(
     html_message=None,
     fail_silently=False,
 ):
+    """
+    Queues the email on the outbox instead of talking to the mail provider
+    inside the request. Delivery errors are retried by the outbox worker, so
+    ``fail_silently`` is accepted only for compatibility.
+    """
+    from system_management_module.services.outbox import enqueue_email
+
     filtered_recipients = filter_recipient_list_by_preference(recipient_list)
     if not filtered_recipients:
         return 0
 
-    return send_mail(
+    enqueue_email(
         subject=subject,
         message=message,
         from_email=from_email,
         recipient_list=filtered_recipients,
         html_message=html_message,
-        fail_silently=fail_silently,
-    )
\ No newline at end of file
+    )
+    return 1
@@ -0,0 +1,121 @@
+"""
+Local stand-in for the Expo Push API, used by tests and load checks.
+
+    server = FakeExpoServer().start()
+    with override_settings(EXPO_API_BASE_URL=server.base_url):
+        ...
+    server.stop()
+
+Tokens listed in ``unregistered_tokens`` get a ``DeviceNotRegistered`` ticket;
+ticket IDs listed in ``receipt_errors`` get an error receipt. Every request is
+recorded in ``send_requests`` / ``receipt_requests``.
+"""
+import json
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _FakeExpoHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length) or b'null')
+
+    def _write_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        fake = self.server.fake
+        if fake.fail_next_requests:
+            fake.fail_next_requests -= 1
+            self._write_json(503, {'errors': [{'code': 'UNAVAILABLE'}]})
+            return
+
+        payload = self._read_json()
+        if self.path.endswith('/push/send'):
+            self._write_json(200, {'data': fake.handle_send(payload)})
+        elif self.path.endswith('/push/getReceipts'):
+            self._write_json(200, {'data': fake.handle_receipts(payload)})
+        else:
+            self._write_json(404, {'errors': [{'code': 'NOT_FOUND'}]})
+
+
+class FakeExpoServer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.unregistered_tokens = set()
+        self.receipt_errors = set()
+        self.fail_next_requests = 0
+        self.send_requests = []
+        self.receipt_requests = []
+        self.tickets = {}
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}/--/api/v2'
+
+    def start(self):
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), _FakeExpoHandler)
+        self._httpd.fake = self
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    @property
+    def messages_sent(self):
+        with self._lock:
+            return sum(len(batch) for batch in self.send_requests)
+
+    def handle_send(self, messages):
+        messages = messages if isinstance(messages, list) else [messages]
+        tickets = []
+        with self._lock:
+            self.send_requests.append(messages)
+            for message in messages:
+                if message.get('to') in self.unregistered_tokens:
+                    tickets.append({
+                        'status': 'error',
+                        'message': f"\"{message.get('to')}\" is not a registered push notification recipient",
+                        'details': {'error': 'DeviceNotRegistered'},
+                    })
+                    continue
+
+                ticket_id = str(uuid.uuid4())
+                self.tickets[ticket_id] = message
+                tickets.append({'status': 'ok', 'id': ticket_id})
+        return tickets
+
+    def handle_receipts(self, payload):
+        ids = (payload or {}).get('ids') or []
+        receipts = {}
+        with self._lock:
+            self.receipt_requests.append(ids)
+            for ticket_id in ids:
+                if ticket_id not in self.tickets:
+                    continue
+                if ticket_id in self.receipt_errors:
+                    receipts[ticket_id] = {
+                        'status': 'error',
+                        'message': 'The device cannot receive push notifications anymore.',
+                        'details': {'error': 'DeviceNotRegistered'},
+                    }
+                else:
+                    receipts[ticket_id] = {'status': 'ok'}
+        return receipts
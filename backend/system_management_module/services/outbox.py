@@ -0,0 +1,297 @@
+"""
+Database-backed outbox for side effects that must not block the request.
+
+Callers record a job with ``enqueue_job`` (or ``enqueue_email``) inside the
+same transaction as the business change, so the job exists exactly when the
+change commits. Jobs are delivered by:
+
+- ``run_outbox_worker`` (management command), the durable path; and
+- an in-process flush kicked on commit, so a deployment without a running
+  worker still delivers promptly (``OUTBOX_INLINE_FLUSH``).
+
+Push delivery is two jobs: ``push.dispatch`` sends queued logs to Expo and
+then schedules ``push.check_receipts`` for when the oldest ticket is
+``RECEIPT_CHECK_DELAY`` (15 minutes) old. That job resolves the receipts,
+deactivating ``DeviceNotRegistered`` tokens, and reschedules itself while
+receipts are still pending, so neither path needs ``process_push_queue``.
+
+Both claim rows with ``SELECT ... FOR UPDATE SKIP LOCKED`` (where the database
+supports it), retry with exponential backoff and move jobs that exhaust
+``max_attempts`` to the ``dead`` status for inspection in the admin.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from system_management_module.models import OutboxJob
+
+logger = logging.getLogger(__name__)
+
+EMAIL_JOB = 'email.send'
+PUSH_DISPATCH_JOB = 'push.dispatch'
+PUSH_RECEIPTS_JOB = 'push.check_receipts'
+
+DEFAULT_MAX_ATTEMPTS = 5
+_BASE_BACKOFF_SECONDS = 30
+_MAX_BACKOFF_SECONDS = 60 * 60
+# Jobs left 'running' longer than this (crashed worker) are claimed again.
+_LOCK_TIMEOUT = timedelta(minutes=10)
+_FLUSH_DELAY_SECONDS = 0.25
+_FLUSH_MAX_WAIT_SECONDS = 10
+
+_JOB_HANDLERS = {}
+
+
+def register_job_handler(kind):
+    def decorator(func):
+        _JOB_HANDLERS[kind] = func
+        return func
+    return decorator
+
+
+def enqueue_job(kind, payload=None, *, delay=None, dedupe_key=None, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """
+    Records a job in the current transaction and schedules an in-process flush
+    for when it commits. With ``dedupe_key``, an already pending job with the
+    same key is reused instead.
+    """
+    available_at = timezone.now() + (delay or timedelta())
+    try:
+        with transaction.atomic():
+            job = OutboxJob.objects.create(
+                kind=kind,
+                payload=payload or {},
+                dedupe_key=dedupe_key,
+                max_attempts=max_attempts,
+                available_at=available_at,
+            )
+    except IntegrityError:
+        if not dedupe_key:
+            raise
+        # Pull an existing deferred job forward rather than delaying this work behind it.
+        OutboxJob.objects.filter(
+            dedupe_key=dedupe_key,
+            status='pending',
+            available_at__gt=available_at,
+        ).update(available_at=available_at, updated_at=timezone.now())
+        job = OutboxJob.objects.filter(dedupe_key=dedupe_key, status='pending').first()
+
+    if getattr(settings, 'OUTBOX_INLINE_FLUSH', True) and not delay:
+        transaction.on_commit(schedule_outbox_flush)
+    return job
+
+
+def enqueue_email(*, subject, message, from_email, recipient_list, html_message=None):
+    if not recipient_list:
+        return None
+    return enqueue_job(EMAIL_JOB, {
+        'subject': subject,
+        'message': message,
+        'from_email': from_email,
+        'recipient_list': list(recipient_list),
+        'html_message': html_message,
+    })
+
+
+def _backoff(attempts):
+    return timedelta(seconds=min(_BASE_BACKOFF_SECONDS * (2 ** max(attempts - 1, 0)), _MAX_BACKOFF_SECONDS))
+
+
+def claim_jobs(limit=50):
+    now = timezone.now()
+    ready = (
+        Q(status='pending', available_at__lte=now) |
+        Q(status='running', locked_at__lt=now - _LOCK_TIMEOUT)
+    )
+
+    with transaction.atomic():
+        jobs = list(
+            OutboxJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(ready)
+            .order_by('available_at', 'id')[:limit]
+        )
+        for job in jobs:
+            job.status = 'running'
+            job.locked_at = now
+            job.attempts += 1
+            # Release the key so new work of the same kind can be queued while this runs.
+            job.dedupe_key = None
+            job.updated_at = now
+        if jobs:
+            OutboxJob.objects.bulk_update(jobs, ['status', 'locked_at', 'attempts', 'dedupe_key', 'updated_at'])
+
+    return jobs
+
+
+def run_job(job):
+    """Runs one claimed job and records its outcome. Returns the final status."""
+    handler = _JOB_HANDLERS.get(job.kind)
+    try:
+        if handler is None:
+            raise LookupError(f'No outbox handler registered for "{job.kind}".')
+        handler(job.payload or {})
+    except Exception as exc:
+        now = timezone.now()
+        job.last_error = f'{type(exc).__name__}: {exc}'
+        job.locked_at = None
+        if handler is None or job.attempts >= job.max_attempts:
+            job.status = 'dead'
+            logger.error('Outbox job %s (%s) dead-lettered: %s', job.id, job.kind, exc)
+        else:
+            job.status = 'pending'
+            job.available_at = now + _backoff(job.attempts)
+            logger.warning('Outbox job %s (%s) failed, retrying: %s', job.id, job.kind, exc)
+        job.save(update_fields=['status', 'available_at', 'locked_at', 'last_error', 'updated_at'])
+        return job.status
+
+    job.status = 'done'
+    job.locked_at = None
+    job.completed_at = timezone.now()
+    job.last_error = None
+    job.save(update_fields=['status', 'locked_at', 'completed_at', 'last_error', 'updated_at'])
+    return job.status
+
+
+def _run_job_in_thread(job):
+    try:
+        return run_job(job)
+    finally:
+        close_old_connections()
+
+
+def process_outbox(limit=50, concurrency=1):
+    """
+    Claims up to ``limit`` due jobs and runs them with at most ``concurrency``
+    in flight. Returns a dict of outcome counts.
+    """
+    jobs = claim_jobs(limit)
+    outcomes = {'done': 0, 'pending': 0, 'dead': 0}
+    if not jobs:
+        return outcomes
+
+    if concurrency <= 1:
+        results = [run_job(job) for job in jobs]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(_run_job_in_thread, jobs))
+
+    for result in results:
+        outcomes[result] += 1
+    return outcomes
+
+
+# In-process flush: one debounced background thread per process.
+_EXECUTOR = ThreadPoolExecutor(max_workers=1)
+_flush_lock = threading.Lock()
+_flush_pending = False
+
+
+def schedule_outbox_flush():
+    global _flush_pending
+    with _flush_lock:
+        if _flush_pending:
+            return
+        _flush_pending = True
+    _EXECUTOR.submit(_flush_worker)
+
+
+def _flush_worker():
+    global _flush_pending
+    time.sleep(_FLUSH_DELAY_SECONDS)
+    with _flush_lock:
+        _flush_pending = False
+
+    close_old_connections()
+    try:
+        while True:
+            while any(process_outbox().values()):
+                pass
+
+            # Short backoffs (e.g. push retries) are awaited here; longer ones are left to the worker.
+            next_due = (
+                OutboxJob.objects
+                .filter(status='pending')
+                .order_by('available_at')
+                .values_list('available_at', flat=True)
+                .first()
+            )
+            if next_due is None:
+                break
+            wait_seconds = (next_due - timezone.now()).total_seconds()
+            if wait_seconds > _FLUSH_MAX_WAIT_SECONDS:
+                break
+            time.sleep(max(wait_seconds, 0))
+    except Exception as exc:
+        logger.exception('Outbox flush failed: %s', exc)
+    finally:
+        close_old_connections()
+
+
+@register_job_handler(EMAIL_JOB)
+def _send_email_job(payload):
+    send_mail(
+        subject=payload['subject'],
+        message=payload['message'],
+        from_email=payload.get('from_email') or settings.DEFAULT_FROM_EMAIL,
+        recipient_list=payload['recipient_list'],
+        html_message=payload.get('html_message'),
+        fail_silently=False,
+    )
+
+
+@register_job_handler(PUSH_DISPATCH_JOB)
+def _dispatch_push_job(payload):
+    from system_management_module.services.push_notifications import (
+        dispatch_queued_push_logs,
+        next_push_retry_at,
+    )
+
+    dispatched = 0
+    while True:
+        handled = dispatch_queued_push_logs()
+        if not handled:
+            break
+        dispatched += handled
+
+    retry_at = next_push_retry_at()
+    if retry_at is not None:
+        enqueue_job(
+            PUSH_DISPATCH_JOB,
+            delay=max(retry_at - timezone.now(), timedelta(seconds=1)),
+            dedupe_key=PUSH_DISPATCH_JOB,
+        )
+    if dispatched:
+        _schedule_receipt_check()
+
+
+def _schedule_receipt_check():
+    from system_management_module.services.push_notifications import RECEIPT_CHECK_DELAY, next_receipt_check_at
+
+    check_at = next_receipt_check_at()
+    if check_at is None:
+        return
+    now = timezone.now()
+    # A receipt that was due but not ready yet is asked for again a full delay later.
+    enqueue_job(
+        PUSH_RECEIPTS_JOB,
+        delay=check_at - now if check_at > now else RECEIPT_CHECK_DELAY,
+        dedupe_key=PUSH_RECEIPTS_JOB,
+    )
+
+
+@register_job_handler(PUSH_RECEIPTS_JOB)
+def _check_push_receipts_job(payload):
+    from system_management_module.services.push_notifications import RECEIPT_CHECK_LIMIT, check_push_receipts
+
+    while check_push_receipts() >= RECEIPT_CHECK_LIMIT:
+        pass
+    _schedule_receipt_check()
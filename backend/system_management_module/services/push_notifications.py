@@ -1,27 +1,39 @@
 import logging
+import threading
 import time
-from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 
 import requests
+from requests.adapters import HTTPAdapter
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import close_old_connections
+from django.db import transaction
+from django.db.models import Q, QuerySet
+from django.utils import timezone
 
 from system_management_module.models import PushDeviceToken, PushNotificationDeliveryLog
+from system_management_module.services.outbox import PUSH_DISPATCH_JOB, enqueue_job
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
-# Expo Push API endpoint.
-EXPO_PUSH_URL = "https://exp.host/--/api/v2/push/send"
-EXPO_RECEIPTS_URL = "https://exp.host/--/api/v2/push/getReceipts"
+# Expo Push API. The base URL is overridable so tests can target a local fake server.
+DEFAULT_EXPO_API_BASE_URL = "https://exp.host/--/api/v2"
+EXPO_PUSH_CHUNK_SIZE = 100
+EXPO_RECEIPT_CHUNK_SIZE = 1000
 MAX_RETRIES = 3
 _BASE_BACKOFF_SECONDS = 1
-_RECEIPT_MAX_POLLS = 4
-_RECEIPT_POLL_DELAY_SECONDS = 2
+_REQUEST_TIMEOUT_SECONDS = 10
 
-# Lightweight background worker pool to avoid blocking request-response cycle.
-_EXECUTOR = ThreadPoolExecutor(max_workers=4)
+# Expo keeps receipts for ~24h and recommends checking them ~15 minutes after sending.
+RECEIPT_CHECK_DELAY = timedelta(minutes=15)
+RECEIPT_EXPIRY = timedelta(hours=24)
+RECEIPT_CHECK_LIMIT = 5000
+# Logs stuck in 'sending' longer than this (worker crash) are picked up again.
+_SENDING_STALE_AFTER = timedelta(minutes=5)
+
+_DISPATCHABLE_STATUSES = ('queued', 'retrying')
+_LOG_INSERT_BATCH_SIZE = 1000
 
 
 def _expo_headers():
@@ -38,125 +50,128 @@ def _expo_headers():
     return headers
 
 
-def _normalize_expo_item(response_json):
-    if isinstance(response_json, dict):
-        data = response_json.get('data')
-        if isinstance(data, list):
-            return data[0] if data else {}
-        if isinstance(data, dict):
-            return data
-    return {}
+class PushPipelineMetrics:
+    """Thread-safe counters describing push throughput since process start."""
+
+    _COUNTERS = (
+        'messages_sent',
+        'send_requests',
+        'send_request_failures',
+        'tickets_ok',
+        'tickets_error',
+        'receipts_checked',
+        'receipt_requests',
+        'receipts_ok',
+        'receipts_error',
+        'tokens_deactivated',
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._values = {name: 0 for name in self._COUNTERS}
+            self._send_seconds = 0.0
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self._values[name] += amount
+
+    def add_send_time(self, seconds):
+        with self._lock:
+            self._send_seconds += seconds
+
+    def snapshot(self):
+        with self._lock:
+            values = dict(self._values)
+            send_seconds = self._send_seconds
+
+        values['send_seconds'] = round(send_seconds, 3)
+        values['messages_per_second'] = (
+            round(values['messages_sent'] / send_seconds, 2) if send_seconds else 0.0
+        )
+        values['messages_per_request'] = (
+            round(values['messages_sent'] / values['send_requests'], 2) if values['send_requests'] else 0.0
+        )
+        return values
 
 
-def _poll_receipt_status(ticket_id):
-    if not ticket_id:
-        return None, None
+_metrics = PushPipelineMetrics()
 
-    final_status = None
-    final_payload = None
-    for _ in range(_RECEIPT_MAX_POLLS):
-        try:
-            response = requests.post(
-                EXPO_RECEIPTS_URL,
-                json={'ids': [ticket_id]},
-                headers=_expo_headers(),
-                timeout=10,
-            )
-            response.raise_for_status()
-            response_json = response.json()
-            receipt = (response_json.get('data') or {}).get(ticket_id) if isinstance(response_json, dict) else None
-            if not isinstance(receipt, dict):
-                time.sleep(_RECEIPT_POLL_DELAY_SECONDS)
-                continue
 
-            final_payload = response_json
-            receipt_status = receipt.get('status')
-            if receipt_status in ('ok', 'error'):
-                final_status = receipt_status
-                break
-        except requests.RequestException as exc:
-            logger.warning('Receipt polling failed for ticket %s: %s', ticket_id, exc)
+def get_push_metrics():
+    return _metrics.snapshot()
 
-        time.sleep(_RECEIPT_POLL_DELAY_SECONDS)
 
-    return final_status, final_payload
+def reset_push_metrics():
+    _metrics.reset()
 
 
-def send_push_to_user(user, title, body, data=None, event_key=None):
-    if not user:
-        return 0
+class ExpoPushClient:
+    """Thin Expo Push API client sharing one pooled HTTP session."""
 
-    if not getattr(user, 'push_enabled', True):
-        return 0
+    def __init__(self, base_url=None, session=None, timeout=_REQUEST_TIMEOUT_SECONDS):
+        self.base_url = (base_url or DEFAULT_EXPO_API_BASE_URL).rstrip('/')
+        self.timeout = timeout
+        self.session = session or self._build_session()
 
-    tokens = PushDeviceToken.objects.filter(user=user, is_active=True)
-    if not tokens.exists():
-        return 0
+    @staticmethod
+    def _build_session():
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
 
-    queued = 0
-    for token_obj in tokens:
-        if event_key:
-            existing = PushNotificationDeliveryLog.objects.filter(
-                device_token=token_obj,
-                event_key=event_key,
-            ).exclude(status='failed').exists()
-            if existing:
-                continue
+    def _post(self, path, payload):
+        response = self.session.post(
+            f'{self.base_url}{path}',
+            json=payload,
+            headers=_expo_headers(),
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response.json()
 
-        try:
-            log = PushNotificationDeliveryLog.objects.create(
-                user=user,
-                device_token=token_obj,
-                event_key=event_key,
-                title=title,
-                body=body,
-                data=data or {},
-                status='queued',
-            )
-            _EXECUTOR.submit(_deliver_log_with_retry, log.id)
-            queued += 1
-        except Exception as exc:
-            logger.exception('Failed to enqueue push delivery for user=%s token_id=%s: %s', user.id, token_obj.id, exc)
-
-    return queued
+    def send(self, messages):
+        """Sends up to EXPO_PUSH_CHUNK_SIZE messages; returns one ticket per message, in order."""
+        response_json = self._post('/push/send', messages)
+        data = response_json.get('data') if isinstance(response_json, dict) else None
+        if isinstance(data, dict):
+            data = [data]
+        return data if isinstance(data, list) else []
 
+    def get_receipts(self, ticket_ids):
+        """Fetches receipts for up to EXPO_RECEIPT_CHUNK_SIZE ticket IDs."""
+        response_json = self._post('/push/getReceipts', {'ids': list(ticket_ids)})
+        data = response_json.get('data') if isinstance(response_json, dict) else None
+        return data if isinstance(data, dict) else {}
 
-def send_push_to_users(users, title, body, data=None, event_key=None):
-    queued = 0
-    for user in users:
-        user_event_key = f"{event_key}:{user.id}" if event_key else None
-        queued += send_push_to_user(
-            user=user,
-            title=title,
-            body=body,
-            data=data,
-            event_key=user_event_key,
-        )
-    return queued
 
+_clients = {}
+_clients_lock = threading.Lock()
 
-def deactivate_push_token(expo_push_token):
-    PushDeviceToken.objects.filter(expo_push_token=expo_push_token).update(is_active=False)
 
+def get_expo_client():
+    base_url = getattr(settings, 'EXPO_API_BASE_URL', '') or DEFAULT_EXPO_API_BASE_URL
+    with _clients_lock:
+        client = _clients.get(base_url)
+        if client is None:
+            client = ExpoPushClient(base_url=base_url)
+            _clients[base_url] = client
+    return client
 
-def _deliver_log_with_retry(log_id):
-    # Ensure thread-safe DB connection handling in worker threads.
-    close_old_connections()
 
-    try:
-        log = PushNotificationDeliveryLog.objects.select_related('device_token').get(id=log_id)
-    except PushNotificationDeliveryLog.DoesNotExist:
-        return
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
 
-    token_obj = log.device_token
-    if not token_obj or not token_obj.is_active:
-        log.status = 'dropped'
-        log.error_message = 'Device token missing or inactive.'
-        log.save(update_fields=['status', 'error_message', 'updated_at'])
-        return
 
-    payload = {
-        'to': token_obj.expo_push_token,
+def _build_expo_message(log):
+    return {
+        'to': log.device_token.expo_push_token,
         'title': log.title,
         'body': log.body,
         'data': log.data or {},
@@ -165,106 +180,342 @@ def _deliver_log_with_retry(log_id):
         'channelId': 'default',
     }
 
-    for attempt in range(1, MAX_RETRIES + 1):
+
+def _schedule_retry_or_fail(log, error_message, now):
+    log.error_message = error_message
+    if log.attempts >= MAX_RETRIES:
+        log.status = 'failed'
+        log.next_attempt_at = None
+        return
+
+    log.status = 'retrying'
+    log.next_attempt_at = now + timedelta(seconds=_BASE_BACKOFF_SECONDS * (2 ** (log.attempts - 1)))
+
+
+def _claim_dispatchable_logs(limit):
+    now = timezone.now()
+    ready = (
+        Q(status__in=_DISPATCHABLE_STATUSES) & (Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now))
+    ) | Q(status='sending', updated_at__lt=now - _SENDING_STALE_AFTER)
+
+    with transaction.atomic():
+        ids = list(
+            PushNotificationDeliveryLog.objects
+            .select_for_update(skip_locked=True)
+            .filter(ready)
+            .order_by('id')
+            .values_list('id', flat=True)[:limit]
+        )
+        if ids:
+            PushNotificationDeliveryLog.objects.filter(id__in=ids).update(status='sending', updated_at=now)
+
+    return list(
+        PushNotificationDeliveryLog.objects
+        .filter(id__in=ids)
+        .select_related('device_token')
+        .order_by('id')
+    )
+
+
+_LOG_UPDATE_FIELDS = [
+    'status', 'attempts', 'expo_ticket_id', 'receipt_status', 'next_attempt_at',
+    'sent_at', 'error_message', 'response_payload', 'updated_at',
+]
+
+
+def dispatch_queued_push_logs(limit=1000, client=None):
+    """
+    Sends every due queued/retrying log to Expo in chunks of up to 100 messages.
+
+    Rows are claimed with SELECT ... FOR UPDATE SKIP LOCKED (where supported)
+    so concurrent dispatchers never send the same log twice. Receipts are not
+    polled here; see ``check_push_receipts``. Returns the number of logs handled.
+    """
+    logs = _claim_dispatchable_logs(limit)
+    if not logs:
+        return 0
+
+    client = client or get_expo_client()
+    now = timezone.now()
+    deliverable = []
+    dead_token_ids = set()
+
+    for log in logs:
+        log.updated_at = now
+        token_obj = log.device_token
+        if not token_obj or not token_obj.is_active:
+            log.status = 'dropped'
+            log.next_attempt_at = None
+            log.error_message = 'Device token missing or inactive.'
+        else:
+            deliverable.append(log)
+
+    for chunk in _chunks(deliverable, EXPO_PUSH_CHUNK_SIZE):
+        for log in chunk:
+            log.attempts += 1
+
+        started = time.perf_counter()
         try:
-            log.attempts = attempt
-            log.status = 'retrying' if attempt > 1 else 'queued'
-            log.save(update_fields=['attempts', 'status', 'updated_at'])
-
-            response = requests.post(
-                EXPO_PUSH_URL,
-                json=payload,
-                headers=_expo_headers(),
-                timeout=10,
-            )
-            response.raise_for_status()
-            response_json = response.json()
-
-            ticket = _normalize_expo_item(response_json)
-            ticket_status = ticket.get('status')
-
-            if ticket_status == 'ok':
-                ticket_id = ticket.get('id')
+            tickets = client.send([_build_expo_message(log) for log in chunk])
+        except (requests.RequestException, ValueError) as exc:
+            _metrics.incr('send_request_failures')
+            logger.warning('Expo push request for %s message(s) failed: %s', len(chunk), exc)
+            for log in chunk:
+                _schedule_retry_or_fail(log, str(exc), now)
+            continue
+        finally:
+            _metrics.incr('send_requests')
+            _metrics.add_send_time(time.perf_counter() - started)
+
+        if len(tickets) != len(chunk):
+            for log in chunk:
+                _schedule_retry_or_fail(log, 'Expo returned an unexpected number of tickets.', now)
+            continue
+
+        _metrics.incr('messages_sent', len(chunk))
+        for log, ticket in zip(chunk, tickets):
+            ticket = ticket if isinstance(ticket, dict) else {}
+            log.response_payload = {'ticket': ticket}
+
+            if ticket.get('status') == 'ok':
+                _metrics.incr('tickets_ok')
                 log.status = 'sent'
-                log.expo_ticket_id = ticket_id
-                log.response_payload = response_json
+                log.expo_ticket_id = ticket.get('id')
+                log.receipt_status = 'pending' if ticket.get('id') else None
+                log.sent_at = now
+                log.next_attempt_at = None
                 log.error_message = None
-                log.save(update_fields=['status', 'expo_ticket_id', 'response_payload', 'error_message', 'updated_at'])
-
-                receipt_status, receipt_payload = _poll_receipt_status(ticket_id)
-                if receipt_status == 'ok':
-                    log.response_payload = {
-                        'ticket': response_json,
-                        'receipt': receipt_payload,
-                    }
-                    log.error_message = None
-                    log.save(update_fields=['response_payload', 'error_message', 'updated_at'])
-                    return
-
-                if receipt_status == 'error':
-                    receipt = (receipt_payload.get('data') or {}).get(ticket_id, {}) if isinstance(receipt_payload, dict) else {}
-                    details = receipt.get('details') or {}
-                    if details.get('error') == 'DeviceNotRegistered':
-                        token_obj.is_active = False
-                        token_obj.save(update_fields=['is_active', 'updated_at'])
-                        log.status = 'dropped'
-                        log.error_message = 'Device not registered. Token deactivated (from receipt).'
-                    else:
-                        log.status = 'failed'
-                        log.error_message = receipt.get('message') or 'Expo receipt reported delivery error.'
-
-                    log.response_payload = {
-                        'ticket': response_json,
-                        'receipt': receipt_payload,
-                    }
-                    log.save(update_fields=['status', 'error_message', 'response_payload', 'updated_at'])
-                    return
-
-                # Receipt was not ready within polling window.
-                log.response_payload = {
-                    'ticket': response_json,
-                    'receipt': {'status': 'pending'},
-                }
-                log.error_message = 'Ticket accepted; receipt still pending after polling window.'
-                log.save(update_fields=['response_payload', 'error_message', 'updated_at'])
-                return
-
-            # Expo responded, but ticket has an error.
-            details = ticket.get('details') or {}
-            ticket_error = ticket.get('message') or 'Unknown Expo ticket error'
+                continue
 
+            _metrics.incr('tickets_error')
+            details = ticket.get('details') or {}
             if details.get('error') == 'DeviceNotRegistered':
-                token_obj.is_active = False
-                token_obj.save(update_fields=['is_active', 'updated_at'])
+                dead_token_ids.add(log.device_token_id)
                 log.status = 'dropped'
+                log.next_attempt_at = None
                 log.error_message = 'Device not registered. Token deactivated.'
-                log.response_payload = response_json
-                log.save(update_fields=['status', 'error_message', 'response_payload', 'updated_at'])
-                return
+                continue
 
-            if attempt >= MAX_RETRIES:
-                log.status = 'failed'
-                log.error_message = str(ticket_error)
-                log.response_payload = response_json
-                log.save(update_fields=['status', 'error_message', 'response_payload', 'updated_at'])
-                return
-
-        except requests.RequestException as exc:
-            logger.warning('Push delivery attempt %s failed for log %s: %s', attempt, log.id, exc)
-            if attempt >= MAX_RETRIES:
+            _schedule_retry_or_fail(log, str(ticket.get('message') or 'Unknown Expo ticket error'), now)
+
+    PushNotificationDeliveryLog.objects.bulk_update(logs, _LOG_UPDATE_FIELDS)
+    _deactivate_tokens(dead_token_ids)
+    return len(logs)
+
+
+def check_push_receipts(min_age=RECEIPT_CHECK_DELAY, limit=RECEIPT_CHECK_LIMIT, client=None):
+    """
+    Resolves pending Expo receipts in batches of up to 1000 ticket IDs.
+
+    Only tickets older than ``min_age`` are checked, so receipts are fetched
+    once Expo has had time to hand them to APNs/FCM. Returns the number of logs
+    whose receipt was resolved.
+    """
+    now = timezone.now()
+    logs = list(
+        PushNotificationDeliveryLog.objects
+        .filter(
+            receipt_status='pending',
+            expo_ticket_id__isnull=False,
+            sent_at__lte=now - min_age,
+        )
+        .order_by('sent_at', 'id')[:limit]
+    )
+    if not logs:
+        return 0
+
+    client = client or get_expo_client()
+    resolved = []
+    dead_token_ids = set()
+
+    for chunk in _chunks(logs, EXPO_RECEIPT_CHUNK_SIZE):
+        try:
+            receipts = client.get_receipts([log.expo_ticket_id for log in chunk])
+        except (requests.RequestException, ValueError) as exc:
+            logger.warning('Expo receipt request for %s ticket(s) failed: %s', len(chunk), exc)
+            continue
+        finally:
+            _metrics.incr('receipt_requests')
+
+        for log in chunk:
+            receipt = receipts.get(log.expo_ticket_id)
+            if not isinstance(receipt, dict):
+                if log.sent_at and log.sent_at <= now - RECEIPT_EXPIRY:
+                    log.receipt_status = 'expired'
+                    resolved.append(log)
+                continue
+
+            _metrics.incr('receipts_checked')
+            payload = dict(log.response_payload or {})
+            payload['receipt'] = receipt
+            log.response_payload = payload
+
+            if receipt.get('status') == 'ok':
+                _metrics.incr('receipts_ok')
+                log.receipt_status = 'ok'
+                resolved.append(log)
+                continue
+
+            _metrics.incr('receipts_error')
+            log.receipt_status = 'error'
+            details = receipt.get('details') or {}
+            if details.get('error') == 'DeviceNotRegistered':
+                dead_token_ids.add(log.device_token_id)
+                log.status = 'dropped'
+                log.error_message = 'Device not registered. Token deactivated (from receipt).'
+            else:
                 log.status = 'failed'
-                log.error_message = str(exc)
-                log.save(update_fields=['status', 'error_message', 'updated_at'])
-                return
-        except Exception as exc:
-            logger.exception('Unexpected push delivery error for log %s: %s', log.id, exc)
-            log.status = 'failed'
-            log.error_message = str(exc)
-            log.save(update_fields=['status', 'error_message', 'updated_at'])
-            return
-
-        backoff = _BASE_BACKOFF_SECONDS * (2 ** (attempt - 1))
-        time.sleep(backoff)
+                log.error_message = receipt.get('message') or 'Expo receipt reported delivery error.'
+            resolved.append(log)
+
+    if resolved:
+        for log in resolved:
+            log.updated_at = now
+        PushNotificationDeliveryLog.objects.bulk_update(
+            resolved,
+            ['status', 'receipt_status', 'error_message', 'response_payload', 'updated_at'],
+        )
+    _deactivate_tokens(dead_token_ids)
+    return len(resolved)
+
+
+def _deactivate_tokens(token_ids):
+    token_ids = {token_id for token_id in token_ids if token_id}
+    if not token_ids:
+        return
+    updated = PushDeviceToken.objects.filter(id__in=token_ids, is_active=True).update(
+        is_active=False,
+        updated_at=timezone.now(),
+    )
+    _metrics.incr('tokens_deactivated', updated)
+
+
+def next_receipt_check_at():
+    """When the oldest pending receipt becomes old enough to check, or ``None``."""
+    oldest_sent_at = (
+        PushNotificationDeliveryLog.objects
+        .filter(receipt_status='pending', expo_ticket_id__isnull=False, sent_at__isnull=False)
+        .order_by('sent_at')
+        .values_list('sent_at', flat=True)
+        .first()
+    )
+    return oldest_sent_at + RECEIPT_CHECK_DELAY if oldest_sent_at else None
+
+
+def next_push_retry_at():
+    """Earliest ``next_attempt_at`` among logs waiting for a retry, or ``None``."""
+    return (
+        PushNotificationDeliveryLog.objects
+        .filter(status='retrying', next_attempt_at__isnull=False)
+        .order_by('next_attempt_at')
+        .values_list('next_attempt_at', flat=True)
+        .first()
+    )
+
+
+def _user_ids(users):
+    if isinstance(users, QuerySet):
+        return users.values('id')
+    return [getattr(user, 'id', user) for user in users if user]
+
+
+def _enqueue_push_logs(token_rows, title, body, data, event_key_for_user):
+    """
+    Queues one log per ``(token_id, user_id)`` row, skipping tokens that already
+    have a non-failed log for the same event key, with one dedup SELECT and
+    batched INSERTs.
+
+    Returns the number of logs attempted: those that passed the dedup read. A
+    concurrent call that queues the same token and event between that read
+    and the INSERT wins the unique constraint. That log is then skipped but
+    still counted here, so the value can be higher than the rows this call
+    inserted. Either way each token is queued once for the event.
+    """
+    if not token_rows:
+        return 0
+
+    keyed_rows = [(token_id, user_id, event_key_for_user(user_id)) for token_id, user_id in token_rows]
+    event_keys = {event_key for _, _, event_key in keyed_rows if event_key}
+    already_logged = set()
+    if event_keys:
+        already_logged = set(
+            PushNotificationDeliveryLog.objects
+            .filter(event_key__in=event_keys, device_token__isnull=False)
+            .exclude(status='failed')
+            .values_list('device_token_id', 'event_key')
+        )
+
+    payload = data or {}
+    logs = [
+        PushNotificationDeliveryLog(
+            user_id=user_id,
+            device_token_id=token_id,
+            event_key=event_key,
+            title=title,
+            body=body,
+            data=payload,
+            status='queued',
+        )
+        for token_id, user_id, event_key in keyed_rows
+        if not event_key or (token_id, event_key) not in already_logged
+    ]
+    if not logs:
+        return 0
+
+    # ignore_conflicts covers a concurrent enqueue of the same event racing past the dedup read.
+    PushNotificationDeliveryLog.objects.bulk_create(
+        logs,
+        batch_size=_LOG_INSERT_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    # One pending dispatch job drains every queued log in Expo-sized batches.
+    enqueue_job(PUSH_DISPATCH_JOB, dedupe_key=PUSH_DISPATCH_JOB)
+    return len(logs)
+
+
+def send_push_to_user(user, title, body, data=None, event_key=None):
+    if not user:
+        return 0
+
+    if not getattr(user, 'push_enabled', True):
+        return 0
+
+    token_rows = list(
+        PushDeviceToken.objects
+        .filter(user=user, is_active=True)
+        .values_list('id', 'user_id')
+    )
+    return _enqueue_push_logs(token_rows, title, body, data, lambda user_id: event_key)
+
+
+def send_push_to_users(users, title, body, data=None, event_key=None):
+    """
+    Fans one notification out to many users (model instances, ids or a user
+    queryset). Every user gets the event key ``"<event_key>:<user id>"``.
+
+    Active tokens are resolved in one query and deduplicated in another, so the
+    query count does not grow with the number of recipients.
+    """
+    user_ids = _user_ids(users)
+    if not isinstance(user_ids, QuerySet) and not user_ids:
+        return 0
+
+    token_rows = list(
+        PushDeviceToken.objects
+        .filter(user_id__in=user_ids, is_active=True, user__push_enabled=True)
+        .values_list('id', 'user_id')
+    )
+    return _enqueue_push_logs(
+        token_rows,
+        title,
+        body,
+        data,
+        lambda user_id: f"{event_key}:{user_id}" if event_key else None,
+    )
+
+
+def deactivate_push_token(expo_push_token):
+    PushDeviceToken.objects.filter(expo_push_token=expo_push_token).update(is_active=False)
 
 
 def build_alert_push_data(alert_type, related_model=None, related_object_id=None, extra=None):
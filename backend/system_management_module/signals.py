@@ -1,19 +1,25 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from .models import SystemAlert
+from .services.alert_events import publish_alert_created, publish_alert_unread_count
 from .services.push_notifications import send_push_to_user, build_alert_push_data
 from .services.email_preferences import send_preference_aware_email
+from .services.catalog_cache import connect_catalog_signals
 
 try:
     from payment.models import Booking
 except ImportError:
     from accommodation_booking.models import Booking
 
+from communication.conversations import get_unread_count
 from communication.models import Message 
 
 
+connect_catalog_signals()
+
+
 def _display_name_for_user(user):
     try:
         agency_profile = user.agency_profile
@@ -45,6 +51,20 @@ def _format_booking_dates(check_in, check_out):
 
     return f"{check_in.strftime('%B %d, %Y')} to {check_out.strftime('%B %d, %Y')}"
 
+@receiver(post_save, sender=SystemAlert)
+def stream_alert_change(sender, instance, created, **kwargs):
+    if created:
+        publish_alert_created(instance)
+    if instance.recipient_id:
+        publish_alert_unread_count(instance.recipient_id)
+
+
+@receiver(post_delete, sender=SystemAlert)
+def stream_alert_removal(sender, instance, **kwargs):
+    if instance.recipient_id and not instance.is_read:
+        publish_alert_unread_count(instance.recipient_id)
+
+
 @receiver(post_save, sender=Message)
 def create_alert_for_new_message(sender, instance, created, **kwargs):
    
@@ -53,11 +73,7 @@ def create_alert_for_new_message(sender, instance, created, **kwargs):
         receiver_role = 'Guide' if getattr(receiver, 'is_local_guide', False) else 'Tourist'
 
         sender_name = _display_name_for_user(instance.sender)
-        unread_from_sender = Message.objects.filter(
-            sender=instance.sender,
-            receiver=receiver,
-            is_read=False,
-        ).count()
+        unread_from_sender = get_unread_count(receiver.id, instance.sender_id)
 
         if unread_from_sender > 1:
             alert_message = f"You have {unread_from_sender} new messages from {sender_name}"
@@ -73,11 +89,16 @@ def create_alert_for_new_message(sender, instance, created, **kwargs):
             is_read=False,
         ).order_by('-created_at')[:50]
 
+        candidate_alerts = [alert for alert in candidate_alerts if alert.related_object_id]
+        same_sender_message_ids = set(
+            Message.objects.filter(
+                pk__in=[alert.related_object_id for alert in candidate_alerts],
+                sender_id=instance.sender_id,
+            ).values_list('id', flat=True)
+        )
+
         for alert in candidate_alerts:
-            if not alert.related_object_id:
-                continue
-            related_message = Message.objects.filter(pk=alert.related_object_id).only('sender_id').first()
-            if related_message and related_message.sender_id == instance.sender_id:
+            if alert.related_object_id in same_sender_message_ids:
                 existing_alert = alert
                 break
 
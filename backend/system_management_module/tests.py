@@ -1,16 +1,27 @@
+import json
+import time
 from datetime import date, timedelta
 from decimal import Decimal
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core import mail
+from django.core.cache import caches
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.http import http_date
 from rest_framework.test import APIClient
 
 from accommodation_booking.models import Booking
+from backend.realtime import BaseEventBroker, get_broker, set_broker
 from agency_management_module.models import Agency
 from communication.models import Message
-from destinations_and_attractions.models import Destination
-from .models import GuideReviewRequest, PushDeviceToken, SystemAlert
+from destinations_and_attractions.models import Destination, DestinationImage
+from .models import CatalogVersion, GuideReviewRequest, OutboxJob, PushDeviceToken, PushNotificationDeliveryLog, SystemAlert
+from .services import catalog_cache, outbox, push_notifications
+from .services.email_preferences import send_preference_aware_email
+from .services.fake_expo import FakeExpoServer
 from .serializers import PushTokenRegisterSerializer
 
 User = get_user_model()
@@ -217,3 +228,466 @@ class AdminPartnerRankingsApiTests(TestCase):
 		response = self.client.get(reverse("admin-partner-rankings"), {"timeframe": "Quarterly"})
 		self.assertEqual(response.status_code, 400)
 		self.assertIn("timeframe", response.json())
+
+
+class RecordingEventBroker(BaseEventBroker):
+	def __init__(self):
+		self.published = []
+
+	def publish(self, channel, message):
+		self.published.append((channel, json.loads(message)))
+
+
+class AlertRealtimeEventTests(TestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(username="alert_socket_user", password="Pass12345")
+		self.previous_broker = get_broker()
+		self.broker = RecordingEventBroker()
+		set_broker(self.broker)
+
+	def tearDown(self):
+		set_broker(self.previous_broker)
+
+	def test_alert_creation_publishes_alert_and_unread_count(self):
+		with self.captureOnCommitCallbacks(execute=True):
+			alert = SystemAlert.objects.create(
+				target_type="Tourist",
+				recipient=self.user,
+				title="Heads up",
+				message="Something happened",
+			)
+
+		channel = f"user:{self.user.id}"
+		self.assertIn((channel, "alert.created"), [(c, event["type"]) for c, event in self.broker.published])
+		self.assertIn(
+			(channel, {"type": "alert.unread_count", "data": {"unread_count": 1}}),
+			self.broker.published,
+		)
+		created = next(event for _, event in self.broker.published if event["type"] == "alert.created")
+		self.assertEqual(created["data"]["id"], alert.id)
+
+	def test_broadcast_alert_is_published_to_role_channel(self):
+		with self.captureOnCommitCallbacks(execute=True):
+			SystemAlert.objects.create(target_type="Guide", title="Guides", message="Broadcast")
+
+		self.assertEqual([channel for channel, _ in self.broker.published], ["role:Guide"])
+
+	def test_mark_all_read_publishes_zero_unread(self):
+		SystemAlert.objects.create(target_type="Tourist", recipient=self.user, title="One", message="Unread")
+		self.broker.published.clear()
+
+		client = APIClient()
+		client.force_authenticate(user=self.user)
+		with self.captureOnCommitCallbacks(execute=True):
+			client.post(reverse("user-alert-mark-all-read"))
+
+		self.assertEqual(
+			self.broker.published,
+			[(f"user:{self.user.id}", {"type": "alert.unread_count", "data": {"unread_count": 0}})],
+		)
+
+
+class BatchedPushPipelineTests(TestCase):
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		cls.expo = FakeExpoServer().start()
+		cls.settings_override = override_settings(EXPO_API_BASE_URL=cls.expo.base_url)
+		cls.settings_override.enable()
+
+	@classmethod
+	def tearDownClass(cls):
+		cls.settings_override.disable()
+		cls.expo.stop()
+		super().tearDownClass()
+
+	def setUp(self):
+		self.expo.send_requests.clear()
+		self.expo.receipt_requests.clear()
+		self.expo.unregistered_tokens.clear()
+		self.expo.receipt_errors.clear()
+		self.expo.fail_next_requests = 0
+		push_notifications.reset_push_metrics()
+		self.user = User.objects.create_user(username="push_batch_user", password="Pass12345")
+
+	def _queue_logs(self, count):
+		tokens = PushDeviceToken.objects.bulk_create([
+			PushDeviceToken(user=self.user, expo_push_token=f"ExponentPushToken[batch-{index}]")
+			for index in range(count)
+		])
+		return PushNotificationDeliveryLog.objects.bulk_create([
+			PushNotificationDeliveryLog(user=self.user, device_token=token, title="Hi", body="Batch", status="queued")
+			for token in tokens
+		])
+
+	def test_dispatch_sends_chunks_of_one_hundred(self):
+		self._queue_logs(250)
+
+		handled = push_notifications.dispatch_queued_push_logs()
+
+		self.assertEqual(handled, 250)
+		self.assertEqual([len(batch) for batch in self.expo.send_requests], [100, 100, 50])
+		self.assertEqual(PushNotificationDeliveryLog.objects.filter(status="sent", receipt_status="pending").count(), 250)
+		self.assertFalse(PushNotificationDeliveryLog.objects.filter(expo_ticket_id__isnull=True).exists())
+		metrics = push_notifications.get_push_metrics()
+		self.assertEqual(metrics["messages_sent"], 250)
+		self.assertEqual(metrics["send_requests"], 3)
+		self.assertEqual(push_notifications.dispatch_queued_push_logs(), 0)
+
+	def test_device_not_registered_ticket_drops_log_and_deactivates_token(self):
+		dead, alive = self._queue_logs(2)
+		self.expo.unregistered_tokens.add(dead.device_token.expo_push_token)
+
+		push_notifications.dispatch_queued_push_logs()
+
+		dead.refresh_from_db()
+		alive.refresh_from_db()
+		self.assertEqual(dead.status, "dropped")
+		self.assertFalse(PushDeviceToken.objects.get(id=dead.device_token_id).is_active)
+		self.assertEqual(alive.status, "sent")
+
+	def test_failed_request_is_retried_with_backoff_then_failed(self):
+		(log,) = self._queue_logs(1)
+		self.expo.fail_next_requests = push_notifications.MAX_RETRIES
+
+		push_notifications.dispatch_queued_push_logs()
+		log.refresh_from_db()
+		self.assertEqual((log.status, log.attempts), ("retrying", 1))
+		self.assertGreater(log.next_attempt_at, timezone.now())
+		self.assertEqual(push_notifications.dispatch_queued_push_logs(), 0)
+
+		for expected_attempts in range(2, push_notifications.MAX_RETRIES + 1):
+			PushNotificationDeliveryLog.objects.filter(id=log.id).update(next_attempt_at=timezone.now())
+			push_notifications.dispatch_queued_push_logs()
+
+		log.refresh_from_db()
+		self.assertEqual((log.status, log.attempts), ("failed", push_notifications.MAX_RETRIES))
+		self.assertEqual(len(self.expo.send_requests), 0)
+
+	def test_receipts_are_checked_in_one_batch_after_delay(self):
+		logs = self._queue_logs(3)
+		push_notifications.dispatch_queued_push_logs()
+
+		self.assertEqual(push_notifications.check_push_receipts(), 0)
+		self.assertEqual(self.expo.receipt_requests, [])
+
+		PushNotificationDeliveryLog.objects.update(sent_at=timezone.now() - timedelta(minutes=20))
+		bad = PushNotificationDeliveryLog.objects.get(id=logs[0].id)
+		self.expo.receipt_errors.add(bad.expo_ticket_id)
+
+		self.assertEqual(push_notifications.check_push_receipts(), 3)
+		self.assertEqual(len(self.expo.receipt_requests), 1)
+		self.assertEqual(len(self.expo.receipt_requests[0]), 3)
+
+		bad.refresh_from_db()
+		self.assertEqual((bad.status, bad.receipt_status), ("dropped", "error"))
+		self.assertFalse(PushDeviceToken.objects.get(id=bad.device_token_id).is_active)
+		self.assertEqual(PushNotificationDeliveryLog.objects.filter(status="sent", receipt_status="ok").count(), 2)
+
+	def test_send_push_to_user_only_enqueues_one_dispatch_job(self):
+		PushDeviceToken.objects.create(user=self.user, expo_push_token="ExponentPushToken[enqueue]")
+
+		with self.captureOnCommitCallbacks(execute=False) as callbacks:
+			queued = push_notifications.send_push_to_user(self.user, "Hi", "Queued", event_key="evt:1")
+			push_notifications.send_push_to_user(self.user, "Hi again", "Queued", event_key="evt:2")
+
+		self.assertEqual(queued, 1)
+		self.assertIn(outbox.schedule_outbox_flush, callbacks)
+		self.assertEqual(PushNotificationDeliveryLog.objects.filter(status="queued").count(), 2)
+		self.assertEqual(OutboxJob.objects.filter(kind=outbox.PUSH_DISPATCH_JOB, status="pending").count(), 1)
+		self.assertEqual(self.expo.send_requests, [])
+
+		outbox.process_outbox()
+
+		self.assertEqual([len(batch) for batch in self.expo.send_requests], [2])
+		self.assertEqual(PushNotificationDeliveryLog.objects.filter(status="sent").count(), 2)
+
+	def test_outbox_checks_receipts_after_dispatch(self):
+		dead, alive = self._queue_logs(2)
+		outbox.enqueue_job(outbox.PUSH_DISPATCH_JOB, dedupe_key=outbox.PUSH_DISPATCH_JOB)
+
+		outbox.process_outbox()
+
+		job = OutboxJob.objects.get(kind=outbox.PUSH_RECEIPTS_JOB, status="pending")
+		self.assertGreater(job.available_at, timezone.now() + timedelta(minutes=14))
+		self.assertEqual(self.expo.receipt_requests, [])
+
+		PushNotificationDeliveryLog.objects.update(sent_at=timezone.now() - timedelta(minutes=20))
+		OutboxJob.objects.filter(id=job.id).update(available_at=timezone.now())
+		self.expo.receipt_errors.add(PushNotificationDeliveryLog.objects.get(id=dead.id).expo_ticket_id)
+
+		self.assertEqual(outbox.process_outbox(), {"done": 1, "pending": 0, "dead": 0})
+
+		dead.refresh_from_db()
+		alive.refresh_from_db()
+		self.assertEqual((dead.status, dead.receipt_status), ("dropped", "error"))
+		self.assertFalse(PushDeviceToken.objects.get(id=dead.device_token_id).is_active)
+		self.assertEqual(alive.receipt_status, "ok")
+		self.assertFalse(OutboxJob.objects.filter(kind=outbox.PUSH_RECEIPTS_JOB, status="pending").exists())
+
+	def test_receipt_check_reschedules_while_receipts_are_pending(self):
+		self._queue_logs(1)
+		push_notifications.dispatch_queued_push_logs()
+		outbox.enqueue_job(outbox.PUSH_RECEIPTS_JOB, dedupe_key=outbox.PUSH_RECEIPTS_JOB)
+
+		outbox.process_outbox()
+
+		self.assertEqual(self.expo.receipt_requests, [])
+		job = OutboxJob.objects.get(kind=outbox.PUSH_RECEIPTS_JOB, status="pending")
+		self.assertGreater(job.available_at, timezone.now() + timedelta(minutes=14))
+
+	def test_push_metrics_endpoint_is_admin_only(self):
+		self._queue_logs(2)
+		push_notifications.dispatch_queued_push_logs()
+		client = APIClient()
+
+		client.force_authenticate(user=self.user)
+		self.assertEqual(client.get(reverse("admin-push-metrics")).status_code, 403)
+
+		admin = User.objects.create_superuser(username="push_metrics_admin", password="Pass12345", email="pm@example.com")
+		client.force_authenticate(user=admin)
+		response = client.get(reverse("admin-push-metrics"))
+
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.json()["pipeline"]["messages_sent"], 2)
+		self.assertEqual(response.json()["queue"]["pending_receipts"], 2)
+
+
+class PushFanOutTests(TestCase):
+	def _users_with_tokens(self, prefix, count):
+		users = User.objects.bulk_create([User(username=f"{prefix}_{index}") for index in range(count)])
+		PushDeviceToken.objects.bulk_create([
+			PushDeviceToken(user=user, expo_push_token=f"ExponentPushToken[{prefix}-{user.id}]")
+			for user in users
+		])
+		return users
+
+	def _broadcast_queries(self, users, event_key):
+		with CaptureQueriesContext(connection) as captured:
+			queued = push_notifications.send_push_to_users(users, "Promo", "New tours", event_key=event_key)
+		return queued, len(captured.captured_queries)
+
+	def test_fan_out_query_count_does_not_grow_with_recipients(self):
+		small = self._users_with_tokens("fanout_small", 3)
+		large = self._users_with_tokens("fanout_large", 40)
+		# Both broadcasts then reuse the same pending dispatch job.
+		outbox.enqueue_job(outbox.PUSH_DISPATCH_JOB, dedupe_key=outbox.PUSH_DISPATCH_JOB)
+
+		small_queued, small_queries = self._broadcast_queries(small, "promo:small")
+		large_queued, large_queries = self._broadcast_queries(User.objects.filter(id__in=[u.id for u in large]), "promo:large")
+
+		self.assertEqual((small_queued, large_queued), (3, 40))
+		self.assertEqual(small_queries, large_queries)
+		self.assertEqual(PushNotificationDeliveryLog.objects.filter(event_key__startswith="promo:large:").count(), 40)
+		self.assertEqual(OutboxJob.objects.filter(kind=outbox.PUSH_DISPATCH_JOB, status="pending").count(), 1)
+
+	def test_fan_out_skips_already_logged_and_push_disabled_users(self):
+		users = self._users_with_tokens("fanout_dedup", 4)
+		User.objects.filter(id=users[0].id).update(push_enabled=False)
+
+		self.assertEqual(push_notifications.send_push_to_users(users, "Hi", "First", event_key="promo:1"), 3)
+		self.assertEqual(push_notifications.send_push_to_users(users, "Hi", "Again", event_key="promo:1"), 0)
+
+		PushNotificationDeliveryLog.objects.filter(user=users[1]).update(status="failed")
+		self.assertEqual(push_notifications.send_push_to_users(users, "Hi", "Retry", event_key="promo:1"), 1)
+		self.assertEqual(PushNotificationDeliveryLog.objects.filter(user=users[1]).count(), 2)
+
+	def test_duplicate_event_key_is_rejected_by_constraint(self):
+		(user,) = self._users_with_tokens("fanout_unique", 1)
+		push_notifications.send_push_to_user(user, "Hi", "Once", event_key="evt:unique")
+		log = PushNotificationDeliveryLog.objects.get()
+
+		with self.assertRaises(IntegrityError):
+			with transaction.atomic():
+				PushNotificationDeliveryLog.objects.create(
+					user=user,
+					device_token=log.device_token,
+					event_key="evt:unique",
+					title="Hi",
+					body="Twice",
+				)
+
+
+class OutboxJobTests(TestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(username="outbox_user", password="Pass12345", email="outbox@example.com")
+		self.calls = []
+
+		def flaky_handler(payload):
+			self.calls.append(payload)
+			raise RuntimeError("provider unavailable")
+
+		outbox.register_job_handler("test.flaky")(flaky_handler)
+
+	def tearDown(self):
+		outbox._JOB_HANDLERS.pop("test.flaky", None)
+
+	def test_email_is_queued_not_sent_inside_request(self):
+		with self.captureOnCommitCallbacks(execute=False) as callbacks:
+			sent = send_preference_aware_email(
+				subject="Hello",
+				message="Body",
+				from_email="noreply@example.com",
+				recipient_list=[self.user.email],
+			)
+
+		self.assertEqual(sent, 1)
+		self.assertEqual(mail.outbox, [])
+		self.assertIn(outbox.schedule_outbox_flush, callbacks)
+
+		self.assertEqual(outbox.process_outbox(), {"done": 1, "pending": 0, "dead": 0})
+		self.assertEqual(len(mail.outbox), 1)
+		self.assertEqual(mail.outbox[0].to, [self.user.email])
+		self.assertEqual(OutboxJob.objects.get().status, "done")
+
+	def test_job_is_discarded_with_rolled_back_transaction(self):
+		with self.assertRaises(RuntimeError):
+			with transaction.atomic():
+				outbox.enqueue_email(
+					subject="Never",
+					message="Rolled back",
+					from_email="noreply@example.com",
+					recipient_list=[self.user.email],
+				)
+				raise RuntimeError("business change failed")
+
+		self.assertFalse(OutboxJob.objects.exists())
+
+	def test_failing_job_backs_off_then_dead_letters(self):
+		job = outbox.enqueue_job("test.flaky", {"n": 1}, max_attempts=2)
+
+		self.assertEqual(outbox.process_outbox(), {"done": 0, "pending": 1, "dead": 0})
+		job.refresh_from_db()
+		self.assertEqual((job.status, job.attempts), ("pending", 1))
+		self.assertGreater(job.available_at, timezone.now())
+		self.assertIn("provider unavailable", job.last_error)
+		self.assertEqual(outbox.process_outbox(), {"done": 0, "pending": 0, "dead": 0})
+
+		OutboxJob.objects.filter(id=job.id).update(available_at=timezone.now())
+		self.assertEqual(outbox.process_outbox(), {"done": 0, "pending": 0, "dead": 1})
+		job.refresh_from_db()
+		self.assertEqual((job.status, job.attempts), ("dead", 2))
+		self.assertEqual(len(self.calls), 2)
+
+	def test_cron_endpoint_requires_secret(self):
+		outbox.enqueue_email(
+			subject="Cron",
+			message="Body",
+			from_email="noreply@example.com",
+			recipient_list=[self.user.email],
+		)
+		client = APIClient()
+
+		with override_settings(CRON_SECRET_KEY="outbox-secret", OUTBOX_CONCURRENCY=1):
+			self.assertEqual(client.post(reverse("cron-process-outbox"), {}).status_code, 403)
+			response = client.post(reverse("cron-process-outbox") + "?key=outbox-secret")
+
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.json()["done"], 1)
+		self.assertEqual(len(mail.outbox), 1)
+
+
+class CatalogCacheTests(TestCase):
+	def setUp(self):
+		caches["default"].clear()
+		catalog_cache.stats.reset()
+		self.client = APIClient()
+		self.destination = self._add_destination("Fort Pilar")
+
+	def _add_destination(self, name):
+		destination = Destination.objects.create(
+			name=name,
+			description="Landmark",
+			category="Historical",
+			location="Zamboanga City",
+			municipality="Zamboanga City",
+			latitude="6.900000",
+			longitude="122.080000",
+		)
+		DestinationImage.objects.create(destination=destination, image="destination_images/fort.jpg")
+		return destination
+
+	def _get(self, url, **headers):
+		with CaptureQueriesContext(connection) as queries:
+			response = self.client.get(url, **headers)
+		return response, len(queries)
+
+	def test_saves_and_deletes_bump_the_model_counter(self):
+		version = CatalogVersion.objects.get(name="destination").version
+		self.destination.name = "Fort Pilar Shrine"
+		self.destination.save()
+		self.destination.delete()
+
+		self.assertEqual(CatalogVersion.objects.get(name="destination").version, version + 2)
+
+	def test_repeat_request_is_served_from_the_cache(self):
+		url = reverse("destination-list")
+		first, first_queries = self._get(url)
+		second, second_queries = self._get(url)
+
+		self.assertEqual(first.status_code, 200)
+		self.assertEqual(second.content, first.content)
+		self.assertEqual(second["ETag"], first["ETag"])
+		self.assertIn("Last-Modified", second)
+		self.assertEqual(second_queries, 1)
+		self.assertGreater(first_queries, second_queries)
+
+	def test_matching_validators_get_not_modified(self):
+		url = reverse("destination-list")
+		first, _queries = self._get(url)
+
+		by_etag, _queries = self._get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+		by_date, _queries = self._get(url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+		stale, _queries = self._get(url, HTTP_IF_NONE_MATCH='"other"')
+
+		self.assertEqual(by_etag.status_code, 304)
+		self.assertEqual(by_etag.content, b"")
+		self.assertEqual(by_date.status_code, 304)
+		self.assertEqual(stale.status_code, 200)
+
+	def test_partially_covered_lists_are_validated_by_etag_only(self):
+		url = reverse("agency-list")
+		first, _queries = self._get(url)
+		tomorrow = http_date(time.time() + 24 * 60 * 60)
+
+		by_date, _queries = self._get(url, HTTP_IF_MODIFIED_SINCE=tomorrow)
+		by_etag, _queries = self._get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+
+		self.assertNotIn("Last-Modified", first)
+		self.assertEqual(by_date.status_code, 200)
+		self.assertEqual(by_etag.status_code, 304)
+
+	def test_catalog_changes_are_visible_on_the_next_request(self):
+		url = reverse("destination-list")
+		before, _queries = self._get(url)
+		self._add_destination("Pasonanca Park")
+		after, _queries = self._get(url)
+
+		self.assertEqual(len(before.json()), 1)
+		self.assertEqual(len(after.json()), 2)
+		self.assertNotEqual(after["ETag"], before["ETag"])
+
+	def test_writes_are_not_cached(self):
+		admin = User.objects.create_superuser(username="catalog_admin", password="Pass12345", email="catalog@example.com")
+		self.client.force_authenticate(user=admin)
+
+		response = self.client.post(reverse("category-choices"), {"name": "Food Trip"}, format="json")
+		listed = self.client.get(reverse("category-choices"))
+
+		self.assertEqual(response.status_code, 201)
+		self.assertIn("Food Trip", listed.json())
+		self.assertEqual(listed["Cache-Control"], "private, no-cache")
+
+	def test_stats_report_hit_rate_per_endpoint(self):
+		url = reverse("agency-list")
+		for _ in range(4):
+			self.client.get(url)
+		admin = User.objects.create_superuser(username="stats_admin", password="Pass12345", email="stats@example.com")
+		self.client.force_authenticate(user=admin)
+
+		report = self.client.get(reverse("admin-catalog-cache-stats")).json()
+
+		self.assertEqual(report["AgencyListView"]["misses"], 1)
+		self.assertEqual(report["AgencyListView"]["hits"], 3)
+		self.assertEqual(report["AgencyListView"]["hit_rate"], 0.75)
+
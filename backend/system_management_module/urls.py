@@ -13,6 +13,9 @@ from .views import (
     AdminPartnerRankingsView,
     PushTokenRegisterView,
     PushTokenUnregisterView,
+    AdminPushMetricsView,
+    AdminCatalogCacheStatsView,
+    ProcessOutboxCronView,
 )
 
 urlpatterns = [
@@ -30,6 +33,9 @@ urlpatterns = [
     path('alerts/unread-count/', UnreadAlertCountView.as_view(), name='unread-alert-count'),
     path('push-tokens/register/', PushTokenRegisterView.as_view(), name='push-token-register'),
     path('push-tokens/unregister/', PushTokenUnregisterView.as_view(), name='push-token-unregister'),
+    path('admin/push-metrics/', AdminPushMetricsView.as_view(), name='admin-push-metrics'),
+    path('admin/catalog-cache-stats/', AdminCatalogCacheStatsView.as_view(), name='admin-catalog-cache-stats'),
+    path('cron/process-outbox/', ProcessOutboxCronView.as_view(), name='cron-process-outbox'),
     
     path('dashboard-summary/', AdminDashboardSummaryView.as_view(), name='dashboard-summary'),
     path('admin/partner-rankings/', AdminPartnerRankingsView.as_view(), name='admin-partner-rankings'),
@@ -10,9 +10,13 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from rest_framework.exceptions import ValidationError #type: ignore
 from .services.email_preferences import send_preference_aware_email
+from .services.alert_events import publish_alert_unread_count
+from .services.push_notifications import get_push_metrics
+from .services.outbox import process_outbox
+from .services.catalog_cache import get_catalog_cache_stats
 
 from .models import GuideReviewRequest, SystemAlert
-from .models import PushDeviceToken
+from .models import PushDeviceToken, PushNotificationDeliveryLog
 from user_authentication.models import GuideApplication
 from agency_management_module.models import Agency
 from accommodation_booking.models import Booking
@@ -207,6 +211,8 @@ class UserAlertMarkAllReadView(APIView):
             recipient=request.user,
             is_read=False,
         ).update(is_read=True)
+        if updated:
+            publish_alert_unread_count(request.user.id)
         return Response({'detail': 'All notifications marked as read.', 'updated': updated}, status=status.HTTP_200_OK)
 
 
@@ -301,6 +307,60 @@ class PushTokenUnregisterView(APIView):
 
         return Response({'detail': 'Push token deactivated.'}, status=status.HTTP_200_OK)
 
+
+class AdminCatalogCacheStatsView(APIView):
+    """Hit rate and render time saved per cached catalog endpoint, for this process."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(get_catalog_cache_stats())
+
+
+class AdminPushMetricsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        status_counts = {
+            row['status']: row['total']
+            for row in PushNotificationDeliveryLog.objects.values('status').annotate(total=Count('id'))
+        }
+        pending_receipts = PushNotificationDeliveryLog.objects.filter(receipt_status='pending').count()
+
+        return Response({
+            'pipeline': get_push_metrics(),
+            'queue': {
+                'queued': status_counts.get('queued', 0),
+                'sending': status_counts.get('sending', 0),
+                'retrying': status_counts.get('retrying', 0),
+                'sent': status_counts.get('sent', 0),
+                'failed': status_counts.get('failed', 0),
+                'dropped': status_counts.get('dropped', 0),
+                'pending_receipts': pending_receipts,
+            },
+        })
+
+class ProcessOutboxCronView(APIView):
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request):
+        provided_key = request.GET.get('key') or request.headers.get('Authorization')
+        expected_key = getattr(settings, 'CRON_SECRET_KEY', None)
+        if not expected_key or provided_key != expected_key:
+            return Response({"detail": "Unauthorized. Invalid cron key."}, status=status.HTTP_403_FORBIDDEN)
+
+        totals = {'done': 0, 'pending': 0, 'dead': 0}
+        for _ in range(20):
+            outcomes = process_outbox(limit=50, concurrency=getattr(settings, 'OUTBOX_CONCURRENCY', 4))
+            for key, value in outcomes.items():
+                totals[key] += value
+            if not any(outcomes.values()):
+                break
+
+        return Response(totals, status=status.HTTP_200_OK)
+
+    get = post
+
+
 class AdminDashboardSummaryView(APIView):
     # permission_classes = [permissions.IsAdminUser] 
 
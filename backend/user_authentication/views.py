@@ -4,7 +4,6 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import default_token_generator
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode #type: ignore
 from django.utils.encoding import force_bytes, force_str #type: ignore
-from django.core.mail import send_mail #type: ignore
 from django.conf import settings
 from django.http import HttpResponse, HttpResponseRedirect #type: ignore
 from django.utils import timezone #type: ignore
@@ -18,6 +17,7 @@ from rest_framework_simplejwt.views import TokenObtainPairView
 from system_management_module.models import SystemAlert, PushDeviceToken
 from system_management_module.services.push_notifications import send_push_to_user, build_alert_push_data
 from system_management_module.services.email_preferences import send_preference_aware_email
+from system_management_module.services.outbox import enqueue_email
 
 from .serializers import (
     UserSerializer, 
@@ -84,12 +84,11 @@ class CreateUserView(generics.CreateAPIView):
         </html>
         """
 
-        send_mail(
+        enqueue_email(
             subject="Verify your LocaLynk account",
             message=plain_message,
             from_email=settings.DEFAULT_FROM_EMAIL,
             recipient_list=[user.email],
-            fail_silently=False,
             html_message=html_message
         )
 
@@ -251,12 +250,11 @@ class ResendVerificationEmailView(APIView):
         </html>
         """
 
-        send_mail(
+        enqueue_email(
             subject="Verify your LocaLynk account",
             message=plain_message,
             from_email=settings.DEFAULT_FROM_EMAIL,
             recipient_list=[user.email],
-            fail_silently=False,
             html_message=html_message
         )
         return Response({"detail": "Verification email resent successfully. Please check your inbox."}, status=status.HTTP_200_OK)
@@ -511,12 +509,11 @@ class PasswordResetRequestView(generics.GenericAPIView):
             </html>
             """
 
-        send_mail(
+        enqueue_email(
             subject="Reset Your Password - LocaLynk",
             message=plain_message,
             from_email=settings.DEFAULT_FROM_EMAIL,
             recipient_list=[user.email],
-            fail_silently=False,
             html_message=html_message 
         )
         return Response({"detail": f"Password reset email sent to {email}."})